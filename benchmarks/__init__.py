@@ -0,0 +1 @@
+"""Benchmark suite for the engine hot paths (see ``trd_cea.core.benchmarking``)."""
@@ -0,0 +1,46 @@
+"""Markov cohort simulation and DSA grids."""
+from trd_cea.models.cea_engine import simulate_arm_grid
+from trd_cea.models.dsa_batch import CohortDSAModel, evaluate_design, grid_design
+
+from .common import COHORT_ARMS, COHORT_INPUTS, COHORT_SETTINGS, SIZES, synthetic_clinical_draws
+
+
+class CohortSimulation:
+    """Every arm simulated over ``n_draws`` clinical parameter vectors."""
+
+    params = SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.parameters = synthetic_clinical_draws(n_draws)
+
+    def _run(self):
+        for arm in COHORT_ARMS:
+            simulate_arm_grid(arm, ["AU"], ["health_system"], COHORT_SETTINGS, COHORT_INPUTS,
+                              parameters=self.parameters)
+
+    def time_simulate_arms(self, n_draws):
+        self._run()
+
+    def peakmem_simulate_arms(self, n_draws):
+        self._run()
+
+
+class DSAGrid:
+    """Three-way DSA grid through the cohort model (``levels``^3 points)."""
+
+    params = [5, 10, 20]
+    param_names = ["levels"]
+
+    def setup(self, levels):
+        import numpy as np
+
+        self.model = CohortDSAModel(COHORT_SETTINGS, COHORT_INPUTS, "IV_ketamine", "ECT_std")
+        self.design = grid_design(self.model.base_parameters(), {
+            "remission_rates.IV_ketamine": np.linspace(0.2, 0.5, levels),
+            "relapse_rates.IV_ketamine": np.linspace(0.01, 0.04, levels),
+            "remission_rates.ECT_std": np.linspace(0.3, 0.5, levels),
+        })
+
+    def time_three_way_grid(self, levels):
+        evaluate_design(self.design, self.model)
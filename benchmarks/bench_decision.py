@@ -0,0 +1,77 @@
+"""Decision summaries of a PSA: CEAC/CEAF, value of information and value-based pricing."""
+import numpy as np
+
+from trd_cea.models.evsi_engine import calculate_evsi_gaussian_process
+from trd_cea.models.psa_streaming import StreamingCEAC, StreamingPSA
+from trd_cea.models.vbp_engine import calculate_vbp_curves
+from trd_cea.models.voi_engine import calculate_evpi, calculate_evppi
+
+from .common import LAMBDA_GRID, SIZES, STRATEGIES, WTP, psa, wide
+
+
+class Acceptability:
+    """CEAC, CEAF and the full streaming PSA summary over the WTP grid."""
+
+    params = SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.cost, self.effect = wide(n_draws)
+
+    def time_ceac(self, n_draws):
+        counts = StreamingCEAC(STRATEGIES, LAMBDA_GRID)
+        counts.update(self.cost, self.effect)
+        counts.ceac()
+
+    def time_ceaf(self, n_draws):
+        # Frontier: strategy with the highest expected NMB at each threshold
+        nmb = LAMBDA_GRID[:, None] * self.effect.mean(axis=0) - self.cost.mean(axis=0)
+        np.asarray(STRATEGIES)[nmb.argmax(axis=1)]
+
+    def time_streaming_psa(self, n_draws):
+        summary = StreamingPSA(STRATEGIES, LAMBDA_GRID, decision_lambda=WTP)
+        summary.update(self.cost, self.effect)
+        summary.result()
+
+    def peakmem_streaming_psa(self, n_draws):
+        summary = StreamingPSA(STRATEGIES, LAMBDA_GRID, decision_lambda=WTP)
+        summary.update(self.cost, self.effect)
+        summary.result()
+
+
+class ValueOfInformation:
+    """EVPI and EVPPI over the WTP grid; EVSI at a few trial sizes."""
+
+    params = SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.psa = psa(n_draws)
+
+    def time_evpi(self, n_draws):
+        calculate_evpi(self.psa, LAMBDA_GRID, population_size=10_000)
+
+    def time_evppi(self, n_draws):
+        calculate_evppi(self.psa, ["cost_iv_ketamine", "effect_iv_ketamine"], LAMBDA_GRID[::10])
+
+    def time_evsi(self, n_draws):
+        if n_draws > SIZES[0]:
+            # Nested simulation per trial size; the smallest PSA tracks its cost
+            raise NotImplementedError
+        calculate_evsi_gaussian_process(self.psa, [50, 200], n_simulations=10, willingness_to_pay=WTP)
+
+    def peakmem_evpi(self, n_draws):
+        calculate_evpi(self.psa, LAMBDA_GRID, population_size=10_000)
+
+
+class ValueBasedPricing:
+    """Threshold-price curves for every strategy against the base strategy."""
+
+    params = SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.psa = psa(n_draws)
+
+    def time_vbp_curves(self, n_draws):
+        calculate_vbp_curves(self.psa, LAMBDA_GRID[::10])
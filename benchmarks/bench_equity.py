@@ -0,0 +1,35 @@
+"""Distributional CEA and MCDA bootstrap."""
+from trd_cea.models.dcea_engine import run_dcea
+from trd_cea.models.mcda_engine import calculate_mcda_scores, create_default_criteria
+
+from .common import SIZES, psa
+
+
+class Distributional:
+    """Equity-weighted net health benefit by subgroup."""
+
+    params = SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.psa = psa(n_draws)
+
+    def time_dcea(self, n_draws):
+        run_dcea(self.psa, epsilon=1.5)
+
+    def peakmem_dcea(self, n_draws):
+        run_dcea(self.psa, epsilon=1.5)
+
+
+class MCDABootstrap:
+    """Weighted criteria scores with bootstrap rank uncertainty."""
+
+    params = SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.psa = psa(n_draws)
+        self.criteria = create_default_criteria("health_system")
+
+    def time_mcda_bootstrap(self, n_draws):
+        calculate_mcda_scores(self.psa, self.criteria, n_boot=50)
@@ -0,0 +1,38 @@
+"""Figure rendering at PSA scale."""
+import io
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+from trd_cea.plotting.dense_scatter import plot_ce_plane_draws  # noqa: E402
+
+from .common import SIZES, STRATEGIES, wide  # noqa: E402
+
+
+class CEPlaneRendering:
+    """Incremental CE plane of every strategy against the first, saved as PNG and PDF."""
+
+    params = SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        cost, effect = wide(n_draws)
+        self.d_cost = (cost[:, 1:] - cost[:, :1]).ravel()
+        self.d_effect = (effect[:, 1:] - effect[:, :1]).ravel()
+        self.labels = STRATEGIES[1:] * n_draws
+
+    def _render(self, fmt):
+        fig = plot_ce_plane_draws(self.d_effect, self.d_cost, self.labels)
+        fig.savefig(io.BytesIO(), format=fmt, dpi=150)
+        plt.close(fig)
+
+    def time_ce_plane_png(self, n_draws):
+        self._render("png")
+
+    def time_ce_plane_pdf(self, n_draws):
+        self._render("pdf")
+
+    def peakmem_ce_plane_png(self, n_draws):
+        self._render("png")
@@ -0,0 +1,76 @@
+"""PSA sampling and PSA data loading."""
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from trd_cea.models.io import load_psa
+from trd_cea.models.psa import cohort_sampler, sample_parameters
+from trd_cea.models.psa_schema import compact_psa_table
+from trd_cea.models.psa_streaming import iter_sampler_chunks
+
+from .common import COHORT_INPUTS, COHORT_SETTINGS, SIZES, psa
+
+# Power-of-two draw counts, split into power-of-two chunks
+SAMPLER_SIZES = [2**10, 2**13, 2**16]
+CHUNK_SIZE = 2**12
+
+
+class PSASampling:
+    """Parameter sampling and the chunked cohort sampler behind ``run_psa``."""
+
+    params = SAMPLER_SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.distributions = pd.DataFrame({
+            "parameter": ["remission_rates.ECT_std", "remission_rates.IV_ketamine",
+                          "relapse_rates.IV_ketamine", "death_rates.baseline"],
+            "distribution": ["Beta"] * 4,
+            "mean": [0.4, 0.35, 0.02, 0.001],
+            "std": [0.05, 0.05, 0.005, 0.0002],
+        })
+        settings = {**COHORT_SETTINGS, "arms": ["ECT_std", "IV_ketamine"],
+                    "jurisdictions": ["AU"], "perspectives": ["health_system"]}
+        self.sampler = cohort_sampler(settings, COHORT_INPUTS, self.distributions)
+
+    def time_sample_parameters(self, n_draws):
+        sample_parameters(self.distributions, n_draws, random_state=np.random.default_rng(1))
+
+    def time_sampler_chunks(self, n_draws):
+        for _ in iter_sampler_chunks(self.sampler, chunk_size=CHUNK_SIZE, max_draws=n_draws, seed=1):
+            pass
+
+    def peakmem_sampler_chunks(self, n_draws):
+        for _ in iter_sampler_chunks(self.sampler, chunk_size=CHUNK_SIZE, max_draws=n_draws, seed=1):
+            pass
+
+
+class DataLoading:
+    """Reading a long PSA table from CSV (strategy normalisation) and compact Parquet."""
+
+    params = SIZES
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.root = Path(tempfile.mkdtemp())
+        table = psa(n_draws).table
+        self.csv = self.root / "psa.csv"
+        self.parquet = self.root / "psa.parquet"
+        table.to_csv(self.csv, index=False)
+        compact_psa_table(table).to_parquet(self.parquet)
+
+    def teardown(self, n_draws):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def time_load_csv(self, n_draws):
+        load_psa(self.csv, compact=True)
+
+    def time_load_parquet(self, n_draws):
+        pd.read_parquet(self.parquet)
+
+    def peakmem_load_csv(self, n_draws):
+        load_psa(self.csv, compact=True)
+
@@ -0,0 +1,36 @@
+"""Shared fixtures for the benchmark suite: fixed synthetic PSA tables and cohort settings."""
+from functools import lru_cache
+
+import numpy as np
+
+from trd_cea.core.benchmarking import (  # noqa: F401  (re-exported to the bench modules)
+    COHORT_INPUTS,
+    COHORT_SETTINGS,
+    PSA_SIZES,
+    SYNTHETIC_STRATEGIES,
+    synthetic_clinical_draws,
+    synthetic_psa,
+)
+
+SIZES = list(PSA_SIZES)
+STRATEGIES = list(SYNTHETIC_STRATEGIES)
+LAMBDA_GRID = np.linspace(0, 100_000, 101)
+WTP = 50_000.0
+
+COHORT_ARMS = ["ECT", "ECT_std", "IV_Ketamine", "IV_ketamine", "Esketamine", "Oral_Ketamine", "rTMS", "Control"]
+
+
+@lru_cache(maxsize=None)
+def psa(n_draws: int):
+    """Synthetic 8-strategy PSA (built once per size and shared across benchmarks)."""
+    return synthetic_psa(n_draws)
+
+
+@lru_cache(maxsize=None)
+def wide(n_draws: int):
+    """(n_draws, 8) cost and effect matrices of ``psa(n_draws)``."""
+    table = psa(n_draws).table
+    cost = table["cost"].to_numpy().reshape(n_draws, len(STRATEGIES))
+    effect = table["effect"].to_numpy().reshape(n_draws, len(STRATEGIES))
+    return cost, effect
+
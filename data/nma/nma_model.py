@@ -106,33 +106,36 @@ def generate_posterior_draws(trace, n_draws=1000):
     """
     Generate posterior draws for use in PSA.
 
-    Returns DataFrame with treatment effects and correlations.
+    Returns DataFrame with treatment effects and correlations. Draws are
+    thinned evenly within each chain (not resampled) and keep their
+    ``chain``/``draw`` indices and ``tau``, so convergence diagnostics and
+    heterogeneity can be computed from the stored file.
     """
-    # Extract posterior samples
-    posterior = az.extract(trace, num_samples=n_draws)
+    posterior = trace.posterior
+    n_chains, n_total = posterior.sizes['chain'], posterior.sizes['draw']
+    per_chain = max(1, min(n_total, n_draws // n_chains))
+    keep = np.linspace(0, n_total - 1, per_chain).round().astype(int)
+    posterior = posterior.isel(draw=keep)
 
-    # Treatment effects (log odds ratios relative to ECT)
-    treatment_effects = {}
-    for treatment, idx in TREATMENTS.items():
-        if treatment == 'ECT':
-            treatment_effects[treatment] = np.zeros(n_draws)  # Reference
-        else:
-            treatment_effects[treatment] = posterior['d_fixed'].sel(d_fixed_dim_0=idx).values
-
-    # Absolute probabilities
-    abs_probs = {}
-    for treatment, idx in TREATMENTS.items():
-        abs_probs[treatment] = posterior['abs_effects'].sel(abs_effects_dim_0=idx).values
+    d_fixed = posterior['d_fixed'].values.reshape(-1, len(TREATMENTS))
+    abs_effects = posterior['abs_effects'].values.reshape(-1, len(TREATMENTS))
 
     # Create DataFrame
     draws_df = pd.DataFrame({
-        f'{treatment}_logOR': effects
-        for treatment, effects in treatment_effects.items()
+        'chain': np.repeat(np.arange(n_chains), per_chain),
+        'draw': np.tile(keep, n_chains),
     })
 
+    # Treatment effects (log odds ratios relative to ECT)
+    for treatment, idx in TREATMENTS.items():
+        draws_df[f'{treatment}_logOR'] = np.zeros(len(draws_df)) if treatment == 'ECT' else d_fixed[:, idx]
+
     # Add absolute probabilities
-    for treatment, probs in abs_probs.items():
-        draws_df[f'{treatment}_prob'] = probs
+    for treatment, idx in TREATMENTS.items():
+        draws_df[f'{treatment}_prob'] = abs_effects[:, idx]
+
+    # Between-study heterogeneity
+    draws_df['tau'] = posterior['tau'].values.ravel()
 
     return draws_df
 
@@ -232,6 +235,8 @@ def main():
     with open(output_dir / 'nma_trace.pkl', 'wb') as f:
         pickle.dump(trace, f)
     print(f"Saved trace to {output_dir / 'nma_trace.pkl'}")
+    trace.to_netcdf(output_dir / 'nma_trace.nc')
+    print(f"Saved ArviZ trace to {output_dir / 'nma_trace.nc'}")
 
     # Create diagnostic plots
     print("Creating diagnostic plots...")
@@ -4,11 +4,17 @@ Run Bayesian Network Meta-Analysis for TRD Treatments
 
 This script executes the complete NMA pipeline:
 1. Load data and configuration
-2. Fit Bayesian model
+2. Fit Bayesian model (reusing a cached fit when data and spec are unchanged)
 3. Generate diagnostics
 4. Export posterior draws for PSA
+
+Usage:
+    python run_nma.py             # NUTS
+    python run_nma.py --fast      # ADVI, for exploratory runs
+    python run_nma.py --validate  # compare ADVI against NUTS
 """
 
+import argparse
 import sys
 import yaml
 from pathlib import Path
@@ -16,9 +22,13 @@ import numpy as np
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / 'src'))
 
-from data.nma.nma_model import create_nma_model, fit_nma_model, generate_posterior_draws, plot_nma_results
+from data.nma.nma_model import plot_nma_results
 from data.nma.nma_data import NMA_DATA
+from trd_cea.models.nma_fitting import NMAFittingService, NMASpec
+
+CACHE_DIR = Path(__file__).parent / 'cache'
 
 def load_config():
     """Load NMA configuration."""
@@ -28,6 +38,12 @@ def load_config():
 
 def main():
     """Run the complete NMA analysis."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--fast', action='store_true', help='Fit with ADVI instead of NUTS')
+    parser.add_argument('--validate', action='store_true', help='Compare the ADVI fit against NUTS')
+    parser.add_argument('--refit', action='store_true', help='Ignore cached fits')
+    args = parser.parse_args()
+
     print("TRD Bayesian Network Meta-Analysis")
     print("=" * 40)
 
@@ -47,22 +63,23 @@ def main():
     response_data = NMA_DATA[NMA_DATA['outcome'] == 'response'].copy()
     print(f"Response data: {len(response_data)} study arms")
 
-    # Create and fit model
-    print("\nFitting Bayesian NMA model...")
-    model = create_nma_model(response_data)
+    # Fit model, or load the cached fit for unchanged data and spec
+    service = NMAFittingService(CACHE_DIR)
+    spec = NMASpec.from_config(config, method='advi' if args.fast else 'nuts')
+    print(f"\nFitting Bayesian NMA model ({spec.method})...")
+    fit = service.fit(response_data, spec, refit=args.refit)
+    status = "loaded from cache" if fit.cached else f"fitted in {fit.fit_seconds:.1f}s"
+    print(f"Model fitting complete ({status}, key {fit.key})")
 
-    trace = fit_nma_model(
-        model,
-        draws=config['n_draws'],
-        tune=config['n_tune'],
-        chains=config['n_chains']
-    )
+    if args.validate:
+        comparison = service.validate_fast_fit(response_data, spec)
+        print("\nADVI vs NUTS:")
+        print(comparison.to_string(index=False))
 
-    print("Model fitting complete!")
+    trace = fit.inference_data()
 
-    # Generate posterior draws for PSA
-    print("\nGenerating posterior draws for PSA...")
-    posterior_draws = generate_posterior_draws(trace, n_draws=1000)
+    # Posterior draws for PSA
+    posterior_draws = fit.draws
 
     # Save results
     output_dir = Path(__file__).parent
@@ -70,6 +87,7 @@ def main():
     posterior_draws.to_parquet(output_file)
     print(f"Posterior draws saved to: {output_file}")
     print(f"Shape: {posterior_draws.shape}")
+    trace.to_netcdf(output_dir / 'nma_trace.nc')
 
     # Create diagnostics
     print("\nCreating diagnostic plots...")
@@ -5,9 +5,10 @@ This module provides a command-line interface for running health economic evalua
 """
 
 import argparse
+import functools
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
 
 def main(args: Optional[list] = None) -> int:
@@ -38,6 +39,99 @@ def main(args: Optional[list] = None) -> int:
         help="Available commands for health economic evaluation"
     )
     
+    # Batch command
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Run an analysis manifest (inputs x jurisdictions x perspectives x analyses)"
+    )
+    batch_parser.add_argument(
+        "manifest",
+        type=str,
+        help="YAML analysis manifest"
+    )
+    batch_parser.add_argument(
+        "--output",
+        type=str,
+        help="Consolidated results file (.parquet or .csv); overrides the manifest"
+    )
+    batch_parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of parallel jobs; overrides the manifest"
+    )
+    batch_parser.add_argument(
+        "--ledger",
+        type=str,
+        help="Run ledger (SQLite) to append every job to; overrides the manifest"
+    )
+    batch_parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write a Chrome/Perfetto trace of the run phases (JSON) and folded flame-graph stacks"
+    )
+    
+    # Complete analysis command
+    complete_parser = subparsers.add_parser(
+        "complete",
+        help="Run every V4 analysis on a strategy subset from one shared PSA load"
+    )
+    complete_parser.add_argument(
+        "config",
+        type=str,
+        nargs="?",
+        default="config/complete_analysis.yml",
+        help="YAML complete-analysis config"
+    )
+    complete_parser.add_argument(
+        "--subset",
+        type=str,
+        help="Strategy subset profile (all, no_uc, ect_focused); overrides the config"
+    )
+    complete_parser.add_argument(
+        "--analyses",
+        type=str,
+        nargs="+",
+        help="Analyses to run (default: the config's, or all)"
+    )
+    complete_parser.add_argument(
+        "--input",
+        type=str,
+        nargs="+",
+        help="PSA input files; override the config"
+    )
+    complete_parser.add_argument(
+        "--strategies-yaml",
+        type=str,
+        help="Strategy config YAML; overrides the config"
+    )
+    complete_parser.add_argument(
+        "--jurisdictions",
+        type=str,
+        nargs="+",
+        help="Jurisdictions to run, e.g. AU NZ"
+    )
+    complete_parser.add_argument(
+        "--perspectives",
+        type=str,
+        nargs="+",
+        help="Perspectives to run, e.g. healthcare societal"
+    )
+    complete_parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Directory for the per-analysis CSVs; overrides the config"
+    )
+    complete_parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of parallel analyses; overrides the config"
+    )
+    complete_parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write a Chrome/Perfetto trace of the run phases (JSON) and folded flame-graph stacks"
+    )
+
     # CEA Analysis command
     cea_parser = subparsers.add_parser(
         "cea",
@@ -47,7 +141,7 @@ def main(args: Optional[list] = None) -> int:
         "--config",
         type=str,
         required=True,
-        help="Configuration file for CEA analysis"
+        help="Analysis manifest (YAML)"
     )
     cea_parser.add_argument(
         "--output",
@@ -64,7 +158,7 @@ def main(args: Optional[list] = None) -> int:
         "--config",
         type=str,
         required=True,
-        help="Configuration file for DCEA analysis"
+        help="Analysis manifest (YAML)"
     )
     dcea_parser.add_argument(
         "--include-equity",
@@ -81,13 +175,13 @@ def main(args: Optional[list] = None) -> int:
         "--config",
         type=str,
         required=True,
-        help="Configuration file for VOI analysis"
+        help="Analysis manifest (YAML)"
     )
     voi_parser.add_argument(
         "--type",
         choices=["evpi", "evppi", "evsi"],
         default="evpi",
-        help="Type of value of information to calculate"
+        help="Type of value of information to calculate (EVSI is engine-API only)"
     )
     
     # BIA Analysis command
@@ -99,7 +193,7 @@ def main(args: Optional[list] = None) -> int:
         "--config",
         type=str,
         required=True,
-        help="Configuration file for BIA analysis"
+        help="Analysis manifest (YAML)"
     )
     bia_parser.add_argument(
         "--horizon",
@@ -108,6 +202,89 @@ def main(args: Optional[list] = None) -> int:
         help="Time horizon for budget impact projection"
     )
     
+    # Run ledger command
+    ledger_parser = subparsers.add_parser(
+        "ledger",
+        help="Query a run ledger: performance, comparisons and non-reproducible outputs"
+    )
+    ledger_parser.add_argument(
+        "path",
+        type=str,
+        help="Run ledger (SQLite)"
+    )
+    ledger_parser.add_argument(
+        "--engine",
+        type=str,
+        help="Only runs of this engine"
+    )
+    ledger_parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        help="Compare timings and outputs between two commits"
+    )
+    ledger_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit non-zero if identical inputs produced different outputs"
+    )
+    ledger_parser.add_argument(
+        "--export",
+        type=str,
+        help="Write the ledger to Parquet (or CSV by suffix)"
+    )
+
+    # Benchmark command
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Run the benchmark suite and report regressions against a baseline"
+    )
+    bench_parser.add_argument(
+        "--benchmarks",
+        type=str,
+        default="benchmarks",
+        help="Directory of bench_*.py modules"
+    )
+    bench_parser.add_argument(
+        "--filter",
+        type=str,
+        help="Regular expression selecting benchmarks by name"
+    )
+    bench_parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        help="PSA sizes (draws) to run, e.g. --sizes 1000 10000"
+    )
+    bench_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Timing samples per benchmark"
+    )
+    bench_parser.add_argument(
+        "--results-dir",
+        type=str,
+        default=".benchmarks",
+        help="Directory for per-commit results"
+    )
+    bench_parser.add_argument(
+        "--baseline",
+        type=str,
+        help="Baseline results file (default: <results-dir>/<machine>/baseline.json)"
+    )
+    bench_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store this run as the new baseline"
+    )
+    bench_parser.add_argument(
+        "--factor",
+        type=float,
+        default=1.25,
+        help="Slowdown ratio reported as a regression"
+    )
+
     # Parse arguments
     parsed_args = parser.parse_args(args)
     
@@ -117,7 +294,11 @@ def main(args: Optional[list] = None) -> int:
     
     # Execute the command
     try:
-        if parsed_args.command == "cea":
+        if parsed_args.command == "batch":
+            return run_batch_analysis(parsed_args)
+        elif parsed_args.command == "complete":
+            return run_complete(parsed_args)
+        elif parsed_args.command == "cea":
             return run_cea_analysis(parsed_args)
         elif parsed_args.command == "dcea":
             return run_dcea_analysis(parsed_args)
@@ -125,6 +306,10 @@ def main(args: Optional[list] = None) -> int:
             return run_voi_analysis(parsed_args)
         elif parsed_args.command == "bia":
             return run_bia_analysis(parsed_args)
+        elif parsed_args.command == "ledger":
+            return run_ledger_query(parsed_args)
+        elif parsed_args.command == "bench":
+            return run_benchmarks(parsed_args)
         else:
             parser.print_help()
             return 1
@@ -136,69 +321,181 @@ def main(args: Optional[list] = None) -> int:
         return 1
 
 
+def _run_and_report(run: Callable[[], Any], label: str, output_attr: str, trace: Optional[str],
+                    span: str, **attributes) -> int:
+    """
+    Call ``run`` (traced to ``trace`` when given) and report its job index.
+
+    Prints the status counts, where ``getattr(result, output_attr)`` was
+    written and every failed task; returns 1 if any task failed.
+    """
+    from .core.tracing import Tracer
+
+    if trace:
+        tracer = Tracer()
+        with tracer.activate(), tracer.span(span, **attributes):
+            result = run()
+        trace_path = tracer.write_chrome_trace(Path(trace))
+        tracer.write_folded(trace_path.with_suffix(".folded"))
+        print(f"Trace written to {trace_path}; slowest phase: {tracer.dominant()}")
+    else:
+        result = run()
+    counts = result.index["status"].value_counts().to_dict()
+    print(f"Ran {len(result.index)} {label}: " + ", ".join(f"{v} {k}" for k, v in sorted(counts.items())))
+    print(f"Results written to {getattr(result, output_attr)}")
+    failed = result.index[result.index["status"] == "failed"]
+    for _, row in failed.iterrows():
+        print(f"  failed {row['input']}/{row['jurisdiction']}/{row['perspective']}/{row['analysis']}: "
+              f"{row['error']}", file=sys.stderr)
+    return 1 if len(failed) else 0
+
+
+def _run_manifest(manifest_path: str, analyses: Optional[list] = None,
+                  output: Optional[str] = None, jobs: Optional[int] = None,
+                  options: Optional[dict] = None, trace: Optional[str] = None,
+                  ledger: Optional[str] = None) -> int:
+    """Run a manifest through the batch runner and report job outcomes."""
+    from .models.batch_runner import AnalysisManifest, run_batch
+
+    manifest = AnalysisManifest.from_yaml(Path(manifest_path))
+    if analyses is not None:
+        manifest.analyses = analyses
+    if output:
+        output_path = Path(output)
+        manifest.output = output_path if output_path.suffix else output_path / manifest.output.name
+    if jobs:
+        manifest.n_jobs = jobs
+    if ledger:
+        manifest.ledger = Path(ledger)
+    for analysis, values in (options or {}).items():
+        manifest.options.setdefault(analysis, {}).update(values)
+
+    return _run_and_report(functools.partial(run_batch, manifest), "jobs", "output_path", trace,
+                           "batch", manifest=str(manifest_path))
+
+
+def run_batch_analysis(args) -> int:
+    """Run every analysis in a manifest."""
+    return _run_manifest(args.manifest, output=args.output, jobs=args.jobs, trace=args.trace,
+                         ledger=args.ledger)
+
+
+def run_complete(args) -> int:
+    """Run every V4 analysis on a strategy subset, loading each PSA input once."""
+    import yaml
+
+    from .models.complete_analysis import CompleteAnalysisConfig, run_complete_analysis
+
+    config_path = Path(args.config)
+    data = {}
+    if config_path.exists():
+        with config_path.open("r", encoding="utf-8") as handle:
+            data = yaml.safe_load(handle) or {}
+    elif not args.input:
+        raise FileNotFoundError(f"Complete analysis config missing at '{config_path}'")
+    overrides = {
+        "strategy_subset": args.subset,
+        "analyses": args.analyses,
+        "inputs": args.input,
+        "strategies_yaml": args.strategies_yaml,
+        "jurisdictions": args.jurisdictions,
+        "perspectives": args.perspectives,
+        "output_dir": args.output_dir,
+        "n_jobs": args.jobs,
+    }
+    data.update({key: value for key, value in overrides.items() if value is not None})
+    data.setdefault("jurisdictions", ["AU", "NZ"])
+    data.setdefault("perspectives", ["healthcare", "societal"])
+    config = CompleteAnalysisConfig.from_dict(data)
+
+    return _run_and_report(functools.partial(run_complete_analysis, config),
+                           f"analyses on strategy subset '{config.subset.name}'", "output_dir",
+                           args.trace, "complete", config=str(config_path))
+
+
 def run_cea_analysis(args) -> int:
     """Run cost-effectiveness analysis."""
-    from .analysis.cea import run_analysis
-    
-    try:
-        # This would call the actual CEA engine with parameters from args
-        print(f"Running CEA analysis with config: {args.config}")
-        if hasattr(args, 'output') and args.output:
-            print(f"Output directory: {args.output}")
-        # run_analysis(config_file=args.config, output_dir=args.output)
-        print("CEA analysis completed.")
-        return 0
-    except Exception as e:
-        print(f"Error in CEA analysis: {e}", file=sys.stderr)
-        return 1
+    return _run_manifest(args.config, analyses=["cea"], output=getattr(args, "output", None))
 
 
 def run_dcea_analysis(args) -> int:
     """Run distributional cost-effectiveness analysis."""
-    from .analysis.dcea import run_analysis
-    
-    try:
-        # This would call the actual DCEA engine with parameters from args
-        print(f"Running DCEA analysis with config: {args.config}")
-        if hasattr(args, 'include_equity') and args.include_equity:
-            print("Including equity analysis")
-        # run_analysis(config_file=args.config, include_equity=args.include_equity)
-        print("DCEA analysis completed.")
-        return 0
-    except Exception as e:
-        print(f"Error in DCEA analysis: {e}", file=sys.stderr)
-        return 1
+    options = {"dcea": {"include_equity": True}} if args.include_equity else None
+    return _run_manifest(args.config, analyses=["dcea"], options=options)
 
 
 def run_voi_analysis(args) -> int:
     """Run value of information analysis."""
-    from .analysis.voi import run_analysis
-    
-    try:
-        # This would call the actual VOI engine with parameters from args
-        print(f"Running {args.type.upper()} analysis with config: {args.config}")
-        # run_analysis(config_file=args.config, voi_type=args.type)
-        print(f"{args.type.upper()} analysis completed.")
-        return 0
-    except Exception as e:
-        print(f"Error in VOI analysis: {e}", file=sys.stderr)
+    if args.type == "evsi":
+        print("EVSI simulates a study per sample size and is too slow for batch runs; "
+              "use evsi_engine.calculate_evsi instead.", file=sys.stderr)
         return 1
+    return _run_manifest(args.config, analyses=["voi"], options={"voi": {"type": args.type}})
 
 
 def run_bia_analysis(args) -> int:
     """Run budget impact analysis."""
-    from .analysis.bia import run_analysis
-    
-    try:
-        # This would call the actual BIA engine with parameters from args
-        print(f"Running BIA analysis with config: {args.config}")
-        print(f"Time horizon: {args.horizon} years")
-        # run_analysis(config_file=args.config, horizon=args.horizon)
-        print("BIA analysis completed.")
-        return 0
-    except Exception as e:
-        print(f"Error in BIA analysis: {e}", file=sys.stderr)
+    return _run_manifest(args.config, analyses=["bia"], options={"bia": {"years": args.horizon}})
+
+
+def run_ledger_query(args) -> int:
+    """Summarise, compare, check or export a run ledger."""
+    import pandas as pd
+
+    from .core.run_ledger import RunLedger
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"No run ledger at {path}", file=sys.stderr)
         return 1
+    ledger = RunLedger(path)
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        if args.export:
+            print(f"Ledger exported to {ledger.export(Path(args.export))}")
+        if args.compare:
+            comparison = ledger.compare(*args.compare)
+            if args.engine:
+                comparison = comparison[comparison["engine"] == args.engine]
+            print(comparison.to_string(index=False))
+        else:
+            print(ledger.performance(engine=args.engine).to_string(index=False))
+        conflicts = ledger.nondeterministic()
+        if args.engine:
+            conflicts = conflicts[conflicts["engine"] == args.engine]
+        if not conflicts.empty:
+            print(f"{len(conflicts)} input(s) produced different outputs on repeated runs:")
+            print(conflicts.drop(columns="run_ids").to_string(index=False))
+    return 1 if args.check and not conflicts.empty else 0
+
+
+def run_benchmarks(args) -> int:
+    """Run the benchmark suite, store the result per commit and compare it with the baseline."""
+    from .core.benchmarking import (
+        BASELINE_NAME,
+        BenchmarkRun,
+        compare_runs,
+        format_report,
+        result_path,
+        run_suite,
+    )
+
+    run = run_suite(Path(args.benchmarks), pattern=args.filter, sizes=args.sizes, repeat=args.repeat)
+    path = result_path(run, Path(args.results_dir))
+    run.save(path)
+    print(f"Results written to {path}")
+
+    baseline_path = Path(args.baseline) if args.baseline else path.parent / BASELINE_NAME
+    if args.save_baseline:
+        run.save(baseline_path)
+        print(f"Baseline written to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(format_report(run))
+        print(f"No baseline at {baseline_path}; rerun with --save-baseline to create one")
+        return 0
+    comparison = compare_runs(run, BenchmarkRun.load(baseline_path), factor=args.factor)
+    print(format_report(run, comparison))
+    return 1 if comparison["regressed"].any() else 0
 
 
 if __name__ == "__main__":
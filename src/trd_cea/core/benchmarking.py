@@ -0,0 +1,398 @@
+"""
+V4 Benchmark Runner
+
+Runs the asv-style benchmark suite in ``benchmarks/`` offline and tracks
+results per commit.
+
+Responsibilities:
+- Discover benchmark classes (``setup``/``teardown``, ``params`` and
+  ``param_names``, ``time_*`` and ``peakmem_*`` methods) as asv does, so the
+  same suite also runs under ``asv run`` where asv is installed
+- Time each case with an adaptively chosen number of calls per sample and
+  record peak memory of one call with ``tracemalloc`` (NumPy buffers are
+  traced; asv's ``peakmem`` measures process RSS instead)
+- Store one JSON result file per commit with machine details
+- Compare a run with a stored baseline and report regressions beyond a
+  ratio threshold
+- Build the fixed synthetic PSA tables and cohort inputs the suite runs on
+"""
+from __future__ import annotations
+
+import functools
+import importlib
+import inspect
+import itertools
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_DIR = Path("benchmarks")
+RESULTS_DIR = Path(".benchmarks")
+BASELINE_NAME = "baseline.json"
+
+# Fixed synthetic PSA sizes (draws x 8 strategies)
+PSA_SIZES = (1_000, 10_000, 100_000)
+SYNTHETIC_STRATEGIES = ("ECT", "KA-ECT", "IV-KA", "IN-EKA", "PO-PSI", "PO-KA", "rTMS", "UC+Li")
+
+# Small Markov cohort setup for simulation benchmarks
+COHORT_SETTINGS = {
+    "time_horizon_years": 2,
+    "cycle_length_months": 1,
+    "discount_costs": {"AU": 0.05},
+    "discount_qalys": {"AU": 0.05},
+}
+COHORT_INPUTS = {"remission_rates": {"ECT_std": 0.4, "IV_ketamine": 0.35}}
+
+# A regression is a slowdown (or memory growth) beyond this ratio
+DEFAULT_REGRESSION_FACTOR = 1.25
+
+
+def synthetic_psa(
+    n_draws: int,
+    strategies: Sequence[str] = SYNTHETIC_STRATEGIES,
+    seed: int = 20240101,
+    perspective: str = "health_system",
+    jurisdiction: str = "AU",
+):
+    """
+    Long-format PSA with correlated costs and QALYs per strategy.
+
+    Returns:
+        PSAData with one row per (draw, strategy)
+    """
+    from ..models.io import PSAData, StrategyConfig
+
+    rng = np.random.default_rng(seed)
+    strategies = list(strategies)
+    n_strat = len(strategies)
+    mean_cost = np.linspace(8_000, 22_000, n_strat)
+    mean_effect = np.linspace(1.10, 1.45, n_strat)
+    shared = rng.normal(size=(n_draws, 1))
+    effect = mean_effect + 0.08 * (0.6 * shared + 0.8 * rng.normal(size=(n_draws, n_strat)))
+    cost = rng.gamma(25.0, mean_cost / 25.0, size=(n_draws, n_strat))
+    table = pd.DataFrame({
+        "draw": np.repeat(np.arange(1, n_draws + 1), n_strat),
+        "strategy": np.tile(strategies, n_draws),
+        "cost": cost.ravel(),
+        "effect": effect.ravel(),
+        "perspective": perspective,
+        "jurisdiction": jurisdiction,
+    })
+    config = StrategyConfig(
+        base=strategies[0],
+        perspectives=[perspective],
+        strategies=strategies,
+        prices={s: 0.0 for s in strategies},
+        effects_unit="QALYs",
+        currency="A$",
+    )
+    return PSAData(table=table, config=config, perspective=perspective, jurisdiction=jurisdiction)
+
+
+def synthetic_clinical_draws(n_draws: int, seed: int = 7) -> np.ndarray:
+    """
+    Beta-distributed clinical parameter vectors for the cohort model.
+
+    Returns:
+        Array of shape ``(n_draws, 5)`` in ``cea_engine.CLINICAL_PARAMETERS`` order
+    """
+    rng = np.random.default_rng(seed)
+    means = np.array([0.3, 0.2, 0.02, 0.01, 0.001])
+    concentration = 200.0
+    return rng.beta(means * concentration, (1 - means) * concentration, size=(n_draws, len(means)))
+
+
+@dataclass
+class BenchmarkCase:
+    """One benchmark method at one parameter combination."""
+
+    name: str                       # module.Class.method
+    kind: str                       # "time" or "peakmem"
+    cls: type
+    method: str
+    params: Tuple[Any, ...] = ()
+    param_names: Tuple[str, ...] = ()
+
+    @property
+    def label(self) -> str:
+        if not self.params:
+            return self.name
+        return f"{self.name}({', '.join(f'{k}={v}' for k, v in zip(self.param_names, self.params))})"
+
+
+@dataclass
+class BenchmarkRecord:
+    """Measured value of one case (seconds per call, or peak bytes)."""
+
+    name: str
+    kind: str
+    params: Dict[str, Any]
+    value: float
+    unit: str
+    samples: List[float] = field(default_factory=list)
+    number: int = 1
+    error: Optional[str] = None
+
+
+@dataclass
+class BenchmarkRun:
+    """All records of one suite run at one commit."""
+
+    commit: str
+    dirty: bool
+    timestamp: str
+    machine: Dict[str, Any]
+    records: List[BenchmarkRecord] = field(default_factory=list)
+
+    def to_frame(self) -> pd.DataFrame:
+        rows = [{"name": r.name, "kind": r.kind, "params": _params_key(r.params), "value": r.value,
+                 "unit": r.unit, "error": r.error} for r in self.records]
+        return pd.DataFrame(rows, columns=["name", "kind", "params", "value", "unit", "error"])
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(asdict(self), indent=2, default=str))
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "BenchmarkRun":
+        data = json.loads(Path(path).read_text())
+        records = [BenchmarkRecord(**r) for r in data.pop("records")]
+        return cls(records=records, **data)
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    return ", ".join(f"{k}={v}" for k, v in params.items())
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "node": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def current_commit(repo: Path = Path(".")) -> Tuple[str, bool]:
+    """(HEAD commit hash, whether the working tree has changes); ``"unknown"`` outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def discover(
+    benchmark_dir: Path = BENCHMARK_DIR,
+    pattern: Optional[str] = None,
+    sizes: Optional[Sequence[int]] = None,
+) -> List[BenchmarkCase]:
+    """
+    Benchmark cases in ``benchmark_dir``, expanded over their parameter grids.
+
+    Args:
+        benchmark_dir: Directory of ``bench_*.py`` modules
+        pattern: Regular expression matched against case names
+        sizes: Keep only these ``n_draws`` values for parameterised cases
+
+    Returns:
+        Cases in module, class and method order
+    """
+    benchmark_dir = Path(benchmark_dir).resolve()
+    # Import the suite as a package, as asv does, so modules share ``.common``
+    root = str(benchmark_dir.parent)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    regex = re.compile(pattern) if pattern else None
+    cases = []
+    for path in sorted(benchmark_dir.glob("bench_*.py")):
+        module = importlib.import_module(f"{benchmark_dir.name}.{path.stem}")
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            methods = [m for m in sorted(vars(cls)) if m.startswith(("time_", "peakmem_"))]
+            params = getattr(cls, "params", [])
+            # asv: a single parameter list may be given without the outer list
+            grids = [params] if params and not isinstance(params[0], (list, tuple)) else list(params)
+            names = tuple(getattr(cls, "param_names", [f"param{i + 1}" for i in range(len(grids))]))
+            for method in methods:
+                name = f"{path.stem}.{cls_name}.{method}"
+                if regex and not regex.search(name):
+                    continue
+                for combo in itertools.product(*grids) if grids else [()]:
+                    values = dict(zip(names, combo))
+                    if sizes is not None and "n_draws" in values and values["n_draws"] not in sizes:
+                        continue
+                    cases.append(BenchmarkCase(name=name, kind=method.split("_", 1)[0], cls=cls,
+                                               method=method, params=tuple(combo), param_names=names))
+    return cases
+
+
+def _time_call(func, repeat: int, min_sample_time: float, max_time: float) -> Tuple[List[float], int]:
+    """Seconds per call over ``repeat`` samples of ``number`` calls each."""
+    start = time.perf_counter()
+    func()                                           # warm-up, also sizes ``number``
+    single = time.perf_counter() - start
+    number = max(1, int(min_sample_time / single)) if single > 0 else 1000
+    # Slow cases get fewer samples so one case stays within ``max_time``
+    repeat = max(1, min(repeat, int(max_time / max(single * number, 1e-9))))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples, number
+
+
+def _peak_memory(func) -> float:
+    """Peak traced allocation (bytes) during one call."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        return float(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(
+    case: BenchmarkCase,
+    repeat: int = 5,
+    min_sample_time: float = 0.05,
+    max_time: float = 20.0,
+) -> BenchmarkRecord:
+    """Set up, measure and tear down one case; failures are recorded, not raised."""
+    params = dict(zip(case.param_names, case.params))
+    unit = "s" if case.kind == "time" else "bytes"
+    instance = case.cls()
+    try:
+        if hasattr(instance, "setup"):
+            instance.setup(*case.params)
+        func = getattr(instance, case.method)
+        call = functools.partial(func, *case.params)
+        if case.kind == "time":
+            samples, number = _time_call(call, repeat, min_sample_time, max_time)
+            value = statistics.median(samples)
+        else:
+            samples, number = [_peak_memory(call)], 1
+            value = samples[0]
+        return BenchmarkRecord(case.name, case.kind, params, value, unit, samples, number)
+    except NotImplementedError:
+        return BenchmarkRecord(case.name, case.kind, params, float("nan"), unit, error="skipped")
+    except Exception as exc:  # a broken benchmark must not stop the suite
+        logger.warning("Benchmark %s failed: %s", case.label, exc)
+        return BenchmarkRecord(case.name, case.kind, params, float("nan"), unit, error=f"{type(exc).__name__}: {exc}")
+    finally:
+        if hasattr(instance, "teardown"):
+            instance.teardown(*case.params)
+
+
+def run_suite(
+    benchmark_dir: Path = BENCHMARK_DIR,
+    pattern: Optional[str] = None,
+    sizes: Optional[Sequence[int]] = None,
+    repeat: int = 5,
+    max_time: float = 20.0,
+    repo: Path = Path("."),
+) -> BenchmarkRun:
+    """Run every discovered case and return the run for the current commit."""
+    commit, dirty = current_commit(repo)
+    run = BenchmarkRun(commit=commit, dirty=dirty, timestamp=datetime.now().isoformat(timespec="seconds"),
+                       machine=machine_info())
+    for case in discover(benchmark_dir, pattern, sizes):
+        record = run_case(case, repeat=repeat, max_time=max_time)
+        logger.info("%s: %s", case.label, format_value(record.value, record.unit) if record.error is None
+                    else record.error)
+        run.records.append(record)
+    return run
+
+
+def result_path(run: BenchmarkRun, results_dir: Path = RESULTS_DIR) -> Path:
+    """``<results_dir>/<machine>/<commit>.json`` (suffixed ``-dirty`` for uncommitted trees)."""
+    name = run.commit[:12] + ("-dirty" if run.dirty else "")
+    return Path(results_dir) / run.machine.get("node", "local") / f"{name}.json"
+
+
+def compare_runs(
+    run: BenchmarkRun,
+    baseline: BenchmarkRun,
+    factor: float = DEFAULT_REGRESSION_FACTOR,
+) -> pd.DataFrame:
+    """
+    Ratio of each case to the baseline.
+
+    Returns:
+        DataFrame with name, kind, params, baseline, current, ratio and
+        ``regressed`` (ratio above ``factor``); cases missing from either run
+        are left out
+    """
+    current = run.to_frame().dropna(subset=["value"])
+    base = baseline.to_frame().dropna(subset=["value"])
+    merged = current.merge(base[["name", "kind", "params", "value"]], on=["name", "kind", "params"],
+                           suffixes=("", "_baseline"))
+    ratio = merged["value"] / merged["value_baseline"].where(merged["value_baseline"] > 0)
+    return pd.DataFrame({
+        "name": merged["name"],
+        "kind": merged["kind"],
+        "params": merged["params"],
+        "baseline": merged["value_baseline"],
+        "current": merged["value"],
+        "unit": merged["unit"],
+        "ratio": ratio,
+        "regressed": ratio > factor,
+    })
+
+
+def format_value(value: float, unit: str) -> str:
+    if not np.isfinite(value):
+        return "n/a"
+    if unit == "bytes":
+        return f"{value / 2**20:.1f} MiB"
+    for scale, suffix in ((1.0, "s"), (1e-3, "ms"), (1e-6, "us")):
+        if value >= scale:
+            return f"{value / scale:.3g} {suffix}"
+    return f"{value / 1e-9:.3g} ns"
+
+
+def format_report(run: BenchmarkRun, comparison: Optional[pd.DataFrame] = None) -> str:
+    """Plain-text table of a run, with ratios and regressions when compared."""
+    lines = [f"Benchmarks at {run.commit[:12]}{' (dirty)' if run.dirty else ''} on {run.machine.get('node')}"]
+    ratios = {}
+    if comparison is not None:
+        ratios = {(r.name, r.kind, r.params): (r.ratio, r.regressed) for r in comparison.itertuples()}
+    for record in run.records:
+        key = (record.name, record.kind, _params_key(record.params))
+        shown = record.error if record.error else format_value(record.value, record.unit)
+        line = f"  {record.name} [{_params_key(record.params)}]: {shown}"
+        if key in ratios:
+            ratio, regressed = ratios[key]
+            line += f"  x{ratio:.2f}" + ("  REGRESSION" if regressed else "")
+        lines.append(line)
+    if comparison is not None:
+        lines.append(f"{int(comparison['regressed'].sum())} regression(s) of {len(comparison)} compared cases")
+    return "\n".join(lines)
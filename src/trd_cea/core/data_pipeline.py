@@ -8,31 +8,40 @@ and ensuring data quality in health economic evaluations.
 import pandas as pd
 import numpy as np
 from pathlib import Path
-import hashlib
 import json
-import pickle
 import yaml
 import sqlite3
+import time
 from datetime import datetime
+from contextlib import contextmanager
 import warnings
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 
+from .hashing import FAST, hash_bytes, hash_dataframe, hash_file
+
 
 class DataPipelineManager:
     """
     Manages automated data pipelines for health economic evaluation projects.
     Provides functionality for data versioning, validation, and transformation.
+
+    Pipeline state (datasets, transformations and step history) lives in the
+    DataVersionTracker sqlite database and is updated one row per step inside a
+    transaction. Validated data is cached as content-addressed Parquet objects,
+    so identical inputs share a single cache entry and an unchanged rerun is
+    served from the cache without writing anything.
     """
     
-    def __init__(self, data_dir: str = "data/", cache_dir: str = "cache/"):
+    def __init__(self, data_dir: str = "data/", cache_dir: str = "cache/",
+                 db_path: Optional[str] = None, cache_budget_mb: Optional[float] = None,
+                 hash_algorithm: str = FAST):
         self.data_dir = Path(data_dir)
         self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
-        
-        # Metadata file to track data versions and transformations
-        self.metadata_file = self.data_dir / "pipeline_metadata.json"
-        self.load_metadata()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.objects_dir = self.cache_dir / "objects"
+        self.cache_budget_mb = cache_budget_mb
+        self.hash_algorithm = hash_algorithm
         
         # Initialize logging
         self.logger = logging.getLogger(__name__)
@@ -42,31 +51,79 @@ class DataPipelineManager:
             formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
+        
+        # Pipeline state is stored in the version tracker database
+        if db_path is None:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            db_path = str(self.data_dir / "data_versions.db")
+        self.tracker = DataVersionTracker(db_path)
+        
+        # Legacy JSON metadata is imported once, then only exported on request
+        self.metadata_file = self.data_dir / "pipeline_metadata.json"
+        self.load_metadata()
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Snapshot of pipeline state in the legacy JSON layout."""
+        return self.tracker.pipeline_snapshot()
     
     def load_metadata(self):
-        """Load pipeline metadata, initialize if doesn't exist."""
-        if self.metadata_file.exists():
-            with open(self.metadata_file, 'r') as f:
-                self.metadata = json.load(f)
-        else:
-            self.metadata = {
-                "datasets": {},
-                "transformations": {},
-                "pipeline_history": []
-            }
-    
-    def save_metadata(self):
-        """Save pipeline metadata to file."""
-        with open(self.metadata_file, 'w') as f:
+        """Import a legacy pipeline_metadata.json into the database if present."""
+        if not self.metadata_file.exists() or self.tracker.has_pipeline_state():
+            return
+        with open(self.metadata_file, 'r') as f:
+            legacy = json.load(f)
+        self.tracker.import_pipeline_snapshot(legacy)
+        self.logger.info(f"Imported legacy pipeline metadata from {self.metadata_file}")
+    
+    def save_metadata(self, output_path: Optional[str] = None):
+        """Export a JSON snapshot of the pipeline state (not needed for persistence)."""
+        output_path = Path(output_path) if output_path else self.metadata_file
+        with open(output_path, 'w') as f:
             json.dump(self.metadata, f, indent=2, default=str)
     
     def hash_file(self, filepath: Path) -> str:
         """Generate hash for file to detect changes."""
-        with open(filepath, "rb") as f:
-            file_hash = hashlib.sha256()
-            while chunk := f.read(8192):
-                file_hash.update(chunk)
-        return file_hash.hexdigest()
+        return hash_file(filepath, self.hash_algorithm)
+    
+    def hash_dataframe(self, df: pd.DataFrame) -> str:
+        """Content hash of a DataFrame (values, column names and dtypes)."""
+        return hash_dataframe(df, self.hash_algorithm)
+    
+    def _file_content_hash(self, filepath: Path) -> Tuple[str, bool]:
+        """
+        Hash a file, reusing the stored digest when size and mtime are unchanged.
+
+        Returns:
+            Tuple of (content hash, whether the file matches the stored record)
+        """
+        stat = filepath.stat()
+        record = self.tracker.get_pipeline_dataset(str(filepath))
+        if record and record['size_bytes'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+            return record['hash'], True
+        file_hash = self.hash_file(filepath)
+        return file_hash, bool(record and record['hash'] == file_hash)
+    
+    def _object_path(self, content_hash: str) -> Path:
+        return self.objects_dir / content_hash[:2] / f"{content_hash}.parquet"
+    
+    def _read_cache(self, content_hash: str) -> Optional[pd.DataFrame]:
+        cached_path = self._object_path(content_hash)
+        if not cached_path.exists():
+            return None
+        self.tracker.touch_cache_entry(content_hash)
+        return pd.read_parquet(cached_path)
+    
+    def _write_cache(self, content_hash: str, df: pd.DataFrame) -> None:
+        cached_path = self._object_path(content_hash)
+        if not cached_path.exists():
+            cached_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cached_path.with_suffix('.tmp')
+            df.to_parquet(tmp_path, index=False)
+            tmp_path.replace(cached_path)
+        self.tracker.add_cache_entry(content_hash, str(cached_path), cached_path.stat().st_size)
+        if self.cache_budget_mb is not None:
+            self.collect_garbage(self.cache_budget_mb)
     
     def validate_dataset(self, df: pd.DataFrame, schema_info: Dict[str, Any]) -> Tuple[bool, List[str]]:
         """
@@ -127,19 +184,17 @@ class DataPipelineManager:
             Validated DataFrame
         """
         filepath = Path(filepath)
-        
-        # Check if file has been modified since last validation
-        file_hash = self.hash_file(filepath)
         metadata_key = str(filepath)
+        schema_json = json.dumps(schema_info or {}, sort_keys=True, default=str)
         
-        if metadata_key in self.metadata['datasets']:
-            if self.metadata['datasets'][metadata_key]['hash'] == file_hash:
-                # File unchanged, can return cached version if available
-                cached_path = self.cache_dir / f"{filepath.name}_validated.pkl"
-                if cached_path.exists():
-                    self.logger.info(f"Loading cached validated data for {filepath}")
-                    with open(cached_path, 'rb') as f:
-                        return pickle.load(f)
+        # Unchanged file validated against the same schema: serve from cache
+        file_hash, unchanged = self._file_content_hash(filepath)
+        record = self.tracker.get_pipeline_dataset(metadata_key)
+        if unchanged and record and record['schema_json'] == schema_json:
+            cached = self._read_cache(file_hash)
+            if cached is not None:
+                self.logger.info(f"Loading cached validated data for {filepath}")
+                return cached
         
         # Load and validate data
         self.logger.info(f"Loading and validating data from {filepath}")
@@ -163,21 +218,23 @@ class DataPipelineManager:
                 self.logger.error(error_msg)
                 raise ValueError(error_msg)
         
-        # Cache validated data
-        cached_path = self.cache_dir / f"{filepath.name}_validated.pkl"
-        with open(cached_path, 'wb') as f:
-            pickle.dump(df, f)
-        
-        # Update metadata
-        self.metadata['datasets'][metadata_key] = {
-            'hash': file_hash,
-            'last_validated': str(datetime.now()),
-            'shape': df.shape,
-            'columns': list(df.columns),
-            'schema_used': schema_info
-        }
-        
-        self.save_metadata()
+        # Cache validated data under the source content hash; identical files share one object
+        self._write_cache(file_hash, df)
+        
+        stat = filepath.stat()
+        self.tracker.upsert_pipeline_dataset(
+            path=metadata_key,
+            hash_value=file_hash,
+            size_bytes=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            schema_json=schema_json,
+            info={
+                'last_validated': str(datetime.now()),
+                'shape': list(df.shape),
+                'columns': list(map(str, df.columns)),
+                'schema_used': schema_info,
+            },
+        )
         self.logger.info(f"Successfully loaded and validated data from {filepath}")
         
         return df
@@ -199,18 +256,21 @@ class DataPipelineManager:
         # Apply transformation
         transformed_df = transform_func(df)
         
-        # Track transformation in metadata
-        transform_id = f"{transform_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        self.metadata['transformations'][transform_id] = {
-            'name': transform_name,
-            'applied_at': str(datetime.now()),
-            'input_shape': df.shape,
-            'output_shape': transformed_df.shape,
-            'columns_before': list(df.columns),
-            'columns_after': list(transformed_df.columns)
-        }
-        
-        self.save_metadata()
+        # One record per (name, input, output); reruns leave the table untouched
+        input_hash = self.hash_dataframe(df)
+        output_hash = self.hash_dataframe(transformed_df)
+        self.tracker.record_transformation(
+            name=transform_name,
+            input_hash=input_hash,
+            output_hash=output_hash,
+            info={
+                'applied_at': str(datetime.now()),
+                'input_shape': list(df.shape),
+                'output_shape': list(transformed_df.shape),
+                'columns_before': list(map(str, df.columns)),
+                'columns_after': list(map(str, transformed_df.columns)),
+            },
+        )
         self.logger.info(f"Completed transformation: {transform_name}")
         
         return transformed_df
@@ -218,6 +278,10 @@ class DataPipelineManager:
     def save_processed_data(self, df: pd.DataFrame, output_path: str, format: str = 'csv') -> str:
         """
         Save processed data with versioning information.
+
+        Versions are content addressed: the file name carries a prefix of the
+        data hash, so saving identical data again returns the existing file
+        instead of writing a duplicate.
         
         Args:
             df: DataFrame to save
@@ -229,51 +293,62 @@ class DataPipelineManager:
         """
         output_path = Path(output_path)
         
+        extensions = {'csv': output_path.suffix or '.csv', 'excel': '.xlsx', 'parquet': '.parquet'}
+        if format not in extensions:
+            raise ValueError(f"Unsupported format: {format}")
+        
+        content_hash = self.hash_dataframe(df)
+        versioned_path = output_path.parent / f"{output_path.stem}_{content_hash[:12]}{extensions[format]}"
+        
+        existing = self.tracker.get_pipeline_dataset(str(versioned_path))
+        if existing and existing['content_hash'] == content_hash and versioned_path.exists():
+            self.logger.info(f"Processed data unchanged; reusing {versioned_path}")
+            return str(versioned_path)
+        
         # Ensure parent directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Add timestamp to filename to maintain version history
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        stem = output_path.stem
-        suffix = output_path.suffix
-        
         if format == 'csv':
-            versioned_path = output_path.parent / f"{stem}_{timestamp}{suffix}"
             df.to_csv(versioned_path, index=False)
         elif format == 'excel':
-            versioned_path = output_path.parent / f"{stem}_{timestamp}.xlsx"
             df.to_excel(versioned_path, index=False)
-        elif format == 'parquet':
-            versioned_path = output_path.parent / f"{stem}_{timestamp}.parquet"
-            df.to_parquet(versioned_path, index=False)
         else:
-            raise ValueError(f"Unsupported format: {format}")
-        
-        # Update metadata
-        file_hash = self.hash_file(versioned_path)
-        self.metadata['datasets'][str(versioned_path)] = {
-            'hash': file_hash,
-            'saved_at': str(datetime.now()),
-            'shape': df.shape,
-            'columns': list(df.columns),
-            'creator': 'pipeline_manager'
-        }
+            df.to_parquet(versioned_path, index=False)
         
-        self.save_metadata()
+        stat = versioned_path.stat()
+        self.tracker.upsert_pipeline_dataset(
+            path=str(versioned_path),
+            hash_value=self.hash_file(versioned_path),
+            size_bytes=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=content_hash,
+            base_name=str(output_path),
+            info={
+                'saved_at': str(datetime.now()),
+                'shape': list(df.shape),
+                'columns': list(map(str, df.columns)),
+                'creator': 'pipeline_manager',
+            },
+        )
         self.logger.info(f"Saved processed data to {versioned_path}")
         
         return str(versioned_path)
     
     def get_latest_version(self, base_filename: str) -> Optional[Path]:
         """
-        Get the latest version of a file based on timestamp naming convention.
+        Get the latest saved version of a file.
         
         Args:
-            base_filename: Base name of the file (without timestamp)
+            base_filename: Base name of the file as passed to save_processed_data
         
         Returns:
             Path to latest version or None if no files found
         """
+        latest = self.tracker.latest_pipeline_output(str(Path(base_filename)))
+        if latest and Path(latest).exists():
+            return Path(latest)
+        
+        # Fall back to legacy timestamped files
         base_path = Path(base_filename)
         pattern = f"{base_path.stem}_????????_??????{base_path.suffix}"
         matching_files = list(base_path.parent.glob(pattern))
@@ -285,38 +360,98 @@ class DataPipelineManager:
         matching_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
         return matching_files[0]
     
+    def collect_garbage(self, max_size_mb: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Enforce the cache size budget.
+
+        Orphaned objects (on disk but unknown to the database, or recorded but
+        missing) are removed first; then least recently used entries are evicted
+        until the cache fits within ``max_size_mb``.
+
+        Args:
+            max_size_mb: Size budget in MB (defaults to ``cache_budget_mb``)
+
+        Returns:
+            Summary with the number of evicted entries and bytes freed
+        """
+        max_size_mb = self.cache_budget_mb if max_size_mb is None else max_size_mb
+        entries = self.tracker.list_cache_entries()
+        known = {e['content_hash'] for e in entries}
+        freed = 0
+        evicted = 0
+        
+        if self.objects_dir.exists():
+            for path in self.objects_dir.glob("*/*.parquet"):
+                if path.stem not in known:
+                    freed += path.stat().st_size
+                    path.unlink()
+                    evicted += 1
+        
+        live = []
+        stale = []
+        for entry in entries:
+            (live if Path(entry['path']).exists() else stale).append(entry)
+        
+        total = sum(e['size_bytes'] for e in live)
+        if max_size_mb is not None:
+            budget = max_size_mb * 1024 * 1024
+            for entry in sorted(live, key=lambda e: e['last_access']):
+                if total <= budget:
+                    break
+                Path(entry['path']).unlink(missing_ok=True)
+                total -= entry['size_bytes']
+                freed += entry['size_bytes']
+                evicted += 1
+                stale.append(entry)
+        
+        if stale:
+            self.tracker.remove_cache_entries([e['content_hash'] for e in stale])
+        
+        if evicted:
+            self.logger.info(f"Cache GC evicted {evicted} objects ({freed / 1024 / 1024:.2f} MB)")
+        return {'evicted': evicted, 'bytes_freed': freed, 'bytes_remaining': total}
+    
     def clear_cache(self):
         """Clear all cached files."""
         import shutil
-        if self.cache_dir.exists():
-            shutil.rmtree(self.cache_dir)
-            self.cache_dir.mkdir(exist_ok=True)
+        if self.objects_dir.exists():
+            shutil.rmtree(self.objects_dir)
+        self.tracker.remove_cache_entries(None)
         self.logger.info("Cache cleared")
     
     def log_pipeline_step(self, step_name: str, inputs: List[str], outputs: List[str], 
                          parameters: Dict[str, Any] = None):
         """Log a pipeline step for tracking and reproducibility."""
-        step_record = {
-            'step_name': step_name,
-            'timestamp': str(datetime.now()),
-            'inputs': inputs,
-            'outputs': outputs,
-            'parameters': parameters or {}
-        }
-        
-        self.metadata['pipeline_history'].append(step_record)
-        self.save_metadata()
+        self.tracker.record_pipeline_step(step_name, inputs, outputs, parameters or {})
 
 
 class DataVersionTracker:
     """
     Tracks data versions using a simple database system.
+
+    The same database also holds DataPipelineManager state: dataset records,
+    transformations, step history and the content-addressed cache index.
     """
     
+    # Cache access times are refreshed at most this often, so that cache hits
+    # on an unchanged pipeline do not turn into database writes
+    ACCESS_RESOLUTION_S = 3600
+    
     def __init__(self, db_path: str = "data_versions.db"):
         self.db_path = db_path
         self.init_db()
     
+    @contextmanager
+    def _transaction(self):
+        """Open a connection and commit (or roll back) a single transaction."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
     def init_db(self):
         """Initialize the database with necessary tables."""
         conn = sqlite3.connect(self.db_path)
@@ -347,9 +482,246 @@ class DataVersionTracker:
             )
         """)
         
+        # Pipeline state tables
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pipeline_datasets (
+                path TEXT PRIMARY KEY,
+                hash_value TEXT NOT NULL,
+                size_bytes INTEGER,
+                mtime_ns INTEGER,
+                schema_json TEXT,
+                content_hash TEXT,
+                base_name TEXT,
+                info TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pipeline_transformations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                output_hash TEXT NOT NULL,
+                info TEXT,
+                UNIQUE(name, input_hash, output_hash)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pipeline_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                step_name TEXT NOT NULL,
+                signature TEXT NOT NULL UNIQUE,
+                timestamp TEXT NOT NULL,
+                inputs TEXT,
+                outputs TEXT,
+                parameters TEXT
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                content_hash TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        
         conn.commit()
         conn.close()
     
+    # ------------------------------------------------------------------
+    # Pipeline state
+    # ------------------------------------------------------------------
+    
+    def get_pipeline_dataset(self, path: str) -> Optional[Dict[str, Any]]:
+        """Return the stored record for a pipeline dataset path, if any."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM pipeline_datasets WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record['hash'] = record.pop('hash_value')
+        record['info'] = json.loads(record['info']) if record['info'] else {}
+        return record
+    
+    def upsert_pipeline_dataset(self, path: str, hash_value: str, size_bytes: int, mtime_ns: int,
+                                schema_json: Optional[str] = None, content_hash: Optional[str] = None,
+                                base_name: Optional[str] = None, info: Optional[Dict[str, Any]] = None) -> None:
+        """Insert or update a single pipeline dataset record."""
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT INTO pipeline_datasets
+                    (path, hash_value, size_bytes, mtime_ns, schema_json, content_hash, base_name, info, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    hash_value = excluded.hash_value,
+                    size_bytes = excluded.size_bytes,
+                    mtime_ns = excluded.mtime_ns,
+                    schema_json = excluded.schema_json,
+                    content_hash = excluded.content_hash,
+                    base_name = excluded.base_name,
+                    info = excluded.info,
+                    updated_at = excluded.updated_at
+            """, (path, hash_value, size_bytes, mtime_ns, schema_json, content_hash, base_name,
+                  json.dumps(info or {}, default=str), time.time()))
+    
+    def latest_pipeline_output(self, base_name: str) -> Optional[str]:
+        """Most recently saved versioned path for a processed-data base name."""
+        with self._transaction() as conn:
+            row = conn.execute("""
+                SELECT path FROM pipeline_datasets WHERE base_name = ?
+                ORDER BY updated_at DESC LIMIT 1
+            """, (base_name,)).fetchone()
+        return row['path'] if row else None
+    
+    def record_transformation(self, name: str, input_hash: str, output_hash: str,
+                              info: Optional[Dict[str, Any]] = None) -> None:
+        """Record a transformation once per (name, input, output) combination."""
+        with self._transaction() as conn:
+            if conn.execute("""
+                SELECT 1 FROM pipeline_transformations
+                WHERE name = ? AND input_hash = ? AND output_hash = ?
+            """, (name, input_hash, output_hash)).fetchone():
+                return
+            conn.execute("""
+                INSERT OR IGNORE INTO pipeline_transformations (name, input_hash, output_hash, info)
+                VALUES (?, ?, ?, ?)
+            """, (name, input_hash, output_hash, json.dumps(info or {}, default=str)))
+    
+    def record_pipeline_step(self, step_name: str, inputs: List[str], outputs: List[str],
+                             parameters: Dict[str, Any]) -> None:
+        """Append a pipeline step unless an identical step is already recorded."""
+        payload = json.dumps(
+            {'step': step_name, 'inputs': inputs, 'outputs': outputs, 'parameters': parameters},
+            sort_keys=True, default=str
+        )
+        signature = hash_bytes(payload.encode())
+        with self._transaction() as conn:
+            if conn.execute(
+                "SELECT 1 FROM pipeline_history WHERE signature = ?", (signature,)
+            ).fetchone():
+                return
+            conn.execute("""
+                INSERT OR IGNORE INTO pipeline_history
+                    (step_name, signature, timestamp, inputs, outputs, parameters)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (step_name, signature, str(datetime.now()), json.dumps(inputs),
+                  json.dumps(outputs), json.dumps(parameters, default=str)))
+    
+    def has_pipeline_state(self) -> bool:
+        """True if any pipeline state has been recorded."""
+        with self._transaction() as conn:
+            for table in ('pipeline_datasets', 'pipeline_transformations', 'pipeline_history'):
+                if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                    return True
+        return False
+    
+    def pipeline_snapshot(self) -> Dict[str, Any]:
+        """Pipeline state in the legacy ``pipeline_metadata.json`` layout."""
+        with self._transaction() as conn:
+            datasets = conn.execute("SELECT * FROM pipeline_datasets").fetchall()
+            transforms = conn.execute("SELECT * FROM pipeline_transformations ORDER BY id").fetchall()
+            history = conn.execute("SELECT * FROM pipeline_history ORDER BY id").fetchall()
+        return {
+            'datasets': {
+                row['path']: {'hash': row['hash_value'], **json.loads(row['info'] or '{}')}
+                for row in datasets
+            },
+            'transformations': {
+                f"{row['name']}_{row['output_hash'][:12]}": {
+                    'name': row['name'], **json.loads(row['info'] or '{}')
+                }
+                for row in transforms
+            },
+            'pipeline_history': [
+                {
+                    'step_name': row['step_name'],
+                    'timestamp': row['timestamp'],
+                    'inputs': json.loads(row['inputs']),
+                    'outputs': json.loads(row['outputs']),
+                    'parameters': json.loads(row['parameters']),
+                }
+                for row in history
+            ],
+        }
+    
+    def import_pipeline_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        """Import a legacy JSON snapshot in a single transaction."""
+        now = time.time()
+        with self._transaction() as conn:
+            for path, info in (snapshot.get('datasets') or {}).items():
+                info = dict(info)
+                hash_value = info.pop('hash', '')
+                conn.execute("""
+                    INSERT OR IGNORE INTO pipeline_datasets (path, hash_value, info, updated_at)
+                    VALUES (?, ?, ?, ?)
+                """, (path, hash_value, json.dumps(info, default=str), now))
+            for transform_id, info in (snapshot.get('transformations') or {}).items():
+                conn.execute("""
+                    INSERT OR IGNORE INTO pipeline_transformations (name, input_hash, output_hash, info)
+                    VALUES (?, ?, ?, ?)
+                """, (info.get('name', transform_id), '', transform_id, json.dumps(info, default=str)))
+            for step in snapshot.get('pipeline_history') or []:
+                payload = json.dumps(step, sort_keys=True, default=str)
+                conn.execute("""
+                    INSERT OR IGNORE INTO pipeline_history
+                        (step_name, signature, timestamp, inputs, outputs, parameters)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (step.get('step_name', ''), hash_bytes(payload.encode()),
+                      str(step.get('timestamp', '')), json.dumps(step.get('inputs', [])),
+                      json.dumps(step.get('outputs', [])),
+                      json.dumps(step.get('parameters', {}), default=str)))
+    
+    # ------------------------------------------------------------------
+    # Content-addressed cache index
+    # ------------------------------------------------------------------
+    
+    def add_cache_entry(self, content_hash: str, path: str, size_bytes: int) -> None:
+        """Register a cache object (no-op if already registered)."""
+        now = time.time()
+        with self._transaction() as conn:
+            if conn.execute(
+                "SELECT 1 FROM cache_entries WHERE content_hash = ?", (content_hash,)
+            ).fetchone():
+                return
+            conn.execute("""
+                INSERT INTO cache_entries (content_hash, path, size_bytes, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            """, (content_hash, path, size_bytes, now, now))
+    
+    def touch_cache_entry(self, content_hash: str) -> None:
+        """Refresh the LRU timestamp of a cache object if it is stale."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT last_access FROM cache_entries WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row is None or row['last_access'] >= now - self.ACCESS_RESOLUTION_S:
+                return
+            conn.execute("""
+                UPDATE cache_entries SET last_access = ?
+                WHERE content_hash = ? AND last_access < ?
+            """, (now, content_hash, now - self.ACCESS_RESOLUTION_S))
+    
+    def list_cache_entries(self) -> List[Dict[str, Any]]:
+        """All registered cache objects."""
+        with self._transaction() as conn:
+            return [dict(row) for row in conn.execute("SELECT * FROM cache_entries")]
+    
+    def remove_cache_entries(self, content_hashes: Optional[List[str]]) -> None:
+        """Remove cache index rows (all rows if ``content_hashes`` is None)."""
+        with self._transaction() as conn:
+            if content_hashes is None:
+                conn.execute("DELETE FROM cache_entries")
+            else:
+                conn.executemany(
+                    "DELETE FROM cache_entries WHERE content_hash = ?",
+                    [(h,) for h in content_hashes]
+                )
+    
     def add_version(self, dataset_name: str, version: str, file_path: str, 
                    hash_value: str, metadata: Dict[str, Any] = None) -> int:
         """Add a new dataset version to the tracker."""
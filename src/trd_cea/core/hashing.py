@@ -0,0 +1,262 @@
+"""
+V4 Content Hashing
+
+Single hashing service for provenance records and cache keys.
+
+Responsibilities:
+- Full-content hashes of files (read in fixed-size chunks) and of DataFrames
+  and arrays (hashing the underlying column buffers rather than a text dump)
+- Canonical hashing of nested configs/parameters containing arrays and frames
+- A fast non-cryptographic default (xxh3-128 when ``xxhash`` is installed,
+  otherwise BLAKE2b-128) with ``sha256`` available for audit trails
+- In-process digest cache for files keyed by (path, size, mtime)
+"""
+from __future__ import annotations
+
+import dataclasses
+import enum
+import hashlib
+import types
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
+FAST = "fast"
+SHA256 = "sha256"
+ALGORITHMS = (FAST, SHA256)
+
+CHUNK_SIZE = 1 << 20
+FILE_CACHE_SIZE = 4096
+
+_file_digests: "OrderedDict[tuple, str]" = OrderedDict()
+_file_digests_lock = Lock()
+
+
+def new_hasher(algorithm: str = FAST):
+    """
+    Create an incremental hasher.
+
+    Args:
+        algorithm: ``"fast"`` (xxh3-128, falling back to BLAKE2b-128) or ``"sha256"``
+
+    Returns:
+        Object with ``update(bytes)`` and ``hexdigest()``
+    """
+    if algorithm == FAST:
+        if xxhash is not None:
+            return xxhash.xxh3_128()
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == SHA256:
+        return hashlib.sha256()
+    raise ValueError(f"Unknown hash algorithm '{algorithm}', expected one of {ALGORITHMS}")
+
+
+def fast_backend() -> str:
+    """Name of the hash function used for the ``"fast"`` algorithm."""
+    return "xxh3_128" if xxhash is not None else "blake2b_128"
+
+
+def hash_bytes(data: bytes, algorithm: str = FAST) -> str:
+    """Hash a bytes-like object."""
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def hash_file(
+    filepath: Union[str, Path],
+    algorithm: str = FAST,
+    chunk_size: int = CHUNK_SIZE,
+    use_cache: bool = True,
+) -> str:
+    """
+    Hash the full contents of a file, reading it in chunks.
+
+    Digests are cached per process by (resolved path, size, mtime_ns,
+    algorithm), so repeated provenance checks on unchanged files do not
+    re-read them.
+
+    Args:
+        filepath: File to hash
+        algorithm: ``"fast"`` or ``"sha256"``
+        chunk_size: Read size in bytes
+        use_cache: Reuse a cached digest when size and mtime are unchanged
+
+    Returns:
+        Hex digest
+    """
+    path = Path(filepath).resolve()
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns, algorithm)
+    if use_cache:
+        with _file_digests_lock:
+            digest = _file_digests.get(key)
+            if digest is not None:
+                _file_digests.move_to_end(key)
+                return digest
+
+    hasher = new_hasher(algorithm)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+
+    with _file_digests_lock:
+        _file_digests[key] = digest
+        while len(_file_digests) > FILE_CACHE_SIZE:
+            _file_digests.popitem(last=False)
+    return digest
+
+
+def clear_file_cache() -> None:
+    """Drop all cached file digests."""
+    with _file_digests_lock:
+        _file_digests.clear()
+
+
+def _update_array(hasher, values: np.ndarray) -> None:
+    values = np.asarray(values)
+    if values.dtype.hasobject:
+        # Object/string arrays have no stable buffer; hash element values instead
+        values = pd.util.hash_array(values.ravel(), categorize=True)
+        hasher.update(b"object")
+    hasher.update(f"{values.dtype.str}{values.shape}".encode())
+    buffer = np.ascontiguousarray(values).view(np.uint8).ravel()
+    for start in range(0, buffer.size, CHUNK_SIZE):
+        hasher.update(buffer[start:start + CHUNK_SIZE].data)
+
+
+def _update_series(hasher, series: pd.Series) -> None:
+    hasher.update(f"{series.name}|{series.dtype}|".encode())
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        _update_array(hasher, series.cat.categories.to_numpy())
+        _update_array(hasher, series.cat.codes.to_numpy())
+    elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if series.hasnans:
+            _update_array(hasher, series.isna().to_numpy())
+            series = series.fillna(0)
+        _update_array(hasher, series.to_numpy())
+    else:
+        _update_array(hasher, series.to_numpy(dtype=object))
+
+
+def _update(hasher, obj: Any, seen: set) -> None:
+    """Feed a canonical representation of ``obj`` into ``hasher``."""
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        hasher.update(f"{type(obj).__name__}:{obj!r};".encode())
+    elif isinstance(obj, pd.DataFrame):
+        hasher.update(f"DataFrame{obj.shape};".encode())
+        for column in obj.columns:
+            _update_series(hasher, obj[column])
+    elif isinstance(obj, pd.Series):
+        _update_series(hasher, obj)
+    elif isinstance(obj, (np.ndarray, np.generic)):
+        _update_array(hasher, obj)
+    elif isinstance(obj, Path):
+        hasher.update(f"Path:{obj.as_posix()};".encode())
+    elif isinstance(obj, dict):
+        hasher.update(f"dict{len(obj)}{{".encode())
+        for key in sorted(obj, key=repr):
+            _update(hasher, key, seen)
+            _update(hasher, obj[key], seen)
+        hasher.update(b"}")
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = sorted(obj, key=repr) if isinstance(obj, (set, frozenset)) else obj
+        hasher.update(f"{type(obj).__name__}{len(obj)}[".encode())
+        for item in items:
+            _update(hasher, item, seen)
+        hasher.update(b"]")
+    else:
+        if id(obj) in seen:
+            hasher.update(b"<cycle>")
+            return
+        seen.add(id(obj))
+        hasher.update(f"{type(obj).__module__}.{type(obj).__qualname__}".encode())
+        if isinstance(obj, enum.Enum):
+            hasher.update(f":{obj.name};".encode())
+        elif isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)):
+            hasher.update(f":{obj.__module__}.{obj.__qualname__};".encode())
+        elif isinstance(obj, types.MethodType):
+            _update(hasher, [obj.__func__, obj.__self__], seen)
+        elif dataclasses.is_dataclass(obj):
+            _update(hasher, {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}, seen)
+        elif hasattr(obj, "__dict__"):
+            _update(hasher, vars(obj), seen)
+        else:
+            _update(hasher, _slot_state(obj), seen)
+
+
+def _slot_state(obj: Any) -> dict:
+    """
+    Values of the ``__slots__`` of ``obj``.
+
+    Raises:
+        TypeError: ``obj`` has neither ``__dict__`` nor slots, so it has no
+            state that can be hashed by content (its repr may contain a
+            memory address and differ between processes)
+    """
+    names = [name for cls in type(obj).__mro__ for name in cls.__dict__.get("__slots__", ())]
+    if not names:
+        raise TypeError(f"Cannot hash {type(obj).__module__}.{type(obj).__qualname__} by content: "
+                        "it has no dataclass fields, __dict__ or __slots__")
+    return {name: getattr(obj, name) for name in names if hasattr(obj, name)}
+
+
+def hash_dataframe(df: pd.DataFrame, algorithm: str = FAST) -> str:
+    """
+    Hash the full contents of a DataFrame.
+
+    Column names, dtypes and every value are included; the index is not.
+
+    Args:
+        df: DataFrame to hash
+        algorithm: ``"fast"`` or ``"sha256"``
+
+    Returns:
+        Hex digest
+    """
+    hasher = new_hasher(algorithm)
+    _update(hasher, df, set())
+    return hasher.hexdigest()
+
+
+def hash_array(values: np.ndarray, algorithm: str = FAST) -> str:
+    """Hash the buffer, dtype and shape of an array."""
+    hasher = new_hasher(algorithm)
+    _update_array(hasher, values)
+    return hasher.hexdigest()
+
+
+def hash_object(obj: Any, algorithm: str = FAST, length: Optional[int] = None) -> str:
+    """
+    Hash a nested structure of configs, parameters, arrays and frames.
+
+    Dict keys are sorted, arrays and frames are hashed by content, functions
+    and classes by qualified name, and other objects by their type plus their
+    dataclass fields, ``__dict__`` or ``__slots__``, so the digest is stable
+    across processes.
+
+    Args:
+        obj: Object to hash
+        algorithm: ``"fast"`` or ``"sha256"``
+        length: Truncate the hex digest to this many characters
+
+    Returns:
+        Hex digest
+
+    Raises:
+        TypeError: ``obj`` contains an object with no content to hash
+    """
+    hasher = new_hasher(algorithm)
+    _update(hasher, obj, set())
+    digest = hasher.hexdigest()
+    return digest[:length] if length else digest
@@ -287,14 +287,10 @@ def create_ce_plane_data(
     df['incremental_effect'] = df['effect'] - ref_effect
     
     # Calculate ICERs where appropriate (relative to reference)
-    df['icer'] = np.nan
-    for i in range(len(df)):
-        if i != ref_idx:
-            inc_cost = df.iloc[i]['incremental_cost']
-            inc_effect = df.iloc[i]['incremental_effect']
-            
-            if inc_effect != 0:
-                df.iloc[i, df.columns.get_loc('icer')] = inc_cost / inc_effect
+    inc_cost = df['incremental_cost'].to_numpy(dtype=float)
+    inc_effect = df['incremental_effect'].to_numpy(dtype=float)
+    defined = (inc_effect != 0) & (np.arange(len(df)) != ref_idx)
+    df['icer'] = np.divide(inc_cost, inc_effect, out=np.full(len(df), np.nan), where=defined)
     
     # Calculate NMB relative to reference
     df['nmb_vs_reference'] = df['incremental_effect'] * 50000 - df['incremental_cost']  # Using default WTP
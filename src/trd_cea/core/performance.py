@@ -7,8 +7,6 @@ for health economic evaluation models.
 
 import asyncio
 import pickle
-import hashlib
-import json
 import os
 import tempfile
 import threading
@@ -27,6 +25,8 @@ from queue import Queue
 from threading import Lock
 import logging
 
+from .hashing import hash_object
+
 
 class IntelligentCache:
     """
@@ -58,15 +58,18 @@ class IntelligentCache:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
     
-    def _generate_key(self, func_name: str, args: tuple, kwargs: dict) -> str:
-        """Generate cache key based on function and parameters."""
+    def _generate_key(self, func_name: str, args: tuple, kwargs: dict) -> Optional[str]:
+        """Generate cache key based on function and parameters (``None`` if they cannot be hashed)."""
         key_data = {
             'function': func_name,
             'args': args,
             'kwargs': kwargs
         }
-        key_str = json.dumps(key_data, sort_keys=True, default=str)
-        return hashlib.md5(key_str.encode()).hexdigest()
+        # Arrays and DataFrames are keyed by content, not by their str() form
+        try:
+            return hash_object(key_data)
+        except TypeError:
+            return None
     
     def _is_expired(self, timestamp: float) -> bool:
         """Check if cache entry is expired."""
@@ -289,6 +292,8 @@ def cached_computation(ttl_seconds: int = 3600, cache_instance: IntelligentCache
         def wrapper(*args, **kwargs):
             # Generate cache key from function and arguments
             cache_key = cache._generate_key(func.__name__, args, kwargs)
+            if cache_key is None:
+                return func(*args, **kwargs)
             
             # Try to get result from cache
             cached_result = cache.get(cache_key)
@@ -438,6 +443,8 @@ class PerformanceOptimizer:
             with self.memory_manager.monitor_memory(f"calculation_{func.__name__}"):
                 # Check if result is cached
                 cache_key = self.cache._generate_key(func.__name__, args, kwargs)
+                if cache_key is None:
+                    return func(*args, **kwargs)
                 cached_result = self.cache.get(cache_key)
                 
                 if cached_result is not None:
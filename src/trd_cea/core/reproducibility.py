@@ -14,13 +14,14 @@ import yaml
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import hashlib
 import subprocess
 import platform
 from typing import Dict, List, Any, Optional, Callable
 import logging
 from functools import wraps
 
+from .hashing import FAST, SHA256, hash_file
+
 
 class ProvenanceTracker:
     """
@@ -28,8 +29,9 @@ class ProvenanceTracker:
     and execution environment for complete reproducibility.
     """
     
-    def __init__(self, output_dir: str = "provenance/"):
+    def __init__(self, output_dir: str = "provenance/", checksum_algorithm: str = FAST):
         self.output_dir = Path(output_dir)
+        self.checksum_algorithm = checksum_algorithm
         self.output_dir.mkdir(exist_ok=True)
         
         self.provenance_data = {
@@ -85,26 +87,30 @@ class ProvenanceTracker:
             "tracked_at": str(datetime.now())
         }
     
-    def track_data_source(self, name: str, filepath: str, checksum: str = None) -> None:
+    def track_data_source(self, name: str, filepath: str, checksum: str = None,
+                          algorithm: Optional[str] = None) -> None:
         """Track data sources with their checksums."""
+        algorithm = algorithm or self.checksum_algorithm
         if checksum is None:
-            checksum = self.calculate_checksum(filepath)
+            checksum = self.calculate_checksum(filepath, algorithm)
         
         self.provenance_data["data_versions"][name] = {
             "filepath": str(filepath),
             "checksum": checksum,
+            "checksum_algorithm": algorithm,
             "file_size": Path(filepath).stat().st_size if Path(filepath).exists() else 0,
             "modified_at": str(datetime.fromtimestamp(Path(filepath).stat().st_mtime)),
             "tracked_at": str(datetime.now())
         }
     
-    def calculate_checksum(self, filepath: str) -> str:
-        """Calculate SHA-256 checksum for a file."""
-        sha256_hash = hashlib.sha256()
-        with open(filepath, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+    def calculate_checksum(self, filepath: str, algorithm: Optional[str] = None) -> str:
+        """
+        Calculate a full-content checksum for a file.
+
+        Uses the tracker's algorithm (fast by default); pass ``"sha256"`` for
+        audit-grade checksums. Digests of unchanged files are cached.
+        """
+        return hash_file(filepath, algorithm or self.checksum_algorithm)
     
     def start_execution(self, execution_id: str, description: str = "") -> None:
         """Record the start of an execution."""
@@ -196,7 +202,10 @@ class ProvenanceTracker:
         for name, data_info in self.provenance_data["data_versions"].items():
             filepath = Path(data_info["filepath"])
             if filepath.exists():
-                current_checksum = self.calculate_checksum(str(filepath))
+                # Entries recorded before the algorithm was stored used SHA-256
+                current_checksum = self.calculate_checksum(
+                    str(filepath), data_info.get("checksum_algorithm", SHA256)
+                )
                 matches = current_checksum == data_info["checksum"]
                 data_checks[name] = {"exists": True, "checksum_match": matches}
                 
@@ -280,6 +289,19 @@ class ReproducibilityChecker:
         )
         return True
     
+    def check_run_ledger(self, ledger, across_versions: bool = False) -> bool:
+        """Check that identical inputs in a run ledger always produced identical outputs."""
+        conflicts = ledger.nondeterministic(across_versions=across_versions)
+        passed = conflicts.empty
+        if passed:
+            message = f"All repeated runs in {ledger.path} produced identical outputs"
+        else:
+            engines = ", ".join(sorted(set(conflicts["engine"])))
+            message = (f"{len(conflicts)} input(s) produced differing outputs across repeated runs "
+                       f"in {ledger.path} ({engines})")
+        self.add_check("run_ledger_determinism", passed, message)
+        return passed
+
     def generate_reproducibility_report(self, execution_id: str) -> str:
         """Generate a comprehensive reproducibility report."""
         report_parts = [
@@ -0,0 +1,291 @@
+"""
+V4 Run Ledger
+
+Persistent record of every engine and batch-job execution.
+
+Responsibilities:
+- Store one row per execution in SQLite: engine and package versions, git
+  commit, input, data and config hashes, seed, duration, peak memory and a
+  digest of the outputs
+- Query runs and summarise performance per engine and input
+- Compare two commits or package versions on timing and outputs
+- Flag identical inputs (same engine, hashes and seed) that produced
+  different output digests
+- Export the ledger to Parquet or CSV for analysis elsewhere
+
+SQLite is opened per operation in WAL mode, so concurrent threads and
+processes can append to the same ledger file.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import platform
+import sqlite3
+import subprocess
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from .hashing import hash_object
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = Path("results/run_ledger.sqlite")
+PACKAGE_NAME = "trd-cea-toolkit"
+
+# Runs with equal values here are expected to give equal outputs
+IDENTITY_COLUMNS = ["engine", "engine_version", "input_hash", "config_hash", "seed"]
+
+
+@lru_cache(maxsize=None)
+def package_version() -> str:
+    """Installed package version, falling back to ``trd_cea.__version__``."""
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+        return version(PACKAGE_NAME)
+    except PackageNotFoundError:
+        from .. import __version__
+        return __version__
+
+
+@lru_cache(maxsize=None)
+def git_commit(repo: str = ".") -> Optional[str]:
+    """HEAD commit of ``repo``, with a ``-dirty`` suffix for uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def output_digest(results: Any) -> Optional[str]:
+    """Content hash of analysis outputs (``None`` for no outputs or outputs that cannot be hashed by content)."""
+    if results is None:
+        return None
+    try:
+        return hash_object(results, length=16)
+    except TypeError as e:
+        logger.debug(f"No output digest: {e}")
+        return None
+
+
+@dataclass
+class LedgerEntry:
+    """One execution; ``phases`` holds seconds per traced phase, ``context`` free-form labels."""
+
+    engine: str
+    input_hash: Optional[str]
+    config_hash: Optional[str]
+    duration_s: Optional[float]
+    success: bool = True
+    engine_version: Optional[str] = None
+    analysis: Optional[str] = None
+    data_hash: Optional[str] = None
+    seed: Optional[int] = None
+    peak_memory_bytes: Optional[int] = None
+    memory_delta_mb: Optional[float] = None
+    output_digest: Optional[str] = None
+    error: Optional[str] = None
+    phases: Dict[str, float] = field(default_factory=dict)
+    context: Dict[str, Any] = field(default_factory=dict)
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(timespec="milliseconds"))
+    package_version: str = field(default_factory=package_version)
+    commit: Optional[str] = field(default_factory=git_commit)
+    python_version: str = field(default_factory=platform.python_version)
+    node: str = field(default_factory=platform.node)
+
+
+_JSON_COLUMNS = ("phases", "context")
+_SQL_TYPES = {"success": "INTEGER", "seed": "INTEGER", "peak_memory_bytes": "INTEGER",
+              "duration_s": "REAL", "memory_delta_mb": "REAL"}
+COLUMNS = [f.name for f in fields(LedgerEntry)]
+_QUOTED = ", ".join(f'"{name}"' for name in COLUMNS)
+
+
+class RunLedger:
+    """
+    SQLite-backed run ledger.
+
+    Args:
+        path: Ledger database file (created with its directory on first use)
+    """
+
+    def __init__(self, path: Path = DEFAULT_LEDGER_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Quoted: ``commit`` is an SQL keyword
+        columns = ", ".join(f'"{name}" ' + _SQL_TYPES.get(name, "TEXT") + (" PRIMARY KEY" if name == "run_id" else "")
+                            for name in COLUMNS)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"CREATE TABLE IF NOT EXISTS runs ({columns})")
+            connection.execute("CREATE INDEX IF NOT EXISTS runs_identity ON runs "
+                               "(engine, input_hash, config_hash)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits on success and is always closed."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def append(self, entries: Iterable[LedgerEntry]) -> List[LedgerEntry]:
+        """Store entries (a single entry may be passed as a one-element list)."""
+        entries = list(entries)
+        rows = []
+        for entry in entries:
+            row = asdict(entry)
+            for name in _JSON_COLUMNS:
+                row[name] = json.dumps(row[name], default=str)
+            row["success"] = int(row["success"])
+            rows.append(tuple(row[name] for name in COLUMNS))
+        with self._connect() as connection:
+            connection.executemany(
+                f"INSERT INTO runs ({_QUOTED}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+        return entries
+
+    def record(self, entry: LedgerEntry) -> LedgerEntry:
+        """Store one entry."""
+        return self.append([entry])[0]
+
+    def query(
+        self,
+        engine: Optional[str] = None,
+        input_hash: Optional[str] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Runs matching every given filter, oldest first.
+
+        Args:
+            engine: Engine name
+            input_hash: Input hash
+            success: Only successful (True) or failed (False) runs
+            since: ISO timestamp lower bound
+            limit: Keep only the most recent ``limit`` runs
+        """
+        clauses, values = [], []
+        for column, value in (("engine", engine), ("input_hash", input_hash),
+                              ("success", None if success is None else int(success))):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                values.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            values.append(since)
+        sql = "SELECT * FROM runs" + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+        sql += " ORDER BY timestamp"
+        with self._connect() as connection:
+            frame = pd.read_sql_query(sql, connection, params=values)
+        frame["success"] = frame["success"].astype(bool)
+        for name in _JSON_COLUMNS:
+            frame[name] = frame[name].map(json.loads)
+        frame["seed"] = frame["seed"].astype("Int64")
+        frame["peak_memory_bytes"] = frame["peak_memory_bytes"].astype("Int64")
+        return frame.tail(limit).reset_index(drop=True) if limit else frame
+
+    def performance(self, engine: Optional[str] = None, by: str = "commit") -> pd.DataFrame:
+        """
+        Duration and peak memory of successful runs per engine, input and ``by``.
+
+        Returns:
+            DataFrame with runs, median/min/max seconds and max peak memory
+        """
+        frame = self.query(engine=engine, success=True)
+        keys = ["engine", "input_hash", "config_hash", by]
+        if frame.empty:
+            return pd.DataFrame(columns=keys + ["runs", "median_s", "min_s", "max_s", "peak_memory_bytes", "last_run"])
+        return (frame.groupby(keys, dropna=False, sort=False)
+                .agg(runs=("run_id", "size"), median_s=("duration_s", "median"), min_s=("duration_s", "min"),
+                     max_s=("duration_s", "max"), peak_memory_bytes=("peak_memory_bytes", "max"),
+                     last_run=("timestamp", "max"))
+                .reset_index()
+                .sort_values("last_run", kind="stable")
+                .reset_index(drop=True))
+
+    def compare(self, before: str, after: str, by: str = "commit") -> pd.DataFrame:
+        """
+        Timing ratio and output agreement of inputs run under both ``before`` and ``after``.
+
+        Args:
+            before: Value of ``by`` for the reference runs (e.g. a commit)
+            after: Value of ``by`` for the runs to compare
+            by: ``"commit"`` or ``"package_version"``
+
+        Returns:
+            DataFrame per identity key with median seconds for each side, their
+            ratio and ``same_output`` (every digest on both sides equal)
+        """
+        frame = self.query(success=True)
+        frame = frame[frame[by].isin([before, after])]
+        keys = [c for c in IDENTITY_COLUMNS if c != "engine_version"]
+        grouped = (frame.groupby(keys + [by], dropna=False)
+                   .agg(median_s=("duration_s", "median"), digests=("output_digest", lambda d: frozenset(d.dropna())))
+                   .reset_index())
+        left = grouped[grouped[by] == before].drop(columns=by)
+        right = grouped[grouped[by] == after].drop(columns=by)
+        merged = left.merge(right, on=keys, suffixes=("_before", "_after"))
+        merged["ratio"] = merged["median_s_after"] / merged["median_s_before"]
+        merged["same_output"] = [len(a | b) <= 1 for a, b in zip(merged["digests_before"], merged["digests_after"])]
+        return merged.drop(columns=["digests_before", "digests_after"])
+
+    def nondeterministic(self, across_versions: bool = False) -> pd.DataFrame:
+        """
+        Identical inputs whose successful runs produced different outputs.
+
+        Args:
+            across_versions: Also group runs from different commits (code
+                changes may legitimately change outputs, so off by default)
+
+        Returns:
+            DataFrame per identity key with the run count, distinct digests
+            and the run ids involved
+        """
+        frame = self.query(success=True)
+        keys = IDENTITY_COLUMNS + ([] if across_versions else ["commit"])
+        columns = keys + ["runs", "digests", "run_ids"]
+        frame = frame[frame["output_digest"].notna()]
+        if frame.empty:
+            return pd.DataFrame(columns=columns)
+        grouped = (frame.groupby(keys, dropna=False)
+                   .agg(runs=("run_id", "size"), digests=("output_digest", lambda d: sorted(set(d))),
+                        run_ids=("run_id", list))
+                   .reset_index())
+        return grouped[grouped["digests"].map(len) > 1][columns].reset_index(drop=True)
+
+    def export(self, path: Path) -> Path:
+        """Write the whole ledger as Parquet (or CSV for a ``.csv`` suffix)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame = self.query()
+        for name in _JSON_COLUMNS:
+            frame[name] = frame[name].map(json.dumps)
+        if path.suffix.lower() == ".csv":
+            frame.to_csv(path, index=False)
+        else:
+            frame.to_parquet(path, index=False)
+        return path
+
+
+def first_seed(sources: Sequence[Optional[Dict[str, Any]]]) -> Optional[int]:
+    """The first ``seed`` set in any of the given mappings."""
+    for source in sources:
+        if isinstance(source, dict) and source.get("seed") is not None:
+            return int(source["seed"])
+    return None
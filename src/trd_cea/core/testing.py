@@ -120,60 +120,52 @@ class PerformanceBenchmark:
             'runs': test_runs
         }
     
-    def benchmark_cea_performance(self, num_strategies: int = 5) -> Dict[str, Any]:
-        """Benchmark CEA engine performance with varying numbers of strategies."""
-        from trd_cea.models.cea_engine import CEAEngine
-        
-        # Generate synthetic data
-        strategies = [f"Strategy_{i}" for i in range(num_strategies)]
-        costs = np.random.uniform(1000, 10000, num_strategies)
-        effects = np.random.uniform(0.1, 1.0, num_strategies)
-        
-        params = {
-            'strategies': strategies,
-            'costs': costs.tolist(),
-            'effects': effects.tolist(),
-            'wtp_threshold': 50000
-        }
-        
-        # Time the analysis
-        cea = CEAEngine()
-        timing_results = self.time_function(cea.analyze, params)
-        
-        # Check against threshold
-        threshold = self.performance_thresholds.get('cea_analysis', 5.0)
-        timing_results['within_threshold'] = timing_results['mean_time'] <= threshold
+    def _record(self, name: str, timing_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Check a timing against its threshold and keep it for the report."""
+        threshold = self.performance_thresholds.get(name)
+        timing_results['within_threshold'] = threshold is None or timing_results['mean_time'] <= threshold
         timing_results['threshold'] = threshold
-        
+        self.benchmark_results[name] = timing_results
         return timing_results
-    
+
+    def benchmark_cea_performance(self, num_strategies: int = 5, num_draws: int = 1000) -> Dict[str, Any]:
+        """Benchmark the PSA decision summary (CEAC, EVPI, incremental results) on a synthetic PSA."""
+        from trd_cea.core.benchmarking import SYNTHETIC_STRATEGIES, synthetic_psa
+        from trd_cea.models.psa_streaming import StreamingPSA
+
+        strategies = list(SYNTHETIC_STRATEGIES[:num_strategies])
+        strategies += [f"Strategy_{i}" for i in range(len(strategies), num_strategies)]
+        table = synthetic_psa(num_draws, strategies).table
+        cost = table['cost'].to_numpy().reshape(num_draws, num_strategies)
+        effect = table['effect'].to_numpy().reshape(num_draws, num_strategies)
+        lambda_grid = np.linspace(0, 100000, 101)
+
+        def analyze():
+            summary = StreamingPSA(strategies, lambda_grid, decision_lambda=50000)
+            summary.update(cost, effect)
+            return summary.result()
+
+        return self._record('cea_analysis', self.time_function(analyze, warmup_runs=1, test_runs=5))
+
     def benchmark_psa_performance(self, num_params: int = 50, num_simulations: int = 1000) -> Dict[str, Any]:
-        """Benchmark PSA performance."""
-        from trd_cea.models.psa_cea_model import run_probabilistic_sa
-        
-        # Create parameters for PSA
-        base_params = {
-            'costs': [5000, 7000, 6000],
-            'effects': [0.5, 0.7, 0.6],
-            'num_simulations': num_simulations
-        }
-        
-        # Add PSA distributions for parameters
-        psa_params = {
-            'costs': [{'mean': c, 'sd': c*0.1, 'dist': 'gamma'} for c in base_params['costs']],
-            'effects': [{'mean': e, 'sd': e*0.1, 'dist': 'beta'} for e in base_params['effects']]
-        }
-        
-        params = {**base_params, 'psa_params': psa_params}
-        
-        timing_results = self.time_function(run_probabilistic_sa, params)
-        
-        threshold = self.performance_thresholds.get('psa_analysis', 60.0)
-        timing_results['within_threshold'] = timing_results['mean_time'] <= threshold
-        timing_results['threshold'] = threshold
-        
-        return timing_results
-    
+        """
+        Benchmark probabilistic cohort simulation of two arms.
+
+        The cohort model samples its five clinical parameters per arm, so
+        ``num_params`` does not change the workload.
+        """
+        from trd_cea.core.benchmarking import COHORT_INPUTS, COHORT_SETTINGS, synthetic_clinical_draws
+        from trd_cea.models.cea_engine import simulate_arm_grid
+
+        parameters = synthetic_clinical_draws(num_simulations)
+
+        def simulate():
+            for arm in ('ECT_std', 'IV_ketamine'):
+                simulate_arm_grid(arm, ['AU'], ['health_system'], COHORT_SETTINGS, COHORT_INPUTS,
+                                  parameters=parameters)
+
+        return self._record('psa_analysis', self.time_function(simulate, warmup_runs=1, test_runs=3))
+
     def generate_benchmark_report(self) -> str:
         """Generate a comprehensive benchmark report."""
         report_parts = [
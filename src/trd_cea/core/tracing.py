@@ -0,0 +1,264 @@
+"""
+V4 Tracing
+
+Nested timing spans for engine and pipeline phases.
+
+Responsibilities:
+- Record nested spans (load, validate, pivot, compute, save, ...) with wall
+  time, net allocated blocks and peak traced memory from ``tracemalloc``
+- Carry the active tracer and span in context variables so spans opened in
+  engines, helpers and worker threads (run in a copied context) nest under
+  the caller's span
+- Cost one context-variable lookup per span when no tracer is active
+- Export Chrome-trace / Perfetto JSON, folded stacks for flame graphs and a
+  per-phase summary naming the phase that dominates a run
+
+Usage::
+
+    tracer = Tracer()
+    with tracer.activate():
+        engine.run(engine_input)          # engine phases become spans
+        with span("save"):
+            write_outputs(...)
+    tracer.write_chrome_trace("trace.json")   # open in ui.perfetto.dev
+    print(tracer.summary().head())
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+_ACTIVE: ContextVar[Optional["Tracer"]] = ContextVar("trd_cea_tracer", default=None)
+_CURRENT: ContextVar[Optional[Tuple["Tracer", "Span"]]] = ContextVar("trd_cea_span", default=None)
+_DISABLED = nullcontext()
+
+
+@dataclass
+class Span:
+    """
+    One timed phase.
+
+    ``start`` is seconds since the tracer was created. ``peak_memory`` is
+    the traced peak above the usage at entry (``None`` without
+    ``tracemalloc``); ``allocated_blocks`` is the net change in live
+    allocated blocks. Both are process-wide, so spans running concurrently
+    on other threads contribute to them.
+    """
+
+    name: str
+    start: float
+    thread: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration: float = 0.0
+    peak_memory: Optional[int] = None
+    allocated_blocks: int = 0
+    children: List["Span"] = field(default_factory=list)
+    _base: int = field(default=0, repr=False)
+    _peak: int = field(default=0, repr=False)
+
+    @property
+    def self_time(self) -> float:
+        """Duration not covered by child spans."""
+        return max(0.0, self.duration - sum(child.duration for child in self.children))
+
+    def walk(self, path: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], "Span"]]:
+        """(stack path, span) for this span and all descendants, depth first."""
+        path = path + (self.name,)
+        yield path, self
+        for child in self.children:
+            yield from child.walk(path)
+
+    def phase_times(self) -> Dict[str, float]:
+        """Seconds per direct child phase (repeated phases are summed)."""
+        times: Dict[str, float] = {}
+        for child in self.children:
+            times[child.name] = times.get(child.name, 0.0) + child.duration
+        return times
+
+
+class Tracer:
+    """
+    Collects spans from every thread and context that activates it.
+
+    Args:
+        memory: Track peak memory with ``tracemalloc`` (started on
+            ``activate`` if it is not already running)
+        max_roots: Keep at most this many top-level spans (oldest dropped)
+    """
+
+    def __init__(self, memory: bool = True, max_roots: Optional[int] = 1000):
+        self.memory = memory
+        self.max_roots = max_roots
+        self.roots: List[Span] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        """Make this the tracer that module-level ``span`` calls report to."""
+        started = self.memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        token = _ACTIVE.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE.reset(token)
+            if started:
+                tracemalloc.stop()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time a phase, nested under the current span of this tracer."""
+        current = _CURRENT.get()
+        parent = current[1] if current is not None and current[0] is self else None
+        record = Span(name, time.perf_counter() - self._origin, threading.get_ident(), attributes)
+        memory = self.memory and tracemalloc.is_tracing()
+        if memory:
+            # tracemalloc has a single peak counter: fold it into the parent
+            # before resetting it for this span, and again on exit
+            usage, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent._peak = max(parent._peak, peak)
+            tracemalloc.reset_peak()
+            record._base = record._peak = usage
+        blocks = sys.getallocatedblocks()
+        token = _CURRENT.set((self, record))
+        try:
+            yield record
+        finally:
+            _CURRENT.reset(token)
+            record.duration = time.perf_counter() - self._origin - record.start
+            record.allocated_blocks = sys.getallocatedblocks() - blocks
+            if memory and tracemalloc.is_tracing():
+                peak = max(record._peak, tracemalloc.get_traced_memory()[1])
+                record.peak_memory = peak - record._base
+                if parent is not None:
+                    parent._peak = max(parent._peak, peak)
+                tracemalloc.reset_peak()
+            if parent is not None:
+                parent.children.append(record)
+            else:
+                with self._lock:
+                    self.roots.append(record)
+                    if self.max_roots is not None and len(self.roots) > self.max_roots:
+                        del self.roots[:-self.max_roots]
+
+    def clear(self) -> None:
+        """Drop recorded spans."""
+        with self._lock:
+            self.roots = []
+
+    def spans(self) -> Iterator[Tuple[Tuple[str, ...], Span]]:
+        """(stack path, span) for every recorded span."""
+        for root in list(self.roots):
+            yield from root.walk()
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Time and memory per stack path, slowest self time first.
+
+        Returns:
+            DataFrame with path, calls, total_s, self_s, self_share (of all
+            root time), peak_memory (max bytes) and allocated_blocks (sum)
+        """
+        rows: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        for path, record in self.spans():
+            row = rows.setdefault(path, {"path": ";".join(path), "depth": len(path) - 1, "calls": 0,
+                                         "total_s": 0.0, "self_s": 0.0, "peak_memory": None,
+                                         "allocated_blocks": 0})
+            row["calls"] += 1
+            row["total_s"] += record.duration
+            row["self_s"] += record.self_time
+            row["allocated_blocks"] += record.allocated_blocks
+            if record.peak_memory is not None:
+                row["peak_memory"] = max(row["peak_memory"] or 0, record.peak_memory)
+        columns = ["path", "depth", "calls", "total_s", "self_s", "self_share", "peak_memory", "allocated_blocks"]
+        frame = pd.DataFrame(list(rows.values()), columns=[c for c in columns if c != "self_share"])
+        total = sum(root.duration for root in self.roots)
+        frame["self_share"] = frame["self_s"] / total if total > 0 else 0.0
+        return frame[columns].sort_values("self_s", ascending=False, kind="stable").reset_index(drop=True)
+
+    def dominant(self) -> Optional[str]:
+        """Stack path with the largest self time, e.g. ``"batch;compute;pivot"``."""
+        frame = self.summary()
+        return None if frame.empty else str(frame["path"].iloc[0])
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Spans as Chrome-trace complete events (loadable in Perfetto and chrome://tracing)."""
+        pid = os.getpid()
+        events = []
+        for _, record in self.spans():
+            args = {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                    for key, value in record.attributes.items()}
+            args["allocated_blocks"] = record.allocated_blocks
+            if record.peak_memory is not None:
+                args["peak_memory_bytes"] = record.peak_memory
+            events.append({"name": record.name, "cat": "trd_cea", "ph": "X", "pid": pid, "tid": record.thread,
+                           "ts": record.start * 1e6, "dur": record.duration * 1e6, "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()))
+        return path
+
+    def folded_stacks(self) -> List[str]:
+        """``"a;b;c <self microseconds>"`` lines for flamegraph.pl, speedscope or ``plot_flame_graph``."""
+        totals: Dict[str, float] = {}
+        for path, record in self.spans():
+            key = ";".join(path)
+            totals[key] = totals.get(key, 0.0) + record.self_time
+        return [f"{key} {int(round(seconds * 1e6))}" for key, seconds in totals.items()]
+
+    def write_folded(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(self.folded_stacks()) + "\n")
+        return path
+
+
+def current_tracer() -> Optional[Tracer]:
+    """The tracer activated in this context, if any."""
+    return _ACTIVE.get()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Context manager timing a phase under the active tracer.
+
+    Yields the ``Span`` or ``None`` when tracing is off, in which case it
+    does nothing beyond one context-variable lookup.
+    """
+    tracer = _ACTIVE.get()
+    if tracer is None:
+        return _DISABLED
+    return tracer.span(name, **attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator running a function inside ``span(name or function name)``."""
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _ACTIVE.get() is None:
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -12,12 +12,16 @@ import logging
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from matplotlib.collections import LineCollection
 from matplotlib.colors import Normalize
 from matplotlib.lines import Line2D
 
 from analysis.plotting.publication import (
     journal_style, save_multiformat, JournalStandards, _get_cmap
 )
+from trd_cea.plotting.surface_animation import (
+    AnimationSettings, SurfaceSpec, animate_surface, build_surface_figure
+)
 
 # Module logger for diagnostics
 logger = logging.getLogger(__name__)
@@ -48,6 +52,7 @@ def plot_3d_sensitivity_surface(
     interactive: bool = False,
     create_animation: bool = False,
     param3_values: Optional[np.ndarray] = None,
+    animation: Optional[AnimationSettings] = None,
 ) -> Path:
     """
     Create 3D surface plot for two-way sensitivity analysis.
@@ -64,6 +69,8 @@ def plot_3d_sensitivity_surface(
         standards: Journal standards
         interactive: If True, create interactive HTML version
         create_animation: If True, create rotating animation
+        animation: Frame count, resolution, workers, formats and time budget
+            of the animation (default: 36 frames at 150 dpi as a GIF)
 
     Returns:
         Path to saved figure
@@ -153,90 +160,17 @@ def plot_3d_sensitivity_surface(
             interactive = False
 
     # Matplotlib version (enhanced)
-    with journal_style(standards):
-        fig = plt.figure(figsize=(12, 9), dpi=standards.min_dpi)
-        ax = fig.add_subplot(111, projection='3d')
-
-        # Plot surface with enhanced styling
-        surf = ax.plot_surface(
-            X, Y, outcome_grid,
-            cmap='viridis',
-            alpha=0.8,
-            edgecolor='none',
-            antialiased=True,
-            rstride=1, cstride=1
-        )
-
-        # Add filled contour projection at the bottom (avoid clipping by
-        # offsetting slightly below the minimum outcome value)
-        z_min = float(outcome_grid.min())
-        z_max = float(outcome_grid.max())
-        z_range = max(1e-6, z_max - z_min)
-        contour_offset = z_min - 0.02 * z_range
-
-        ax.contourf(
-            X, Y, outcome_grid,
-            zdir='z',
-            offset=contour_offset,
-            cmap='viridis',
-            alpha=0.6,
-            levels=15
-        )
-
-        # Ensure z-limits include the surface and the contour projection offset
-        ax.set_zlim(contour_offset, z_max)
-
-        # Set labels with better formatting
-        ax.set_xlabel(f'{param1_name}', fontsize=11, fontweight='bold', labelpad=10)
-        ax.set_ylabel(f'{param2_name}', fontsize=11, fontweight='bold', labelpad=10)
-        ax.set_zlabel(f'{outcome_name}', fontsize=11, fontweight='bold', labelpad=10)
-        ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
-
-        # Add colorbar with better positioning
-        cbar = fig.colorbar(surf, ax=ax, shrink=0.6, aspect=10, pad=0.1)
-        cbar.set_label(f'{outcome_name}', rotation=270, labelpad=20, fontsize=10)
-
-        # Enhanced viewing angles - create multiple perspectives
-        _viewing_angles = [
-            (20, 45, "Standard View"),
-            (60, 45, "Top-Down View"),
-            (20, 135, "Side View"),
-            (0, 45, "Aerial View")
-        ]
-
-        if create_animation:
-            # Create animation frames
-            angles = np.linspace(0, 360, 36)  # 36 frames for smooth animation
-            animation_frames = []
-
-            for angle in angles:
-                ax.view_init(elev=30, azim=angle)
-                frame_path = output_path.parent / f"frame_{int(angle):03d}.png"
-                fig.savefig(frame_path, dpi=150, bbox_inches='tight')
-                animation_frames.append(frame_path)
-
-            # Create GIF animation
-            try:
-                from PIL import Image
-                frames = [Image.open(frame) for frame in animation_frames]
-                gif_path = output_path.with_suffix('.gif')
-                frames[0].save(
-                    str(gif_path),
-                    save_all=True,
-                    append_images=frames[1:],
-                    duration=100,  # 100ms per frame = 10 fps
-                    loop=0
-                )
-
-                # Clean up frame files
-                for frame in animation_frames:
-                    frame.unlink()
+    spec = SurfaceSpec(
+        x=np.asarray(param1_values), y=np.asarray(param2_values), z=outcome_grid,
+        x_label=param1_name, y_label=param2_name, z_label=outcome_name,
+        title=title, standards=standards,
+    )
+    if create_animation:
+        # Rotating animation: mesh built once per worker, frames cached by content
+        animate_surface(spec, output_path, animation)
 
-                # Animation saved successfully
-
-            except ImportError:
-                # PIL not available for animation creation
-                pass
+    with journal_style(standards):
+        fig, ax = build_surface_figure(spec)
 
         # Set optimal viewing angle for static plot
         ax.view_init(elev=30, azim=45)
@@ -838,20 +772,17 @@ def plot_multi_dimensional_projection(
         else:
             color_map = None
 
-        # Plot each data point as a line with enhanced styling
-        lines = []
-        for idx, row in normalized_data.iterrows():
-            y_values = [row[dim] for dim in dimensions]
-
-            if color_map:
-                color = color_map[data.loc[idx, color_by]]
-                label = data.loc[idx, color_by] if idx == 0 else None
-                line = ax.plot(x_positions, y_values, color=color, linewidth=2, alpha=0.8,
-                             label=label, zorder=2)[0]
-            else:
-                line = ax.plot(x_positions, y_values, color='blue', linewidth=2, alpha=0.8, zorder=2)[0]
-
-            lines.append(line)
+        # Draw every data point as one segment of a single LineCollection,
+        # so large inputs stay one artist (rasterized on save when dense)
+        values = normalized_data[dimensions].to_numpy(dtype=float)
+        segments = np.stack([np.broadcast_to(x_positions, values.shape), values], axis=-1)
+        if color_map:
+            codes, uniques = pd.factorize(data.loc[normalized_data.index, color_by])
+            line_colors = np.array([color_map[value] for value in uniques])[codes]
+        else:
+            line_colors = 'blue'
+        ax.add_collection(LineCollection(segments, colors=line_colors, linewidths=2, alpha=0.8, zorder=2))
+        ax.autoscale_view()
 
         # Set x-ticks and labels
         ax.set_xticks(x_positions)
@@ -8,20 +8,30 @@ The base engine system provides:
 - Standardized interfaces for all analysis operations
 - Consistent input/output contracts
 - Built-in validation and error handling
-- Performance monitoring capabilities
-- Metadata tracking for provenance and reproducibility
+- Performance monitoring capabilities, with optional nested phase spans
+  (``core.tracing``) exportable as Chrome traces and flame graphs
+- Metadata tracking for provenance and reproducibility, with an optional
+  persistent run ledger (``core.run_ledger``)
 """
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Type
 from enum import Enum
+from contextlib import nullcontext
 import time
 import logging
 
+from ..core.hashing import hash_object
+from ..core.run_ledger import LedgerEntry, RunLedger, first_seed, output_digest
+from ..core.tracing import Span, Tracer, span
+
 # Configure logger for this module
 logger = logging.getLogger(__name__)
 
+# Engine config keys that control instrumentation, not results
+RUNTIME_CONFIG_KEYS = ('tracing', 'trace_memory', 'ledger', 'cache_size', 'persist_dir')
+
 
 class AnalysisType(Enum):
     """Enumeration of supported analysis types."""
@@ -84,6 +94,7 @@ class EngineOutput:
     errors: List[str] = field(default_factory=list)
     execution_time: Optional[float] = None
     memory_usage: Optional[float] = None
+    trace: Optional[Span] = None
 
 
 class BaseAnalysisEngine(ABC):
@@ -100,13 +111,22 @@ class BaseAnalysisEngine(ABC):
         Initialize the analysis engine.
 
         Args:
-            config: Configuration dictionary for engine parameters
+            config: Configuration dictionary for engine parameters. A truthy
+                ``tracing`` key gives the engine its own ``Tracer``
+                (``trace_memory`` toggles tracemalloc, default on); a
+                ``ledger`` path records every run in a ``RunLedger``
             metadata: Optional metadata describing the engine
         """
         self.config = config
         self.metadata = metadata or self._get_default_metadata()
         self._execution_history: List[Dict[str, Any]] = []
         self._is_initialized = False
+        self.tracer: Optional[Tracer] = None
+        if isinstance(config, dict) and config.get('tracing'):
+            self.tracer = Tracer(memory=config.get('trace_memory', True))
+        self.ledger: Optional[RunLedger] = None
+        if isinstance(config, dict) and config.get('ledger'):
+            self.ledger = RunLedger(config['ledger'])
 
         # Validate configuration
         self._validate_config()
@@ -191,6 +211,15 @@ class BaseAnalysisEngine(ABC):
         """
         Execute the analysis with standardized input/output handling.
 
+        When the engine has a tracer, or one is active in the caller's
+        context, the run is recorded as a span named after the engine with
+        ``load``, ``validate``, ``compute`` and ``record`` phases; spans
+        opened inside ``_run_analysis`` (e.g. ``span("pivot")``) nest under
+        ``compute``. The span is attached to the output as ``trace``.
+
+        With a ledger, every run (including failed ones) is appended to it
+        and the output metadata carries its ``run_id``.
+
         Args:
             input_data: Input data for the analysis
 
@@ -209,79 +238,73 @@ class BaseAnalysisEngine(ABC):
             except Exception as e:
                 raise RuntimeError(f"Failed to auto-initialize engine: {e}")
 
+        activation = self.tracer.activate() if self.tracer is not None else nullcontext()
+        with activation, span(self.metadata.name, analysis=self.metadata.analysis_type.value) as trace:
+            output = self._execute(input_data)
+        if trace is not None:
+            output.trace = trace
+            phases = trace.phase_times()
+            if phases:
+                slowest = max(phases, key=phases.get)
+                logger.info(f"{self.metadata.name} phases: slowest '{slowest}' "
+                            f"{phases[slowest]:.2f}s of {trace.duration:.2f}s")
+        if self.ledger is not None:
+            try:
+                entry = self.ledger.record(self._ledger_entry(input_data, output))
+                output.metadata['run_id'] = entry.run_id
+            except Exception as e:
+                logger.warning(f"Could not record {self.metadata.name} run in ledger {self.ledger.path}: {e}")
+        return output
+
+    def _ledger_entry(self, input_data: EngineInput, output: EngineOutput) -> LedgerEntry:
+        """Ledger row for one run: hashes, seed, timings and the output digest."""
+        try:
+            input_hash = output.metadata.get('input_hash') or self._hash_input(input_data)
+        except Exception:
+            input_hash = None
+        return LedgerEntry(
+            engine=self.metadata.name,
+            engine_version=self.metadata.version,
+            analysis=self.metadata.analysis_type.value,
+            input_hash=input_hash,
+            data_hash=hash_object(input_data.data, length=16),
+            config_hash=hash_object({
+                'engine': {k: v for k, v in self.config.items() if k not in RUNTIME_CONFIG_KEYS},
+                'config': input_data.config,
+                'parameters': input_data.parameters or {}
+            }, length=16),
+            seed=first_seed([input_data.parameters, input_data.config, self.config]),
+            duration_s=output.execution_time,
+            peak_memory_bytes=output.trace.peak_memory if output.trace is not None else None,
+            memory_delta_mb=output.memory_usage,
+            output_digest=output_digest(output.results),
+            success=not output.errors,
+            error='; '.join(output.errors) or None,
+            phases=output.trace.phase_times() if output.trace is not None else {},
+        )
+
+    def _execute(self, input_data: EngineInput) -> EngineOutput:
+        """Validate, run and record one analysis, returning an error output on failure."""
         # Start timing
         start_time = time.time()
         start_memory = self._get_memory_usage()
 
         try:
-            # If tests or callers pass a raw pandas.DataFrame (instead of PSAData-like
-            # container), wrap it in a lightweight compatibility object that exposes
-            # `.table`, `.strategies`, `.draws` and proxies DataFrame attributes.
-            try:
-                import pandas as _pd
-            except Exception:
-                _pd = None
-
-            if _pd is not None and isinstance(input_data.data, _pd.DataFrame):
-                df = input_data.data
-
-                class _PSADataLike:
-                    def __init__(self, df, perspective=None):
-                        self.table = df
-                        # Derive perspective from input config where possible
-                        self.perspective = perspective or (getattr(df, 'perspective', None) if hasattr(df, 'perspective') else None) or 'health_system'
-
-                    @property
-                    def strategies(self):
-                        return list(self.table['strategy'].unique())
-
-                    @property
-                    def draws(self):
-                        return _pd.sort_values(self.table['draw'].unique()) if hasattr(_pd, 'sort_values') else list(sorted(self.table['draw'].unique()))
-
-                    def __getattr__(self, item):
-                        # Delegate to underlying DataFrame where reasonable
-                        return getattr(self.table, item)
-
-                    def __bool__(self):
-                        # Treat as truthy in boolean contexts to avoid ambiguous DataFrame truth
-                        return True
-
-                input_data = EngineInput(
-                    data=_PSADataLike(df, perspective=input_data.config.get('perspective') if isinstance(input_data.config, dict) else None),
-                    config=input_data.config,
-                    metadata=input_data.metadata,
-                    parameters=input_data.parameters
-                )
+            with span('load'):
+                input_data = self._wrap_dataframe_input(input_data)
 
             # Validate input
-            self._validate_input(input_data)
+            with span('validate'):
+                self._validate_input(input_data)
 
             # Run analysis
-            results = self._run_analysis(input_data)
-
-            # Calculate execution metrics
-            execution_time = time.time() - start_time
-            memory_usage = self._get_memory_usage() - start_memory
-
-            # Create output
-            output = EngineOutput(
-                results=results,
-                metadata={
-                    'engine_name': self.metadata.name,
-                    'engine_version': self.metadata.version,
-                    'execution_timestamp': time.time(),
-                    'input_hash': self._hash_input(input_data),
-                    **(input_data.metadata or {})
-                },
-                execution_time=execution_time,
-                memory_usage=memory_usage
-            )
+            with span('compute'):
+                results = self._run_analysis(input_data)
 
-            # Record execution
-            self._record_execution(input_data, output)
+            with span('record'):
+                output = self._build_output(input_data, results, start_time, start_memory)
 
-            logger.info(f"Successfully completed {self.metadata.name} analysis in {execution_time:.2f}s")
+            logger.info(f"Successfully completed {self.metadata.name} analysis in {output.execution_time:.2f}s")
             return output
 
         except Exception as e:
@@ -301,6 +324,78 @@ class BaseAnalysisEngine(ABC):
                 execution_time=execution_time
             )
 
+    def _wrap_dataframe_input(self, input_data: EngineInput) -> EngineInput:
+        """
+        Wrap a raw DataFrame input in a PSAData-like container.
+
+        Tests and callers may pass a pandas.DataFrame instead of a PSAData-like
+        container; the wrapper exposes ``.table``, ``.strategies``, ``.draws``
+        and proxies DataFrame attributes. Other inputs pass through unchanged.
+        """
+        try:
+            import pandas as _pd
+        except Exception:
+            return input_data
+        if not isinstance(input_data.data, _pd.DataFrame):
+            return input_data
+        df = input_data.data
+
+        class _PSADataLike:
+            def __init__(self, df, perspective=None):
+                self.table = df
+                # Derive perspective from input config, else a single-valued perspective column
+                if perspective is None and 'perspective' in df.columns and df['perspective'].nunique() == 1:
+                    perspective = str(df['perspective'].iloc[0])
+                self.perspective = perspective or 'health_system'
+
+            @property
+            def strategies(self):
+                return list(self.table['strategy'].unique())
+
+            @property
+            def draws(self):
+                return _pd.sort_values(self.table['draw'].unique()) if hasattr(_pd, 'sort_values') else list(sorted(self.table['draw'].unique()))
+
+            def __getattr__(self, item):
+                # Delegate to underlying DataFrame where reasonable
+                return getattr(self.table, item)
+
+            def __bool__(self):
+                # Treat as truthy in boolean contexts to avoid ambiguous DataFrame truth
+                return True
+
+        return EngineInput(
+            data=_PSADataLike(df, perspective=input_data.config.get('perspective') if isinstance(input_data.config, dict) else None),
+            config=input_data.config,
+            metadata=input_data.metadata,
+            parameters=input_data.parameters
+        )
+
+    def _build_output(self, input_data: EngineInput, results: Any, start_time: float,
+                      start_memory: float) -> EngineOutput:
+        """Wrap results with execution metrics and metadata, and record the execution."""
+        # Calculate execution metrics
+        execution_time = time.time() - start_time
+        memory_usage = self._get_memory_usage() - start_memory
+
+        # Create output
+        output = EngineOutput(
+            results=results,
+            metadata={
+                'engine_name': self.metadata.name,
+                'engine_version': self.metadata.version,
+                'execution_timestamp': time.time(),
+                'input_hash': self._hash_input(input_data),
+                **(input_data.metadata or {})
+            },
+            execution_time=execution_time,
+            memory_usage=memory_usage
+        )
+
+        # Record execution
+        self._record_execution(input_data, output)
+        return output
+
     def _get_memory_usage(self) -> float:
         """
         Get current memory usage in MB.
@@ -319,26 +414,20 @@ class BaseAnalysisEngine(ABC):
         """
         Generate a hash of the input data for reproducibility tracking.
 
+        The data object, config and parameters are hashed by content, so
+        arrays and DataFrames contribute their values rather than a JSON dump.
+
         Args:
             input_data: Input data to hash
 
         Returns:
             String hash of the input data
         """
-        import hashlib
-        import json
-
-        # Create a normalized representation of the input
-        input_dict = {
-            'data_type': str(type(input_data.data)),
+        return hash_object({
+            'data': input_data.data,
             'config': input_data.config,
             'parameters': input_data.parameters or {}
-        }
-
-        # Convert to JSON string for consistent hashing
-        input_str = json.dumps(input_dict, sort_keys=True)
-
-        return hashlib.sha256(input_str.encode()).hexdigest()[:16]
+        }, length=16)
 
     def _record_execution(self, input_data: EngineInput, output: EngineOutput) -> None:
         """
@@ -350,7 +439,7 @@ class BaseAnalysisEngine(ABC):
         """
         execution_record = {
             'timestamp': time.time(),
-            'input_hash': self._hash_input(input_data),
+            'input_hash': output.metadata.get('input_hash') or self._hash_input(input_data),
             'execution_time': output.execution_time,
             'memory_usage': output.memory_usage,
             'success': len(output.errors) == 0,
@@ -0,0 +1,543 @@
+"""
+V4 Batch Analysis Runner
+
+Runs a manifest of analyses (inputs × jurisdictions × perspectives × analyses)
+against the PSA-based engines in ``trd_cea.models`` in a single process.
+
+Responsibilities:
+- Parse and validate analysis manifests (YAML)
+- Load each PSA input once and slice it by jurisdiction/perspective
+- Dispatch jobs to the CEA, VOI, DCEA and BIA engines in parallel
+- Write one consolidated long-format dataset indexed by
+  (input, jurisdiction, perspective, analysis) plus a JSON job index
+- Report load, validate, pivot, compute and save phases to an active
+  ``core.tracing`` tracer
+- Append every job to a ``core.run_ledger`` ledger when the manifest names one
+
+Example manifest::
+
+    inputs:
+      - data/sample/psa_sample_AU_healthcare.csv
+      - data/sample/psa_sample_NZ_healthcare.csv
+    jurisdictions: [AU, NZ]
+    perspectives: [healthcare, societal]
+    analyses: [cea, voi, dcea, bia]
+    wtp: {min: 0, max: 150000, step: 5000, default: 50000}
+    output: results/batch/batch_results.parquet
+    ledger: results/run_ledger.sqlite   # optional
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from ..core.hashing import hash_dataframe, hash_object
+from ..core.run_ledger import LedgerEntry, RunLedger, output_digest
+from ..core.tracing import span
+from .bia_engine import PopulationInputs, budget_impact, psa_cost_streams
+from .dcea_engine import run_dcea
+from .io import PSAData, StrategyConfig, load_psa
+from .psa_streaming import StreamingPSA
+from .voi_engine import calculate_evpi, calculate_evppi, evppi_parameter_names
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "ANALYSES",
+    "AnalysisManifest",
+    "BatchJob",
+    "BatchResult",
+    "run_batch",
+    "write_batch_result",
+]
+
+INDEX_COLUMNS = ["input", "jurisdiction", "perspective", "analysis"]
+RESULT_COLUMNS = INDEX_COLUMNS + ["strategy", "lambda", "year", "metric", "value"]
+
+# Eligible treated populations used by the V4 VOI analysis (run_v4_analysis)
+DEFAULT_POPULATION = {"AU": 75000, "NZ": 12500}
+
+BASE_CANDIDATES = ("UC", "Usual Care")
+
+
+@dataclass
+class AnalysisManifest:
+    """Specification of a batch of analyses."""
+
+    inputs: Dict[str, Path]
+    jurisdictions: List[str]
+    perspectives: List[str]
+    analyses: List[str]
+    lambda_grid: np.ndarray
+    decision_lambda: float = 50000.0
+    base: Optional[str] = None
+    strategies_yaml: Optional[Path] = None
+    output: Path = Path("results/batch/batch_results.parquet")
+    n_jobs: int = 4
+    options: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    ledger: Optional[Path] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], root: Optional[Path] = None) -> "AnalysisManifest":
+        """
+        Build a manifest from a parsed dictionary.
+
+        Args:
+            data: Manifest mapping
+            root: Directory that relative input paths are resolved against
+
+        Returns:
+            Validated AnalysisManifest
+        """
+        required = {"inputs", "jurisdictions", "perspectives", "analyses"}
+        missing = required - set(data)
+        if missing:
+            raise KeyError(f"Analysis manifest missing keys: {', '.join(sorted(missing))}")
+
+        root = Path(root) if root is not None else Path(".")
+        inputs: Dict[str, Path] = {}
+        for entry in data["inputs"]:
+            if isinstance(entry, dict):
+                path = Path(entry["path"])
+                name = str(entry.get("name", path.stem))
+            else:
+                path = Path(entry)
+                name = path.stem
+            if name in inputs:
+                raise ValueError(f"Duplicate input name '{name}' in manifest")
+            inputs[name] = path if path.is_absolute() else root / path
+
+        analyses = [str(a).lower() for a in data["analyses"]]
+        unknown = [a for a in analyses if a not in ANALYSES]
+        if unknown:
+            raise ValueError(f"Unknown analyses {unknown}. Available: {sorted(ANALYSES)}")
+
+        wtp = data.get("wtp", {}) or {}
+        lambda_grid = np.arange(
+            float(wtp.get("min", 0)),
+            float(wtp.get("max", 150000)) + float(wtp.get("step", 5000)) / 2,
+            float(wtp.get("step", 5000)),
+        )
+        strategies_yaml = data.get("strategies_yaml")
+
+        return cls(
+            inputs=inputs,
+            jurisdictions=[str(j) for j in data["jurisdictions"]],
+            perspectives=[str(p) for p in data["perspectives"]],
+            analyses=analyses,
+            lambda_grid=lambda_grid,
+            decision_lambda=float(wtp.get("default", 50000)),
+            base=data.get("base"),
+            strategies_yaml=Path(strategies_yaml) if strategies_yaml else None,
+            output=Path(data.get("output", cls.output)),
+            n_jobs=int(data.get("n_jobs", 4)),
+            options={str(k): dict(v or {}) for k, v in (data.get("options") or {}).items()},
+            ledger=Path(data["ledger"]) if data.get("ledger") else None,
+        )
+
+    @classmethod
+    def from_yaml(cls, path: Path) -> "AnalysisManifest":
+        """Load an analysis manifest from YAML; inputs resolve relative to the CWD."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Analysis manifest missing at '{path}'")
+        with path.open("r", encoding="utf-8") as handle:
+            data = yaml.safe_load(handle) or {}
+        return cls.from_dict(data)
+
+    def jobs(self) -> List["BatchJob"]:
+        """Expand the manifest into one job per input/jurisdiction/perspective/analysis."""
+        return [
+            BatchJob(name, jurisdiction, perspective, analysis)
+            for name in self.inputs
+            for jurisdiction in self.jurisdictions
+            for perspective in self.perspectives
+            for analysis in self.analyses
+        ]
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """One cell of the manifest grid."""
+
+    input: str
+    jurisdiction: str
+    perspective: str
+    analysis: str
+
+    @property
+    def key(self) -> Tuple[str, str, str, str]:
+        """(input, jurisdiction, perspective, analysis)."""
+        return (self.input, self.jurisdiction, self.perspective, self.analysis)
+
+
+@dataclass
+class BatchResult:
+    """Consolidated output of a batch run."""
+
+    results: pd.DataFrame   # Long format, one row per metric value
+    index: pd.DataFrame     # One row per job: status, rows, timing, input hash
+    output_path: Optional[Path] = None
+
+    def select(self, **keys: str) -> pd.DataFrame:
+        """Rows for a given input/jurisdiction/perspective/analysis combination."""
+        mask = np.ones(len(self.results), dtype=bool)
+        for column, value in keys.items():
+            mask &= (self.results[column] == value).to_numpy()
+        return self.results[mask]
+
+
+# ---------------------------------------------------------------------------
+# Analysis adapters: PSAData -> tidy frame with metric columns
+# ---------------------------------------------------------------------------
+
+
+def _wide(psa: PSAData, strategies: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    with span("pivot"):
+        cost = psa.table.pivot(index="draw", columns="strategy", values="cost")[strategies]
+        effect = psa.table.pivot(index="draw", columns="strategy", values="effect")[strategies]
+    return cost.to_numpy(dtype=float), effect.to_numpy(dtype=float)
+
+
+def _run_cea(psa: PSAData, manifest: AnalysisManifest, options: Dict[str, Any]) -> List[pd.DataFrame]:
+    strategies = list(psa.strategies)
+    cost, effect = _wide(psa, strategies)
+    summariser = StreamingPSA(
+        strategies,
+        manifest.lambda_grid,
+        decision_lambda=manifest.decision_lambda,
+        comparator=psa.config.base if psa.config.base in strategies else None,
+    )
+    summariser.update(cost, effect)
+    result = summariser.result()
+    at_decision = {"lambda": manifest.decision_lambda}
+    return [
+        result.summary.assign(**at_decision),
+        result.incremental.drop(columns="comparator").assign(**at_decision),
+        result.ceac,
+    ]
+
+
+def _run_voi(psa: PSAData, manifest: AnalysisManifest, options: Dict[str, Any]) -> List[pd.DataFrame]:
+    """
+    EVPI across the lambda grid, or EVPPI per parameter with ``type: evppi``.
+
+    EVPPI parameters default to the cost and effect names of every strategy in
+    the slice; each becomes an ``evppi_<parameter>`` metric.
+    """
+    voi_type = options.get("type", "evpi")
+    if voi_type == "evppi":
+        parameters = options.get("parameters") or evppi_parameter_names(psa.strategies)
+        evppi = calculate_evppi(psa, list(parameters), manifest.lambda_grid)
+        wide = evppi.pivot(index="lambda", columns="parameter", values="evppi")
+        return [wide[list(dict.fromkeys(parameters))].add_prefix("evppi_").reset_index()]
+    if voi_type != "evpi":
+        raise ValueError(f"Unsupported VOI type {voi_type!r}; expected 'evpi' or 'evppi'")
+    population = options.get("population", DEFAULT_POPULATION)
+    if isinstance(population, dict):
+        population = population.get(psa.jurisdiction)
+    result = calculate_evpi(
+        psa,
+        manifest.lambda_grid,
+        population_size=int(population) if population is not None else None,
+        time_horizon=int(options.get("time_horizon", 10)),
+        discount_rate=float(options.get("discount_rate", 0.05)),
+    )
+    return [result.evpi]
+
+
+def _run_dcea(psa: PSAData, manifest: AnalysisManifest, options: Dict[str, Any]) -> List[pd.DataFrame]:
+    """EDE-QALYs and Atkinson index; ``include_equity`` adds the equity-efficiency ratio."""
+    result = run_dcea(psa, epsilon=float(options.get("epsilon", 1.5)))
+    frames = [result.ede_qalys.drop(columns="epsilon"), result.atkinson_index.drop(columns="epsilon")]
+    if options.get("include_equity"):
+        impact = result.atkinson_index.merge(result.ede_qalys[["strategy", "mean_qalys"]], on="strategy")
+        ratio = impact["atkinson_index"] / impact["mean_qalys"].where(impact["mean_qalys"] > 0)
+        frames.append(pd.DataFrame({"strategy": impact["strategy"],
+                                    "equity_efficiency_ratio": ratio.fillna(0.0)}))
+    return frames
+
+
+def _run_bia(psa: PSAData, manifest: AnalysisManifest, options: Dict[str, Any]) -> List[pd.DataFrame]:
+    """
+    Cohort-flow budget impact per strategy for the eligible population.
+
+    ``options['population']`` is a number or ``PopulationInputs`` mapping,
+    optionally keyed by jurisdiction. Each year a share of new patients moves
+    from the base strategy to each comparator according to ``options['uptake']``
+    (strategy -> yearly shares, or a ``displacement`` matrix for other sources);
+    without an uptake schedule the whole population is costed per strategy.
+    ``options['budget_caps']`` adds the probability that the net impact exceeds
+    each cap, over all PSA draws.
+    """
+    years = int(options.get("years", 5))
+    population = options.get("population", DEFAULT_POPULATION)
+    if isinstance(population, dict) and not {"prevalent", "incident"} & set(population):
+        population = population.get(psa.jurisdiction, 0)
+    population = PopulationInputs.from_config(psa.jurisdiction, population)
+
+    strategies = [str(s) for s in pd.unique(psa.table["strategy"])]
+    base = psa.config.base
+    streams = psa_cost_streams(psa.table, strategies, years, options.get("cost_profile"))
+    uptake = {s: v for s, v in (options.get("uptake") or {}).items() if s in strategies}
+    result = budget_impact(streams, strategies, population, {base: 1.0}, uptake, options.get("displacement"))
+
+    table = result.strategy_table()
+    base_budget = table.loc[table["strategy"] == base].set_index("year")["budget"]
+    table["net_budget_impact"] = table["budget"] - table["year"].map(base_budget)
+    frames = []
+    if uptake:
+        summary = result.summary()
+        summary = summary[summary["horizon"] == "annual"]
+        frames.append(pd.DataFrame({
+            "year": summary["year"].to_numpy(),
+            "strategy": "scenario",
+            "budget": summary["scenario_budget"].to_numpy(),
+            "net_budget_impact": summary["net_budget_impact"].to_numpy(),
+            "net_budget_impact_lower": summary["net_budget_impact_lower"].to_numpy(),
+            "net_budget_impact_upper": summary["net_budget_impact_upper"].to_numpy(),
+        }))
+        caps = options.get("budget_caps")
+        if caps:
+            exceed = result.exceedance(caps)
+            exceed["metric"] = [f"prob_net_impact_exceeds_{cap:g}" for cap in exceed["cap"]]
+            wide = exceed.pivot(index="year", columns="metric", values="probability_exceeds")
+            frames.append(wide.rename_axis(columns=None).reset_index().assign(strategy="scenario"))
+    frames.append(table)
+    return frames
+
+
+ANALYSES: Dict[str, Callable[[PSAData, AnalysisManifest, Dict[str, Any]], List[pd.DataFrame]]] = {
+    "cea": _run_cea,
+    "voi": _run_voi,
+    "dcea": _run_dcea,
+    "bia": _run_bia,
+}
+
+
+def _to_long(frames: List[pd.DataFrame], job: BatchJob) -> pd.DataFrame:
+    """Melt analysis frames into the shared (strategy, lambda, year, metric, value) layout."""
+    parts = []
+    for frame in frames:
+        if frame.empty:
+            continue
+        id_vars = [c for c in ("strategy", "lambda", "year") if c in frame.columns]
+        value_vars = [c for c in frame.columns
+                      if c not in id_vars and pd.api.types.is_numeric_dtype(frame[c])]
+        long = frame.melt(id_vars=id_vars, value_vars=value_vars, var_name="metric", value_name="value")
+        parts.append(long)
+    if not parts:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    out = pd.concat(parts, ignore_index=True)
+    for column, value in zip(INDEX_COLUMNS, job.key):
+        out[column] = value
+    for column in ("strategy", "lambda", "year"):
+        if column not in out.columns:
+            out[column] = np.nan
+    out["strategy"] = out["strategy"].astype(object)
+    out["value"] = out["value"].astype(float)
+    return out[RESULT_COLUMNS]
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+
+def _strategy_config(manifest: AnalysisManifest, table: pd.DataFrame) -> StrategyConfig:
+    """Strategy configuration from the manifest YAML, or inferred from the PSA table."""
+    if manifest.strategies_yaml is not None:
+        return StrategyConfig.from_yaml(manifest.strategies_yaml)
+    strategies = [str(s) for s in pd.unique(table["strategy"])]
+    base = manifest.base or next((b for b in BASE_CANDIDATES if b in strategies), strategies[0])
+    return StrategyConfig(
+        base=base,
+        perspectives=[str(p) for p in pd.unique(table["perspective"])],
+        strategies=strategies,
+        prices={s: 0.0 for s in strategies},
+        effects_unit="QALYs",
+        currency="A$",
+    )
+
+
+def _load_slices(
+    name: str, path: Path, manifest: AnalysisManifest
+) -> Tuple[Dict[Tuple[str, str], PSAData], str]:
+    """
+    Load one PSA input and split it by (jurisdiction, perspective).
+
+    Returns:
+        Tuple of (slices keyed by requested jurisdiction/perspective, content hash)
+    """
+    with span("load", input=name):
+        table = load_psa(Path(path), strategies_yaml=manifest.strategies_yaml)
+    content_hash = hash_dataframe(table)[:16]
+    config = _strategy_config(manifest, table)
+    if manifest.base is not None:
+        config.base = manifest.base
+
+    available = [str(p) for p in pd.unique(table["perspective"])]
+    slices: Dict[Tuple[str, str], PSAData] = {}
+    for perspective in manifest.perspectives:
+        lookup = {p.lower().replace("_", ""): p for p in available}
+        stored = lookup.get(perspective.lower().replace("_", ""))
+        if stored is None:
+            continue
+        mask = table["perspective"] == stored
+        for jurisdiction in manifest.jurisdictions:
+            if "jurisdiction" in table.columns:
+                rows = table[mask & (table["jurisdiction"] == jurisdiction)]
+            else:
+                rows = table[mask]
+            if rows.empty:
+                continue
+            psa = PSAData(table=rows, config=config, perspective=perspective,
+                          jurisdiction=jurisdiction)
+            with span("validate", input=name, jurisdiction=jurisdiction, perspective=perspective):
+                psa.validate()
+            slices[(jurisdiction, perspective)] = psa
+    logger.info(f"Loaded {name}: {len(table)} rows, {len(slices)} jurisdiction/perspective slices")
+    return slices, content_hash
+
+
+def _run_job(job: BatchJob, psa: PSAData, manifest: AnalysisManifest) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    start = time.perf_counter()
+    trace = None
+    try:
+        with span("compute", job="/".join(job.key)) as trace:
+            frames = ANALYSES[job.analysis](psa, manifest, manifest.options.get(job.analysis, {}))
+            long = _to_long(frames, job)
+        status, error = "completed", None
+    except Exception as e:
+        logger.error(f"Job {job.key} failed: {e}")
+        long, status, error = pd.DataFrame(columns=RESULT_COLUMNS), "failed", str(e)
+    return long, {"status": status, "error": error, "rows": len(long),
+                  "seconds": time.perf_counter() - start, "trace": trace}
+
+
+def _ledger_entry(job: BatchJob, info: Dict[str, Any], long: pd.DataFrame, input_hash: str,
+                  manifest: AnalysisManifest) -> LedgerEntry:
+    """Ledger row for one job; the slice and the analysis settings form its identity."""
+    trace = info.get("trace")
+    return LedgerEntry(
+        engine=f"batch.{job.analysis}",
+        analysis=job.analysis,
+        input_hash=hash_object([input_hash, job.jurisdiction, job.perspective], length=16),
+        data_hash=input_hash,
+        config_hash=hash_object({
+            "options": manifest.options.get(job.analysis, {}),
+            "lambda_grid": manifest.lambda_grid,
+            "decision_lambda": manifest.decision_lambda,
+            "base": manifest.base,
+        }, length=16),
+        duration_s=info["seconds"],
+        peak_memory_bytes=trace.peak_memory if trace is not None else None,
+        output_digest=output_digest(long) if info["status"] == "completed" else None,
+        success=info["status"] == "completed",
+        error=info["error"],
+        context=dict(zip(INDEX_COLUMNS, job.key)),
+    )
+
+
+def run_batch(manifest: AnalysisManifest, write: bool = True) -> BatchResult:
+    """
+    Execute every job in a manifest and consolidate the results.
+
+    Each PSA input is read once; its jurisdiction/perspective slices are
+    shared by all analyses, which run concurrently on a thread pool.
+
+    Args:
+        manifest: Analysis manifest
+        write: Write the consolidated dataset and job index to ``manifest.output``
+
+    Returns:
+        BatchResult with long-format results and a per-job index
+    """
+    slices: Dict[Tuple[str, str, str], PSAData] = {}
+    hashes: Dict[str, str] = {}
+    for name, path in manifest.inputs.items():
+        input_slices, hashes[name] = _load_slices(name, path, manifest)
+        for (jurisdiction, perspective), psa in input_slices.items():
+            slices[(name, jurisdiction, perspective)] = psa
+
+    index_rows: List[Dict[str, Any]] = []
+    runnable = []
+    for job in manifest.jobs():
+        psa = slices.get(job.key[:3])
+        if psa is None:
+            index_rows.append({**dict(zip(INDEX_COLUMNS, job.key)), "status": "skipped",
+                               "error": "no rows for jurisdiction/perspective", "rows": 0,
+                               "seconds": 0.0, "input_hash": hashes[job.input]})
+        else:
+            runnable.append((job, psa))
+
+    logger.info(f"Running {len(runnable)} jobs with {manifest.n_jobs} workers")
+    parts = []
+    entries: List[LedgerEntry] = []
+    with ThreadPoolExecutor(max_workers=max(1, manifest.n_jobs)) as executor:
+        # Each job runs in a copy of this context so its spans nest under the caller's
+        futures = [(job, executor.submit(contextvars.copy_context().run, _run_job, job, psa, manifest))
+                   for job, psa in runnable]
+        for job, future in futures:
+            long, info = future.result()
+            parts.append(long)
+            if manifest.ledger is not None:
+                entries.append(_ledger_entry(job, info, long, hashes[job.input], manifest))
+            info.pop("trace")
+            index_rows.append({**dict(zip(INDEX_COLUMNS, job.key)), **info,
+                               "input_hash": hashes[job.input]})
+
+    results = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=RESULT_COLUMNS)
+    results = results.sort_values(INDEX_COLUMNS, kind="stable").reset_index(drop=True)
+    for column in INDEX_COLUMNS + ["metric"]:
+        results[column] = results[column].astype("category")
+    index = pd.DataFrame(index_rows).sort_values(INDEX_COLUMNS).reset_index(drop=True)
+
+    if entries:
+        RunLedger(manifest.ledger).append(entries)
+
+    batch = BatchResult(results=results, index=index)
+    if write:
+        batch.output_path = write_batch_result(batch, manifest)
+    return batch
+
+
+def write_batch_result(batch: BatchResult, manifest: AnalysisManifest) -> Path:
+    """
+    Write the consolidated results (Parquet or CSV by suffix) and a JSON job index.
+
+    Returns:
+        Path of the results file
+    """
+    output = Path(manifest.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with span("save", path=str(output)):
+        if output.suffix.lower() == ".csv":
+            batch.results.to_csv(output, index=False)
+        else:
+            batch.results.to_parquet(output, index=False)
+
+    index_path = output.with_name(f"{output.stem}_index.json")
+    with open(index_path, "w") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(),
+            "results_file": output.name,
+            "index_columns": INDEX_COLUMNS,
+            "inputs": {name: str(path) for name, path in manifest.inputs.items()},
+            "lambda_grid": manifest.lambda_grid.tolist(),
+            "decision_lambda": manifest.decision_lambda,
+            "jobs": batch.index.to_dict(orient="records"),
+        }, f, indent=2, default=str)
+    logger.info(f"Wrote {len(batch.results)} result rows to {output}")
+    return output
@@ -1,30 +1,358 @@
-import pandas as pd
+"""
+V4 Budget Impact Engine
+
+Cohort-flow budget impact analysis over every PSA draw at once.
+
+Responsibilities:
+- Jurisdiction-specific eligible populations: a prevalent pool treated in
+  year 1 plus incident patients entering every year
+- Reference and scenario market shares from uptake schedules for new
+  strategies and a displacement matrix saying whose share they take
+- Per-patient cost streams by year since treatment start, from PSA totals
+  or from the Markov cohort model in ``cea_engine``
+- Calendar-year budgets for all draws as one lagged tensor contraction,
+  with budget-impact intervals and exceedance probabilities for budget caps
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence, Union
+
 import numpy as np
+import pandas as pd
+
+from .cea_engine import _as_draws, get_costs, simulate_trace
+
+# Treated (eligible) patients per year used by the V4 VOI analysis
+DEFAULT_POPULATIONS = {"AU": 75000.0, "NZ": 12500.0}
+
 
 def adoption_curve(year, max_adoption=1.0, inflection=2.5, steepness=1.0):
     """Sigmoid adoption curve."""
     return max_adoption / (1 + np.exp(-steepness * (year - inflection)))
 
-def compute_bia(arm, jurisdiction, settings, inputs, base_arm='ECT_std'):
-    """Compute 5-year BIA for arm vs base."""
-    years = 5
-    results = []
-    for year in range(1, years + 1):
-        adoption = adoption_curve(year)
-        # TODO: Compute costs with constraints (theatre slots, anaesthetist FTE)
-        # For now, stub
-        cost = 100000 * adoption  # example
-        base_cost = 80000  # stub
-        incremental_cost = cost - base_cost
-        results.append({
-            'year': year,
-            'arm': arm,
-            'adoption': adoption,
-            'cost': cost,
-            'base_cost': base_cost,
-            'incremental_cost': incremental_cost
+
+@dataclass(frozen=True)
+class PopulationInputs:
+    """
+    Eligible TRD population for one jurisdiction.
+
+    ``prevalent`` patients start treatment in year 1; ``incident`` patients
+    start in every year (scalar or one value per year). Both are scaled by
+    ``treated_fraction``.
+    """
+
+    jurisdiction: str
+    prevalent: float = 0.0
+    incident: Union[float, Sequence[float]] = 0.0
+    treated_fraction: float = 1.0
+
+    def entrants(self, years: int) -> np.ndarray:
+        """Patients starting treatment in each year, shape (years,)."""
+        incident = np.asarray(self.incident, dtype=float)
+        if incident.ndim == 0:
+            incident = np.full(years, float(incident))
+        elif len(incident) < years:
+            incident = np.concatenate([incident, np.full(years - len(incident), incident[-1])])
+        flow = incident[:years].copy()
+        flow[0] += self.prevalent
+        return flow * self.treated_fraction
+
+    @classmethod
+    def from_config(cls, jurisdiction: str, data: Union[float, Mapping, None] = None) -> "PopulationInputs":
+        """
+        Population from a config value.
+
+        A number is the treated population starting each year (the V4
+        convention); a mapping may give ``prevalent``, ``incident`` and
+        ``treated_fraction``. Missing values fall back to ``DEFAULT_POPULATIONS``.
+        """
+        if data is None:
+            data = DEFAULT_POPULATIONS.get(jurisdiction, 0.0)
+        if not isinstance(data, Mapping):
+            return cls(jurisdiction, incident=float(data))
+        return cls(
+            jurisdiction,
+            prevalent=float(data.get("prevalent", 0.0)),
+            incident=data.get("incident", 0.0),
+            treated_fraction=float(data.get("treated_fraction", 1.0)),
+        )
+
+
+def uptake_curve(peak: float, years: int, inflection: float = 2.5, steepness: float = 1.0) -> np.ndarray:
+    """Sigmoid uptake share for years 1..``years``."""
+    return adoption_curve(np.arange(1, years + 1), peak, inflection, steepness)
+
+
+def _yearly(values: Union[float, Sequence[float], Mapping], years: int) -> np.ndarray:
+    """Broadcast a scalar, list or {year: value} mapping to ``years`` values (last value carried)."""
+    if isinstance(values, Mapping):
+        values = [values[k] for k in sorted(values)]
+    values = np.atleast_1d(np.asarray(values, dtype=float))
+    if len(values) < years:
+        values = np.concatenate([values, np.full(years - len(values), values[-1])])
+    return values[:years]
+
+
+def market_shares(
+    strategies: Sequence[str],
+    reference: Mapping[str, float],
+    uptake: Mapping[str, Union[float, Sequence[float], Mapping]],
+    years: int,
+    displacement: Optional[Mapping[str, Mapping[str, float]]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Reference and scenario shares of new patients by year.
+
+    Uptake of a strategy is taken from the others according to its row of
+    ``displacement`` (strategy -> {displaced strategy: fraction}); without a
+    row it displaces the reference mix of all other strategies pro rata.
+
+    Args:
+        strategies: Strategy order of the share arrays
+        reference: Current share of each strategy (missing strategies get 0)
+        uptake: Strategy -> scenario uptake share per year
+        years: Number of years
+        displacement: Optional displacement matrix rows
+
+    Returns:
+        Dict with ``reference`` and ``scenario`` arrays of shape (years, n_strategies)
+
+    Raises:
+        ValueError: If shares do not sum to one or any scenario share is negative
+    """
+    index = {s: i for i, s in enumerate(strategies)}
+    ref = np.array([float(reference.get(s, 0.0)) for s in strategies])
+    if not np.isclose(ref.sum(), 1.0):
+        raise ValueError(f"Reference shares sum to {ref.sum():.4f}, expected 1")
+
+    D = np.zeros((len(strategies), len(strategies)))
+    U = np.zeros((years, len(strategies)))
+    for strategy, values in uptake.items():
+        i = index[strategy]
+        U[:, i] = _yearly(values, years)
+        row = (displacement or {}).get(strategy)
+        if row is None:
+            others = ref.copy()
+            others[i] = 0.0
+            D[i] = others / others.sum() if others.sum() > 0 else 0.0
+        else:
+            D[i, [index[s] for s in row]] = list(row.values())
+            if not np.isclose(D[i].sum(), 1.0):
+                raise ValueError(f"Displacement of '{strategy}' sums to {D[i].sum():.4f}, expected 1")
+
+    # Each unit of new uptake adds to its own share and removes from displaced strategies
+    scenario = ref[None, :] + U - U @ D
+    if (scenario < -1e-12).any():
+        year, i = np.argwhere(scenario < -1e-12)[0]
+        raise ValueError(f"Uptake displaces more than the share of '{strategies[i]}' in year {year + 1}")
+    return {"reference": np.tile(ref, (years, 1)), "scenario": np.clip(scenario, 0.0, None)}
+
+
+def psa_cost_streams(
+    table: pd.DataFrame,
+    strategies: Sequence[str],
+    years: int,
+    profile: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    """
+    Per-patient cost streams from PSA cost totals.
+
+    Args:
+        table: PSA table with ``draw``, ``strategy`` and ``cost``
+        strategies: Strategy order
+        years: Years since treatment start to cover
+        profile: Share of the total cost incurred in each year since start
+            (default: all in the year treatment starts)
+
+    Returns:
+        Array (n_draws, n_strategies, years)
+    """
+    costs = table.pivot_table(index="draw", columns="strategy", values="cost", observed=True)
+    costs = costs.reindex(columns=list(strategies)).to_numpy(dtype=float)
+    weights = np.zeros(years)
+    if profile is None:
+        weights[0] = 1.0
+    else:
+        profile = np.asarray(profile, dtype=float)[:years]
+        weights[:len(profile)] = profile
+    return costs[:, :, None] * weights[None, None, :]
+
+
+def cohort_cost_streams(
+    arms: Sequence[str],
+    jurisdiction: str,
+    perspective: str,
+    settings: Dict,
+    inputs,
+    years: int,
+) -> np.ndarray:
+    """
+    Undiscounted per-patient cost by year since start from the Markov cohort model.
+
+    Cohort mass lost to death stops incurring cost, so the streams carry
+    survival; all parameter draws in ``inputs`` are simulated as one batch.
+
+    Returns:
+        Array (n_draws, n_arms, years)
+    """
+    cycles_per_year = int(round(12 / settings.get("cycle_length_months", 1)))
+    n_cycles = years * cycles_per_year
+    draws, _ = _as_draws(inputs)
+    streams = []
+    for arm in arms:
+        mass = simulate_trace(arm, draws, n_cycles).sum(axis=2)          # (D, T)
+        cost = np.array([get_costs(arm, jurisdiction, perspective, draws[0], c) for c in range(n_cycles)])
+        streams.append((mass * cost).reshape(len(draws), years, cycles_per_year).sum(axis=2))
+    return np.stack(streams, axis=1)
+
+
+def cohort_budgets(streams: np.ndarray, entrants: np.ndarray) -> np.ndarray:
+    """
+    Calendar-year budget per strategy if every entrant used that strategy.
+
+    The cohort starting in year ``s`` contributes ``stream[t - s]`` in year
+    ``t >= s``; all cohorts, strategies and draws are one contraction.
+
+    Args:
+        streams: Per-patient costs (n_draws, n_strategies, years)
+        entrants: Patients (or patients by strategy) starting each year,
+            shape (years,) or (years, n_strategies)
+
+    Returns:
+        Array (n_draws, n_strategies, years)
+    """
+    years = streams.shape[2]
+    lag = np.arange(years)[None, :] - np.arange(years)[:, None]           # (start, calendar)
+    lagged = np.where(lag >= 0, streams[:, :, np.clip(lag, 0, None)], 0.0)  # (D, A, s, t)
+    entrants = np.asarray(entrants, dtype=float)
+    if entrants.ndim == 1:
+        entrants = np.broadcast_to(entrants[:, None], (years, streams.shape[1]))
+    return np.einsum("sa,dast->dat", entrants, lagged)
+
+
+@dataclass
+class BIAResult:
+    """Budget impact for all PSA draws."""
+
+    strategies: list
+    jurisdiction: str
+    reference: np.ndarray        # (n_draws, years) budget under current shares
+    scenario: np.ndarray         # (n_draws, years) budget with new uptake
+    by_strategy: np.ndarray      # (n_draws, n_strategies, years) all entrants on one strategy
+    shares: Dict[str, np.ndarray]
+
+    @property
+    def years(self) -> np.ndarray:
+        return np.arange(1, self.reference.shape[1] + 1)
+
+    @property
+    def net(self) -> np.ndarray:
+        """Net budget impact per draw and year."""
+        return self.scenario - self.reference
+
+    def summary(self, confidence_level: float = 0.95) -> pd.DataFrame:
+        """Mean budgets and the net impact interval per year, plus a cumulative row."""
+        alpha = (1 - confidence_level) / 2
+        rows = []
+        for label, ref, scen in (("annual", self.reference, self.scenario),
+                                 ("cumulative", self.reference.cumsum(axis=1), self.scenario.cumsum(axis=1))):
+            net = scen - ref
+            rows.append(pd.DataFrame({
+                "year": self.years,
+                "horizon": label,
+                "reference_budget": ref.mean(axis=0),
+                "scenario_budget": scen.mean(axis=0),
+                "net_budget_impact": net.mean(axis=0),
+                "net_budget_impact_lower": np.quantile(net, alpha, axis=0),
+                "net_budget_impact_upper": np.quantile(net, 1 - alpha, axis=0),
+            }))
+        return pd.concat(rows, ignore_index=True)
+
+    def exceedance(self, caps: Sequence[float], cumulative: bool = False) -> pd.DataFrame:
+        """Probability that the net budget impact exceeds each cap, per year."""
+        caps = np.asarray(caps, dtype=float)
+        net = self.net.cumsum(axis=1) if cumulative else self.net
+        prob = (net[:, :, None] > caps[None, None, :]).mean(axis=0)       # (years, caps)
+        return pd.DataFrame({
+            "year": np.repeat(self.years, len(caps)),
+            "cap": np.tile(caps, len(self.years)),
+            "probability_exceeds": prob.ravel(),
         })
-    return pd.DataFrame(results)
+
+    def strategy_table(self) -> pd.DataFrame:
+        """Mean budget per year if all entrants used each strategy."""
+        mean = self.by_strategy.mean(axis=0)                              # (A, years)
+        return pd.DataFrame({
+            "year": np.tile(self.years, len(self.strategies)),
+            "strategy": np.repeat(self.strategies, len(self.years)),
+            "budget": mean.ravel(),
+        })
+
+
+def budget_impact(
+    streams: np.ndarray,
+    strategies: Sequence[str],
+    population: PopulationInputs,
+    reference_shares: Mapping[str, float],
+    uptake: Mapping[str, Union[float, Sequence[float], Mapping]],
+    displacement: Optional[Mapping[str, Mapping[str, float]]] = None,
+) -> BIAResult:
+    """
+    Cohort-flow budget impact across all draws.
+
+    Args:
+        streams: Per-patient cost streams (n_draws, n_strategies, years)
+        strategies: Strategy order of ``streams``
+        population: Eligible population inputs
+        reference_shares: Current market shares
+        uptake: Scenario uptake per new strategy and year
+        displacement: Optional displacement matrix rows (see ``market_shares``)
+
+    Returns:
+        BIAResult
+    """
+    years = streams.shape[2]
+    entrants = population.entrants(years)
+    shares = market_shares(strategies, reference_shares, uptake, years, displacement)
+    by_strategy = cohort_budgets(streams, entrants)
+    # Shares differ between entry cohorts, so entrants are split by strategy per cohort
+    reference = cohort_budgets(streams, entrants[:, None] * shares["reference"]).sum(axis=1)
+    scenario = cohort_budgets(streams, entrants[:, None] * shares["scenario"]).sum(axis=1)
+    return BIAResult(
+        strategies=list(strategies),
+        jurisdiction=population.jurisdiction,
+        reference=reference,
+        scenario=scenario,
+        by_strategy=by_strategy,
+        shares=shares,
+    )
+
+
+def compute_bia(arm, jurisdiction, settings, inputs, base_arm='ECT_std'):
+    """
+    Compute BIA for ``arm`` displacing ``base_arm`` with sigmoid adoption.
+
+    Costs come from the cohort model for every draw in ``inputs``; the
+    population is ``settings['bia']['population'][jurisdiction]`` (see
+    ``PopulationInputs.from_config``).
+    """
+    bia_settings = settings.get('bia', {})
+    years = int(bia_settings.get('years', 5))
+    perspective = bia_settings.get('perspective', 'health_system')
+    population = PopulationInputs.from_config(jurisdiction, bia_settings.get('population', {}).get(jurisdiction))
+    streams = cohort_cost_streams([base_arm, arm], jurisdiction, perspective, settings, inputs, years)
+    result = budget_impact(streams, [base_arm, arm], population, {base_arm: 1.0},
+                           {arm: adoption_curve(np.arange(1, years + 1))})
+    return pd.DataFrame({
+        'year': result.years,
+        'arm': arm,
+        'adoption': result.shares['scenario'][:, 1],
+        'cost': result.scenario.mean(axis=0),
+        'base_cost': result.reference.mean(axis=0),
+        'incremental_cost': result.net.mean(axis=0),
+    })
+
 
 def run_bia_all_arms(settings_path, inputs, out_dir='nextgen_v3/out/'):
     """Run BIA for all arms, output by jurisdiction."""
@@ -40,4 +368,4 @@ def run_bia_all_arms(settings_path, inputs, out_dir='nextgen_v3/out/'):
                 results.append(df)
         if results:
             all_df = pd.concat(results)
-            all_df.to_csv(f'{out_dir}/bia_summary_{jur}_v3.csv', index=False)
\ No newline at end of file
+            all_df.to_csv(f'{out_dir}/bia_summary_{jur}_v3.csv', index=False)
@@ -0,0 +1,580 @@
+"""
+V4 Engine Capabilities
+
+Concrete protocols behind the ``EngineCapabilities`` flags, and a harness
+that checks engines against the flags they declare.
+
+Responsibilities:
+- Chunked input iteration over PSA draws and per-chunk outputs
+  (MEMORY_EFFICIENT, STREAMING_OUTPUT)
+- Partial-result merging for incremental and sharded runs
+  (INCREMENTAL_RESULTS, PARALLEL_PROCESSING)
+- Content-derived cache keys with an in-memory result cache (CACHING)
+- Save/load hooks for outputs keyed by the same cache key (PERSISTENCE)
+- Conformance checks for every declared capability, and ``schedule_run``,
+  which shards or chunks a run only when the engine has the capability
+
+Engines opt in by listing protocol classes ahead of ``BaseAnalysisEngine``;
+each protocol adds its flags to the engine metadata::
+
+    class MeanCostEngine(CachedEngine, PersistentEngine, IncrementalEngine, BaseAnalysisEngine):
+        def merge_results(self, partials):
+            ...
+
+    report = check_conformance(MeanCostEngine({}), EngineInput(psa_table, {}))
+    assert report.passed, report.to_frame()
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import copy
+import dataclasses
+import inspect
+import math
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..core.hashing import hash_object
+from .base import RUNTIME_CONFIG_KEYS, BaseAnalysisEngine, EngineCapabilities, EngineInput, EngineOutput
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CACHE_SIZE = 32
+DEFAULT_STORE_DIR = Path("results/engine_store")
+
+
+def _declare(engine: BaseAnalysisEngine, *capabilities: EngineCapabilities) -> None:
+    """Add capabilities to an engine's metadata (once each)."""
+    for capability in capabilities:
+        if capability not in engine.metadata.capabilities:
+            engine.metadata.capabilities.append(capability)
+
+
+def _table(data: Any) -> Optional[pd.DataFrame]:
+    """The long PSA table behind a DataFrame or PSAData-like input, if any."""
+    if isinstance(data, pd.DataFrame):
+        return data
+    table = getattr(data, "table", None)
+    return table if isinstance(table, pd.DataFrame) else None
+
+
+def _with_table(data: Any, table: pd.DataFrame) -> Any:
+    """``data`` with its table replaced (DataFrames are returned as is)."""
+    if isinstance(data, pd.DataFrame):
+        return table
+    if dataclasses.is_dataclass(data):
+        return replace(data, table=table)
+    data = copy.copy(data)
+    data.table = table
+    return data
+
+
+def draw_count(data: Any) -> int:
+    """Distinct draws (or rows, without a ``draw`` column) in the input data; 0 if not tabular."""
+    table = _table(data)
+    if table is None:
+        return 0
+    return int(table["draw"].nunique()) if "draw" in table.columns else len(table)
+
+
+def same_results(a: Any, b: Any, rtol: float = 1e-9, atol: float = 1e-12) -> bool:
+    """Whether two results agree: dicts and sequences item by item, numbers to tolerance."""
+    if isinstance(a, pd.DataFrame) and isinstance(b, pd.DataFrame):
+        try:
+            pd.testing.assert_frame_equal(a, b, check_exact=False, rtol=rtol, atol=atol)
+            return True
+        except AssertionError:
+            return False
+    if isinstance(a, pd.Series) and isinstance(b, pd.Series):
+        try:
+            pd.testing.assert_series_equal(a, b, check_exact=False, rtol=rtol, atol=atol)
+            return True
+        except AssertionError:
+            return False
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same_results(a[k], b[k], rtol, atol) for k in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same_results(x, y, rtol, atol) for x, y in zip(a, b))
+    if isinstance(a, (np.ndarray, float, np.floating)) or isinstance(b, (np.ndarray, float, np.floating)):
+        try:
+            a, b = np.asarray(a), np.asarray(b)
+            return a.shape == b.shape and bool(np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True))
+        except TypeError:
+            return bool(np.array_equal(a, b))
+    return a == b
+
+
+class ChunkedEngine:
+    """
+    MEMORY_EFFICIENT and STREAMING_OUTPUT: run on draw chunks.
+
+    ``iter_chunks`` splits the PSA table into inputs holding at most
+    ``chunk_size`` draws each (every row of a draw stays in one chunk);
+    ``run_streaming`` yields one output per chunk as it completes, so only
+    one chunk's rows and results need to be alive at a time. Inputs without
+    a table are yielded whole.
+    """
+
+    def __init__(self, config: Dict[str, Any], metadata=None):
+        super().__init__(config, metadata)
+        _declare(self, EngineCapabilities.MEMORY_EFFICIENT, EngineCapabilities.STREAMING_OUTPUT)
+
+    def iter_chunks(self, input_data: EngineInput, chunk_size: Optional[int] = None) -> Iterator[EngineInput]:
+        """Inputs over consecutive draw chunks, with ``chunk``/``n_chunks`` in their metadata."""
+        chunk_size = int(chunk_size or self.config.get("chunk_size", DEFAULT_CHUNK_SIZE))
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        table = _table(input_data.data)
+        if table is None or table.empty:
+            yield input_data
+            return
+        if "draw" in table.columns:
+            codes, _ = pd.factorize(table["draw"], sort=True)
+        else:
+            codes = np.arange(len(table))
+        chunk_ids = codes // chunk_size
+        order = np.argsort(chunk_ids, kind="stable")
+        n_chunks = int(chunk_ids.max()) + 1
+        bounds = np.searchsorted(chunk_ids[order], np.arange(n_chunks + 1))
+        for index in range(n_chunks):
+            rows = table.iloc[order[bounds[index]:bounds[index + 1]]]
+            yield replace(input_data, data=_with_table(input_data.data, rows),
+                          metadata={**(input_data.metadata or {}), "chunk": index, "n_chunks": n_chunks})
+
+    def run_streaming(self, input_data: EngineInput, chunk_size: Optional[int] = None) -> Iterator[EngineOutput]:
+        """Run chunk by chunk, yielding each chunk's output."""
+        for chunk in self.iter_chunks(input_data, chunk_size):
+            yield self.run(chunk)
+
+
+class IncrementalEngine(ChunkedEngine, ABC):
+    """
+    INCREMENTAL_RESULTS and PARALLEL_PROCESSING: merge partial results.
+
+    Subclasses implement ``merge_results``, which combines the results of
+    runs on disjoint draw chunks into the result of one run on all of them.
+    It must also accept already merged results (so partial results can be
+    folded in one at a time), which means partial results need to carry
+    whatever weights the merge needs, e.g. draw counts alongside means.
+    """
+
+    def __init__(self, config: Dict[str, Any], metadata=None):
+        super().__init__(config, metadata)
+        _declare(self, EngineCapabilities.INCREMENTAL_RESULTS, EngineCapabilities.PARALLEL_PROCESSING)
+
+    @abstractmethod
+    def merge_results(self, partials: Sequence[Any]) -> Any:
+        """Combine results of disjoint chunks (or of earlier merges)."""
+        pass
+
+    def run_incremental(
+        self,
+        input_data: EngineInput,
+        chunk_size: Optional[int] = None,
+        callback: Optional[Callable[[Any, int], None]] = None,
+    ) -> EngineOutput:
+        """
+        Fold chunk results into a running result.
+
+        Args:
+            input_data: Full input
+            chunk_size: Draws per chunk (default: config ``chunk_size`` or 1000)
+            callback: Called with the result so far and the chunk index after
+                every chunk, e.g. to refresh a progress table
+
+        Returns:
+            Output whose results equal those of ``run(input_data)``; the first
+            failing chunk's errors are returned instead if any chunk fails
+        """
+        start = time.time()
+        merged, outputs = None, []
+        for index, output in enumerate(self.run_streaming(input_data, chunk_size)):
+            if output.errors:
+                return self._merged_output(input_data, [output], start)
+            merged = output.results if merged is None else self.merge_results([merged, output.results])
+            outputs.append(replace(output, results=None))
+            if callback is not None:
+                callback(merged, index)
+        return self._merged_output(input_data, outputs, start, merged)
+
+    def run_sharded(self, input_data: EngineInput, n_shards: int, max_workers: Optional[int] = None) -> EngineOutput:
+        """
+        Split the draws into ``n_shards`` chunks, run them on a thread pool and merge.
+
+        Shards run in a copy of the caller's context, so active tracers
+        record their spans.
+        """
+        start = time.time()
+        n_draws = draw_count(input_data.data)
+        if n_shards <= 1 or n_draws <= 1:
+            return self.run(input_data)
+        shards = list(self.iter_chunks(input_data, math.ceil(n_draws / n_shards)))
+        with ThreadPoolExecutor(max_workers=max_workers or len(shards)) as executor:
+            outputs = list(executor.map(lambda shard: contextvars.copy_context().run(self.run, shard), shards))
+        failed = [output for output in outputs if output.errors]
+        if failed:
+            return self._merged_output(input_data, failed, start)
+        return self._merged_output(input_data, outputs, start, self.merge_results([o.results for o in outputs]))
+
+    def _merged_output(self, input_data: EngineInput, outputs: List[EngineOutput], start: float,
+                       results: Any = None) -> EngineOutput:
+        """One output for a chunked run (results ``None`` when any part failed)."""
+        errors = [error for output in outputs for error in output.errors]
+        return EngineOutput(
+            results=None if errors else results,
+            metadata={
+                "engine_name": self.metadata.name,
+                "engine_version": self.metadata.version,
+                "execution_timestamp": time.time(),
+                "input_hash": self._hash_input(input_data),
+                "chunks": len(outputs),
+                **(input_data.metadata or {}),
+            },
+            warnings=[warning for output in outputs for warning in output.warnings],
+            errors=errors,
+            execution_time=time.time() - start,
+        )
+
+
+class _KeyedEngine:
+    """Shared cache key derivation for the caching and persistence protocols."""
+
+    def cache_key(self, input_data: EngineInput) -> str:
+        """
+        Content hash of everything that determines the results.
+
+        Covers the engine name and version, its configuration (minus
+        runtime-only keys such as ``tracing`` or ``ledger``) and the input
+        data, config and parameters.
+        """
+        return hash_object({
+            "engine": self.metadata.name,
+            "version": self.metadata.version,
+            "config": {k: v for k, v in self.config.items() if k not in RUNTIME_CONFIG_KEYS},
+            "input": self._hash_input(input_data),
+        }, length=24)
+
+
+class CachedEngine(_KeyedEngine):
+    """
+    CACHING: reuse outputs of identical inputs within the process.
+
+    Successful outputs are kept in a least-recently-used cache of config
+    ``cache_size`` entries (default 32). Hits return the stored output with
+    ``cache_hit`` set in the metadata; results are shared, not copied.
+    """
+
+    def __init__(self, config: Dict[str, Any], metadata=None):
+        super().__init__(config, metadata)
+        _declare(self, EngineCapabilities.CACHING)
+        self._result_cache: "OrderedDict[str, EngineOutput]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+
+    def run(self, input_data: EngineInput) -> EngineOutput:
+        key = self.cache_key(input_data)
+        with self._cache_lock:
+            cached = self._result_cache.get(key)
+            if cached is not None:
+                self._result_cache.move_to_end(key)
+                self.cache_hits += 1
+        if cached is not None:
+            return replace(cached, metadata={**cached.metadata, "cache_key": key, "cache_hit": True})
+        output = super().run(input_data)
+        if not output.errors:
+            output.metadata.update(cache_key=key, cache_hit=False)
+            with self._cache_lock:
+                self._result_cache[key] = output
+                while len(self._result_cache) > int(self.config.get("cache_size", DEFAULT_CACHE_SIZE)):
+                    self._result_cache.popitem(last=False)
+        return output
+
+    def clear_cache(self) -> None:
+        """Drop cached outputs."""
+        with self._cache_lock:
+            self._result_cache.clear()
+
+
+class PersistentEngine(_KeyedEngine):
+    """
+    PERSISTENCE: store outputs on disk and reload them in later processes.
+
+    Outputs are pickled to ``<persist_dir>/<engine>/<cache key>.pkl``
+    (config ``persist_dir``, default ``results/engine_store``) without their
+    trace. Only load stores written by trusted runs.
+    """
+
+    def __init__(self, config: Dict[str, Any], metadata=None):
+        super().__init__(config, metadata)
+        _declare(self, EngineCapabilities.PERSISTENCE)
+
+    @property
+    def store_dir(self) -> Path:
+        return Path(self.config.get("persist_dir", DEFAULT_STORE_DIR)) / self.metadata.name
+
+    def save_output(self, key: str, output: EngineOutput) -> Path:
+        """Write an output atomically under ``key``."""
+        path = self.store_dir / f"{key}.pkl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(handle, "wb") as stream:
+            pickle.dump(replace(output, trace=None), stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return path
+
+    def load_output(self, key: str) -> Optional[EngineOutput]:
+        """The output stored under ``key``, if any."""
+        path = self.store_dir / f"{key}.pkl"
+        if not path.exists():
+            return None
+        with open(path, "rb") as stream:
+            return pickle.load(stream)
+
+    def run(self, input_data: EngineInput) -> EngineOutput:
+        key = self.cache_key(input_data)
+        stored = self.load_output(key)
+        if stored is not None:
+            stored.metadata.update(cache_key=key, persisted=True)
+            return stored
+        output = super().run(input_data)
+        if not output.errors:
+            self.save_output(key, output)
+            output.metadata.update(cache_key=key, persisted=False)
+        return output
+
+
+@dataclass
+class CapabilityCheck:
+    """Outcome of one conformance check."""
+
+    capability: EngineCapabilities
+    passed: bool
+    detail: str = ""
+
+
+@dataclass
+class ConformanceReport:
+    """Conformance of one engine with the capabilities it declares."""
+
+    engine: str
+    declared: List[EngineCapabilities]
+    checks: List[CapabilityCheck] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return all(check.passed for check in self.checks)
+
+    @property
+    def verified(self) -> List[EngineCapabilities]:
+        """Declared capabilities whose checks all passed."""
+        failed = {check.capability for check in self.checks if not check.passed}
+        return [capability for capability in self.declared if capability not in failed]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([{"engine": self.engine, "capability": check.capability.value,
+                              "passed": check.passed, "detail": check.detail} for check in self.checks],
+                            columns=["engine", "capability", "passed", "detail"])
+
+
+def _check_chunks(engine, sample, chunk_size) -> Tuple[bool, str]:
+    if not hasattr(engine, "iter_chunks"):
+        return False, "no iter_chunks"
+    chunks = list(engine.iter_chunks(sample, chunk_size))
+    table = _table(sample.data)
+    if table is None:
+        return len(chunks) == 1, f"{len(chunks)} chunks of untabular input"
+    tables = [_table(chunk.data) for chunk in chunks]
+    key = "draw" if "draw" in table.columns else None
+    sizes = [part[key].nunique() if key else len(part) for part in tables]
+    rows = sum(len(part) for part in tables)
+    if rows != len(table):
+        return False, f"chunks hold {rows} of {len(table)} rows"
+    if max(sizes) > chunk_size:
+        return False, f"chunk of {max(sizes)} draws exceeds {chunk_size}"
+    if key and sum(sizes) != table[key].nunique():
+        return False, "a draw is split across chunks"
+    return True, f"{len(chunks)} chunks of <= {chunk_size} draws"
+
+
+def _check_streaming(engine, sample, chunk_size) -> Tuple[bool, str]:
+    if not hasattr(engine, "run_streaming"):
+        return False, "no run_streaming"
+    stream = engine.run_streaming(sample, chunk_size)
+    if not inspect.isgenerator(stream):
+        return False, "run_streaming is not lazy"
+    outputs = list(stream)
+    failed = [o for o in outputs if o.errors]
+    if failed:
+        return False, f"chunk failed: {failed[0].errors[0]}"
+    expected = max(1, math.ceil(draw_count(sample.data) / chunk_size))
+    return len(outputs) == expected, f"{len(outputs)} outputs for {expected} chunks"
+
+
+def _check_merge(run: Callable[[], EngineOutput], reference: EngineOutput, label: str) -> Tuple[bool, str]:
+    output = run()
+    if output.errors:
+        return False, f"{label} run failed: {output.errors[0]}"
+    if not same_results(output.results, reference.results):
+        return False, f"{label} results differ from a single run"
+    return True, f"{label} results match a single run"
+
+
+def _check_cache(engine, sample) -> Tuple[bool, str]:
+    key = engine.cache_key(sample)
+    if engine.cache_key(copy.deepcopy(sample)) != key:
+        return False, "cache key is not stable"
+    changed = replace(sample, parameters={**(sample.parameters or {}), "_conformance_probe": 1})
+    if engine.cache_key(changed) == key:
+        return False, "cache key ignores parameters"
+    table = _table(sample.data)
+    if table is not None and len(table) > 1 and engine.cache_key(
+            replace(sample, data=_with_table(sample.data, table.iloc[:-1]))) == key:
+        return False, "cache key ignores data"
+    first, second = engine.run(sample), engine.run(sample)
+    if not second.metadata.get("cache_hit") and not second.metadata.get("persisted"):
+        return False, "repeated run was not served from the cache"
+    if not same_results(first.results, second.results):
+        return False, "cached results differ"
+    return True, "stable key; repeated run served from cache"
+
+
+def _check_persistence(engine, sample) -> Tuple[bool, str]:
+    directory = Path(tempfile.mkdtemp(prefix="trd_cea_conformance_"))
+    try:
+        config = {**engine.config, "persist_dir": str(directory)}
+        writer, reader = type(engine)(config), type(engine)(config)
+        first = writer.run(sample)
+        if first.errors:
+            return False, f"run failed: {first.errors[0]}"
+        key = writer.cache_key(sample)
+        if reader.load_output(key) is None:
+            return False, "nothing stored for the run"
+        second = reader.run(sample)
+        if not second.metadata.get("persisted"):
+            return False, "a new engine instance did not reload the stored output"
+        if not same_results(first.results, second.results):
+            return False, "reloaded results differ"
+        return True, "output reloaded by a new engine instance"
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _check_async(engine, sample, reference) -> Tuple[bool, str]:
+    if not inspect.iscoroutinefunction(getattr(engine, "run_async", None)):
+        return False, "no async run_async"
+    output = asyncio.run(engine.run_async(sample))
+    if output.errors or not same_results(output.results, reference.results):
+        return False, "run_async differs from run"
+    return True, "run_async matches run"
+
+
+def _check_validation(engine, sample) -> Tuple[bool, str]:
+    table = _table(sample.data)
+    invalid = replace(sample, data=_with_table(sample.data, table.iloc[0:0]) if table is not None else None)
+    output = engine.run(invalid)
+    if not output.errors:
+        return False, "empty input was accepted"
+    return True, f"empty input rejected: {output.errors[0]}"
+
+
+def check_conformance(
+    engine: Union[BaseAnalysisEngine, type],
+    sample: EngineInput,
+    chunk_size: Optional[int] = None,
+    n_shards: int = 3,
+) -> ConformanceReport:
+    """
+    Check an engine's behaviour against every capability it declares.
+
+    Args:
+        engine: Engine instance, or class (instantiated with an empty config)
+        sample: Valid input with enough draws for several chunks
+        chunk_size: Draws per chunk (default: about a quarter of the draws)
+        n_shards: Shards for the parallel check
+
+    Returns:
+        ConformanceReport with one check per declared capability (chunking
+        capabilities also check the chunk iterator); checks that raise
+        fail with the exception as their detail
+    """
+    if isinstance(engine, type):
+        engine = engine({})
+    store = Path(tempfile.mkdtemp(prefix="trd_cea_conformance_"))
+    try:
+        if isinstance(engine, PersistentEngine):
+            # Keep the checks' outputs out of the engine's real store
+            engine = type(engine)({**engine.config, "persist_dir": str(store)})
+        return _check_declared(engine, sample, chunk_size, n_shards)
+    finally:
+        shutil.rmtree(store, ignore_errors=True)
+
+
+def _check_declared(engine: BaseAnalysisEngine, sample: EngineInput, chunk_size: Optional[int],
+                    n_shards: int) -> ConformanceReport:
+    declared = list(engine.get_capabilities())
+    report = ConformanceReport(engine.metadata.name, declared)
+    chunk_size = chunk_size or max(1, math.ceil(draw_count(sample.data) / 4))
+
+    needs_reference = {EngineCapabilities.INCREMENTAL_RESULTS, EngineCapabilities.PARALLEL_PROCESSING,
+                       EngineCapabilities.ASYNC_EXECUTION}
+    reference = None
+    if needs_reference & set(declared):
+        reference = engine.run(sample)
+
+    checks = {
+        EngineCapabilities.MEMORY_EFFICIENT: lambda: _check_chunks(engine, sample, chunk_size),
+        EngineCapabilities.STREAMING_OUTPUT: lambda: _check_streaming(engine, sample, chunk_size),
+        EngineCapabilities.INCREMENTAL_RESULTS: lambda: _check_merge(
+            lambda: engine.run_incremental(sample, chunk_size), reference, "incremental"),
+        EngineCapabilities.PARALLEL_PROCESSING: lambda: _check_merge(
+            lambda: engine.run_sharded(sample, n_shards), reference, "sharded"),
+        EngineCapabilities.CACHING: lambda: _check_cache(engine, sample),
+        EngineCapabilities.PERSISTENCE: lambda: _check_persistence(engine, sample),
+        EngineCapabilities.ASYNC_EXECUTION: lambda: _check_async(engine, sample, reference),
+        EngineCapabilities.VALIDATION: lambda: _check_validation(engine, sample),
+    }
+    for capability in declared:
+        if reference is not None and reference.errors and capability in needs_reference:
+            report.checks.append(CapabilityCheck(capability, False, f"reference run failed: {reference.errors[0]}"))
+            continue
+        try:
+            passed, detail = checks[capability]()
+        except Exception as e:
+            passed, detail = False, f"{type(e).__name__}: {e}"
+        report.checks.append(CapabilityCheck(capability, passed, detail))
+    return report
+
+
+def schedule_run(
+    engine: BaseAnalysisEngine,
+    input_data: EngineInput,
+    n_shards: int = 1,
+    chunk_size: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> EngineOutput:
+    """
+    Run an engine the cheapest way it supports.
+
+    Shards across threads when more than one shard is requested and the
+    engine declares PARALLEL_PROCESSING, folds chunks incrementally when a
+    chunk size is given and it declares INCREMENTAL_RESULTS, and otherwise
+    makes a single ``run`` call.
+    """
+    if n_shards > 1 and engine.supports_capability(EngineCapabilities.PARALLEL_PROCESSING):
+        return engine.run_sharded(input_data, n_shards, max_workers)
+    if chunk_size and engine.supports_capability(EngineCapabilities.INCREMENTAL_RESULTS):
+        return engine.run_incremental(input_data, chunk_size)
+    return engine.run(input_data)
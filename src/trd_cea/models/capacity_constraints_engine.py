@@ -10,7 +10,8 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Any
 import numpy as np
 import pandas as pd
-import math
+from .capacity_des import COURSES, ServiceSpec, simulate_capacity
+from .queueing import queue_metrics
 
 
 @dataclass
@@ -63,53 +64,37 @@ class QueueingModel:
             raise ValueError("System is unstable (ρ ≥ 1)")
     
     def waiting_time_distribution(self, n_patients: int = 10000) -> Dict[str, float]:
-        """Calculate waiting time distribution metrics."""
-        if self.servers == 1:
-            # M/M/1 queue
-            mean_waiting_time = self.utilization / (self.service_rate * (1 - self.utilization))
-            _var_waiting_time = (self.utilization / (self.service_rate ** 2 * (1 - self.utilization) ** 2))
-        else:
-            # M/M/c queue approximation
-            c = self.servers
-            rho = self.utilization
-            
-            # Erlang C formula for probability of waiting
-            def erlang_c(c, rho):
-                if rho >= 1:
-                    return 1
-                sum_term = sum((c * rho) ** k / math.factorial(k) for k in range(c))
-                return (c * rho) ** c / (math.factorial(c) * (1 - rho)) / (
-                    sum_term + (c * rho) ** c / (math.factorial(c) * (1 - rho))
-                )
-            
-            p_wait = erlang_c(c, rho)
-            mean_waiting_time = p_wait / (c * self.service_rate * (1 - rho))
-            _var_waiting_time = (p_wait * (1 + c * (1 - rho) * (c * rho) ** (c - 1) / 
-                                         ((c * rho) ** c / math.factorial(c)) ** 2)) / (
-                                         c * self.service_rate * (1 - rho)) ** 2
+        """
+        Calculate waiting time distribution metrics.
         
-        # Generate sample waiting times
-        if self.servers == 1:
-            waiting_times = np.random.exponential(1 / (self.service_rate * (1 - self.utilization)), n_patients)
-        else:
-            # Approximation for M/M/c
-            waiting_times = np.random.exponential(1 / (self.servers * self.service_rate * (1 - self.utilization)), n_patients)
+        Args:
+            n_patients: Cohort size; ``max_waiting_time`` is the wait exceeded
+                with probability 1/n_patients
+        """
+        metrics = queue_metrics(
+            self.arrival_rate, self.service_rate, self.servers,
+            quantiles=(0.5, 0.95, 0.99, 1 - 1 / n_patients)
+        )
+        max_key = f"wait_q{round((1 - 1 / n_patients) * 100):02d}"
         
         return {
-            "mean_waiting_time": mean_waiting_time,
-            "median_waiting_time": np.median(waiting_times),
-            "p95_waiting_time": np.percentile(waiting_times, 95),
-            "p99_waiting_time": np.percentile(waiting_times, 99),
-            "max_waiting_time": np.max(waiting_times),
+            "mean_waiting_time": float(metrics["mean_waiting_time"]),
+            "median_waiting_time": float(metrics["wait_q50"]),
+            "p95_waiting_time": float(metrics["wait_q95"]),
+            "p99_waiting_time": float(metrics["wait_q99"]),
+            "max_waiting_time": float(metrics[max_key]),
             "utilization_rate": self.utilization,
-            "probability_waiting": p_wait if self.servers > 1 else self.utilization
+            "probability_waiting": float(metrics["probability_waiting"])
         }
 
 
 def analyze_capacity_constraints(
     treatment_demand: pd.DataFrame,
     resource_capacity: Dict[str, float],
-    time_horizon: int = 365
+    time_horizon: int = 365,
+    method: str = "analytic",
+    n_replications: int = 200,
+    seed: Optional[int] = None
 ) -> CapacityConstraintResult:
     """
     Analyze capacity constraints for treatment implementation.
@@ -118,6 +103,11 @@ def analyze_capacity_constraints(
         treatment_demand: DataFrame with treatment demand by strategy
         resource_capacity: Dictionary of resource capacities
         time_horizon: Analysis time horizon in days
+        method: "analytic" (M/M/c queue per course) or "des" (session-level
+            discrete-event simulation with multi-session courses; capacity
+            is then sessions per day)
+        n_replications: Replications per scenario for "des"
+        seed: Random seed for "des"
         
     Returns:
         Capacity constraint analysis results
@@ -151,41 +141,46 @@ def analyze_capacity_constraints(
         for capacity_multiplier in capacity_scenarios:
             available_capacity = resource_capacity.get("treatment_slots", 10) * capacity_multiplier
             
-            try:
-                # Create queueing model
-                model = QueueingModel(daily_demand, service_rate, int(available_capacity))
-                waiting_stats = model.waiting_time_distribution()
-                
+            if method == "des":
                 results.append({
                     "strategy": strategy,
                     "capacity_multiplier": capacity_multiplier,
                     "available_capacity": available_capacity,
                     "daily_demand": daily_demand,
-                    "utilization_rate": waiting_stats["utilization_rate"],
-                    "mean_waiting_days": waiting_stats["mean_waiting_time"],
-                    "median_waiting_days": waiting_stats["median_waiting_time"],
-                    "p95_waiting_days": waiting_stats["p95_waiting_time"],
-                    "probability_waiting": waiting_stats["probability_waiting"],
-                    "bottleneck_indicator": "High" if waiting_stats["utilization_rate"] > 0.8 else 
-                                          "Medium" if waiting_stats["utilization_rate"] > 0.6 else "Low"
-                })
-                
-            except ValueError:
-                # Unstable system
-                results.append({
-                    "strategy": strategy,
-                    "capacity_multiplier": capacity_multiplier,
-                    "available_capacity": available_capacity,
-                    "daily_demand": daily_demand,
-                    "utilization_rate": float('inf'),
-                    "mean_waiting_days": float('inf'),
-                    "median_waiting_days": float('inf'),
-                    "p95_waiting_days": float('inf'),
-                    "probability_waiting": 1.0,
-                    "bottleneck_indicator": "Critical"
+                    **_simulated_waiting_stats(strategy, daily_demand, available_capacity,
+                                               time_horizon, n_replications, seed)
                 })
+                continue
+            
+            results.append({
+                "strategy": strategy,
+                "capacity_multiplier": capacity_multiplier,
+                "available_capacity": available_capacity,
+                "daily_demand": daily_demand,
+                "service_rate": service_rate
+            })
     
     results_df = pd.DataFrame(results)
+    if method != "des":
+        # All strategy x capacity scenarios in one kernel call
+        metrics = queue_metrics(
+            results_df["daily_demand"].to_numpy(dtype=float),
+            results_df["service_rate"].to_numpy(dtype=float),
+            np.floor(results_df["available_capacity"].to_numpy(dtype=float))
+        )
+        stable = metrics["stable"]
+        utilization = metrics["utilization"]
+        results_df = results_df.drop(columns="service_rate").assign(
+            utilization_rate=np.where(stable, utilization, np.inf),
+            mean_waiting_days=metrics["mean_waiting_time"],
+            median_waiting_days=metrics["wait_q50"],
+            p95_waiting_days=metrics["wait_q95"],
+            probability_waiting=metrics["probability_waiting"],
+            bottleneck_indicator=np.select(
+                [~stable, utilization > 0.8, utilization > 0.6],
+                ["Critical", "High", "Medium"], default="Low"
+            )
+        )
     
     # Create summary DataFrames
     waiting_times = results_df[["strategy", "capacity_multiplier", "mean_waiting_days", 
@@ -225,6 +220,36 @@ def analyze_capacity_constraints(
     )
 
 
+def _simulated_waiting_stats(
+    strategy: str,
+    daily_demand: float,
+    sessions_per_day: float,
+    time_horizon: int,
+    n_replications: int,
+    seed: Optional[int]
+) -> Dict[str, Any]:
+    """Waiting-time metrics for one capacity scenario from the discrete-event simulator."""
+    # Strategies without a session-based course need a single appointment
+    service = COURSES.get(strategy, ServiceSpec(strategy, sessions=1, sessions_per_week=7))
+    sim = simulate_capacity(service, sessions_per_day, daily_demand, horizon_days=time_horizon,
+                            n_replications=n_replications, seed=seed)
+    summary = sim.summary.iloc[0]
+    waits = sim.wait_distribution
+    utilization = float(summary["utilization"])
+    backlog = float(summary["still_waiting_mean"]) / max(float(summary["arrived_mean"]), 1.0)
+    return {
+        "utilization_rate": utilization,
+        "mean_waiting_days": float(summary["mean_wait_days"]),
+        "median_waiting_days": float(summary["median_wait_days"]),
+        "p95_waiting_days": float(summary["p95_wait_days"]),
+        "probability_waiting": float(waits.loc[waits["wait_days"] > 0, "probability"].sum()),
+        # A backlog still waiting at the horizon means demand outgrew capacity
+        "bottleneck_indicator": "Critical" if backlog > 0.05 else
+                                "High" if utilization > 0.8 else
+                                "Medium" if utilization > 0.6 else "Low"
+    }
+
+
 def analyze_implementation_costs(
     treatment_volumes: pd.DataFrame,
     cost_parameters: Dict[str, Any],
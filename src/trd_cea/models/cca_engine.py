@@ -22,7 +22,7 @@ from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 
-from trd_cea.core.io import load_psa
+from trd_cea.models.io import load_psa
 
 
 @dataclass
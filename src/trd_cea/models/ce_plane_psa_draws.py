@@ -23,6 +23,7 @@ if script_dir.name in ('main.py', 'run.py'):
 sys.path.insert(0, str(script_dir.parent))
 
 from trd_cea.core.logging_config import get_default_logging_config, setup_analysis_logging  # noqa: E402
+from trd_cea.plotting.dense_scatter import scatter_layer  # noqa: E402
 
 logging_config = get_default_logging_config()
 logging_config.level = "INFO"
@@ -95,24 +96,19 @@ def plot_ce_plane(psa: pd.DataFrame, country: str, perspective: str, output: Pat
     """Create a combined CE plane using raw PSA draws."""
     output.parent.mkdir(parents=True, exist_ok=True)
 
-    strategies = list(psa["strategy"].unique())
-    colour_cycle = PALETTE * ((len(strategies) // len(PALETTE)) + 1)
-    marker_cycle = MARKERS * ((len(strategies) // len(MARKERS)) + 1)
-
     fig, ax = plt.subplots(figsize=(7, 6), dpi=300)
 
-    for colour, marker, strategy in zip(colour_cycle, marker_cycle, strategies):
-        subset = psa[psa["strategy"] == strategy]
-        ax.scatter(
-            subset["incremental_qalys"],
-            subset["incremental_cost"],
-            s=18,
-            alpha=0.30,
-            color=colour,
-            marker=marker,
-            linewidths=0,
-            label=strategy,
-        )
+    # Raw markers for typical PSA sizes; large draw sets are density-shaded
+    layer = scatter_layer(
+        ax,
+        psa["incremental_qalys"].to_numpy(),
+        psa["incremental_cost"].to_numpy(),
+        psa["strategy"],
+        colors=PALETTE,
+        markers=MARKERS,
+        point_size=18,
+        alpha=0.30,
+    )
 
     # Threshold lines -------------------------------------------------------
     qaly_min = psa["incremental_qalys"].min()
@@ -152,7 +148,7 @@ def plot_ce_plane(psa: pd.DataFrame, country: str, perspective: str, output: Pat
     ax.set_ylim(c_min - c_padding, c_max + c_padding)
 
     ax.grid(True, alpha=0.2)
-    ax.legend(frameon=False, loc="best")
+    ax.legend(handles=layer.legend_handles(), frameon=False, loc="best")
     fig.tight_layout()
     fig.savefig(output, bbox_inches="tight")
     plt.close(fig)
@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+from functools import lru_cache
 from types import SimpleNamespace
 import itertools
 import os
@@ -48,17 +49,35 @@ def apply_cognition_mapping(measures, mapping_cfg):
     
     return disutilities
 
+# Clinical inputs read by get_transition_matrix: (inputs key, sub-key or None
+# for the arm itself, default)
+CLINICAL_PARAMETERS = [
+    ('remission_rates', None, 0.3),
+    ('partial_response_rates', None, 0.2),
+    ('relapse_rates', None, 0.02),  # monthly relapse rate
+    ('ae_rates', None, 0.01),
+    ('death_rates', 'baseline', 0.001),  # baseline death rate
+]
+
+def clinical_values(arm, inputs):
+    """Clinical parameter values for an arm in ``CLINICAL_PARAMETERS`` order."""
+    return [inputs.get(key, {}).get(sub or arm, default) for key, sub, default in CLINICAL_PARAMETERS]
+
+def _clinical_inputs(arm, values):
+    """Inputs dict setting every clinical parameter explicitly."""
+    return {key: {sub or arm: v} for (key, sub, _), v in zip(CLINICAL_PARAMETERS, values)}
+
+def tunnel_progresses(cycle):
+    """Whether remission tunnel states advance at this cycle (every 3 months)."""
+    return (cycle % 3) == 0 and cycle > 0
+
 def get_transition_matrix(arm, inputs, cycle, time_in_remission=None):
     """Build transition matrix for the arm at given cycle with semi-Markov tunnels."""
     n = len(STATES)
     P = np.zeros((n, n))
 
     # Get clinical parameters for this arm
-    induction_remission = inputs.get('remission_rates', {}).get(arm, 0.3)
-    induction_partial = inputs.get('partial_response_rates', {}).get(arm, 0.2)
-    relapse_rate_monthly = inputs.get('relapse_rates', {}).get(arm, 0.02)  # monthly relapse rate
-    ae_rate = inputs.get('ae_rates', {}).get(arm, 0.01)
-    death_rate = inputs.get('death_rates', {}).get('baseline', 0.001)  # baseline death rate
+    induction_remission, induction_partial, relapse_rate_monthly, ae_rate, death_rate = clinical_values(arm, inputs)
 
     # Tunnel progression (months in remission determine transitions)
     if time_in_remission is None:
@@ -83,7 +102,7 @@ def get_transition_matrix(arm, inputs, cycle, time_in_remission=None):
         # Progress to next tunnel or stay
         if i < len(tunnel_states) - 1:
             # Move to next tunnel after 3 months
-            if (cycle % 3) == 0 and cycle > 0:  # Every 3 months
+            if tunnel_progresses(cycle):  # Every 3 months
                 P[idx, STATE_INDEX[tunnel_states[i + 1]]] = 1 - relapse_rate_monthly - death_rate
             else:
                 P[idx, idx] = 1 - relapse_rate_monthly - death_rate
@@ -243,13 +262,8 @@ def get_ect_cognitive_disutility(cycle):
     else:
         return 0.0  # No long-term cognitive disutility
 
-def simulate_arm(arm, jurisdiction, perspective, settings, inputs, out_dir='nextgen_v3/out/'):
-    """Simulate Markov model for one arm."""
-    n_cycles = int(settings['time_horizon_years'] * 12 / settings['cycle_length_months'])
-    discount_cost = settings['discount_costs'][jurisdiction]
-    discount_qaly = settings['discount_qalys'][jurisdiction]
-
-    # Load utility mapping config
+def _load_mapping_disutilities():
+    """Cognition-mapped disutilities (recorded alongside results)."""
     mapping_cfg = None
     mapping_path = 'nextgen_v3/config/utility_mapping.yaml'
     if os.path.exists(mapping_path):
@@ -258,172 +272,248 @@ def simulate_arm(arm, jurisdiction, perspective, settings, inputs, out_dir='next
 
     # Get cognitive measures (stub)
     measures = {'HVLT-R_Delta': -0.1, 'AMI_Delta': -0.05}  # stub deltas
+    return measures, apply_cognition_mapping(measures, mapping_cfg)
 
-    # Apply cognition mapping
-    disutilities = apply_cognition_mapping(measures, mapping_cfg)
-
-    # Determine phases
-    acute_cycles = 1  # 1 month acute
-    _maintenance_cycles = n_cycles - acute_cycles
-
-    # Start in Depressed (treatment-resistant depression baseline)
-    state_probs = np.zeros(len(STATES))
-    state_probs[STATE_INDEX['Depressed']] = 1.0
-
-    # Track time in remission for tunnel transitions
-    time_in_remission = 0
-
-    total_cost = 0
-    total_qaly = 0
-    for cycle in range(n_cycles):
-        # Costs
-        cost = sum(state_probs[i] * get_costs(arm, jurisdiction, perspective, inputs, cycle) for i in range(len(STATES)))
-        total_cost += cost * (1 - discount_cost) ** (cycle / 12)  # annual discount
-
-        # QALYs with enhanced utility system
-        base_qaly = sum(state_probs[i] * get_utility(STATES[i], inputs, cycle, arm, perspective)
-                       for i in range(len(STATES)))
-
-        # Apply any additional disutilities (legacy compatibility)
-        # Note: Most disutilities now handled in get_utility function
-        adjusted_qaly = base_qaly
-
-        total_qaly += adjusted_qaly * (1 - discount_qaly) ** (cycle / 12)
-
-        # Transition with time-in-remission tracking
-        P = get_transition_matrix(arm, inputs, cycle, time_in_remission)
-        state_probs = state_probs @ P
-
-        # Update time in remission if in remission tunnel
-        current_state = np.argmax(state_probs)
-        if 'Remission' in STATES[current_state]:
-            time_in_remission += 1
-        else:
-            time_in_remission = 0
-
-    # Save utility mapping effects
+def _write_utility_mapping_effects(arms, jurisdictions, perspectives, settings):
+    """Append utility mapping effects for each arm/jurisdiction/perspective in one write."""
+    measures, disutilities = _load_mapping_disutilities()
     effects = []
-    for key, disutility in disutilities.items():
-        effects.append({
-            'arm': arm,
-            'jurisdiction': jurisdiction,
-            'perspective': perspective,
-            'mapping_key': key,
-            'disutility': disutility,
-            'measure_HVLT_R_Delta': measures.get('HVLT-R_Delta', None),
-            'measure_AMI_Delta': measures.get('AMI_Delta', None)
-        })
+    for arm, jurisdiction, perspective in itertools.product(arms, jurisdictions, perspectives):
+        for key, disutility in disutilities.items():
+            effects.append({
+                'arm': arm,
+                'jurisdiction': jurisdiction,
+                'perspective': perspective,
+                'mapping_key': key,
+                'disutility': disutility,
+                'measure_HVLT_R_Delta': measures.get('HVLT-R_Delta', None),
+                'measure_AMI_Delta': measures.get('AMI_Delta', None)
+            })
     effects_df = pd.DataFrame(effects)
-    effects_df.to_csv(f'{settings.get("out_dir", "nextgen_v3/out/")}utility_mapping_effects_v3.csv', mode='a', header=not os.path.exists(f'{settings.get("out_dir", "nextgen_v3/out/")}utility_mapping_effects_v3.csv'), index=False)
-
-    return SimpleNamespace(cost=total_cost, qaly=total_qaly)
+    path = f'{settings.get("out_dir", "nextgen_v3/out/")}utility_mapping_effects_v3.csv'
+    effects_df.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+def _as_draws(inputs):
+    """Normalise inputs to a list of parameter draws (a single dict is one draw)."""
+    if isinstance(inputs, dict):
+        return [inputs], False
+    return list(inputs), True
+
+@lru_cache(maxsize=None)
+def transition_basis(arm, cycle):
+    """
+    Constant and per-parameter terms of the transition matrix.
+
+    Every entry of ``get_transition_matrix`` is affine in the clinical
+    parameters, so P(theta) = P0 + sum_k theta_k G_k exactly.
+
+    Returns:
+        (P0, G) with shapes (n_states, n_states) and (n_params, n_states, n_states);
+        cached, so callers must not modify them
+    """
+    n_params = len(CLINICAL_PARAMETERS)
+    P0 = get_transition_matrix(arm, _clinical_inputs(arm, [0.0] * n_params), cycle)
+    G = np.stack([
+        get_transition_matrix(arm, _clinical_inputs(arm, np.eye(n_params)[k]), cycle) - P0
+        for k in range(n_params)
+    ])
+    return P0, G
+
+def clinical_parameter_matrix(arm, inputs):
+    """(n_draws, n_params) clinical parameters for an arm, with model defaults filled in."""
+    draws, _ = _as_draws(inputs)
+    return np.array([clinical_values(arm, d) for d in draws], dtype=float)
+
+def simulate_trace_batch(arm, parameters, n_cycles):
+    """
+    Markov trace for a batch of clinical parameter vectors.
+
+    Args:
+        arm: Treatment arm
+        parameters: Array (n_points, n_params) ordered as ``CLINICAL_PARAMETERS``
+        n_cycles: Number of monthly cycles
+
+    Returns:
+        Array of shape (n_points, n_cycles, n_states)
+    """
+    parameters = np.atleast_2d(np.asarray(parameters, dtype=float))
+    # Transition matrices only change when remission tunnels advance
+    P_stay, P_move = (
+        P0 + np.einsum('dk,kst->dst', parameters, G)
+        for P0, G in (transition_basis(arm, 1), transition_basis(arm, 3))
+    )
+
+    trace = np.empty((len(parameters), n_cycles, len(STATES)))
+    state_probs = np.zeros((len(parameters), len(STATES)))
+    state_probs[:, STATE_INDEX['Depressed']] = 1.0
+    for cycle in range(n_cycles):
+        trace[:, cycle] = state_probs
+        P = P_move if tunnel_progresses(cycle) else P_stay
+        state_probs = np.einsum('ds,dst->dt', state_probs, P)
+    return trace
+
+def simulate_trace(arm, inputs, n_cycles):
+    """
+    Markov trace for one arm across parameter draws.
+
+    The clinical pathway does not depend on jurisdiction or perspective, so
+    it is simulated once and shared by every cost/discount combination.
+
+    Args:
+        arm: Treatment arm
+        inputs: Clinical inputs dict, or a sequence of dicts (one per draw)
+        n_cycles: Number of monthly cycles
+
+    Returns:
+        Array of shape (n_draws, n_cycles, n_states) with state occupancy at
+        the start of each cycle
+    """
+    return simulate_trace_batch(arm, clinical_parameter_matrix(arm, inputs), n_cycles)
+
+def _discount_factors(settings, key, jurisdictions, n_cycles):
+    """(n_jurisdictions, n_cycles) discount weights using the annual rate per jurisdiction."""
+    rates = np.array([settings[key][j] for j in jurisdictions], dtype=float)
+    return (1 - rates[:, None]) ** (np.arange(n_cycles)[None, :] / 12)
+
+def simulate_arm_grid(arm, jurisdictions, perspectives, settings, inputs, parameters=None):
+    """
+    Discounted totals for one arm over a (jurisdiction, perspective) grid.
+
+    Args:
+        arm: Treatment arm
+        jurisdictions: Jurisdictions (select discount rates)
+        perspectives: Perspectives (select cost vectors)
+        settings: Model settings
+        inputs: Clinical inputs dict, or a sequence of dicts (one per draw)
+        parameters: Optional (n_points, n_params) clinical parameter matrix
+            (see ``CLINICAL_PARAMETERS``) used instead of the draws in ``inputs``
+
+    Returns:
+        SimpleNamespace with ``cost`` and ``qaly`` arrays of shape
+        (n_draws, n_jurisdictions, n_perspectives)
+    """
+    n_cycles = int(settings['time_horizon_years'] * 12 / settings['cycle_length_months'])
+    draws, _ = _as_draws(inputs)
+    if parameters is None:
+        trace = simulate_trace(arm, draws, n_cycles)
+    else:
+        trace = simulate_trace_batch(arm, parameters, n_cycles)
+
+    # Cost and utility schedules do not vary with the drawn clinical inputs
+    cost_per_cycle = np.array([
+        [[get_costs(arm, jurisdiction, perspective, draws[0], cycle) for cycle in range(n_cycles)]
+         for perspective in perspectives]
+        for jurisdiction in jurisdictions
+    ])
+    utility = np.array([
+        [get_utility(state, draws[0], cycle, arm) for state in STATES]
+        for cycle in range(n_cycles)
+    ])
+
+    mass = trace.sum(axis=2)                              # (D, T)
+    qaly_per_cycle = np.einsum('dts,ts->dt', trace, utility)
+    disc_cost = _discount_factors(settings, 'discount_costs', jurisdictions, n_cycles)
+    disc_qaly = _discount_factors(settings, 'discount_qalys', jurisdictions, n_cycles)
+
+    cost = np.einsum('dt,jpt,jt->djp', mass, cost_per_cycle, disc_cost)
+    qaly = np.einsum('dt,jt->dj', qaly_per_cycle, disc_qaly)[:, :, None]
+    return SimpleNamespace(cost=cost, qaly=np.broadcast_to(qaly, cost.shape).copy())
 
-def run_cea_all_arms(settings_path, inputs, out_dir='nextgen_v3/out/'):
-    """Run CEA for all arms, output results."""
-    import yaml
+def simulate_arm(arm, jurisdiction, perspective, settings, inputs, out_dir='nextgen_v3/out/'):
+    """Simulate Markov model for one arm."""
+    res = simulate_arm_grid(arm, [jurisdiction], [perspective], settings, inputs)
+    _write_utility_mapping_effects([arm], [jurisdiction], [perspective], settings)
+    return SimpleNamespace(cost=float(res.cost[0, 0, 0]), qaly=float(res.qaly[0, 0, 0]))
+
+def run_cea_all_arms(settings_path, inputs, out_dir='nextgen_v3/out/', comparator='ECT_std'):
+    """
+    Run CEA for all arms, output results.
+
+    Each arm's clinical trace is simulated once per parameter draw; discount
+    rates and perspective cost vectors are broadcast over a
+    (jurisdiction, perspective) axis, and incrementals are array differences
+    against the comparator.
+
+    Args:
+        settings_path: Path to the model settings YAML
+        inputs: Clinical inputs dict, or a sequence of dicts (one per draw)
+        out_dir: Output directory
+        comparator: Reference arm for incrementals
+
+    Returns:
+        SimpleNamespace with ``results`` and ``incremental`` DataFrames
+    """
     with open(settings_path, 'r') as f:
         settings = yaml.safe_load(f)
 
-    results = []
-    for arm in settings['arms']:
-        for jur in settings['jurisdictions']:
-            for pers in settings['perspectives']:
-                res = simulate_arm(arm, jur, pers, settings, inputs)
-                results.append({
-                    'arm': arm,
-                    'jurisdiction': jur,
-                    'perspective': pers,
-                    'total_cost': res.cost,
-                    'total_qaly': res.qaly
-                })
-
-    df = pd.DataFrame(results)
+    arms = list(settings['arms'])
+    jurisdictions = list(settings['jurisdictions'])
+    perspectives = list(settings['perspectives'])
+    draws, has_draws = _as_draws(inputs)
+
+    grids = [simulate_arm_grid(arm, jurisdictions, perspectives, settings, draws) for arm in arms]
+    cost = np.stack([g.cost for g in grids])              # (A, D, J, P)
+    qaly = np.stack([g.qaly for g in grids])
+    _write_utility_mapping_effects(arms, jurisdictions, perspectives, settings)
+
+    def frame(arm_labels, values):
+        index = pd.MultiIndex.from_product(
+            [arm_labels, jurisdictions, perspectives, range(len(draws))],
+            names=['arm', 'jurisdiction', 'perspective', 'draw']
+        )
+        df = pd.DataFrame({k: v.transpose(0, 2, 3, 1).ravel() for k, v in values.items()}, index=index)
+        df = df.reset_index()
+        return df if has_draws else df.drop(columns='draw')
+
+    df = frame(arms, {'total_cost': cost, 'total_qaly': qaly})
     df.to_csv(f'{out_dir}/cea_results_by_arm_v3.csv', index=False)
 
-    # Incremental vs ECT_std
-    ect_std = df[df['arm'] == 'ECT_std'].set_index(['jurisdiction', 'perspective'])
-    incremental = []
-    for _, row in df.iterrows():
-        if row['arm'] != 'ECT_std':
-            base = ect_std.loc[(row['jurisdiction'], row['perspective'])]
-            inc_cost = row['total_cost'] - base['total_cost']
-            inc_qaly = row['total_qaly'] - base['total_qaly']
-            icer = inc_cost / inc_qaly if inc_qaly != 0 else np.inf
-            incremental.append({
-                'arm': row['arm'],
-                'jurisdiction': row['jurisdiction'],
-                'perspective': row['perspective'],
-                'incremental_cost': inc_cost,
-                'incremental_qaly': inc_qaly,
-                'icer': icer
-            })
-
-    inc_df = pd.DataFrame(incremental)
-    inc_df.to_csv(f'{out_dir}/incremental_vs_ECT_std_v3.csv', index=False)
-
-def run_structural_sensitivity(settings, inputs):
-    """Run structural sensitivity analysis across all scenario combinations."""
-    # Define arms
-    arms = ['ECT_std', 'IV_ketamine']  # TODO: Load from config or inputs
-    
-    # Get all combinations
-    scenarios = list(itertools.product(
-        settings['structural_scenarios']['include_response_nonremit'],
-        settings['structural_scenarios']['cycle_length_months'],
-        settings['structural_scenarios']['semi_markov_memory'],
-        settings['structural_scenarios']['switching_logic']
-    ))
-    
-    # Baseline settings (assume default: true, 1, false, standard)
-    baseline_settings = settings.copy()
-    baseline_results = {}
-    for arm in arms:
-        res = simulate_arm(arm, 'AU', 'healthcare', baseline_settings, inputs)
-        baseline_results[arm] = {'total_cost': res.cost, 'total_qaly': res.qaly}
-    
-    # Run each scenario
-    results = []
-    for i, (include_rnr, cycle_len, semi_markov, switching) in enumerate(scenarios):
-        scenario_id = f"scenario_{i}"
-        scen_settings = baseline_settings.copy()
-        scen_settings['cycle_length_months'] = cycle_len
-        # TODO: Implement modifications for include_rnr, semi_markov, switching
-        
-        for arm in arms:
-            res = simulate_arm(arm, 'AU', 'healthcare', scen_settings, inputs)
-            costs = res.cost
-            qalys = res.qaly
-            
-            # Compute deltas
-            wtp = 50000  # TODO: Use from settings
-            baseline_costs = baseline_results[arm]['total_cost']
-            baseline_qalys = baseline_results[arm]['total_qaly']
-            baseline_nmb = baseline_qalys * wtp - baseline_costs
-            
-            nmb = qalys * wtp - costs
-            
-            inc_cost = costs - baseline_costs
-            inc_qaly = qalys - baseline_qalys
-            delta_icer = inc_cost / inc_qaly if inc_qaly != 0 else 0
-            delta_nmb = nmb - baseline_nmb
-            
-            results.append({
-                'scenario_id': scenario_id,
-                'include_response_nonremit': include_rnr,
-                'cycle_len_m': cycle_len,
-                'semi_markov': semi_markov,
-                'switching': switching,
-                'arm': arm,
-                'delta_ICER': delta_icer,
-                'delta_INMB': delta_nmb
-            })
-    
-    df = pd.DataFrame(results)
+    # Incremental vs comparator as array differences
+    ref = arms.index(comparator)
+    others = [i for i in range(len(arms)) if i != ref]
+    inc_cost = cost[others] - cost[ref]
+    inc_qaly = qaly[others] - qaly[ref]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        icer = np.where(inc_qaly != 0, inc_cost / inc_qaly, np.inf)
+    inc_df = frame([arms[i] for i in others], {
+        'incremental_cost': inc_cost,
+        'incremental_qaly': inc_qaly,
+        'icer': icer
+    })
+    inc_df.to_csv(f'{out_dir}/incremental_vs_{comparator}_v3.csv', index=False)
+
+    return SimpleNamespace(results=df, incremental=inc_df)
+
+def run_structural_sensitivity(settings, inputs, n_jobs=4):
+    """
+    Run structural sensitivity analysis across all scenario combinations.
+
+    Options in ``settings['structural_scenarios']`` are swept as a full
+    product on a memoised ScenarioGrid: each clinical trace is simulated once
+    per arm and transition variant, and combinations are evaluated in
+    parallel batches.
+    """
+    from .scenario_grid import ScenarioGrid, _wtp
+
+    scenarios = dict(settings['structural_scenarios'])
+    arms = scenarios.pop('arms', ['ECT_std', 'IV_ketamine'])
+
+    grid = ScenarioGrid(settings, inputs, jurisdiction='AU', perspective='healthcare', n_jobs=n_jobs)
+    df = grid.run_structural_sensitivity(scenarios, arms, wtp=_wtp(settings))
     os.makedirs('nextgen_v3/out', exist_ok=True)
     df.to_csv('nextgen_v3/out/structural_sensitivity_v3.csv', index=False)
+    return df
+
+def run_opportunity_cost_scenarios(settings, inputs, incremental=None, comparator='ECT_std'):
+    """
+    Run opportunity cost scenarios across jurisdictions and k values.
+
+    k is swept as a vectorised axis over incremental results. Pass the
+    ``incremental`` table from ``run_cea_all_arms`` to reuse stored results;
+    otherwise incrementals are computed once from the broadcast CEA grid.
+    """
+    from .scenario_grid import sweep_opportunity_cost, _wtp
 
-def run_opportunity_cost_scenarios(settings, inputs):
-    """Run opportunity cost scenarios across jurisdictions and k values."""
     if not settings.get('opportunity_cost', {}).get('use_k', False):
         return
     
@@ -431,37 +521,25 @@ def run_opportunity_cost_scenarios(settings, inputs):
     apply_in = settings['opportunity_cost']['apply_in']
     if 'CEA' not in apply_in:
         return
-    
-    # Stub incremental results vs ECT_std
-    # In practice, get from run_cea_all_arms
-    incremental_stub = {
-        'AU': {
-            'IV_ketamine': {'inc_cost': 10000, 'inc_qaly': 0.5}
-        },
-        'NZ': {
-            'IV_ketamine': {'inc_cost': 8000, 'inc_qaly': 0.4}
-        }
-    }
-    
-    wtp = 50000  # Stub, assume same for AU/NZ
-    
-    results = []
-    for jur in ['AU', 'NZ']:
-        for k in k_values[jur]:
-            for arm, inc in incremental_stub[jur].items():
-                inc_cost = inc['inc_cost']
-                inc_qaly = inc['inc_qaly']
-                inmb_standard = inc_qaly * wtp - inc_cost
-                health_forgone = inc_cost / k
-                inmb_adjusted = inmb_standard - health_forgone * wtp
-                results.append({
-                    'jurisdiction': jur,
-                    'k': k,
-                    'arm': arm,
-                    'INMB_standard': inmb_standard,
-                    'INMB_adjusted': inmb_adjusted
-                })
-    
-    df = pd.DataFrame(results)
+
+    if incremental is None:
+        arms = list(settings.get('arms', [comparator, 'IV_ketamine']))
+        jurisdictions = list(k_values)
+        perspectives = list(settings.get('perspectives', ['healthcare']))
+        grids = {arm: simulate_arm_grid(arm, jurisdictions, perspectives, settings, inputs) for arm in arms}
+        ref = grids[comparator]
+        rows = []
+        for arm in arms:
+            if arm == comparator:
+                continue
+            inc_cost = (grids[arm].cost - ref.cost).mean(axis=0)   # (J, P), mean over draws
+            inc_qaly = (grids[arm].qaly - ref.qaly).mean(axis=0)
+            for (j, jur), (p, pers) in itertools.product(enumerate(jurisdictions), enumerate(perspectives)):
+                rows.append({'jurisdiction': jur, 'arm': arm, 'perspective': pers,
+                             'incremental_cost': inc_cost[j, p], 'incremental_qaly': inc_qaly[j, p]})
+        incremental = pd.DataFrame(rows)
+
+    df = sweep_opportunity_cost(incremental, k_values, wtp=_wtp(settings))
     os.makedirs('nextgen_v3/out', exist_ok=True)
-    df.to_csv('nextgen_v3/out/opportunity_cost_scenarios_v3.csv', index=False)
\ No newline at end of file
+    df.to_csv('nextgen_v3/out/opportunity_cost_scenarios_v3.csv', index=False)
+    return df
@@ -23,7 +23,7 @@ from dataclasses import dataclass
 from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
 from scipy import stats
-from trd_cea.core.io import load_psa
+from trd_cea.models.io import load_psa
 
 
 from typing import Union
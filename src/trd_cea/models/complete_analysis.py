@@ -0,0 +1,814 @@
+"""
+V4 Complete Analysis Runner
+
+Runs every V4 analysis engine on each PSA input in one process, replacing the
+per-variant ``run_complete_v4_analysis*`` scripts.
+
+Responsibilities:
+- Parse complete-analysis configs: the batch manifest keys plus a strategy
+  subset (a named profile such as ``no_uc`` or ``ect_focused``, or explicit
+  include/exclude lists and a base strategy)
+- Load each PSA input once and slice it by jurisdiction/perspective
+  (``batch_runner._load_slices``)
+- Pivot each slice once and derive the quantities several engines need:
+  NMB over the lambda grid, the CEAC, incrementals and probability
+  cost-effective against the base strategy, and the efficiency frontier
+- Fan the CEA, VOI, VBP, BIA, DSA, DCEA, NMA, subgroup, CCA, CMA, ROA, ROI,
+  MCDA and headroom analyses out over a thread pool; CEA, VOI, VBP, DCEA and
+  headroom read the shared quantities instead of re-pivoting the table
+- Write one CSV per output under ``<output_dir>/<input>/<jurisdiction>/<perspective>``
+  plus a JSON job index
+
+Example config::
+
+    inputs: [data/sample/psa_sample_AU_healthcare.csv]
+    jurisdictions: [AU]
+    perspectives: [healthcare]
+    strategy_subset: no_uc          # or {include: [...], exclude: [...], base: ECT}
+    analyses: [cea, voi, vbp, dcea, headroom]   # default: all
+    output_dir: results/complete
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from ..core.tracing import span
+from . import (
+    cca_engine,
+    cma_engine,
+    dcea_engine,
+    mcda_engine,
+    nma_engine,
+    roa_engine,
+    roi_engine,
+    sensitivity_engine,
+    subgroup_engine,
+    vbp_engine,
+    voi_engine,
+)
+from .batch_runner import DEFAULT_POPULATION, INDEX_COLUMNS, AnalysisManifest, BatchJob, _load_slices
+from .batch_runner import _run_bia as _bia_frames
+from .cea_engine import CLINICAL_PARAMETERS
+from .io import PSAData
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "ANALYSES",
+    "STRATEGY_SUBSETS",
+    "CompleteAnalysisConfig",
+    "CompleteAnalysisResult",
+    "SharedPSA",
+    "StrategySubset",
+    "efficiency_frontier",
+    "run_complete_analysis",
+]
+
+Outputs = Dict[str, Union[pd.DataFrame, str]]
+
+
+@dataclass
+class StrategySubset:
+    """
+    Strategies a complete run covers.
+
+    ``include`` (in the given order) restricts the strategies, ``exclude``
+    drops some; ``base`` is the comparator if it survives the selection,
+    otherwise the configured base, otherwise the first strategy left.
+    """
+
+    name: str = "all"
+    include: Optional[List[str]] = None
+    exclude: List[str] = field(default_factory=list)
+    base: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, value: Union[None, str, Dict[str, Any]]) -> "StrategySubset":
+        """Subset from a profile name or a mapping (``profile`` picks the starting profile)."""
+        if value is None:
+            return STRATEGY_SUBSETS["all"]
+        if isinstance(value, str):
+            if value not in STRATEGY_SUBSETS:
+                raise ValueError(f"Unknown strategy subset '{value}'. Available: {sorted(STRATEGY_SUBSETS)}")
+            return STRATEGY_SUBSETS[value]
+        start = cls.from_config(value.get("profile", "all"))
+        return replace(
+            start,
+            name=str(value.get("name", value.get("profile", "custom"))),
+            include=list(value["include"]) if value.get("include") is not None else start.include,
+            exclude=list(value.get("exclude", start.exclude)),
+            base=value.get("base", start.base),
+        )
+
+    def select(self, strategies: List[str]) -> List[str]:
+        """The strategies kept, in ``include`` order when given."""
+        ordered = [s for s in self.include if s in strategies] if self.include is not None else list(strategies)
+        return [s for s in ordered if s not in self.exclude]
+
+    def apply(self, psa: PSAData) -> PSAData:
+        """PSA slice restricted to the subset, with the strategy config to match."""
+        strategies = [str(s) for s in psa.strategies]
+        selected = self.select(strategies)
+        if len(selected) < 2:
+            raise ValueError(f"Strategy subset '{self.name}' leaves {selected} of {strategies}; need two or more")
+        base = next(b for b in (self.base, psa.config.base, selected[0]) if b in selected)
+        if selected == strategies and base == psa.config.base:
+            return psa
+        config = replace(psa.config, base=base, strategies=selected,
+                         prices={s: p for s, p in psa.config.prices.items() if s in selected})
+        table = psa.table[psa.table["strategy"].isin(selected)]
+        return PSAData(table=table, config=config, perspective=psa.perspective, jurisdiction=psa.jurisdiction)
+
+
+ECT_FOCUSED = ["ECT", "KA-ECT", "IV-KA", "IN-EKA", "PO-PSI", "PO-KA", "rTMS"]
+
+STRATEGY_SUBSETS: Dict[str, StrategySubset] = {
+    "all": StrategySubset("all"),
+    "no_uc": StrategySubset("no_uc", exclude=["UC", "Usual Care"]),
+    "ect_focused": StrategySubset("ect_focused", include=ECT_FOCUSED, base="ECT"),
+}
+
+
+@dataclass
+class CompleteAnalysisConfig(AnalysisManifest):
+    """Batch manifest plus a strategy subset and a directory for per-output CSVs."""
+
+    subset: StrategySubset = field(default_factory=StrategySubset)
+    output_dir: Path = Path("results/complete")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], root: Optional[Path] = None) -> "CompleteAnalysisConfig":
+        """
+        Build a config from a parsed mapping.
+
+        Takes the batch manifest keys (``analyses`` optional, default all)
+        plus ``strategy_subset`` and ``output_dir``.
+        """
+        analyses = [str(a).lower() for a in data.get("analyses") or ANALYSES]
+        unknown = [a for a in analyses if a not in ANALYSES]
+        if unknown:
+            raise ValueError(f"Unknown analyses {unknown}. Available: {list(ANALYSES)}")
+        manifest = AnalysisManifest.from_dict({**data, "analyses": []}, root)
+        values = {f.name: getattr(manifest, f.name) for f in fields(AnalysisManifest)}
+        values["analyses"] = analyses
+        return cls(**values, subset=StrategySubset.from_config(data.get("strategy_subset")),
+                   output_dir=Path(data.get("output_dir", cls.output_dir)))
+
+    @classmethod
+    def from_yaml(cls, path: Path) -> "CompleteAnalysisConfig":
+        """Load a config from YAML; inputs resolve relative to the CWD."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Complete analysis config missing at '{path}'")
+        with path.open("r", encoding="utf-8") as handle:
+            return cls.from_dict(yaml.safe_load(handle) or {})
+
+
+# ---------------------------------------------------------------------------
+# Shared derived quantities
+# ---------------------------------------------------------------------------
+
+
+def efficiency_frontier(strategies: List[str], cost: np.ndarray, effect: np.ndarray) -> pd.DataFrame:
+    """
+    Cost-effectiveness efficiency frontier of mean costs and effects.
+
+    Strategies costing at least as much as another for no more effect are
+    ``dominated``; those whose ICER exceeds that of the next more effective
+    strategy are ``extendedly dominated``. Frontier strategies carry their
+    ICER against the previous frontier strategy.
+
+    Returns:
+        DataFrame sorted by cost with strategy, cost, effect, status,
+        on_frontier and icer
+    """
+    order = sorted(range(len(strategies)), key=lambda i: (cost[i], -effect[i]))
+    status = {i: "dominated" for i in order}
+    frontier: List[int] = []
+    for i in order:
+        if frontier and effect[i] <= effect[frontier[-1]]:
+            continue
+        while len(frontier) >= 2:
+            prev, last = frontier[-2], frontier[-1]
+            icer_last = (cost[last] - cost[prev]) / (effect[last] - effect[prev])
+            icer_next = (cost[i] - cost[last]) / (effect[i] - effect[last])
+            if icer_last <= icer_next:
+                break
+            status[frontier.pop()] = "extendedly dominated"
+        frontier.append(i)
+
+    icers = {frontier[0]: np.nan}
+    for prev, i in zip(frontier, frontier[1:]):
+        icers[i] = (cost[i] - cost[prev]) / (effect[i] - effect[prev])
+    for i in frontier:
+        status[i] = "frontier"
+    return pd.DataFrame({
+        "strategy": [strategies[i] for i in order],
+        "cost": [float(cost[i]) for i in order],
+        "effect": [float(effect[i]) for i in order],
+        "status": [status[i] for i in order],
+        "on_frontier": [status[i] == "frontier" for i in order],
+        "icer": [icers.get(i, np.nan) for i in order],
+    })
+
+
+@dataclass
+class SharedPSA:
+    """
+    One PSA slice pivoted once, with the quantities shared across engines.
+
+    Arrays are indexed (lambda, draw, strategy) in ``strategies`` order; the
+    NMB cube holds ``len(lambda_grid) * draws * strategies`` floats.
+    """
+
+    psa: PSAData
+    strategies: List[str]
+    base: str
+    draws: np.ndarray
+    lambda_grid: np.ndarray
+    decision_lambda: float
+    cost: np.ndarray            # (draw, strategy)
+    effect: np.ndarray          # (draw, strategy)
+    nmb: np.ndarray             # (lambda, draw, strategy)
+    expected_nmb: np.ndarray    # (lambda, strategy)
+    prob_optimal: np.ndarray    # (lambda, strategy) CEAC
+    prob_ce: np.ndarray         # (lambda, strategy) P(NMB > base NMB)
+    incremental: pd.DataFrame   # Per strategy vs base at the decision lambda
+    frontier: pd.DataFrame
+
+    @classmethod
+    def derive(cls, psa: PSAData, lambda_grid: np.ndarray, decision_lambda: float) -> "SharedPSA":
+        """Pivot the slice and compute every shared quantity."""
+        strategies = [str(s) for s in psa.strategies]
+        with span("pivot"):
+            wide = psa.table.pivot(index="draw", columns="strategy", values=["cost", "effect"])
+            cost = wide["cost"][strategies].to_numpy(dtype=float)
+            effect = wide["effect"][strategies].to_numpy(dtype=float)
+        lambda_grid = np.asarray(lambda_grid, dtype=float)
+        base = psa.config.base if psa.config.base in strategies else strategies[0]
+        b = strategies.index(base)
+
+        nmb = lambda_grid[:, None, None] * effect[None, :, :] - cost[None, :, :]
+        best = nmb.argmax(axis=2)
+        prob_optimal = np.stack([(best == j).mean(axis=1) for j in range(len(strategies))], axis=1)
+        prob_ce = (nmb > nmb[:, :, b:b + 1]).mean(axis=1)
+
+        mean_cost, mean_effect = cost.mean(axis=0), effect.mean(axis=0)
+        inmb = decision_lambda * (effect - effect[:, b:b + 1]) - (cost - cost[:, b:b + 1])
+        delta_cost, delta_effect = mean_cost - mean_cost[b], mean_effect - mean_effect[b]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            icer = np.where(delta_effect != 0, delta_cost / delta_effect, np.nan)
+        incremental = pd.DataFrame({
+            "strategy": strategies,
+            "comparator": base,
+            "mean_cost": mean_cost,
+            "mean_effect": mean_effect,
+            "incremental_cost": delta_cost,
+            "incremental_effect": delta_effect,
+            "icer": icer,
+            "inmb": inmb.mean(axis=0),
+            "prob_cost_effective": (inmb > 0).mean(axis=0),
+        })[lambda frame: frame["strategy"] != base].reset_index(drop=True)
+
+        return cls(
+            psa=psa, strategies=strategies, base=base, draws=wide.index.to_numpy(),
+            lambda_grid=lambda_grid, decision_lambda=float(decision_lambda),
+            cost=cost, effect=effect, nmb=nmb, expected_nmb=nmb.mean(axis=1),
+            prob_optimal=prob_optimal, prob_ce=prob_ce, incremental=incremental,
+            frontier=efficiency_frontier(strategies, mean_cost, mean_effect),
+        )
+
+    @property
+    def comparators(self) -> List[int]:
+        """Indices of the non-base strategies."""
+        return [j for j, s in enumerate(self.strategies) if s != self.base]
+
+    def lambda_frame(self, values: np.ndarray, name: str) -> pd.DataFrame:
+        """(lambda, strategy) array in long format."""
+        return pd.DataFrame({
+            "lambda": np.repeat(self.lambda_grid, len(self.strategies)),
+            "strategy": np.tile(self.strategies, len(self.lambda_grid)),
+            name: values.ravel(),
+        })
+
+
+# ---------------------------------------------------------------------------
+# Analysis adapters: SharedPSA -> named output tables
+# ---------------------------------------------------------------------------
+
+
+def _perspective_value(psa: PSAData) -> str:
+    """Perspective label as stored in the table (engines filter on it)."""
+    if "perspective" in psa.table.columns and len(psa.table):
+        return str(psa.table["perspective"].iloc[0])
+    return psa.perspective
+
+
+def _run_cea(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    inc = shared.incremental
+    mean_cost, mean_effect = shared.cost.mean(axis=0), shared.effect.mean(axis=0)
+    summary = pd.DataFrame({
+        "strategy": shared.strategies,
+        "cost_mean": mean_cost,
+        "effect_mean": mean_effect,
+        "nmb_mean": shared.decision_lambda * mean_effect - mean_cost,
+        "lambda": shared.decision_lambda,
+    })
+    best = shared.expected_nmb.argmax(axis=1)
+    rows = np.arange(len(shared.lambda_grid))
+    ceaf = pd.DataFrame({
+        "lambda": shared.lambda_grid,
+        "strategy": [shared.strategies[j] for j in best],
+        "expected_nmb": shared.expected_nmb[rows, best],
+        "prob_optimal": shared.prob_optimal[rows, best],
+    })
+    b = shared.strategies.index(shared.base)
+    comparators = shared.comparators
+    inmb = (shared.decision_lambda * (shared.effect[:, comparators] - shared.effect[:, [b]])
+            - (shared.cost[:, comparators] - shared.cost[:, [b]]))
+    inmb_draws = pd.DataFrame({
+        "draw": np.repeat(shared.draws, len(comparators)),
+        "strategy": np.tile([shared.strategies[j] for j in comparators], len(shared.draws)),
+        "inmb": inmb.ravel(),
+    })
+    return {
+        "cea_summary": summary,
+        "cea_incremental": inc.assign(**{"lambda": shared.decision_lambda}),
+        "cea_frontier": shared.frontier,
+        "ceac": shared.lambda_frame(shared.prob_optimal, "prob_optimal"),
+        "ceaf": ceaf,
+        "inmb_distributions": inmb_draws,
+    }
+
+
+def _run_voi(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    """EVPI from the shared NMB cube (``voi_engine.calculate_evpi`` columns), plus EVPPI."""
+    confidence = float(options.get("confidence_level", 0.95))
+    max_nmb = shared.nmb.max(axis=2)
+    max_expected = shared.expected_nmb.max(axis=1)
+    spread = max_nmb - max_expected[:, None]
+    alpha = (1 - confidence) / 2
+    evpi = pd.DataFrame({
+        "lambda": shared.lambda_grid,
+        "evpi_per_person": max_nmb.mean(axis=1) - max_expected,
+        "evpi_lower": np.percentile(spread, alpha * 100, axis=1),
+        "evpi_upper": np.percentile(spread, (1 - alpha) * 100, axis=1),
+        "expected_max_nmb": max_nmb.mean(axis=1),
+        "max_expected_nmb": max_expected,
+    })
+
+    population = options.get("population", DEFAULT_POPULATION)
+    if isinstance(population, dict):
+        population = population.get(shared.psa.jurisdiction)
+    outputs: Outputs = {}
+    if population is not None:
+        horizon = int(options.get("time_horizon", 10))
+        rate = float(options.get("discount_rate", 0.05))
+        pv_factor = sum((1 / (1 + rate)) ** t for t in range(horizon))
+        evpi["population_evpi"] = evpi["evpi_per_person"] * int(population) * pv_factor
+        outputs["population_evpi"] = evpi[["lambda", "population_evpi"]].assign(
+            population_size=int(population), time_horizon=horizon, discount_rate=rate)
+    outputs["evpi"] = evpi
+
+    parameters = options.get("evppi_parameters", ["efficacy", "cost", "utility", "relapse_rate"])
+    evppi = voi_engine.calculate_evppi(shared.psa, parameters, shared.lambda_grid)
+    outputs["evppi"] = evppi
+    outputs["voi_summary"] = voi_engine.create_voi_summary(evppi, shared.decision_lambda)
+    return outputs
+
+
+def _run_vbp(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    """Threshold prices from the shared incrementals and probability CE from the NMB cube."""
+    inc = shared.incremental.set_index("strategy")
+    therapies = [shared.strategies[j] for j in shared.comparators]
+    lam = np.repeat(shared.lambda_grid, len(therapies))
+    therapy = np.tile(therapies, len(shared.lambda_grid))
+    threshold = np.maximum(0.0, lam * inc.loc[therapy, "incremental_effect"].to_numpy()
+                           - inc.loc[therapy, "incremental_cost"].to_numpy())
+    prob_ce = shared.prob_ce[:, shared.comparators].ravel()
+    curves = pd.DataFrame({"therapy": therapy, "lambda": lam, "threshold_price": threshold,
+                           "probability_ce": prob_ce, "base_strategy": shared.base})
+    curves = curves.sort_values(["therapy", "lambda"], key=lambda c: c.map(therapies.index)
+                                if c.name == "therapy" else c, kind="stable").reset_index(drop=True)
+    price_range = np.arange(0, float(options.get("max_price", 50000)), float(options.get("price_step", 1000)))
+    return {
+        "vbp_curves": curves,
+        "threshold_prices": curves[["therapy", "lambda", "threshold_price", "base_strategy"]].assign(
+            wtp_threshold=curves["lambda"]),
+        "price_elasticity": vbp_engine.calculate_price_elasticity(
+            shared.psa, price_range, lambda_threshold=shared.decision_lambda),
+        "risk_sharing_scenarios": vbp_engine.calculate_risk_sharing_scenarios(shared.psa),
+        "multi_indication_vbp": curves.assign(indication=options.get("indication", "TRD")),
+    }
+
+
+def _load_mapping(value: Union[None, str, Path, Dict[str, Any]]) -> Dict[str, Any]:
+    """Mapping given inline or as a YAML path."""
+    if value is None or isinstance(value, dict):
+        return dict(value or {})
+    with Path(value).open("r", encoding="utf-8") as handle:
+        return yaml.safe_load(handle) or {}
+
+
+def _has_clinical_inputs(arm: str, inputs: Dict[str, Any]) -> bool:
+    """Whether ``inputs`` gives any per-arm clinical parameter for ``arm``."""
+    return any(arm in (inputs.get(key) or {}) for key, sub, _ in CLINICAL_PARAMETERS if sub is None)
+
+
+def _run_dsa(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    """
+    Cohort-model DSA of each mapped strategy against the base strategy.
+
+    PSA strategy names are not cohort-model arms, so ``options["arms"]`` maps
+    each strategy to its arm (e.g. ``{"IV-KA": "IV_Ketamine"}``) and
+    ``options["inputs"]`` (inline or a YAML path) gives the arms' clinical
+    inputs. Strategies without an arm or clinical inputs would only sweep the
+    ``CLINICAL_PARAMETERS`` defaults, so they are skipped with a warning and
+    left out of the tables; without a mapped base strategy only the PRCC and
+    scenario tables are returned. ``settings`` (inline or a YAML path)
+    defaults to ``time_horizon`` years at ``discount_rate`` for the slice's
+    jurisdiction; ``pairs``/``triple`` choose the swept parameters.
+    """
+    psa = shared.psa
+    outputs: Outputs = {
+        "tornado_prcc": sensitivity_engine.run_prcc_analysis(psa),
+        "scenarios": sensitivity_engine.run_scenario_analysis(psa),
+    }
+    inputs = _load_mapping(options.get("inputs"))
+    arms = {strategy: arm for strategy, arm in _load_mapping(options.get("arms")).items()
+            if _has_clinical_inputs(arm, inputs)}
+    if shared.base not in arms:
+        logger.warning(f"DSA skipped: base strategy {shared.base} has no cohort arm with clinical inputs")
+        return outputs
+    strategies = [shared.strategies[j] for j in shared.comparators]
+    skipped = [strategy for strategy in strategies if strategy not in arms]
+    if skipped:
+        logger.warning(f"DSA skipped for strategies without a cohort arm and clinical inputs: {skipped}")
+    strategies = [strategy for strategy in strategies if strategy in arms]
+    if not strategies:
+        return outputs
+
+    jurisdiction = psa.jurisdiction or "AU"
+    rate = float(options.get("discount_rate", 0.05))
+    settings = _load_mapping(options.get("settings")) or {
+        "time_horizon_years": int(options.get("time_horizon", 10)),
+        "cycle_length_months": 1,
+        "discount_costs": {jurisdiction: rate},
+        "discount_qalys": {jurisdiction: rate},
+    }
+    pairs = [tuple(p) for p in options.get("pairs", [("remission_rates", "relapse_rates"),
+                                                      ("remission_rates", "ae_rates")])]
+    triple = tuple(options.get("triple", ("remission_rates", "relapse_rates", "partial_response_rates")))
+    kwargs = {"comparator": arms[shared.base], "jurisdiction": jurisdiction, "perspective": psa.perspective,
+              "outcome": options.get("outcome", "inmb"), "wtp": shared.decision_lambda,
+              "variation": float(options.get("variation", 0.2))}
+
+    tornado, two_way, three_way = [], [], []
+    for strategy in strategies:
+        arm = arms[strategy]
+        tornado.append(sensitivity_engine.run_one_way_dsa(settings, inputs, arm, **kwargs)
+                       .assign(strategy=strategy))
+        two_way.append(sensitivity_engine.run_two_way_dsa(pairs, settings, inputs, arm, **kwargs)
+                       .assign(strategy=strategy))
+        three_way.append(sensitivity_engine.run_three_way_dsa(triple, settings, inputs, arm, **kwargs)
+                         .assign(strategy=strategy))
+    outputs.update({
+        "tornado_owsa": pd.concat(tornado, ignore_index=True),
+        "dsa_twoway": pd.concat(two_way, ignore_index=True),
+        "dsa_threeway": pd.concat(three_way, ignore_index=True),
+    })
+    return outputs
+
+
+def _run_bia(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    frames = _bia_frames(shared.psa, config, options)
+    outputs: Outputs = {"bia_annual": frames[-1]}
+    if len(frames) > 1:
+        outputs["bia_scenario"] = pd.concat(frames[:-1], ignore_index=True)
+    return outputs
+
+
+def _run_dcea(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    """Equity summaries per strategy; the distributional CEAC uses the shared per-draw cube."""
+    psa = shared.psa
+    epsilon = float(options.get("epsilon", 1.5))
+    result = dcea_engine.run_dcea(psa, epsilon=epsilon)
+    mean_effect, mean_cost = shared.effect.mean(axis=0), shared.cost.mean(axis=0)
+    ede = np.array([dcea_engine.calculate_ede_qalys(shared.effect[:, j], epsilon=epsilon)
+                    for j in range(len(shared.strategies))])
+    # Per-draw effects scaled by EDE / mean, so their mean NMB is lambda * EDE - mean cost
+    weighted = (shared.lambda_grid[:, None, None] * (shared.effect * (ede / mean_effect))[None, :, :]
+                - shared.cost[None, :, :])
+    best = weighted.argmax(axis=2)
+    prob_optimal = np.stack([(best == j).mean(axis=1) for j in range(len(shared.strategies))], axis=1)
+    distributional = shared.lambda_frame(weighted.mean(axis=1), "equity_weighted_nmb")
+    distributional["probability_optimal"] = prob_optimal.ravel()
+    summary = pd.DataFrame({
+        "strategy": shared.strategies,
+        "mean_qalys": mean_effect,
+        "atkinson_index": dcea_engine.calculate_atkinson_index(mean_effect, epsilon=epsilon),
+        "ede_qalys": dcea_engine.calculate_ede_qalys(mean_effect, epsilon=epsilon),
+    })
+    return {
+        "dcea_summary": summary,
+        "dcea_ede_qalys": result.ede_qalys,
+        "dcea_atkinson": result.atkinson_index,
+        "equity_impact": dcea_engine.calculate_equity_impact(psa),
+        "atkinson_by_strategy": dcea_engine.calculate_atkinson_by_strategy(psa),
+        "ede_comparison": dcea_engine.calculate_ede_comparison(psa),
+        "distributional_ceac": distributional,
+        "subgroup_comparison": dcea_engine.calculate_subgroup_comparison(psa),
+    }
+
+
+def _run_nma(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    mean_effects = dict(zip(shared.strategies, shared.effect.mean(axis=0)))
+    result = nma_engine.run_nma_analysis(shared.strategies, shared.base, mean_effects,
+                                         n_samples=int(options.get("n_samples", 1000)), seed=options.get("seed"))
+    return {
+        "nma_treatment_effects": result.treatment_effects,
+        "nma_relative_effects": result.relative_effects,
+        "nma_correlation_matrix": result.correlation_matrix,
+    }
+
+
+def _run_subgroup(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    age = subgroup_engine.run_age_subgroup_analysis(shared.psa, lambda_threshold=shared.decision_lambda)
+    severity = subgroup_engine.run_severity_subgroup_analysis(shared.psa, lambda_threshold=shared.decision_lambda)
+    return {
+        f"subgroup_{age.subgroup_name}": age.results_by_subgroup,
+        f"subgroup_{severity.subgroup_name}": severity.results_by_subgroup,
+        "subgroup_combined": pd.concat([age.results_by_subgroup.assign(subgroup_type="age"),
+                                        severity.results_by_subgroup.assign(subgroup_type="severity")]),
+    }
+
+
+def _run_cca(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    engine = cca_engine.CostConsequenceEngine(confidence_level=float(options.get("confidence_level", 0.95)))
+    result = engine.analyze(shared.psa.table, perspective=_perspective_value(shared.psa))
+    return {
+        "cca_summary": result.summary_table,
+        "cca_cost_components": pd.DataFrame([
+            {"component": c.name, "description": c.description, "category": c.category,
+             "mean": c.mean, "ci_lower": c.ci_lower, "ci_upper": c.ci_upper}
+            for c in result.cost_components]),
+        "cca_outcome_measures": pd.DataFrame([
+            {"measure": m.name, "description": m.description, "unit": m.unit,
+             "higher_is_better": m.higher_is_better, "mean": m.mean, "ci_lower": m.ci_lower,
+             "ci_upper": m.ci_upper}
+            for m in result.outcome_measures]),
+    }
+
+
+def _run_cma(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    engine = cma_engine.CostMinimizationEngine(
+        equivalence_margin=float(options.get("equivalence_margin", 0.01)),
+        bootstrap_samples=int(options.get("bootstrap_samples", 1000)),
+        random_seed=options.get("seed"),
+    )
+    result = engine.run_analysis(shared.psa.table, perspective=_perspective_value(shared.psa))
+    return {
+        "cma_base_case": result.base_case_results,
+        "cma_equivalence_tests": pd.DataFrame([vars(test) for test in result.equivalence_tests]),
+        "cma_cost_minimization": result.cost_minimization_results,
+        "cma_sensitivity": result.sensitivity_analysis,
+        "cma_bootstrap": result.bootstrap_results,
+    }
+
+
+def _run_roa(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    engine = roa_engine.RealOptionsEngine(risk_free_rate=float(options.get("risk_free_rate", 0.03)),
+                                          time_horizon=float(options.get("time_horizon", 5.0)))
+    result = engine.analyze(shared.psa.table, perspective=_perspective_value(shared.psa),
+                            option_types=options.get("option_types", ["delay", "abandon", "expand", "switch"]),
+                            wtp_threshold=shared.decision_lambda)
+    return {"roa_summary": result.summary_table}
+
+
+def _run_roi(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    engine = roi_engine.ROIAnalysisEngine(willingness_to_pay=shared.decision_lambda,
+                                          discount_rate=float(options.get("discount_rate", 0.05)),
+                                          time_horizon_years=int(options.get("time_horizon", 5)))
+    result = engine.analyze(shared.psa.table)
+    return {
+        "roi_summary": pd.DataFrame(result.summary_stats).T.rename_axis("statistic").reset_index(),
+        "roi_metrics": pd.DataFrame([
+            {"strategy": m.strategy, "benefit_cost_ratio": m.benefit_cost_ratio, "net_benefit": m.net_benefit,
+             "roi_percentage": m.roi_percentage, "break_even_probability": m.break_even_probability,
+             "payback_period_years": m.payback_period_years}
+            for m in result.metrics]),
+    }
+
+
+def _run_mcda(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    perspective = "health_system" if shared.psa.perspective == "healthcare" else shared.psa.perspective
+    criteria = mcda_engine.create_default_criteria(perspective=perspective)
+    scores = mcda_engine.calculate_mcda_scores(shared.psa, criteria, n_boot=int(options.get("n_boot", 1000)))
+    sensitivity = mcda_engine.perform_weight_sensitivity_analysis(
+        shared.psa, criteria, n_scenarios=int(options.get("n_scenarios", 100)))
+    return {
+        "mcda_scores": scores.scores,
+        "mcda_weighted_scores": scores.weighted_scores,
+        "mcda_rankings": scores.rankings,
+        "mcda_weight_ranges": sensitivity.weight_ranges,
+        "mcda_ranking_stability": sensitivity.ranking_stability,
+        "mcda_trade_offs": sensitivity.trade_offs,
+        "mcda_report": mcda_engine.generate_mcda_summary_report(scores, sensitivity),
+    }
+
+
+def _run_headroom(shared: SharedPSA, config: CompleteAnalysisConfig, options: Dict[str, Any]) -> Outputs:
+    """
+    Headroom against the base strategy over the lambda grid.
+
+    Same metrics as ``HeadroomAnalysisEngine`` (current price defaults to the
+    mean cost), but incrementals and probability cost-effective come from
+    the real comparator's draws rather than a fixed baseline.
+    """
+    inc = shared.incremental.set_index("strategy")
+    prices = options.get("current_prices") or {}
+    rows = []
+    for j in shared.comparators:
+        strategy = shared.strategies[j]
+        price = float(prices.get(strategy, inc.at[strategy, "mean_cost"]))
+        delta_cost, delta_effect = inc.at[strategy, "incremental_cost"], inc.at[strategy, "incremental_effect"]
+        for k, wtp in enumerate(shared.lambda_grid):
+            threshold = max(0.0, price + wtp * delta_effect - delta_cost) if delta_effect > 0 else 0.0
+            probability = float(shared.prob_ce[k, j])
+            rows.append({
+                "strategy": strategy, "current_price": price, "threshold_price": threshold,
+                "headroom_amount": threshold - price,
+                "headroom_multiple": threshold / price if price > 0 else 0.0,
+                "wtp_threshold": float(wtp), "cost_effective_probability": probability,
+                "expected_headroom": (threshold - price) * probability,
+            })
+    metrics = pd.DataFrame(rows)
+    summary = (metrics.groupby("strategy", sort=False)
+               .agg(mean_headroom_amount=("headroom_amount", "mean"),
+                    median_headroom_amount=("headroom_amount", "median"),
+                    max_headroom_amount=("headroom_amount", "max"),
+                    mean_headroom_multiple=("headroom_multiple", "mean"),
+                    max_headroom_multiple=("headroom_multiple", "max"),
+                    mean_ce_probability=("cost_effective_probability", "mean"),
+                    max_threshold_price=("threshold_price", "max"))
+               .reset_index())
+    return {"headroom": metrics, "headroom_summary": summary}
+
+
+ANALYSES: Dict[str, Callable[[SharedPSA, CompleteAnalysisConfig, Dict[str, Any]], Outputs]] = {
+    "cea": _run_cea,
+    "voi": _run_voi,
+    "vbp": _run_vbp,
+    "bia": _run_bia,
+    "dsa": _run_dsa,
+    "dcea": _run_dcea,
+    "nma": _run_nma,
+    "subgroup": _run_subgroup,
+    "cca": _run_cca,
+    "cma": _run_cma,
+    "roa": _run_roa,
+    "roi": _run_roi,
+    "mcda": _run_mcda,
+    "headroom": _run_headroom,
+}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class CompleteAnalysisResult:
+    """Outputs of a complete run, keyed by (input, jurisdiction, perspective, analysis)."""
+
+    outputs: Dict[Tuple[str, str, str, str], Outputs]
+    index: pd.DataFrame     # One row per job: status, outputs, timing, strategies
+    shared: Dict[Tuple[str, str, str], SharedPSA]
+    output_dir: Optional[Path] = None
+
+    def get(self, input: str, jurisdiction: str, perspective: str, analysis: str) -> Outputs:
+        return self.outputs.get((input, jurisdiction, perspective, analysis), {})
+
+
+def _job_dir(config: CompleteAnalysisConfig, job: BatchJob) -> Path:
+    return Path(config.output_dir) / job.input / job.jurisdiction / job.perspective
+
+
+def _write_outputs(outputs: Outputs, directory: Path) -> List[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, value in outputs.items():
+        if isinstance(value, str):
+            path = directory / f"{name}.md"
+            path.write_text(value, encoding="utf-8")
+        else:
+            path = directory / f"{name}.csv"
+            value.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def _run_job(job: BatchJob, shared: SharedPSA, config: CompleteAnalysisConfig,
+             write: bool) -> Tuple[Outputs, Dict[str, Any]]:
+    start = time.perf_counter()
+    try:
+        with span("compute", job="/".join(job.key)):
+            outputs = ANALYSES[job.analysis](shared, config, config.options.get(job.analysis, {}))
+        if write:
+            with span("save", job="/".join(job.key)):
+                _write_outputs(outputs, _job_dir(config, job))
+        status, error = "completed", None
+    except Exception as e:
+        logger.error(f"Job {job.key} failed: {e}")
+        outputs, status, error = {}, "failed", str(e)
+    return outputs, {"status": status, "error": error, "outputs": len(outputs),
+                     "seconds": time.perf_counter() - start}
+
+
+def run_complete_analysis(config: CompleteAnalysisConfig, write: bool = True) -> CompleteAnalysisResult:
+    """
+    Run every configured analysis on every input slice.
+
+    Each input is read once; each jurisdiction/perspective slice is cut to
+    the strategy subset and pivoted once into a ``SharedPSA``, which all
+    analyses of that slice read concurrently on a thread pool.
+
+    Args:
+        config: Complete analysis config
+        write: Write per-output CSVs and a JSON job index under ``config.output_dir``
+
+    Returns:
+        CompleteAnalysisResult with the output tables and a per-job index
+    """
+    slices: Dict[Tuple[str, str, str], SharedPSA] = {}
+    errors: Dict[Tuple[str, str, str], str] = {}
+    for name, path in config.inputs.items():
+        input_slices, _ = _load_slices(name, path, config)
+        for (jurisdiction, perspective), psa in input_slices.items():
+            key = (name, jurisdiction, perspective)
+            try:
+                with span("derive", input=name, jurisdiction=jurisdiction, perspective=perspective):
+                    slices[key] = SharedPSA.derive(config.subset.apply(psa), config.lambda_grid,
+                                                   config.decision_lambda)
+            except ValueError as e:
+                errors[key] = str(e)
+
+    index_rows: List[Dict[str, Any]] = []
+    runnable = []
+    for job in config.jobs():
+        shared = slices.get(job.key[:3])
+        if shared is None:
+            index_rows.append({**dict(zip(INDEX_COLUMNS, job.key)), "status": "skipped",
+                               "error": errors.get(job.key[:3], "no rows for jurisdiction/perspective"),
+                               "outputs": 0, "seconds": 0.0, "strategies": None})
+        else:
+            runnable.append((job, shared))
+
+    logger.info(f"Running {len(runnable)} analyses on {len(slices)} slices with {config.n_jobs} workers "
+                f"(strategy subset '{config.subset.name}')")
+    outputs: Dict[Tuple[str, str, str, str], Outputs] = {}
+    with ThreadPoolExecutor(max_workers=max(1, config.n_jobs)) as executor:
+        # Each job runs in a copy of this context so its spans nest under the caller's
+        futures = [(job, shared, executor.submit(contextvars.copy_context().run, _run_job, job, shared, config, write))
+                   for job, shared in runnable]
+        for job, shared, future in futures:
+            outputs[job.key], info = future.result()
+            index_rows.append({**dict(zip(INDEX_COLUMNS, job.key)), **info,
+                               "strategies": ",".join(shared.strategies)})
+
+    index = pd.DataFrame(index_rows).sort_values(INDEX_COLUMNS).reset_index(drop=True)
+    result = CompleteAnalysisResult(outputs=outputs, index=index, shared=slices)
+    if write:
+        result.output_dir = _write_index(result, config)
+    return result
+
+
+def _write_index(result: CompleteAnalysisResult, config: CompleteAnalysisConfig) -> Path:
+    """Write the JSON job index; returns the output directory."""
+    output_dir = Path(config.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / "complete_index.json", "w") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(),
+            "strategy_subset": vars(config.subset),
+            "inputs": {name: str(path) for name, path in config.inputs.items()},
+            "lambda_grid": config.lambda_grid.tolist(),
+            "decision_lambda": config.decision_lambda,
+            "jobs": result.index.astype(object).where(result.index.notna(), None).to_dict(orient="records"),
+        }, f, indent=2, default=str)
+    completed = int((result.index["status"] == "completed").sum()) if len(result.index) else 0
+    logger.info(f"Wrote outputs of {completed} analyses to {output_dir}")
+    return output_dir
@@ -0,0 +1,222 @@
+"""
+V4 Batched Deterministic Sensitivity Analysis
+
+Turns DSA designs into parameter matrices evaluated in batches.
+
+Responsibilities:
+- One-way (tornado), two-way, three-way and general n-way grid designs as a
+  single (n_points, n_params) parameter matrix
+- Batched evaluation through a vectorised model that takes columns of
+  parameter values and returns one outcome per point
+- Reshaping outcomes back into grids
+- A vectorised adapter for the Markov cohort model in ``cea_engine``
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cea_engine import CLINICAL_PARAMETERS, clinical_parameter_matrix, simulate_arm_grid
+
+# Vectorised model: parameter name -> array of values (one per point) -> outcomes
+BatchModel = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+DEFAULT_BATCH_SIZE = 8192
+
+
+@dataclass
+class DSADesign:
+    """Parameter matrix for a DSA, with the layout needed to reshape outcomes."""
+
+    parameters: List[str]
+    matrix: np.ndarray                   # (n_points, n_params)
+    base: Dict[str, float]
+    axes: Dict[str, np.ndarray] = field(default_factory=dict)  # grid axes, in product order
+    kind: str = "grid"                   # "grid" or "tornado"
+
+    @property
+    def n_points(self) -> int:
+        return self.matrix.shape[0]
+
+    def columns(self, rows: slice = slice(None)) -> Dict[str, np.ndarray]:
+        """Parameter columns for a range of points."""
+        return {name: self.matrix[rows, i] for i, name in enumerate(self.parameters)}
+
+    def grid_shape(self) -> Tuple[int, ...]:
+        """Shape of the outcome grid (n_varied, 2) for tornado designs."""
+        if self.kind == "tornado":
+            return (len(self.parameters), 2)
+        return tuple(len(values) for values in self.axes.values())
+
+
+def grid_design(base: Dict[str, float], axes: Dict[str, Sequence[float]]) -> DSADesign:
+    """
+    Full-factorial design over ``axes`` with all other parameters at base.
+
+    Points are ordered as nested loops over the axes (first axis outermost).
+
+    Args:
+        base: Base-case value of every parameter
+        axes: Parameter -> values to sweep (one to three axes for 1/2/3-way DSA)
+
+    Returns:
+        DSADesign with ``n_points = prod(len(values))``
+    """
+    base = dict(base)
+    for name, values in axes.items():
+        base.setdefault(name, float(np.asarray(values)[0]))
+    names = list(base)
+    axes = {name: np.asarray(values, dtype=float) for name, values in axes.items()}
+    mesh = np.meshgrid(*axes.values(), indexing="ij")
+    n_points = mesh[0].size if mesh else 1
+
+    matrix = np.tile(np.array([base[n] for n in names], dtype=float), (n_points, 1))
+    for name, values in zip(axes, mesh):
+        matrix[:, names.index(name)] = values.ravel()
+    return DSADesign(parameters=names, matrix=matrix, base=base, axes=axes, kind="grid")
+
+
+def tornado_design(parameters: Dict[str, Tuple[float, float, float]]) -> DSADesign:
+    """
+    One-way design: the base case followed by (low, high) for each parameter.
+
+    Args:
+        parameters: Parameter -> (base, low, high)
+
+    Returns:
+        DSADesign with ``1 + 2 * n_params`` points
+    """
+    names = list(parameters)
+    base = {name: float(values[0]) for name, values in parameters.items()}
+    base_row = np.array([base[n] for n in names], dtype=float)
+    matrix = np.tile(base_row, (1 + 2 * len(names), 1))
+    for i, name in enumerate(names):
+        _, low, high = parameters[name]
+        matrix[1 + 2 * i, i] = low
+        matrix[2 + 2 * i, i] = high
+    return DSADesign(parameters=names, matrix=matrix, base=base, kind="tornado")
+
+
+def evaluate_design(
+    design: DSADesign,
+    model: BatchModel,
+    batch_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Evaluate a vectorised model over every point of a design.
+
+    The whole matrix is passed to ``model`` in one call, or in chunks of
+    ``batch_size`` points when the model itself does not bound memory.
+
+    Returns:
+        Outcome array of length ``design.n_points``
+    """
+    step = design.n_points if not batch_size else batch_size
+    parts = [
+        np.broadcast_to(np.asarray(model(design.columns(slice(start, start + step))), dtype=float),
+                        (min(step, design.n_points - start),))
+        for start in range(0, design.n_points, step)
+    ]
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def grid_frame(design: DSADesign, outcomes: np.ndarray, outcome_name: str = "outcome") -> pd.DataFrame:
+    """Long table with one row per grid point: swept parameters and outcome."""
+    frame = pd.DataFrame({name: design.matrix[:, design.parameters.index(name)] for name in design.axes})
+    frame[outcome_name] = outcomes
+    return frame
+
+
+class CohortDSAModel:
+    """
+    Vectorised DSA outcome from the Markov cohort model.
+
+    Parameters are named ``"<inputs key>.<arm or sub-key>"`` after
+    ``cea_engine.CLINICAL_PARAMETERS``, e.g. ``"remission_rates.IV_ketamine"``
+    or ``"death_rates.baseline"``. Each arm is simulated once per distinct
+    parameter vector it sees (a three-way grid over one arm's parameters leaves
+    the comparator with a single axis), in batched traces of ``batch_size``.
+    """
+
+    OUTCOMES = ("cost", "qaly", "incremental_cost", "incremental_qaly", "inmb", "icer")
+
+    def __init__(
+        self,
+        settings: Dict,
+        inputs: Dict,
+        arm: str,
+        comparator: str,
+        jurisdiction: str = "AU",
+        perspective: str = "health_system",
+        outcome: str = "inmb",
+        wtp: float = 50000.0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        if outcome not in self.OUTCOMES:
+            raise ValueError(f"Unknown outcome '{outcome}', expected one of {self.OUTCOMES}")
+        self.settings = settings
+        self.inputs = inputs
+        self.arm = arm
+        self.comparator = comparator
+        self.jurisdiction = jurisdiction
+        self.perspective = perspective
+        self.outcome = outcome
+        self.wtp = wtp
+        self.batch_size = batch_size
+
+    def parameter_names(self, arm: Optional[str] = None) -> List[str]:
+        """Parameter names that affect ``arm`` (default: both arms)."""
+        arms = [arm] if arm else [self.arm, self.comparator]
+        return list(dict.fromkeys(f"{key}.{sub or a}" for a in arms for key, sub, _ in CLINICAL_PARAMETERS))
+
+    def base_parameters(self) -> Dict[str, float]:
+        """Base-case value of every parameter."""
+        base = {}
+        for a in (self.arm, self.comparator):
+            values = clinical_parameter_matrix(a, self.inputs)[0]
+            base.update(zip(self.parameter_names(a), values))
+        return base
+
+    def _simulate(self, arm: str, params: Dict[str, np.ndarray], n_points: int):
+        names = self.parameter_names(arm)
+        theta = np.tile(clinical_parameter_matrix(arm, self.inputs), (n_points, 1))
+        for k, name in enumerate(names):
+            if name in params:
+                theta[:, k] = params[name]
+        unique, inverse = np.unique(theta, axis=0, return_inverse=True)
+        cost = np.empty(len(unique))
+        qaly = np.empty(len(unique))
+        for start in range(0, len(unique), self.batch_size):
+            rows = slice(start, start + self.batch_size)
+            res = simulate_arm_grid(arm, [self.jurisdiction], [self.perspective], self.settings,
+                                    self.inputs, parameters=unique[rows])
+            cost[rows] = res.cost[:, 0, 0]
+            qaly[rows] = res.qaly[:, 0, 0]
+        inverse = inverse.ravel()
+        return cost[inverse], qaly[inverse]
+
+    def __call__(self, params: Dict[str, np.ndarray]) -> np.ndarray:
+        unknown = set(params) - set(self.parameter_names())
+        if unknown:
+            raise KeyError(f"Parameters not used by the cohort model: {sorted(unknown)}")
+        n_points = len(next(iter(params.values()))) if params else 1
+        cost, qaly = self._simulate(self.arm, params, n_points)
+        if self.outcome == "cost":
+            return cost
+        if self.outcome == "qaly":
+            return qaly
+
+        ref_cost, ref_qaly = self._simulate(self.comparator, params, n_points)
+        inc_cost = cost - ref_cost
+        inc_qaly = qaly - ref_qaly
+        if self.outcome == "incremental_cost":
+            return inc_cost
+        if self.outcome == "incremental_qaly":
+            return inc_qaly
+        if self.outcome == "icer":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.where(inc_qaly != 0, inc_cost / inc_qaly, np.inf)
+        return self.wtp * inc_qaly - inc_cost
@@ -6,7 +6,7 @@ optimization using Gaussian process regression and Bayesian methods.
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import List, Optional, Dict, Any
 
 import numpy as np
@@ -118,12 +118,7 @@ def calculate_evsi_gaussian_process(
             # Calculate EVPI with the additional sample information
             # This is a simplified approximation
             sample_evpi = calculate_evpi(
-                PSAData(
-                    table=sample_data,
-                    strategies=psa.strategies,
-                    perspective=psa.perspective,
-                    jurisdiction=psa.jurisdiction
-                ),
+                replace(psa, table=sample_data),
                 willingness_to_pay
             )
             
@@ -12,9 +12,12 @@ Author: V4 Development Team
 Date: October 2025
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 from scipy import stats
@@ -22,11 +25,117 @@ from sklearn.model_selection import KFold
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import logging
 
-from trd_cea.core.io import save_results, load_psa
+from trd_cea.core.io import save_results
+
+from .io import load_psa
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
 
+# Largest (n_sims x n_obs) block of replicated data held at once
+PPC_BLOCK_SIZE = 4_000_000
+
+
+def replicated_statistics(
+    values: np.ndarray,
+    n_obs: int,
+    n_simulations: int,
+    test_statistics: List[str],
+    rng: np.random.Generator
+) -> Dict[str, np.ndarray]:
+    """
+    Test statistics of replicated datasets drawn from predictive values.
+
+    One (n_simulations, n_obs) index matrix selects every replicate; each
+    statistic is then a row-wise reduction. Rows are generated in blocks of
+    at most ``PPC_BLOCK_SIZE`` elements.
+
+    Args:
+        values: Predictive values (e.g. every PSA draw of the effect)
+        n_obs: Size of each replicate (the observed sample size)
+        n_simulations: Number of replicates
+        test_statistics: Any of "mean", "std", "skewness", "kurtosis"
+        rng: Random generator
+
+    Returns:
+        Statistic name -> array of length n_simulations
+    """
+    values = np.asarray(values, dtype=float)
+    rows = max(1, PPC_BLOCK_SIZE // max(n_obs, 1))
+    parts: Dict[str, List[np.ndarray]] = {stat: [] for stat in test_statistics}
+    for start in range(0, n_simulations, rows):
+        replicates = values[rng.integers(0, len(values), size=(min(rows, n_simulations - start), n_obs))]
+        for stat in test_statistics:
+            parts[stat].append(_row_statistic(replicates, stat))
+    return {stat: np.concatenate(blocks) for stat, blocks in parts.items()}
+
+
+def _row_statistic(x: np.ndarray, stat: str) -> np.ndarray:
+    if stat == "mean":
+        return x.mean(axis=-1)
+    if stat == "std":
+        return x.std(axis=-1, ddof=1)
+    if stat == "skewness":
+        return stats.skew(x, axis=-1)
+    if stat == "kurtosis":
+        return stats.kurtosis(x, axis=-1)
+    raise ValueError(f"Unknown test statistic '{stat}'")
+
+
+def calibration_target_checks(
+    predictions: pd.DataFrame,
+    observed: pd.DataFrame,
+    value_column: str = "effect",
+    confidence_level: float = 0.95
+) -> pd.DataFrame:
+    """
+    Check each strategy's observed target against all of its PSA draws.
+
+    Args:
+        predictions: PSA draws with ``strategy`` and ``value_column``
+        observed: Observed data with the same columns; the target is the
+            strategy mean
+        value_column: Column holding the calibrated quantity
+        confidence_level: Width of the predictive interval
+
+    Returns:
+        DataFrame per strategy: predicted_mean, observed_mean,
+        calibration_error, relative_error, predicted_lower/upper,
+        target_in_interval, draw_p_value (share of draws >= target) and n_draws
+    """
+    targets = observed.groupby("strategy")[value_column].mean().rename("observed_mean")
+    draws = predictions[predictions["strategy"].isin(targets.index)]
+    if draws.empty:
+        return pd.DataFrame(columns=[
+            "strategy", "predicted_mean", "observed_mean", "calibration_error", "relative_error",
+            "predicted_lower", "predicted_upper", "target_in_interval", "draw_p_value", "n_draws"
+        ])
+    alpha = (1 - confidence_level) / 2
+    target = draws["strategy"].map(targets)
+    grouped = draws.assign(_above=(draws[value_column] >= target).astype(float)).groupby("strategy")
+    df = pd.DataFrame({
+        "predicted_mean": grouped[value_column].mean(),
+        "predicted_lower": grouped[value_column].quantile(alpha),
+        "predicted_upper": grouped[value_column].quantile(1 - alpha),
+        "draw_p_value": grouped["_above"].mean(),
+        "n_draws": grouped.size(),
+    }).join(targets, how="inner")
+    df["calibration_error"] = df["predicted_mean"] - df["observed_mean"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["relative_error"] = np.where(df["observed_mean"] != 0,
+                                        df["calibration_error"] / df["observed_mean"], np.nan)
+    df["target_in_interval"] = df["observed_mean"].between(df["predicted_lower"], df["predicted_upper"])
+    df = df.reset_index()
+    return df[[
+        "strategy", "predicted_mean", "observed_mean", "calibration_error", "relative_error",
+        "predicted_lower", "predicted_upper", "target_in_interval", "draw_p_value", "n_draws"
+    ]]
+
+
+def _fold_scores(pred: np.ndarray, obs: np.ndarray, folds: List[Tuple[np.ndarray, np.ndarray]]) -> List[float]:
+    """Score folds that predict the training mean: 1 / (1 + test MSE)."""
+    return [1.0 / (1.0 + np.mean((pred[train].mean() - obs[test]) ** 2)) for train, test in folds]
+
 
 @dataclass
 class ValidationMetrics:
@@ -100,7 +209,9 @@ class ExternalValidationEngine:
             "cross_validation": {
                 "n_splits": 5,
                 "shuffle": True,
-                "random_state": 42
+                "random_state": 42,
+                "n_jobs": None,              # worker processes (default: one per fold)
+                "parallel_min_rows": 200_000  # below this, folds run in-process
             },
             "calibration": {
                 "method": "linear",  # linear, isotonic, or spline
@@ -108,7 +219,8 @@ class ExternalValidationEngine:
             },
             "predictive_checks": {
                 "n_simulations": 1000,
-                "test_statistics": ["mean", "std", "skewness", "kurtosis"]
+                "test_statistics": ["mean", "std", "skewness", "kurtosis"],
+                "random_state": None
             },
             "goodness_of_fit": {
                 "metrics": ["mse", "mae", "rmse", "r_squared"]
@@ -136,6 +248,9 @@ class ExternalValidationEngine:
         """
         logger.info("Starting comprehensive external validation")
 
+        # Accept PSAData as returned by load_psa
+        model_predictions = getattr(model_predictions, "table", model_predictions)
+
         # Perform calibration
         calibration_results = self._calibrate_model(model_predictions, observed_data)
 
@@ -213,27 +328,9 @@ class ExternalValidationEngine:
         pred_filtered = predictions[predictions["strategy"].isin(common_strategies)]
         obs_filtered = observed[observed["strategy"].isin(common_strategies)]
 
-        # Calculate calibration statistics
-        calibration_data = []
-
-        for strategy in common_strategies:
-            pred_vals = pred_filtered[pred_filtered["strategy"] == strategy]
-            obs_vals = obs_filtered[obs_filtered["strategy"] == strategy]
-
-            if len(pred_vals) > 0 and len(obs_vals) > 0:
-                # Simple linear calibration
-                pred_mean = pred_vals["effect"].mean()
-                obs_mean = obs_vals["effect"].mean()
-
-                calibration_data.append({
-                    "strategy": strategy,
-                    "predicted_mean": pred_mean,
-                    "observed_mean": obs_mean,
-                    "calibration_error": pred_mean - obs_mean,
-                    "relative_error": (pred_mean - obs_mean) / obs_mean if obs_mean != 0 else np.nan
-                })
-
-        calibration_df = pd.DataFrame(calibration_data)
+        # Calibration targets (observed means) against every predicted PSA draw
+        confidence = self.config["calibration"].get("confidence_level", 0.95)
+        calibration_df = calibration_target_checks(pred_filtered, obs_filtered, confidence_level=confidence)
 
         # Overall calibration slope and intercept
         if len(calibration_df) > 1:
@@ -282,7 +379,10 @@ class ExternalValidationEngine:
             suffixes=("_pred", "_obs")
         )
 
-        if len(merged_data) < self.config["cross_validation"]["n_splits"]:
+        cv_config = self.config["cross_validation"]
+        cv_results = []
+
+        if len(merged_data) < cv_config["n_splits"]:
             # Not enough data for cross-validation
             cv_scores = [0.0]  # Placeholder
             cv_mean = 0.0
@@ -290,33 +390,37 @@ class ExternalValidationEngine:
         else:
             # Perform k-fold cross-validation
             kf = KFold(
-                n_splits=self.config["cross_validation"]["n_splits"],
-                shuffle=self.config["cross_validation"]["shuffle"],
-                random_state=self.config["cross_validation"]["random_state"]
+                n_splits=cv_config["n_splits"],
+                shuffle=cv_config["shuffle"],
+                random_state=cv_config["random_state"]
             )
-
-            cv_scores = []
-            cv_results = []
-
-            for fold, (train_idx, test_idx) in enumerate(kf.split(merged_data)):
-                train_data = merged_data.iloc[train_idx]
-                test_data = merged_data.iloc[test_idx]
-
-                # Simple prediction model (could be enhanced)
-                pred_mean = train_data["effect_pred"].mean()
-                obs_test = test_data["effect_obs"]
-
-                # Calculate fold score (1 - normalized MSE)
-                mse = mean_squared_error([pred_mean] * len(obs_test), obs_test)
-                score = 1.0 / (1.0 + mse)  # Normalized score
-                cv_scores.append(score)
-
-                cv_results.append({
+            folds = list(kf.split(merged_data))
+            pred = merged_data["effect_pred"].to_numpy(dtype=float)
+            obs = merged_data["effect_obs"].to_numpy(dtype=float)
+
+            # Worker processes only pay off once folds are large
+            n_jobs = cv_config.get("n_jobs") or min(len(folds), os.cpu_count() or 1)
+            if n_jobs > 1 and len(merged_data) >= cv_config.get("parallel_min_rows", 200_000):
+                with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                    cv_scores = [
+                        score for part in pool.map(
+                            _fold_scores, [pred] * len(folds), [obs] * len(folds),
+                            [[fold] for fold in folds]
+                        )
+                        for score in part
+                    ]
+            else:
+                cv_scores = _fold_scores(pred, obs, folds)
+
+            cv_results = [
+                {
                     "fold": fold + 1,
                     "score": score,
                     "n_train": len(train_idx),
                     "n_test": len(test_idx)
-                })
+                }
+                for fold, (score, (train_idx, test_idx)) in enumerate(zip(cv_scores, folds))
+            ]
 
             cv_mean = np.mean(cv_scores)
             cv_std = np.std(cv_scores)
@@ -352,28 +456,25 @@ class ExternalValidationEngine:
         check_results = []
 
         # Test statistics to check
-        test_stats = self.config["predictive_checks"]["test_statistics"]
+        ppc_config = self.config["predictive_checks"]
+        test_stats = ppc_config["test_statistics"]
+        observed_values = observed["effect"].to_numpy(dtype=float)
+
+        # All replicates come from one index matrix over the predictive draws
+        replicated = replicated_statistics(
+            predictions["effect"].to_numpy(dtype=float),
+            len(observed_values),
+            ppc_config["n_simulations"],
+            test_stats,
+            np.random.default_rng(ppc_config.get("random_state"))
+        )
 
         for stat in test_stats:
-            if stat == "mean":
-                obs_stat = observed["effect"].mean()
-                pred_stats = [predictions.sample(n=len(observed), replace=True)["effect"].mean()
-                             for _ in range(self.config["predictive_checks"]["n_simulations"])]
-            elif stat == "std":
-                obs_stat = observed["effect"].std()
-                pred_stats = [predictions.sample(n=len(observed), replace=True)["effect"].std()
-                             for _ in range(self.config["predictive_checks"]["n_simulations"])]
-            elif stat == "skewness":
-                obs_stat = stats.skew(observed["effect"])
-                pred_stats = [stats.skew(predictions.sample(n=len(observed), replace=True)["effect"])
-                             for _ in range(self.config["predictive_checks"]["n_simulations"])]
-            elif stat == "kurtosis":
-                obs_stat = stats.kurtosis(observed["effect"])
-                pred_stats = [stats.kurtosis(predictions.sample(n=len(observed), replace=True)["effect"])
-                             for _ in range(self.config["predictive_checks"]["n_simulations"])]
+            obs_stat = float(_row_statistic(observed_values, stat))
+            pred_stats = replicated[stat]
 
             # Calculate p-value (Bayesian p-value)
-            p_value = np.mean([1 if pred_stat >= obs_stat else 0 for pred_stat in pred_stats])
+            p_value = float(np.mean(pred_stats >= obs_stat))
 
             p_values[stat] = p_value
             statistics[stat] = obs_stat
@@ -559,7 +660,9 @@ class ExternalValidationEngine:
             },
             "calibration": {
                 "slope_close_to_1": calibration_good,
-                "mean_calibration_error": calibration["mean_calibration_error"]
+                "mean_calibration_error": calibration["mean_calibration_error"],
+                "targets_within_draw_interval": float(calibration["calibration_df"]["target_in_interval"].mean())
+                if len(calibration["calibration_df"]) else np.nan
             },
             "cross_validation": {
                 "consistent_performance": cv_consistent,
@@ -20,6 +20,7 @@ if script_dir.name in ('main.py', 'run.py'):
 sys.path.insert(0, str(script_dir.parent))
 
 from trd_cea.core.logging_config import get_default_logging_config, setup_analysis_logging
+from trd_cea.models.nma_linkage import link_posterior_draws
 
 logging_config = get_default_logging_config()
 logging_config.level = "INFO"
@@ -54,8 +55,8 @@ def sample_remission_rates(nma_df, survival_params, n_draws=1000):
 
     remission_samples = {}
 
-    # Sample indices once for all treatments to ensure correlation
-    sampled_indices = np.random.choice(len(nma_df), size=n_draws, replace=True)
+    # One whole posterior draw per PSA draw, shared by all treatments
+    sampled_indices = link_posterior_draws(np.arange(n_draws), len(nma_df))
 
     for nma_name, model_name in treatment_mapping.items():
         prob_col = f'{nma_name}_prob'
@@ -0,0 +1,460 @@
+"""
+V4 Global Sensitivity Engine
+
+Global (probabilistic) sensitivity measures for PSA parameters.
+
+Responsibilities:
+- Partial rank correlation coefficients for every parameter at once, from
+  the inverse correlation matrix of the rank-transformed inputs and outcome
+  (equivalent to correlating rank residuals after linear adjustment for all
+  other parameters)
+- First-order and total Sobol indices with the Saltelli (first-order) and
+  Jansen (total) estimators on quasi-random A/B/AB_i designs, evaluated in a
+  single call of a vectorised model, with bootstrap confidence intervals
+- A polynomial chaos emulator fitted to existing PSA draws, giving Sobol
+  indices analytically from its coefficients without further model runs
+
+Inputs are assumed to be independent, as in the PSA sampling itself.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import combinations_with_replacement
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.polynomial import legendre
+from scipy import stats
+from scipy.stats import qmc
+
+# Vectorised model: parameter name -> array of values (one per point) -> outcomes
+BatchModel = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+# Marginal distribution: (low, high) for uniform, or an inverse CDF on [0, 1]
+Marginal = Union[Tuple[float, float], Callable[[np.ndarray], np.ndarray]]
+
+PARAMETER_PREFIX = "param_"
+
+
+def parameter_columns(frame: pd.DataFrame, prefix: str = PARAMETER_PREFIX) -> List[str]:
+    """PSA parameter columns (``param_*``) that vary across draws."""
+    return [c for c in frame.columns if c.startswith(prefix) and frame[c].nunique() > 1]
+
+
+def partial_rank_correlation(X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    PRCC of each column of ``X`` with ``y``.
+
+    The partial correlation of parameter i with the outcome, controlling for
+    all other parameters, is ``-P[i, y] / sqrt(P[i, i] P[y, y])`` where ``P``
+    is the inverse of the rank correlation matrix, so every coefficient comes
+    from one matrix inversion.
+
+    Args:
+        X: Parameter samples (n, k)
+        y: Outcome samples (n,)
+
+    Returns:
+        (prcc, p_value) arrays of length k; p-values use a t-test with
+        ``n - 2 - (k - 1)`` degrees of freedom
+    """
+    X = np.asarray(X, dtype=float)
+    n, k = X.shape
+    ranks = stats.rankdata(np.column_stack([X, np.asarray(y, dtype=float)]), axis=0)
+    precision = np.linalg.pinv(np.corrcoef(ranks, rowvar=False))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prcc = -precision[:k, k] / np.sqrt(precision[np.arange(k), np.arange(k)] * precision[k, k])
+        prcc = np.clip(prcc, -1.0, 1.0)
+        dof = n - 2 - (k - 1)
+        t = prcc * np.sqrt(dof / (1 - prcc ** 2))
+    p_value = 2 * stats.t.sf(np.abs(t), dof) if dof > 0 else np.full(k, np.nan)
+    return prcc, p_value
+
+
+def prcc_table(
+    frame: pd.DataFrame,
+    outcomes: Union[str, Sequence[str]],
+    parameters: Optional[Sequence[str]] = None,
+    by: Optional[Union[str, Sequence[str]]] = None,
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """
+    PRCC for every parameter and outcome, optionally within groups.
+
+    Args:
+        frame: PSA draws with parameter and outcome columns
+        outcomes: Outcome column(s)
+        parameters: Parameter columns (default: varying ``param_*`` columns)
+        by: Optional grouping column(s), e.g. ``"strategy"``
+        alpha: Significance level for the ``significant`` flag
+
+    Returns:
+        Long DataFrame: group columns, outcome, parameter, prcc, p_value,
+        abs_prcc, significant, sample_size (sorted by abs_prcc within outcome)
+    """
+    outcomes = [outcomes] if isinstance(outcomes, str) else list(outcomes)
+    by = [by] if isinstance(by, str) else list(by or [])
+    groups = frame.groupby(by, sort=False) if by else [((), frame)]
+
+    rows = []
+    for key, group in groups:
+        key = key if isinstance(key, tuple) else (key,)
+        params = list(parameters) if parameters is not None else parameter_columns(group)
+        params = [p for p in params if group[p].nunique() > 1]
+        if not params:
+            continue
+        for outcome in outcomes:
+            prcc, p_value = partial_rank_correlation(group[params].to_numpy(), group[outcome].to_numpy())
+            rows.append(pd.DataFrame({
+                **dict(zip(by, key)),
+                "outcome": outcome,
+                "parameter": params,
+                "prcc": prcc,
+                "p_value": p_value,
+                "abs_prcc": np.abs(prcc),
+                "significant": p_value < alpha,
+                "sample_size": len(group),
+            }))
+    columns = by + ["outcome", "parameter", "prcc", "p_value", "abs_prcc", "significant", "sample_size"]
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    out = pd.concat(rows, ignore_index=True)[columns]
+    return out.sort_values(by + ["outcome", "abs_prcc"], ascending=[True] * (len(by) + 1) + [False],
+                           kind="stable").reset_index(drop=True)
+
+
+# ---------------------------------------------------------------------------
+# Sobol indices from model runs
+# ---------------------------------------------------------------------------
+
+def _inverse_cdf(marginal: Marginal) -> Callable[[np.ndarray], np.ndarray]:
+    if callable(marginal):
+        return marginal
+    low, high = marginal
+    return lambda u: low + (high - low) * u
+
+
+def empirical_marginals(frame: pd.DataFrame, parameters: Optional[Sequence[str]] = None) -> Dict[str, Marginal]:
+    """Inverse empirical CDFs of PSA parameter columns, for Sobol sampling from PSA marginals."""
+    parameters = list(parameters) if parameters is not None else parameter_columns(frame)
+    return {
+        name: (lambda u, values=np.sort(frame[name].to_numpy(dtype=float)): np.quantile(values, u))
+        for name in parameters
+    }
+
+
+def saltelli_design(
+    marginals: Dict[str, Marginal],
+    n_samples: int,
+    seed: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    A, B and AB_i sample blocks for Sobol estimation.
+
+    A and B are the two halves of a scrambled Sobol' sequence in 2k
+    dimensions; AB_i is A with column i taken from B.
+
+    Returns:
+        Parameter -> values of length ``n_samples * (k + 2)``, stacked as
+        [A, B, AB_1, ..., AB_k]
+    """
+    names = list(marginals)
+    k = len(names)
+    u = qmc.Sobol(2 * k, scramble=True, seed=seed).random(n_samples)
+    A, B = u[:, :k], u[:, k:]
+    blocks = [A, B]
+    for i in range(k):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append(AB)
+    stacked = np.vstack(blocks)
+    return {name: _inverse_cdf(marginals[name])(stacked[:, i]) for i, name in enumerate(names)}
+
+
+def _sobol_estimates(fA: np.ndarray, fB: np.ndarray, fAB: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Leading axes are replicates; fA/fB (..., n), fAB (..., n, k)
+    variance = np.var(np.concatenate([fA, fB], axis=-1), axis=-1)[..., None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first = np.mean(fB[..., None] * (fAB - fA[..., None]), axis=-2) / variance        # Saltelli (2010)
+        total = 0.5 * np.mean((fA[..., None] - fAB) ** 2, axis=-2) / variance           # Jansen (1999)
+    return first, total
+
+
+def sobol_indices(
+    fA: np.ndarray,
+    fB: np.ndarray,
+    fAB: np.ndarray,
+    parameters: Sequence[str],
+    n_bootstrap: int = 200,
+    confidence_level: float = 0.95,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    First-order and total Sobol indices from A/B/AB_i model outputs.
+
+    Bootstrap resamples of the n base points are evaluated together as one
+    (n_bootstrap, n, k) array operation.
+
+    Args:
+        fA, fB: Outputs at A and B (n,)
+        fAB: Outputs at AB_i (n, k)
+        parameters: Parameter names in column order
+        n_bootstrap: Bootstrap resamples for the intervals (0 = none)
+        confidence_level: Width of the percentile intervals
+
+    Returns:
+        DataFrame: parameter, S1, ST and (with bootstrap) S1_lower/upper,
+        ST_lower/upper
+    """
+    first, total = _sobol_estimates(fA, fB, fAB)
+    out = pd.DataFrame({"parameter": list(parameters), "S1": first, "ST": total})
+    if n_bootstrap:
+        rng = np.random.default_rng(seed)
+        n = fA.shape[0]
+        alpha = (1 - confidence_level) / 2
+        # Chunk resamples so the (chunk, n, k) array stays small
+        chunk = max(1, int(2e7 // max(1, n * fAB.shape[1])))
+        boot_first, boot_total = [], []
+        for start in range(0, n_bootstrap, chunk):
+            idx = rng.integers(0, n, size=(min(chunk, n_bootstrap - start), n))
+            bf, bt = _sobol_estimates(fA[idx], fB[idx], fAB[idx])
+            boot_first.append(bf)
+            boot_total.append(bt)
+        boot_first = np.concatenate(boot_first)
+        boot_total = np.concatenate(boot_total)
+        out["S1_lower"] = np.nanquantile(boot_first, alpha, axis=0)
+        out["S1_upper"] = np.nanquantile(boot_first, 1 - alpha, axis=0)
+        out["ST_lower"] = np.nanquantile(boot_total, alpha, axis=0)
+        out["ST_upper"] = np.nanquantile(boot_total, 1 - alpha, axis=0)
+    return out
+
+
+def sobol_analysis(
+    model: BatchModel,
+    marginals: Dict[str, Marginal],
+    n_samples: int = 1024,
+    n_bootstrap: int = 200,
+    confidence_level: float = 0.95,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Sobol indices of a vectorised model over independent parameter marginals.
+
+    The ``n_samples * (k + 2)`` design points are passed to ``model`` in a
+    single call (e.g. ``dsa_batch.CohortDSAModel``).
+
+    Args:
+        model: Vectorised model (parameter arrays -> outcome array)
+        marginals: Parameter -> (low, high) or inverse CDF
+        n_samples: Base sample size (a power of two keeps the Sobol' sequence balanced)
+        n_bootstrap: Bootstrap resamples for the intervals
+        confidence_level: Width of the percentile intervals
+        seed: Seed for scrambling and bootstrap
+
+    Returns:
+        DataFrame as ``sobol_indices``
+    """
+    names = list(marginals)
+    k = len(names)
+    design = saltelli_design(marginals, n_samples, seed=seed)
+    f = np.broadcast_to(np.asarray(model(design), dtype=float), (n_samples * (k + 2),))
+    fA, fB = f[:n_samples], f[n_samples:2 * n_samples]
+    fAB = f[2 * n_samples:].reshape(k, n_samples).T
+    return sobol_indices(fA, fB, fAB, names, n_bootstrap=n_bootstrap,
+                         confidence_level=confidence_level, seed=seed)
+
+
+# ---------------------------------------------------------------------------
+# Polynomial chaos emulator
+# ---------------------------------------------------------------------------
+
+def _multi_indices(n_params: int, degree: int) -> np.ndarray:
+    """Total-degree multi-indices (n_terms, n_params), constant term first."""
+    indices = [np.zeros(n_params, dtype=int)]
+    for total in range(1, degree + 1):
+        for combo in combinations_with_replacement(range(n_params), total):
+            alpha = np.zeros(n_params, dtype=int)
+            np.add.at(alpha, list(combo), 1)
+            indices.append(alpha)
+    return np.array(indices)
+
+
+@dataclass
+class PolynomialChaosEmulator:
+    """
+    Legendre polynomial chaos expansion of a PSA outcome.
+
+    Each parameter is mapped to [-1, 1] through its empirical CDF, where the
+    orthonormal Legendre polynomials are orthogonal under the (uniform)
+    transformed marginals. Sobol indices are then sums of squared
+    coefficients, so they come directly from the fitted PSA draws.
+    """
+
+    degree: int = 2
+    ridge: float = 1e-8
+
+    def _transform(self, X: np.ndarray) -> np.ndarray:
+        n_ref = self._sorted.shape[0]
+        cdf = (np.arange(1, n_ref + 1) - 0.5) / n_ref
+        u = np.column_stack([np.interp(X[:, j], self._sorted[:, j], cdf) for j in range(X.shape[1])])
+        return 2 * u - 1
+
+    def _basis(self, z: np.ndarray) -> np.ndarray:
+        # Orthonormal Legendre values per degree: (degree + 1, n, k)
+        per_degree = np.stack([
+            np.sqrt(2 * d + 1) * legendre.legval(z, np.eye(self.degree + 1)[d])
+            for d in range(self.degree + 1)
+        ])
+        # Term t is prod_j per_degree[alpha_tj, :, j]: index to (n_terms, k, n)
+        terms = per_degree[self.indices_, :, np.arange(z.shape[1])]
+        return np.prod(terms, axis=1).T
+
+    def fit(self, X: np.ndarray, y: np.ndarray, parameters: Optional[Sequence[str]] = None) -> "PolynomialChaosEmulator":
+        """
+        Fit by least squares to PSA draws.
+
+        Raises:
+            ValueError: If there are not more draws than expansion terms
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        n, k = X.shape
+        self.parameters = list(parameters) if parameters is not None else [f"x{j}" for j in range(k)]
+        self.indices_ = _multi_indices(k, self.degree)
+        if n <= len(self.indices_):
+            raise ValueError(
+                f"Polynomial chaos of degree {self.degree} in {k} parameters has {len(self.indices_)} terms; "
+                f"needs more than {n} draws (lower the degree)"
+            )
+        # Ranks give an exactly uniform design for the empirical-CDF transform
+        self._sorted = np.sort(X, axis=0)
+        z = 2 * (stats.rankdata(X, axis=0) - 0.5) / n - 1
+        self._design = self._basis(z)
+        self._y = y
+        self.coefficients_ = self._solve(self._design, y)
+
+        fitted = self._design @ self.coefficients_
+        residual = y - fitted
+        total = np.sum((y - y.mean()) ** 2)
+        gram = self._design.T @ self._design + self.ridge * np.eye(len(self.indices_))
+        leverage = np.einsum("ij,ji->i", self._design, np.linalg.solve(gram, self._design.T))
+        self.r2_ = 1 - np.sum(residual ** 2) / total if total > 0 else 1.0
+        self.q2_ = 1 - np.sum((residual / (1 - leverage)) ** 2) / total if total > 0 else 1.0
+        return self
+
+    def _solve(self, design: np.ndarray, y: np.ndarray) -> np.ndarray:
+        gram = design.T @ design + self.ridge * np.eye(design.shape[1])
+        return np.linalg.solve(gram, design.T @ y)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Emulated outcome at new parameter values."""
+        return self._basis(self._transform(np.asarray(X, dtype=float))) @ self.coefficients_
+
+    def _indices_from(self, coefficients: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # coefficients (..., n_terms)
+        power = coefficients[..., 1:] ** 2
+        alpha = self.indices_[1:]
+        variance = power.sum(axis=-1, keepdims=True)
+        active = alpha > 0
+        only = active & (active.sum(axis=1, keepdims=True) == 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            first = (power @ only) / variance
+            total = (power @ active) / variance
+        return first, total
+
+    def sobol_indices(
+        self,
+        n_bootstrap: int = 200,
+        confidence_level: float = 0.95,
+        seed: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        First-order and total Sobol indices from the expansion coefficients.
+
+        Bootstrap intervals refit the coefficients on resampled draws (the
+        design matrix is reused, only the least-squares weights change).
+
+        Returns:
+            DataFrame: parameter, S1, ST, optional S1/ST bounds, emulator_r2, emulator_q2
+        """
+        first, total = self._indices_from(self.coefficients_)
+        out = pd.DataFrame({"parameter": self.parameters, "S1": first, "ST": total})
+        if n_bootstrap:
+            rng = np.random.default_rng(seed)
+            n = self._design.shape[0]
+            weights = rng.multinomial(n, np.full(n, 1.0 / n), size=n_bootstrap)
+            eye = self.ridge * np.eye(self._design.shape[1])
+            coefficients = np.stack([
+                np.linalg.solve(self._design.T @ (w[:, None] * self._design) + eye, self._design.T @ (w * self._y))
+                for w in weights
+            ])
+            boot_first, boot_total = self._indices_from(coefficients)
+            alpha = (1 - confidence_level) / 2
+            out["S1_lower"] = np.nanquantile(boot_first, alpha, axis=0)
+            out["S1_upper"] = np.nanquantile(boot_first, 1 - alpha, axis=0)
+            out["ST_lower"] = np.nanquantile(boot_total, alpha, axis=0)
+            out["ST_upper"] = np.nanquantile(boot_total, 1 - alpha, axis=0)
+        out["emulator_r2"] = self.r2_
+        out["emulator_q2"] = self.q2_
+        return out
+
+
+def emulator_sobol_table(
+    frame: pd.DataFrame,
+    outcomes: Union[str, Sequence[str]],
+    parameters: Optional[Sequence[str]] = None,
+    by: Optional[Union[str, Sequence[str]]] = None,
+    degree: int = 2,
+    n_bootstrap: int = 200,
+    confidence_level: float = 0.95,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Emulator-based Sobol indices for PSA outcomes, optionally within groups.
+
+    Returns:
+        Long DataFrame: group columns, outcome, then ``PolynomialChaosEmulator.sobol_indices`` columns
+    """
+    outcomes = [outcomes] if isinstance(outcomes, str) else list(outcomes)
+    by = [by] if isinstance(by, str) else list(by or [])
+    groups = frame.groupby(by, sort=False) if by else [((), frame)]
+
+    rows = []
+    for key, group in groups:
+        key = key if isinstance(key, tuple) else (key,)
+        params = list(parameters) if parameters is not None else parameter_columns(group)
+        params = [p for p in params if group[p].nunique() > 1]
+        if not params:
+            continue
+        X = group[params].to_numpy(dtype=float)
+        for outcome in outcomes:
+            emulator = PolynomialChaosEmulator(degree=degree).fit(X, group[outcome].to_numpy(), params)
+            table = emulator.sobol_indices(n_bootstrap=n_bootstrap, confidence_level=confidence_level, seed=seed)
+            rows.append(table.assign(**dict(zip(by, key)), outcome=outcome))
+    if not rows:
+        return pd.DataFrame(columns=by + ["outcome", "parameter", "S1", "ST"])
+    out = pd.concat(rows, ignore_index=True)
+    return out[by + ["outcome"] + [c for c in out.columns if c not in by + ["outcome"]]]
+
+
+def global_sensitivity(
+    frame: pd.DataFrame,
+    outcomes: Union[str, Sequence[str]],
+    parameters: Optional[Sequence[str]] = None,
+    by: Optional[Union[str, Sequence[str]]] = None,
+    degree: int = 2,
+    n_bootstrap: int = 200,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    PRCC and emulator Sobol indices for PSA outcomes in one table.
+
+    Returns:
+        ``prcc_table`` joined with ``emulator_sobol_table`` on group, outcome and parameter
+    """
+    by_cols = [by] if isinstance(by, str) else list(by or [])
+    prcc = prcc_table(frame, outcomes, parameters, by=by)
+    sobol = emulator_sobol_table(frame, outcomes, parameters, by=by, degree=degree,
+                                 n_bootstrap=n_bootstrap, seed=seed)
+    return prcc.merge(sobol, on=by_cols + ["outcome", "parameter"], how="left")
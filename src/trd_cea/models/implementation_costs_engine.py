@@ -3,13 +3,64 @@ V4 Implementation Costs Engine
 
 Dedicated engine for analyzing implementation costs including startup costs,
 training costs, operational costs, and adoption costs for treatment adoption.
+
+Cost schedules are ``(strategy, year, component)`` arrays (with optional
+leading scenario or draw axes), so depreciation, discounting, breakeven
+searches, sensitivity draws and site scale-up scenarios are broadcast array
+operations rather than per-strategy loops.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+import numpy as np
 import pandas as pd
 
+from .dsa_batch import tornado_design
+from .global_sensitivity import partial_rank_correlation
+
+COMPONENTS = ("startup", "training", "operational", "adoption")
+
+# (output column, parameter key, default) per cost item
+STARTUP_ITEMS = [
+    ("equipment_cost", "startup_equipment", 0),
+    ("facility_modifications", "facility_modifications", 0),
+    ("regulatory_costs", "regulatory_costs", 5000),
+    ("initial_marketing", "initial_marketing", 10000),
+    ("it_setup", "it_setup", 2000),
+]
+OPERATIONAL_PER_PATIENT = [
+    ("supplies_cost", "supplies_per_patient", 100),
+    ("monitoring_cost", "monitoring_per_patient", 50),
+]
+OPERATIONAL_FIXED = [
+    ("maintenance_annual", "equipment_maintenance", 5000),
+    ("quality_assurance", "quality_assurance", 2000),
+    ("administrative_overhead", "administrative_overhead", 10000),
+    ("utilities_allocated", "utilities_allocated", 3000),
+]
+ADOPTION_PER_PATIENT = [
+    ("patient_education", "patient_education_per_patient", 25),
+    ("care_coordination", "care_coordination_per_patient", 15),
+    ("retention_programs", "retention_program_per_patient", 10),
+]
+PATIENTS_PER_STAFF = 200
+DEFAULT_ANNUAL_VOLUME = 100
+
+# Sensitivity parameter -> (total_costs column, multiplied by the horizon)
+SENSITIVITY_COLUMNS = {
+    "startup_cost": ("total_startup", False),
+    "training_cost": ("total_training", False),
+    "operational_cost": ("annual_operational", True),
+    "adoption_cost": ("annual_adoption", True),
+}
+DEFAULT_SENSITIVITY_RANGES = {
+    "startup_cost": (0.5, 2.0),      # ±50% to ±100%
+    "operational_cost": (0.7, 1.5),  # -30% to +50%
+    "training_cost": (0.8, 1.3),     # -20% to +30%
+    "adoption_cost": (0.6, 1.8)      # -40% to +80%
+}
+
 
 def get_cost_parameter(cost_parameters: Dict[str, Any], key: str, strategy: str, default: float) -> float:
     """Helper function to get cost parameter that may be dict or scalar."""
@@ -20,10 +71,126 @@ def get_cost_parameter(cost_parameters: Dict[str, Any], key: str, strategy: str,
         return param_value
 
 
+def parameter_vector(
+    cost_parameters: Dict[str, Any], key: str, strategies: Sequence[str], default: float
+) -> np.ndarray:
+    """Cost parameter for every strategy as an array (scalars are broadcast)."""
+    return np.array([get_cost_parameter(cost_parameters, key, s, default) for s in strategies], dtype=float)
+
+
+def _items(cost_parameters: Dict[str, Any], items, strategies: Sequence[str]) -> Dict[str, np.ndarray]:
+    return {column: parameter_vector(cost_parameters, key, strategies, default) for column, key, default in items}
+
+
+def _annual_volumes(treatment_volumes: pd.DataFrame, strategies: Sequence[str]) -> np.ndarray:
+    """First listed annual volume per strategy (default when a strategy is missing)."""
+    first = treatment_volumes.drop_duplicates("strategy").set_index("strategy")["annual_volume"]
+    return first.reindex(list(strategies)).fillna(DEFAULT_ANNUAL_VOLUME).to_numpy(dtype=float)
+
+
+def discount_factors(n_years: int, rate: float) -> np.ndarray:
+    """End-of-year discount weights for years 1..n (year 1 undiscounted)."""
+    return (1.0 + rate) ** -np.arange(n_years, dtype=float)
+
+
+def breakeven_year(cumulative: np.ndarray) -> np.ndarray:
+    """
+    First year (1-based) in which a cumulative net position reaches zero.
+
+    Args:
+        cumulative: Array (..., n_years) of cumulative net benefit
+
+    Returns:
+        Float array (...) of breakeven years, NaN where it is never reached
+    """
+    reached = cumulative >= 0
+    return np.where(reached.any(axis=-1), reached.argmax(axis=-1) + 1.0, np.nan)
+
+
+@dataclass
+class CostSchedule:
+    """Undiscounted implementation costs by strategy, year and component."""
+
+    strategies: List[str]
+    values: np.ndarray                      # (..., n_strategies, n_years, n_components)
+    components: Tuple[str, ...] = COMPONENTS
+
+    @property
+    def years(self) -> np.ndarray:
+        return np.arange(1, self.values.shape[-2] + 1)
+
+    def discounted(self, rate: float = 0.0) -> np.ndarray:
+        """Component costs with annual discounting applied."""
+        return self.values * discount_factors(len(self.years), rate)[:, None]
+
+    def annual_totals(self, rate: float = 0.0) -> np.ndarray:
+        """Total cost per year, shape (..., n_strategies, n_years)."""
+        return self.discounted(rate).sum(axis=-1)
+
+    def component(self, name: str) -> np.ndarray:
+        return self.values[..., self.components.index(name)]
+
+
+def build_cost_schedule(
+    strategies: Sequence[str],
+    volumes: np.ndarray,
+    cost_parameters: Dict[str, Any],
+    sites: Any = 1.0,
+    depreciation_years: Optional[int] = None,
+) -> CostSchedule:
+    """
+    Implementation cost schedule for annual patient volumes.
+
+    Startup costs are depreciated straight-line over ``depreciation_years``
+    (default: the horizon; 1 gives cash flows). Staff are trained when they
+    are first needed, so training follows the running maximum of
+    ``max(sites, volume / 200)``. Fixed costs scale with the number of sites.
+
+    Args:
+        strategies: Strategy order
+        volumes: Patients per year, shape (..., n_strategies, n_years)
+        cost_parameters: Cost parameter dictionary
+        sites: Number of sites, scalar or broadcastable to the leading axes
+        depreciation_years: Straight-line depreciation period
+
+    Returns:
+        CostSchedule with the same leading axes as ``volumes``
+    """
+    volumes = np.asarray(volumes, dtype=float)
+    n_years = volumes.shape[-1]
+    sites = np.asarray(sites, dtype=float)[..., None, None]
+
+    def vec(key, default):
+        """Per-strategy parameter as a (n_strategies, 1) column."""
+        return parameter_vector(cost_parameters, key, strategies, default)[:, None]
+
+    depreciation_years = depreciation_years or n_years
+    weights = np.where(np.arange(n_years) < depreciation_years, 1.0 / depreciation_years, 0.0)
+    startup_total = sum(vec(key, default) for _, key, default in STARTUP_ITEMS)
+    startup = sites * startup_total * weights
+
+    staff = np.maximum(sites, volumes / PATIENTS_PER_STAFF)
+    hires = np.diff(np.maximum.accumulate(staff, axis=-1), axis=-1, prepend=0.0)
+    first_year = (np.arange(n_years) == 0).astype(float)
+    training = (hires * vec("training_hours_per_staff", 40) * vec("staff_hourly_rate", 75)
+                + sites * (vec("training_materials", 500) + vec("certification_cost", 1000)) * first_year)
+
+    operational = (volumes * sum(vec(key, default) for _, key, default in OPERATIONAL_PER_PATIENT)
+                   + sites * sum(vec(key, default) for _, key, default in OPERATIONAL_FIXED))
+
+    transport_rate = get_cost_parameter(cost_parameters, "transport_assistance_rate", None, 0.1)
+    per_patient = (sum(vec(key, default) for _, key, default in ADOPTION_PER_PATIENT)
+                   + transport_rate * vec("transport_per_patient", 50))
+    adoption = volumes * per_patient + sites * vec("outreach_marketing_annual", 5000)
+
+    values = np.stack(np.broadcast_arrays(startup, training, operational, adoption), axis=-1)
+    return CostSchedule(strategies=list(strategies), values=values)
+
+
 @dataclass
 class ImplementationCostResult:
     """Container for implementation cost analysis results."""
-    
+
     startup_costs: pd.DataFrame         # One-time implementation costs
     operational_costs: pd.DataFrame     # Ongoing operational costs
     training_costs: pd.DataFrame        # Staff training and development costs
@@ -35,6 +202,7 @@ class ImplementationCostResult:
     sensitivity_analysis: pd.DataFrame  # Cost parameter sensitivity
     perspective: str
     jurisdiction: Optional[str]
+    probabilistic_sensitivity: Optional[pd.DataFrame] = None  # Sensitivity over sampled draws
 
 
 def calculate_startup_costs(
@@ -43,46 +211,18 @@ def calculate_startup_costs(
 ) -> pd.DataFrame:
     """
     Calculate one-time startup costs for treatment implementation.
-    
+
     Args:
         strategies: List of treatment strategies
         cost_parameters: Cost parameter dictionary
-        
+
     Returns:
         DataFrame with startup cost breakdown
     """
-    startup_costs = []
-    
-    for strategy in strategies:
-        # Equipment and infrastructure costs
-        equipment_cost = get_cost_parameter(cost_parameters, "startup_equipment", strategy, 0)
-        
-        # Facility modifications
-        facility_mods = get_cost_parameter(cost_parameters, "facility_modifications", strategy, 0)
-        
-        # Regulatory and licensing costs
-        regulatory_cost = get_cost_parameter(cost_parameters, "regulatory_costs", strategy, 5000)
-        
-        # Initial marketing and outreach
-        marketing_cost = get_cost_parameter(cost_parameters, "initial_marketing", strategy, 10000)
-        
-        # IT system setup
-        it_setup = get_cost_parameter(cost_parameters, "it_setup", strategy, 2000)
-        
-        total_startup = (equipment_cost + facility_mods + regulatory_cost + 
-                        marketing_cost + it_setup)
-        
-        startup_costs.append({
-            "strategy": strategy,
-            "equipment_cost": equipment_cost,
-            "facility_modifications": facility_mods,
-            "regulatory_costs": regulatory_cost,
-            "initial_marketing": marketing_cost,
-            "it_setup": it_setup,
-            "total_startup": total_startup
-        })
-    
-    return pd.DataFrame(startup_costs)
+    items = _items(cost_parameters, STARTUP_ITEMS, strategies)
+    df = pd.DataFrame({"strategy": list(strategies), **items})
+    df["total_startup"] = sum(items.values())
+    return df
 
 
 def calculate_training_costs(
@@ -92,60 +232,36 @@ def calculate_training_costs(
 ) -> pd.DataFrame:
     """
     Calculate staff training and development costs.
-    
+
     Args:
         strategies: List of treatment strategies
         treatment_volumes: DataFrame with expected treatment volumes
         cost_parameters: Cost parameter dictionary
-        
+
     Returns:
         DataFrame with training cost breakdown
     """
-    training_costs = []
-    
-    for strategy in strategies:
-        # Get expected annual volume
-        volume_row = treatment_volumes[treatment_volumes["strategy"] == strategy]
-        if len(volume_row) > 0:
-            annual_patients = volume_row["annual_volume"].iloc[0]
-        else:
-            annual_patients = 100  # Default assumption
-        
-        # Estimate staff requirements based on patient volume
-        # Assume 1 staff member per 200 patients per year
-        staff_needed = max(1, annual_patients / 200)
-        
-        # Training hours per staff member
-        training_hours_per_staff = get_cost_parameter(cost_parameters, "training_hours_per_staff", strategy, 40)
-        total_training_hours = training_hours_per_staff * staff_needed
-        
-        # Hourly training cost
-        hourly_rate = get_cost_parameter(cost_parameters, "staff_hourly_rate", strategy, 75)
-        training_cost = total_training_hours * hourly_rate
-        
-        # Additional training materials and certification
-        materials_cost = get_cost_parameter(cost_parameters, "training_materials", strategy, 500)
-        certification_cost = get_cost_parameter(cost_parameters, "certification_cost", strategy, 1000)
-        
-        # Ongoing professional development (annual)
-        ongoing_training = get_cost_parameter(cost_parameters, "ongoing_training_annual", strategy, 2000)
-        
-        total_training = training_cost + materials_cost + certification_cost
-        
-        training_costs.append({
-            "strategy": strategy,
-            "annual_patients": annual_patients,
-            "staff_needed": staff_needed,
-            "training_hours_per_staff": training_hours_per_staff,
-            "total_training_hours": total_training_hours,
-            "training_labor_cost": training_cost,
-            "materials_cost": materials_cost,
-            "certification_cost": certification_cost,
-            "ongoing_training_annual": ongoing_training,
-            "total_initial_training": total_training
-        })
-    
-    return pd.DataFrame(training_costs)
+    annual_patients = _annual_volumes(treatment_volumes, strategies)
+    # Assume 1 staff member per 200 patients per year
+    staff_needed = np.maximum(1, annual_patients / PATIENTS_PER_STAFF)
+    hours_per_staff = parameter_vector(cost_parameters, "training_hours_per_staff", strategies, 40)
+    total_hours = hours_per_staff * staff_needed
+    labor = total_hours * parameter_vector(cost_parameters, "staff_hourly_rate", strategies, 75)
+    materials = parameter_vector(cost_parameters, "training_materials", strategies, 500)
+    certification = parameter_vector(cost_parameters, "certification_cost", strategies, 1000)
+
+    return pd.DataFrame({
+        "strategy": list(strategies),
+        "annual_patients": annual_patients,
+        "staff_needed": staff_needed,
+        "training_hours_per_staff": hours_per_staff,
+        "total_training_hours": total_hours,
+        "training_labor_cost": labor,
+        "materials_cost": materials,
+        "certification_cost": certification,
+        "ongoing_training_annual": parameter_vector(cost_parameters, "ongoing_training_annual", strategies, 2000),
+        "total_initial_training": labor + materials + certification,
+    })
 
 
 def calculate_operational_costs(
@@ -155,61 +271,23 @@ def calculate_operational_costs(
 ) -> pd.DataFrame:
     """
     Calculate ongoing operational costs.
-    
+
     Args:
         strategies: List of treatment strategies
         treatment_volumes: DataFrame with expected treatment volumes
         cost_parameters: Cost parameter dictionary
-        
+
     Returns:
         DataFrame with operational cost breakdown
     """
-    operational_costs = []
-    
-    for strategy in strategies:
-        # Get expected annual volume
-        volume_row = treatment_volumes[treatment_volumes["strategy"] == strategy]
-        if len(volume_row) > 0:
-            annual_patients = volume_row["annual_volume"].iloc[0]
-        else:
-            annual_patients = 100  # Default assumption
-        
-        # Supplies and consumables per patient
-        supplies_per_patient = get_cost_parameter(cost_parameters, "supplies_per_patient", strategy, 100)
-        supplies_cost = supplies_per_patient * annual_patients
-        
-        # Monitoring and follow-up costs per patient
-        monitoring_per_patient = get_cost_parameter(cost_parameters, "monitoring_per_patient", strategy, 50)
-        monitoring_cost = monitoring_per_patient * annual_patients
-        
-        # Equipment maintenance (annual)
-        maintenance_annual = get_cost_parameter(cost_parameters, "equipment_maintenance", strategy, 5000)
-        
-        # Quality assurance and auditing
-        qa_cost = get_cost_parameter(cost_parameters, "quality_assurance", strategy, 2000)
-        
-        # Administrative overhead
-        admin_overhead = get_cost_parameter(cost_parameters, "administrative_overhead", strategy, 10000)
-        
-        # Utilities and facility costs (allocated per strategy)
-        utilities_allocated = get_cost_parameter(cost_parameters, "utilities_allocated", strategy, 3000)
-        
-        total_operational = (supplies_cost + monitoring_cost + maintenance_annual + 
-                           qa_cost + admin_overhead + utilities_allocated)
-        
-        operational_costs.append({
-            "strategy": strategy,
-            "annual_patients": annual_patients,
-            "supplies_cost": supplies_cost,
-            "monitoring_cost": monitoring_cost,
-            "maintenance_annual": maintenance_annual,
-            "quality_assurance": qa_cost,
-            "administrative_overhead": admin_overhead,
-            "utilities_allocated": utilities_allocated,
-            "total_operational_annual": total_operational
-        })
-    
-    return pd.DataFrame(operational_costs)
+    annual_patients = _annual_volumes(treatment_volumes, strategies)
+    per_patient = {column: rate * annual_patients
+                   for column, rate in _items(cost_parameters, OPERATIONAL_PER_PATIENT, strategies).items()}
+    fixed = _items(cost_parameters, OPERATIONAL_FIXED, strategies)
+
+    df = pd.DataFrame({"strategy": list(strategies), "annual_patients": annual_patients, **per_patient, **fixed})
+    df["total_operational_annual"] = sum(per_patient.values()) + sum(fixed.values())
+    return df
 
 
 def calculate_adoption_costs(
@@ -219,60 +297,34 @@ def calculate_adoption_costs(
 ) -> pd.DataFrame:
     """
     Calculate patient adoption and engagement costs.
-    
+
     Args:
         strategies: List of treatment strategies
         treatment_volumes: DataFrame with expected treatment volumes
         cost_parameters: Cost parameter dictionary
-        
+
     Returns:
         DataFrame with adoption cost breakdown
     """
-    adoption_costs = []
-    
-    for strategy in strategies:
-        # Get expected annual volume
-        volume_row = treatment_volumes[treatment_volumes["strategy"] == strategy]
-        if len(volume_row) > 0:
-            annual_patients = volume_row["annual_volume"].iloc[0]
-        else:
-            annual_patients = 100  # Default assumption
-        
-        # Patient education and counseling
-        education_per_patient = get_cost_parameter(cost_parameters, "patient_education_per_patient", strategy, 25)
-        education_cost = education_per_patient * annual_patients
-        
-        # Outreach and marketing (ongoing)
-        outreach_annual = get_cost_parameter(cost_parameters, "outreach_marketing_annual", strategy, 5000)
-        
-        # Care coordination costs
-        coordination_per_patient = get_cost_parameter(cost_parameters, "care_coordination_per_patient", strategy, 15)
-        coordination_cost = coordination_per_patient * annual_patients
-        
-        # Transportation assistance (for some patients)
-        transport_assistance_rate = get_cost_parameter(cost_parameters, "transport_assistance_rate", None, 0.1)  # 10% of patients
-        transport_per_patient = get_cost_parameter(cost_parameters, "transport_per_patient", strategy, 50)
-        transport_cost = transport_assistance_rate * annual_patients * transport_per_patient
-        
-        # Follow-up and retention programs
-        retention_per_patient = get_cost_parameter(cost_parameters, "retention_program_per_patient", strategy, 10)
-        retention_cost = retention_per_patient * annual_patients
-        
-        total_adoption = education_cost + outreach_annual + coordination_cost + transport_cost + retention_cost
-        
-        adoption_costs.append({
-            "strategy": strategy,
-            "annual_patients": annual_patients,
-            "patient_education": education_cost,
-            "outreach_marketing": outreach_annual,
-            "care_coordination": coordination_cost,
-            "transport_assistance": transport_cost,
-            "retention_programs": retention_cost,
-            "total_adoption_annual": total_adoption,
-            "adoption_rate_target": cost_parameters.get("adoption_rate_target", 0.7)
-        })
-    
-    return pd.DataFrame(adoption_costs)
+    annual_patients = _annual_volumes(treatment_volumes, strategies)
+    per_patient = {column: rate * annual_patients
+                   for column, rate in _items(cost_parameters, ADOPTION_PER_PATIENT, strategies).items()}
+    outreach = parameter_vector(cost_parameters, "outreach_marketing_annual", strategies, 5000)
+    # Transportation assistance for a share of patients (10% by default)
+    transport_rate = get_cost_parameter(cost_parameters, "transport_assistance_rate", None, 0.1)
+    transport = transport_rate * annual_patients * parameter_vector(cost_parameters, "transport_per_patient", strategies, 50)
+
+    return pd.DataFrame({
+        "strategy": list(strategies),
+        "annual_patients": annual_patients,
+        "patient_education": per_patient["patient_education"],
+        "outreach_marketing": outreach,
+        "care_coordination": per_patient["care_coordination"],
+        "transport_assistance": transport,
+        "retention_programs": per_patient["retention_programs"],
+        "total_adoption_annual": sum(per_patient.values()) + outreach + transport,
+        "adoption_rate_target": cost_parameters.get("adoption_rate_target", 0.7),
+    })
 
 
 def calculate_cost_amortization(
@@ -280,54 +332,62 @@ def calculate_cost_amortization(
     operational_costs: pd.DataFrame,
     training_costs: pd.DataFrame,
     adoption_costs: pd.DataFrame,
-    time_horizon: int = 5
+    time_horizon: int = 5,
+    depreciation_years: Optional[int] = None,
+    discount_rate: float = 0.0,
 ) -> pd.DataFrame:
     """
     Calculate cost amortization schedule over time.
-    
+
     Args:
         startup_costs: Startup cost DataFrame
         operational_costs: Operational cost DataFrame
         training_costs: Training cost DataFrame
         adoption_costs: Adoption cost DataFrame
         time_horizon: Analysis time horizon in years
-        
+        depreciation_years: Straight-line depreciation period for startup
+            costs (default: the time horizon)
+        discount_rate: Annual discount rate for the discounted columns
+
     Returns:
         DataFrame with annual cost amortization
     """
-    amortization_schedule = []
-    
-    strategies = startup_costs["strategy"].unique()
-    
-    for strategy in strategies:
-        startup = startup_costs[startup_costs["strategy"] == strategy]["total_startup"].iloc[0]
-        operational = operational_costs[operational_costs["strategy"] == strategy]["total_operational_annual"].iloc[0]
-        training = training_costs[training_costs["strategy"] == strategy]["total_initial_training"].iloc[0]
-        adoption = adoption_costs[adoption_costs["strategy"] == strategy]["total_adoption_annual"].iloc[0]
-        
-        # Amortize startup costs over time horizon
-        annual_startup_amortization = startup / time_horizon
-        
-        for year in range(1, time_horizon + 1):
-            # Training costs only in year 1
-            training_annual = training if year == 1 else 0
-            
-            # Operational and adoption costs are ongoing
-            total_annual = (annual_startup_amortization + operational + 
-                          training_annual + adoption)
-            
-            amortization_schedule.append({
-                "strategy": strategy,
-                "year": year,
-                "startup_amortization": annual_startup_amortization,
-                "operational_cost": operational,
-                "training_cost": training_annual,
-                "adoption_cost": adoption,
-                "total_annual_cost": total_annual,
-                "cumulative_cost": total_annual * year  # Simplified cumulative
-            })
-    
-    return pd.DataFrame(amortization_schedule)
+    strategies = list(startup_costs["strategy"])
+
+    def column(frame: pd.DataFrame, name: str) -> np.ndarray:
+        return frame.set_index("strategy")[name].reindex(strategies).to_numpy(dtype=float)
+
+    depreciation_years = depreciation_years or time_horizon
+    weights = np.where(np.arange(time_horizon) < depreciation_years, 1.0 / depreciation_years, 0.0)
+    first_year = (np.arange(time_horizon) == 0).astype(float)
+    annual = np.ones(time_horizon)
+    values = np.stack([
+        column(startup_costs, "total_startup")[:, None] * weights,
+        column(training_costs, "total_initial_training")[:, None] * first_year,   # Training costs only in year 1
+        column(operational_costs, "total_operational_annual")[:, None] * annual,
+        column(adoption_costs, "total_adoption_annual")[:, None] * annual,
+    ], axis=-1)
+    schedule = CostSchedule(strategies=strategies, values=values)
+    return schedule_frame(schedule, discount_rate)
+
+
+def schedule_frame(schedule: CostSchedule, discount_rate: float = 0.0) -> pd.DataFrame:
+    """Long amortization table (one row per strategy and year) for a 3-D schedule."""
+    n_strategies, n_years, _ = schedule.values.shape
+    total = schedule.values.sum(axis=-1)
+    discounted = schedule.annual_totals(discount_rate)
+    return pd.DataFrame({
+        "strategy": np.repeat(schedule.strategies, n_years),
+        "year": np.tile(schedule.years, n_strategies),
+        "startup_amortization": schedule.component("startup").ravel(),
+        "operational_cost": schedule.component("operational").ravel(),
+        "training_cost": schedule.component("training").ravel(),
+        "adoption_cost": schedule.component("adoption").ravel(),
+        "total_annual_cost": total.ravel(),
+        "cumulative_cost": total.cumsum(axis=-1).ravel(),
+        "discounted_annual_cost": discounted.ravel(),
+        "cumulative_discounted_cost": discounted.cumsum(axis=-1).ravel(),
+    })
 
 
 def perform_breakeven_analysis(
@@ -337,198 +397,298 @@ def perform_breakeven_analysis(
 ) -> pd.DataFrame:
     """
     Perform breakeven analysis for implementation costs.
-    
+
+    Cumulative profit (startup equipment paid in year 1) is built for every
+    strategy and year at once and the breakeven year found by a cumulative-sum
+    search.
+
     Args:
         operational_costs: Operational cost DataFrame
         cost_parameters: Cost parameter dictionary
         time_horizon: Analysis time horizon in years
-        
+
     Returns:
         DataFrame with breakeven analysis results
     """
-    breakeven_results = []
-    
-    for _, row in operational_costs.iterrows():
-        strategy = row["strategy"]
-        annual_patients = row["annual_patients"]
-        annual_operational_cost = row["total_operational_annual"]
-        
-        # Estimate revenue per patient (simplified assumption)
-        revenue_per_patient = get_cost_parameter(cost_parameters, "revenue_per_patient", strategy, 2000)
-        annual_revenue = annual_patients * revenue_per_patient
-        
-        # Calculate annual profit/loss
-        annual_profit = annual_revenue - annual_operational_cost
-        
-        # Find breakeven point (when cumulative profit becomes positive)
-        cumulative_profit = 0
-        breakeven_year = None
-        
-        for year in range(1, time_horizon + 1):
-            # Add startup costs in year 1
-            if year == 1:
-                startup_cost = get_cost_parameter(cost_parameters, "startup_equipment", strategy, 0)
-                cumulative_profit -= startup_cost
-            
-            cumulative_profit += annual_profit
-            
-            if breakeven_year is None and cumulative_profit >= 0:
-                breakeven_year = year
-        
-        # Calculate profitability metrics
-        profitability_ratio = annual_revenue / annual_operational_cost if annual_operational_cost > 0 else float('inf')
-        roi = (annual_profit / annual_operational_cost) if annual_operational_cost > 0 else float('inf')
-        
-        breakeven_results.append({
-            "strategy": strategy,
-            "annual_patients": annual_patients,
-            "revenue_per_patient": revenue_per_patient,
-            "annual_revenue": annual_revenue,
-            "annual_operational_cost": annual_operational_cost,
-            "annual_profit": annual_profit,
-            "breakeven_year": breakeven_year or f">{time_horizon}",
-            "profitability_ratio": profitability_ratio,
-            "roi": roi,
-            "payback_period_years": (get_cost_parameter(cost_parameters, "startup_equipment", strategy, 0) / 
-                                   annual_profit) if annual_profit > 0 else float('inf')
-        })
-    
-    return pd.DataFrame(breakeven_results)
+    strategies = list(operational_costs["strategy"])
+    annual_patients = operational_costs["annual_patients"].to_numpy(dtype=float)
+    annual_cost = operational_costs["total_operational_annual"].to_numpy(dtype=float)
+
+    # Estimate revenue per patient (simplified assumption)
+    revenue_per_patient = parameter_vector(cost_parameters, "revenue_per_patient", strategies, 2000)
+    annual_revenue = annual_patients * revenue_per_patient
+    annual_profit = annual_revenue - annual_cost
+    startup = parameter_vector(cost_parameters, "startup_equipment", strategies, 0)
+
+    cumulative = np.cumsum(np.broadcast_to(annual_profit[:, None], (len(strategies), time_horizon)), axis=1)
+    years = breakeven_year(cumulative - startup[:, None])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        positive_cost = annual_cost > 0
+        profitability_ratio = np.where(positive_cost, annual_revenue / annual_cost, np.inf)
+        roi = np.where(positive_cost, annual_profit / annual_cost, np.inf)
+        payback = np.where(annual_profit > 0, startup / annual_profit, np.inf)
+
+    return pd.DataFrame({
+        "strategy": strategies,
+        "annual_patients": annual_patients,
+        "revenue_per_patient": revenue_per_patient,
+        "annual_revenue": annual_revenue,
+        "annual_operational_cost": annual_cost,
+        "annual_profit": annual_profit,
+        "breakeven_year": pd.Series([f">{time_horizon}" if np.isnan(y) else int(y) for y in years], dtype=object),
+        "profitability_ratio": profitability_ratio,
+        "roi": roi,
+        "payback_period_years": payback,
+    })
+
+
+def _sensitivity_contributions(
+    base_costs: pd.DataFrame, parameters: Sequence[str], time_horizon: int
+) -> np.ndarray:
+    """(n_strategies, n_parameters) cost contributions of each sensitivity parameter."""
+    columns = []
+    for param in parameters:
+        column, annual = SENSITIVITY_COLUMNS[param]
+        values = base_costs[column].to_numpy(dtype=float)
+        columns.append(values * time_horizon if annual else values)
+    return np.column_stack(columns)
 
 
 def perform_cost_sensitivity_analysis(
     base_costs: pd.DataFrame,
-    sensitivity_ranges: Dict[str, Tuple[float, float]] = None
+    sensitivity_ranges: Dict[str, Tuple[float, float]] = None,
+    time_horizon: int = 5,
 ) -> pd.DataFrame:
     """
     Perform sensitivity analysis on cost parameters.
-    
+
+    The one-way low/high multipliers form a tornado parameter matrix that is
+    applied to every strategy's cost contributions in one product.
+
     Args:
         base_costs: Base cost DataFrame
         sensitivity_ranges: Dictionary of parameter ranges for sensitivity analysis
-        
+        time_horizon: Years of annual costs included in ``total_5year_cost``
+
     Returns:
         DataFrame with sensitivity analysis results
     """
-    if sensitivity_ranges is None:
-        sensitivity_ranges = {
-            "startup_cost": (0.5, 2.0),      # ±50% to ±100%
-            "operational_cost": (0.7, 1.5),  # -30% to +50%
-            "training_cost": (0.8, 1.3),     # -20% to +30%
-            "adoption_cost": (0.6, 1.8)      # -40% to +80%
-        }
-    
-    sensitivity_results = []
-    
-    for _, row in base_costs.iterrows():
-        strategy = row["strategy"]
-        base_total = row["total_5year_cost"]
-        
-        for param, (low_mult, high_mult) in sensitivity_ranges.items():
-            if param in row.index:
-                base_param_cost = row[param]
-                
-                # Low scenario
-                low_cost = base_total - base_param_cost + (base_param_cost * low_mult)
-                low_change = ((low_cost - base_total) / base_total) * 100
-                
-                # High scenario
-                high_cost = base_total - base_param_cost + (base_param_cost * high_mult)
-                high_change = ((high_cost - base_total) / base_total) * 100
-                
-                sensitivity_results.append({
-                    "strategy": strategy,
-                    "parameter": param,
-                    "base_cost": base_total,
-                    "low_scenario_cost": low_cost,
-                    "high_scenario_cost": high_cost,
-                    "low_change_percent": low_change,
-                    "high_change_percent": high_change,
-                    "sensitivity_range": high_change - low_change
-                })
-    
-    return pd.DataFrame(sensitivity_results)
+    ranges = {p: r for p, r in (sensitivity_ranges or DEFAULT_SENSITIVITY_RANGES).items()
+              if p in SENSITIVITY_COLUMNS}
+    if not ranges or base_costs.empty:
+        return pd.DataFrame(columns=["strategy", "parameter", "base_cost", "low_scenario_cost",
+                                     "high_scenario_cost", "low_change_percent", "high_change_percent",
+                                     "sensitivity_range"])
+
+    parameters = list(ranges)
+    design = tornado_design({p: (1.0, low, high) for p, (low, high) in ranges.items()})
+    contributions = _sensitivity_contributions(base_costs, parameters, time_horizon)
+    base_total = base_costs["total_5year_cost"].to_numpy(dtype=float)
+    totals = base_total[:, None] + contributions @ (design.matrix - 1.0).T     # (S, 1 + 2P)
+    low, high = totals[:, 1::2], totals[:, 2::2]
+    low_change = (low - base_total[:, None]) / base_total[:, None] * 100
+    high_change = (high - base_total[:, None]) / base_total[:, None] * 100
+
+    n_strategies = len(base_costs)
+    return pd.DataFrame({
+        "strategy": np.repeat(base_costs["strategy"].to_numpy(), len(parameters)),
+        "parameter": np.tile(parameters, n_strategies),
+        "base_cost": np.repeat(base_total, len(parameters)),
+        "low_scenario_cost": low.ravel(),
+        "high_scenario_cost": high.ravel(),
+        "low_change_percent": low_change.ravel(),
+        "high_change_percent": high_change.ravel(),
+        "sensitivity_range": (high_change - low_change).ravel(),
+    })
+
+
+def probabilistic_cost_sensitivity(
+    base_costs: pd.DataFrame,
+    n_draws: int = 1000,
+    sensitivity_ranges: Dict[str, Tuple[float, float]] = None,
+    time_horizon: int = 5,
+    confidence_level: float = 0.95,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Implementation cost uncertainty over sampled parameter draws.
+
+    Uniform multipliers for every parameter form one ``(n_draws, n_params)``
+    matrix; totals for all draws and strategies are a single product, and
+    each parameter's influence is its PRCC with the total.
+
+    Returns:
+        DataFrame with one row per strategy and parameter: mean and interval
+        of the total cost, and the parameter's PRCC
+    """
+    ranges = {p: r for p, r in (sensitivity_ranges or DEFAULT_SENSITIVITY_RANGES).items()
+              if p in SENSITIVITY_COLUMNS}
+    parameters = list(ranges)
+    rng = np.random.default_rng(seed)
+    bounds = np.array([ranges[p] for p in parameters], dtype=float)
+    multipliers = rng.uniform(bounds[:, 0], bounds[:, 1], size=(n_draws, len(parameters)))
+
+    contributions = _sensitivity_contributions(base_costs, parameters, time_horizon)
+    base_total = base_costs["total_5year_cost"].to_numpy(dtype=float)
+    totals = base_total[None, :] + (multipliers - 1.0) @ contributions.T          # (D, S)
+
+    alpha = (1 - confidence_level) / 2
+    rows = []
+    for i, strategy in enumerate(base_costs["strategy"]):
+        prcc, _ = partial_rank_correlation(multipliers, totals[:, i])
+        for parameter, coefficient in zip(parameters, prcc):
+            rows.append({
+                "strategy": strategy,
+                "parameter": parameter,
+                "mean_cost": totals[:, i].mean(),
+                "lower_cost": np.quantile(totals[:, i], alpha),
+                "upper_cost": np.quantile(totals[:, i], 1 - alpha),
+                "prcc": coefficient,
+            })
+    return pd.DataFrame(rows)
+
+
+def ramp_up(speed: Any, n_years: int) -> np.ndarray:
+    """Share of full volume reached in years 1..n: ``1 - exp(-speed * year)``; ``inf`` is immediate."""
+    speed = np.asarray(speed, dtype=float)[..., None]
+    return 1.0 - np.exp(-speed * np.arange(1, n_years + 1))
+
+
+def scale_up_scenarios(
+    strategies: Sequence[str],
+    volume_per_site: Sequence[float],
+    cost_parameters: Dict[str, Any],
+    sites: Sequence[int] = (1, 2, 5, 10),
+    ramp_speeds: Sequence[float] = (0.5, 1.0, 2.0),
+    time_horizon: int = 5,
+    discount_rate: float = 0.0,
+) -> pd.DataFrame:
+    """
+    Implementation cost and breakeven for every (sites, ramp-up speed) scenario.
+
+    Volumes for all scenarios form one ``(n_sites, n_speeds, n_strategies,
+    n_years)`` array and go through ``build_cost_schedule`` together;
+    breakeven uses cash flows (startup paid in year 1) against
+    ``revenue_per_patient``.
+
+    Args:
+        strategies: Strategy order
+        volume_per_site: Full annual volume of one site per strategy
+        cost_parameters: Cost parameter dictionary
+        sites: Numbers of sites to evaluate
+        ramp_speeds: Ramp-up speeds (see ``ramp_up``)
+        time_horizon: Years
+        discount_rate: Annual discount rate for total costs
+
+    Returns:
+        DataFrame with sites, ramp_speed, strategy, patients, total_cost,
+        cost_per_patient and breakeven_year (NaN if not reached)
+    """
+    sites_arr = np.asarray(sites, dtype=float)
+    speeds = np.asarray(ramp_speeds, dtype=float)
+    per_site = np.asarray(volume_per_site, dtype=float)
+    volumes = (sites_arr[:, None, None, None] * per_site[None, None, :, None]
+               * ramp_up(speeds, time_horizon)[None, :, None, :])                 # (K, R, S, Y)
+    schedule = build_cost_schedule(strategies, volumes, cost_parameters,
+                                   sites=sites_arr[:, None], depreciation_years=1)
+
+    discount = discount_factors(time_horizon, discount_rate)
+    total_cost = schedule.annual_totals(discount_rate).sum(axis=-1)
+    patients = (volumes * discount).sum(axis=-1)
+    revenue = volumes * parameter_vector(cost_parameters, "revenue_per_patient", strategies, 2000)[:, None]
+    breakeven = breakeven_year(np.cumsum(revenue - schedule.annual_totals(), axis=-1))
+
+    grid = np.meshgrid(sites_arr, speeds, np.arange(len(strategies)), indexing="ij")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost_per_patient = np.where(patients > 0, total_cost / patients, np.inf)
+    return pd.DataFrame({
+        "sites": grid[0].ravel().astype(int),
+        "ramp_speed": grid[1].ravel(),
+        "strategy": np.asarray(list(strategies), dtype=object)[grid[2].ravel()],
+        "patients": patients.ravel(),
+        "total_cost": total_cost.ravel(),
+        "cost_per_patient": cost_per_patient.ravel(),
+        "breakeven_year": breakeven.ravel(),
+    })
 
 
 def analyze_implementation_costs(
     treatment_volumes: pd.DataFrame,
     cost_parameters: Dict[str, Any],
-    time_horizon: int = 5
+    time_horizon: int = 5,
+    n_draws: int = 0,
+    seed: Optional[int] = None,
 ) -> ImplementationCostResult:
     """
     Comprehensive implementation cost analysis.
-    
+
     Args:
         treatment_volumes: DataFrame with expected treatment volumes
-        cost_parameters: Dictionary of cost parameters
+        cost_parameters: Dictionary of cost parameters (``depreciation_years``
+            and ``discount_rate`` shape the amortization schedule)
         time_horizon: Implementation time horizon in years
-        
+        n_draws: Number of sampled draws for the probabilistic sensitivity
+            analysis (0 skips it)
+        seed: Seed for the sampled draws
+
     Returns:
         Implementation cost analysis results
     """
-    strategies = treatment_volumes["strategy"].unique()
-    
+    strategies = list(treatment_volumes["strategy"].unique())
+
     # Calculate component costs
     startup_costs = calculate_startup_costs(strategies, cost_parameters)
     training_costs = calculate_training_costs(strategies, treatment_volumes, cost_parameters)
     operational_costs = calculate_operational_costs(strategies, treatment_volumes, cost_parameters)
     adoption_costs = calculate_adoption_costs(strategies, treatment_volumes, cost_parameters)
-    
+
     # Calculate total costs
-    total_costs = []
-    for strategy in strategies:
-        startup = startup_costs[startup_costs["strategy"] == strategy]["total_startup"].iloc[0]
-        training = training_costs[training_costs["strategy"] == strategy]["total_initial_training"].iloc[0]
-        operational = operational_costs[operational_costs["strategy"] == strategy]["total_operational_annual"].iloc[0]
-        adoption = adoption_costs[adoption_costs["strategy"] == strategy]["total_adoption_annual"].iloc[0]
-        
-        total_5year = startup + training + (operational + adoption) * time_horizon
-        
-        total_costs.append({
-            "strategy": strategy,
-            "total_startup": startup,
-            "total_training": training,
-            "annual_operational": operational,
-            "annual_adoption": adoption,
-            "total_5year_cost": total_5year,
-            "cost_per_patient_year1": (startup/time_horizon + training + operational + adoption) / 
-                                    treatment_volumes[treatment_volumes["strategy"] == strategy]["annual_volume"].iloc[0]
-        })
-    
-    total_costs_df = pd.DataFrame(total_costs)
-    
+    startup = startup_costs["total_startup"].to_numpy()
+    training = training_costs["total_initial_training"].to_numpy()
+    operational = operational_costs["total_operational_annual"].to_numpy()
+    adoption = adoption_costs["total_adoption_annual"].to_numpy()
+    annual_volume = _annual_volumes(treatment_volumes, strategies)
+    total_5year = startup + training + (operational + adoption) * time_horizon
+
+    total_costs_df = pd.DataFrame({
+        "strategy": strategies,
+        "total_startup": startup,
+        "total_training": training,
+        "annual_operational": operational,
+        "annual_adoption": adoption,
+        "total_5year_cost": total_5year,
+        "cost_per_patient_year1": (startup / time_horizon + training + operational + adoption) / annual_volume,
+    })
+
     # Calculate amortization schedule
     cost_amortization = calculate_cost_amortization(
-        startup_costs, operational_costs, training_costs, adoption_costs, time_horizon
+        startup_costs, operational_costs, training_costs, adoption_costs, time_horizon,
+        depreciation_years=cost_parameters.get("depreciation_years"),
+        discount_rate=float(cost_parameters.get("discount_rate", 0.0)),
     )
-    
+
     # Perform breakeven analysis
     breakeven_analysis = perform_breakeven_analysis(operational_costs, cost_parameters, time_horizon)
-    
-    # Calculate cost-effectiveness ratios (simplified)
-    cost_effectiveness = []
-    for strategy in strategies:
-        total_5year = total_costs_df[total_costs_df["strategy"] == strategy]["total_5year_cost"].iloc[0]
-        annual_patients = treatment_volumes[treatment_volumes["strategy"] == strategy]["annual_volume"].iloc[0]
-        total_patients_5year = annual_patients * time_horizon
-        
-        # Simplified QALY assumption (placeholder)
-        qaly_per_patient = get_cost_parameter(cost_parameters, "qaly_per_patient", strategy, 0.5)
-        total_qaly = total_patients_5year * qaly_per_patient
-        
-        cost_effectiveness.append({
-            "strategy": strategy,
-            "total_cost_5year": total_5year,
-            "total_qaly_5year": total_qaly,
-            "cost_per_qaly": total_5year / total_qaly if total_qaly > 0 else float('inf'),
-            "icer_vs_usual_care": None  # Would need comparator analysis
-        })
-    
-    cost_effectiveness_df = pd.DataFrame(cost_effectiveness)
-    
+
+    # Calculate cost-effectiveness ratios (simplified QALY assumption, placeholder)
+    qaly_per_patient = parameter_vector(cost_parameters, "qaly_per_patient", strategies, 0.5)
+    total_qaly = annual_volume * time_horizon * qaly_per_patient
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost_per_qaly = np.where(total_qaly > 0, total_5year / total_qaly, np.inf)
+    cost_effectiveness_df = pd.DataFrame({
+        "strategy": strategies,
+        "total_cost_5year": total_5year,
+        "total_qaly_5year": total_qaly,
+        "cost_per_qaly": cost_per_qaly,
+        "icer_vs_usual_care": None,  # Would need comparator analysis
+    })
+
     # Perform sensitivity analysis
-    sensitivity_analysis = perform_cost_sensitivity_analysis(total_costs_df)
-    
+    sensitivity_analysis = perform_cost_sensitivity_analysis(total_costs_df, time_horizon=time_horizon)
+    probabilistic = (probabilistic_cost_sensitivity(total_costs_df, n_draws, time_horizon=time_horizon, seed=seed)
+                     if n_draws else None)
+
     return ImplementationCostResult(
         startup_costs=startup_costs,
         operational_costs=operational_costs,
@@ -540,5 +700,6 @@ def analyze_implementation_costs(
         cost_effectiveness=cost_effectiveness_df,
         sensitivity_analysis=sensitivity_analysis,
         perspective="health_system",
-        jurisdiction=None
-    )
\ No newline at end of file
+        jurisdiction=None,
+        probabilistic_sensitivity=probabilistic,
+    )
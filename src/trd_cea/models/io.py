@@ -22,6 +22,9 @@ import numpy as np
 import pandas as pd
 import yaml
 
+from ..core.hashing import FAST, hash_dataframe
+from .psa_schema import DowncastReport, compact_psa_table, strategy_mask
+
 # V4 therapy abbreviations from manuscript
 V4_THERAPY_ABBREVIATIONS = {
     "ECT": "Standard Electroconvulsive Therapy",
@@ -227,7 +230,7 @@ class PSAData:
 
     def filter_by_strategy(self, strategies: List[str]) -> 'PSAData':
         """Create a new PSAData object filtered to specific strategies."""
-        filtered_table = self.table[self.table['strategy'].isin(strategies)].copy()
+        filtered_table = self.table[strategy_mask(self.table, strategies)].copy()
 
         if filtered_table.empty:
             raise ValueError(f"No data found for strategies: {strategies}")
@@ -251,22 +254,52 @@ class PSAData:
 
         return filtered_psa
 
+    def to_compact(self, float32: bool = False, rtol: float = 1e-6) -> 'PSAData':
+        """
+        Return a copy of this PSAData using the compact table schema.
+
+        Args:
+            float32: Opt in to error-bounded float32 storage for value columns
+            rtol: Maximum element-wise relative error allowed by the downcast
+
+        Returns:
+            New PSAData with categorical labels and int32 draw ids
+        """
+        report = DowncastReport()
+        table = compact_psa_table(
+            self.table, float32=float32, rtol=rtol,
+            extra_strategies=self.config.strategies, report=report
+        )
+        compact = PSAData(
+            table=table,
+            config=self.config,
+            perspective=self.perspective,
+            jurisdiction=self.jurisdiction,
+            provenance=self.provenance,
+            metadata={**self.metadata, 'compact_schema': {
+                'float32_columns': report.downcast,
+                'memory_before_mb': report.memory_before_mb,
+                'memory_after_mb': report.memory_after_mb,
+            }},
+            validation_cache=self.validation_cache.copy()
+        )
+        return compact
+
     def get_cost_effectiveness_data(self) -> pd.DataFrame:
         """Get cost-effectiveness data in standard format for analysis."""
         return self.table[['draw', 'strategy', 'cost', 'effect']].copy()
 
-    def compute_data_hash(self) -> str:
-        """Compute hash of the PSA data for provenance tracking."""
-        import hashlib
+    def compute_data_hash(self, algorithm: str = FAST) -> str:
+        """
+        Compute a full-content hash of the PSA data for provenance tracking.
 
-        # Create a deterministic representation of the data
-        data_str = str(self.table.shape) + str(sorted(self.table.columns.tolist()))
+        Args:
+            algorithm: ``"fast"`` (default) or ``"sha256"`` for audit records
 
-        # Add first and last few values for uniqueness
-        sample_data = self.table.head(5).to_string() + self.table.tail(5).to_string()
-        data_str += sample_data
-
-        return hashlib.sha256(data_str.encode()).hexdigest()[:16]
+        Returns:
+            First 16 hex characters of the digest
+        """
+        return hash_dataframe(self.table, algorithm)[:16]
 
     def export_metadata(self, output_path: Path) -> None:
         """Export PSA data metadata and provenance to JSON."""
@@ -312,12 +345,20 @@ def normalise_perspective(perspective: str, available: Iterable[str]) -> str:
     raise ValueError(f"Perspective '{perspective}' not found. Available: {items}")
 
 
-def load_psa(path: Path, strategies_yaml: Optional[Path] = None) -> pd.DataFrame:
+def load_psa(
+    path: Path,
+    strategies_yaml: Optional[Path] = None,
+    compact: bool = False,
+    float32: bool = False
+) -> pd.DataFrame:
     """Load PSA data from CSV file and normalize strategy names to canonical keys.
 
     Args:
         path: Path to PSA CSV file
         strategies_yaml: Optional path to `config/strategies.yml` for canonical strategy list
+        compact: Return the compact schema (categorical labels, int32 draws)
+        float32: With ``compact``, store value columns as float32 where lossless
+            to within the schema tolerance
 
     Returns:
         DataFrame with normalized `strategy` column
@@ -379,7 +420,14 @@ def load_psa(path: Path, strategies_yaml: Optional[Path] = None) -> pd.DataFrame
         return canonical_map.get(key, canonical_map.get(key.lower(), key))
 
     if 'strategy' in df.columns:
-        df['strategy'] = df['strategy'].apply(_map_strategy_value)
+        # Map each distinct label once rather than every row
+        uniques = pd.unique(df['strategy'])
+        mapping = {v: _map_strategy_value(v) for v in uniques}
+        df['strategy'] = df['strategy'].map(mapping)
+
+    if compact:
+        extra = cfg.strategies if cfg is not None else None
+        df = compact_psa_table(df, float32=float32, extra_strategies=extra)
 
     return df
 
@@ -396,7 +444,9 @@ def load_analysis_inputs(
     psa_path: Path,
     config_path: Path,
     perspective: str,
-    jurisdiction: Optional[str] = None
+    jurisdiction: Optional[str] = None,
+    compact: bool = False,
+    float32: bool = False
 ) -> PSAData:
     """
     Load and validate all inputs for analysis.
@@ -406,6 +456,8 @@ def load_analysis_inputs(
         config_path: Path to strategy configuration YAML
         perspective: Economic perspective (health_system or societal)
         jurisdiction: Geographic jurisdiction (AU or NZ)
+        compact: Store the PSA table with the compact schema
+        float32: With ``compact``, opt in to float32 value columns
     
     Returns:
         PSAData object with validated data and configuration
@@ -418,7 +470,7 @@ def load_analysis_inputs(
     perspective = normalise_perspective(perspective, config.perspectives)
     
     # Load PSA data
-    psa_df = load_psa(psa_path)
+    psa_df = load_psa(psa_path, compact=compact, float32=float32)
     
     # Filter by perspective
     psa_df = psa_df[psa_df["perspective"] == perspective].copy()
@@ -7,11 +7,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 
 import numpy as np
 import pandas as pd
 
+from .nma_linkage import (
+    NMA_STRATEGY_MAP,
+    NMAPosterior,
+    convergence_diagnostics,
+    link_nma_effects,
+    load_nma_posterior,
+    summarize_posterior,
+)
+
 
 @dataclass
 class NMAResult:
@@ -118,43 +127,64 @@ def create_nma_correlation_structure(
 def integrate_nma_with_psa(
     nma_effects: pd.DataFrame,
     base_psa: pd.DataFrame,
-    effect_column: str = 'effect'
+    effect_column: str = 'effect',
+    method: str = 'thin',
+    seed: Optional[int] = None
 ) -> pd.DataFrame:
     """
     Integrate NMA treatment effects into PSA data.
     
+    Each PSA draw is linked to one posterior draw (row of ``nma_effects``)
+    shared by all strategies, so the correlation between treatment effects
+    within a posterior draw carries through to the PSA.
+    
     Args:
-        nma_effects: NMA posterior samples
+        nma_effects: NMA posterior samples, one column per therapy
         base_psa: Base PSA data
         effect_column: Column name for effects
+        method: Draw linkage, ``'thin'`` (deterministic, evenly spaced) or
+            ``'seed'`` (seeded permutation); see ``nma_linkage.link_posterior_draws``
+        seed: Seed for ``method='seed'``
     
     Returns:
-        Updated PSA data with NMA-informed effects
+        Updated PSA data with NMA-informed effects and the linked ``posterior_draw``
     """
-    updated_psa = base_psa.copy()
-    
-    # Map NMA effects to PSA draws
-    for therapy in nma_effects.columns:
-        if therapy == 'draw':
-            continue
-        
-        # Get NMA effects for this therapy
-        therapy_effects = nma_effects[therapy].values
-        
-        # Update PSA data
-        therapy_mask = updated_psa['strategy'] == therapy
-        n_therapy_draws = therapy_mask.sum()
-        
-        if n_therapy_draws > 0:
-            # Sample from NMA posterior
-            sampled_effects = np.random.choice(
-                therapy_effects,
-                size=n_therapy_draws,
-                replace=True
-            )
-            updated_psa.loc[therapy_mask, effect_column] = sampled_effects
-    
-    return updated_psa
+    effects = nma_effects.sort_values('draw') if 'draw' in nma_effects.columns else nma_effects
+    therapies = [c for c in effects.columns if c != 'draw']
+    return link_nma_effects(
+        base_psa,
+        effects.reset_index(drop=True),
+        {therapy: therapy for therapy in therapies},
+        effect_column=effect_column,
+        method=method,
+        seed=seed
+    )
+
+
+def posterior_treatment_effects(
+    posterior: NMAPosterior,
+    strategy_map: Optional[Dict[str, str]] = None,
+    scale: str = 'prob'
+) -> pd.DataFrame:
+    """
+    Posterior draws as a therapy-per-column table.
+    
+    Args:
+        posterior: Stored NMA posterior
+        strategy_map: NMA treatment code -> strategy name (default ``NMA_STRATEGY_MAP``)
+        scale: ``'prob'`` (absolute response probability) or ``'logOR'`` (vs reference)
+    
+    Returns:
+        DataFrame with one column per strategy and a ``draw`` column
+    """
+    strategy_map = NMA_STRATEGY_MAP if strategy_map is None else strategy_map
+    effects = pd.DataFrame({
+        strategy: posterior.draws[f"{code}_{scale}"].to_numpy()
+        for code, strategy in strategy_map.items()
+        if f"{code}_{scale}" in posterior.draws.columns
+    })
+    effects['draw'] = range(len(effects))
+    return effects
 
 
 def run_nma_analysis(
@@ -163,11 +193,19 @@ def run_nma_analysis(
     mean_effects: Dict[str, float],
     correlation_strength: float = 0.3,
     n_samples: int = 1000,
-    seed: Optional[int] = None
+    seed: Optional[int] = None,
+    posterior: Optional[Union[NMAPosterior, Path]] = None,
+    strategy_map: Optional[Dict[str, str]] = None
 ) -> NMAResult:
     """
     Run Bayesian Network Meta-Analysis.
     
+    With ``posterior`` (stored draws, e.g. ``data/nma/nma_posterior_draws.parquet``)
+    the treatment effects, correlations, heterogeneity and convergence
+    diagnostics all come from the fitted model. Otherwise effects are drawn
+    from a multivariate normal around ``mean_effects``; heterogeneity is then
+    not estimated and the diagnostics describe the generated draws.
+    
     Args:
         therapies: List of therapy names
         reference_therapy: Reference therapy
@@ -175,10 +213,18 @@ def run_nma_analysis(
         correlation_strength: Correlation between treatments
         n_samples: Number of posterior samples
         seed: Random seed
+        posterior: Stored posterior draws or their path
+        strategy_map: NMA treatment code -> therapy name for stored draws
     
     Returns:
         NMAResult with posterior distributions
     """
+    if posterior is not None:
+        return _nma_from_posterior(
+            posterior if isinstance(posterior, NMAPosterior) else load_nma_posterior(posterior),
+            therapies, reference_therapy, strategy_map
+        )
+    
     # Create correlation structure
     corr_matrix = create_nma_correlation_structure(
         therapies, reference_therapy, correlation_strength
@@ -189,7 +235,43 @@ def run_nma_analysis(
         mean_effects, corr_matrix, n_samples, seed
     )
     
-    # Calculate relative effects vs reference
+    # Create correlation DataFrame
+    corr_df = pd.DataFrame(
+        corr_matrix,
+        index=therapies,
+        columns=therapies
+    )
+    
+    # No model was fitted, so heterogeneity is not estimated
+    heterogeneity = {
+        'tau_squared': None,
+        'i_squared': None
+    }
+    
+    # Diagnostics of the generated draws (a single independent chain)
+    diagnostics = convergence_diagnostics(
+        treatment_effects[therapies].to_numpy()[None], therapies
+    )
+    convergence = {
+        'r_hat': float(diagnostics['r_hat'].max()),
+        'effective_sample_size': float(diagnostics['ess_bulk'].min())
+    }
+    
+    return NMAResult(
+        treatment_effects=treatment_effects,
+        relative_effects=_relative_effects(treatment_effects, therapies, reference_therapy),
+        correlation_matrix=corr_df,
+        heterogeneity=heterogeneity,
+        convergence_diagnostics=convergence
+    )
+
+
+def _relative_effects(
+    treatment_effects: pd.DataFrame,
+    therapies: List[str],
+    reference_therapy: str
+) -> pd.DataFrame:
+    """Posterior summaries of each therapy's effect minus the reference, draw by draw."""
     relative_effects_list = []
     ref_effects = treatment_effects[reference_therapy].values
     
@@ -207,33 +289,45 @@ def run_nma_analysis(
                 'q975': np.percentile(relative, 97.5)
             })
     
-    relative_effects_df = pd.DataFrame(relative_effects_list)
-    
-    # Create correlation DataFrame
-    corr_df = pd.DataFrame(
-        corr_matrix,
-        index=therapies,
-        columns=therapies
-    )
-    
-    # Heterogeneity (simplified - would come from Bayesian model)
+    return pd.DataFrame(relative_effects_list)
+
+
+def _nma_from_posterior(
+    posterior: NMAPosterior,
+    therapies: List[str],
+    reference_therapy: str,
+    strategy_map: Optional[Dict[str, str]]
+) -> NMAResult:
+    """NMAResult from stored posterior draws."""
+    treatment_effects = posterior_treatment_effects(posterior, strategy_map)
+    available = [t for t in therapies if t in treatment_effects.columns] or \
+        [c for c in treatment_effects.columns if c != 'draw']
+    treatment_effects = treatment_effects[available + ['draw']]
+    if reference_therapy not in available:
+        reference_therapy = available[0]
+    
+    summary = summarize_posterior(posterior, suffix='_prob')
+    convergence = summary.convergence()
     heterogeneity = {
-        'tau_squared': 0.01,  # Between-study variance
-        'i_squared': 0.25     # Proportion of variance due to heterogeneity
-    }
-    
-    # Convergence diagnostics (simplified)
-    convergence = {
-        'r_hat': 1.01,  # Should be < 1.05
-        'effective_sample_size': n_samples * 0.8
+        'tau_squared': summary.heterogeneity['tau_squared'],
+        'tau_mean': summary.heterogeneity['tau_mean'],
+        'tau_q025': summary.heterogeneity['tau_q025'],
+        'tau_q975': summary.heterogeneity['tau_q975']
     }
     
     return NMAResult(
         treatment_effects=treatment_effects,
-        relative_effects=relative_effects_df,
-        correlation_matrix=corr_df,
+        relative_effects=_relative_effects(treatment_effects, available, reference_therapy),
+        correlation_matrix=treatment_effects[available].corr(),
         heterogeneity=heterogeneity,
-        convergence_diagnostics=convergence
+        convergence_diagnostics={
+            'r_hat': convergence['r_hat'],
+            'effective_sample_size': convergence['ess_bulk'],
+            'ess_tail': convergence['ess_tail'],
+            'n_chains': summary.n_chains,
+            'n_draws': summary.n_draws,
+            'notes': summary.notes
+        }
     )
 
 
@@ -0,0 +1,339 @@
+"""
+V4 NMA Fitting Service
+
+Fits the Bayesian NMA once per distinct network and model specification.
+
+Responsibilities:
+- Content-addressed fit keys from the arm-level data and the model spec
+  (priors, sampler, draws, seed), so an unchanged NMA is never refitted
+- A fit store holding the posterior draw table as Parquet (with chain, draw
+  and tau) and the full trace as ArviZ NetCDF
+- NUTS for reporting runs and a variational fast mode (ADVI or Pathfinder)
+  for exploratory runs
+- A diagnostic comparing a fast fit against the NUTS reference
+
+PyMC and ArviZ are imported only when a model is actually fitted or a
+NetCDF trace is read, so cached fits load without them.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..core.hashing import hash_object
+
+from .nma_linkage import NMAPosterior, load_nma_posterior
+
+# Bump when the model structure changes so earlier fits are not reused
+MODEL_VERSION = 1
+
+METHODS = ("nuts", "advi", "pathfinder")
+FAST_METHODS = ("advi", "pathfinder")
+
+DATA_COLUMNS = ["study", "treatment", "responders", "total"]
+
+DEFAULT_TREATMENTS = ["ECT", "IV_KA", "IN_EKA", "PO_PSI", "rTMS", "PHARM"]
+
+DEFAULT_PRIORS = {
+    "mu": {"dist": "Normal", "mu": 0.0, "sigma": 2.0},
+    "tau": {"dist": "HalfNormal", "sigma": 0.5},
+    "d": {"dist": "Normal", "mu": 0.0, "sigma": 1.0},
+}
+
+# Fitter: (arm data, spec) -> (posterior draw table, ArviZ InferenceData or None)
+Fitter = Callable[[pd.DataFrame, "NMASpec"], Tuple[pd.DataFrame, Any]]
+
+
+@dataclass(frozen=True)
+class NMASpec:
+    """Model and sampler specification; every field is part of the fit key."""
+
+    treatments: Tuple[str, ...] = tuple(DEFAULT_TREATMENTS)
+    priors: Dict[str, Dict[str, Any]] = field(default_factory=lambda: dict(DEFAULT_PRIORS))
+    method: str = "nuts"
+    draws: int = 2000
+    tune: int = 1000
+    chains: int = 4
+    vi_iterations: int = 30000
+    random_seed: int = 42
+    n_export: int = 1000                 # draws kept in the exported table
+
+    def __post_init__(self):
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown NMA fitting method '{self.method}', expected one of {METHODS}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], method: str = "nuts") -> "NMASpec":
+        """Spec from ``data/nma/nma_config.yaml`` contents."""
+        return cls(
+            treatments=tuple(config.get("treatments", DEFAULT_TREATMENTS)),
+            priors=config.get("priors", DEFAULT_PRIORS),
+            method=method,
+            draws=config.get("n_draws", 2000),
+            tune=config.get("n_tune", 1000),
+            chains=config.get("n_chains", 4),
+            random_seed=config.get("random_seed", 42),
+        )
+
+    def with_method(self, method: str) -> "NMASpec":
+        """Same model with a different fitting method."""
+        return NMASpec(**{**asdict(self), "method": method})
+
+
+def fit_key(data: pd.DataFrame, spec: NMASpec) -> str:
+    """Content hash of the arm-level data and model specification."""
+    arms = data[[c for c in DATA_COLUMNS if c in data.columns]].reset_index(drop=True)
+    return hash_object({"version": MODEL_VERSION, "data": arms, "spec": asdict(spec)}, length=24)
+
+
+# ---------------------------------------------------------------------------
+# Model
+# ---------------------------------------------------------------------------
+
+def build_nma_model(data: pd.DataFrame, spec: NMASpec):
+    """
+    Random-effects binomial NMA (as in ``data/nma/nma_model.create_nma_model``).
+
+    Treatment effects are log odds ratios relative to the first treatment in
+    ``spec.treatments``; ``abs_effects`` are absolute response probabilities.
+    """
+    import pymc as pm
+
+    index = {t: i for i, t in enumerate(spec.treatments)}
+    treatment_idx = data["treatment"].map(index).to_numpy()
+    if np.isnan(treatment_idx.astype(float)).any():
+        unknown = sorted(set(data["treatment"]) - set(index))
+        raise ValueError(f"Treatments not in the NMA spec: {unknown}")
+    priors = spec.priors
+
+    with pm.Model() as model:
+        mu = pm.Normal("mu", mu=priors["mu"]["mu"], sigma=priors["mu"]["sigma"])
+        tau = pm.HalfNormal("tau", sigma=priors["tau"]["sigma"])
+        study_effects = pm.Normal("study_effects", mu=0, sigma=tau, shape=len(data))
+        d = pm.Normal("d", mu=priors["d"]["mu"], sigma=priors["d"]["sigma"], shape=len(spec.treatments))
+        d_fixed = pm.Deterministic("d_fixed", d - d[0])
+        p = pm.invlogit(mu + study_effects + d_fixed[treatment_idx])
+        pm.Binomial("y", n=data["total"].to_numpy(), p=p, observed=data["responders"].to_numpy())
+        pm.Deterministic("abs_effects", pm.invlogit(mu + d_fixed))
+    return model
+
+
+def posterior_draws_table(idata, treatments: Sequence[str], n_draws: Optional[int] = None) -> pd.DataFrame:
+    """
+    Posterior draw table for PSA linkage.
+
+    Draws are thinned evenly within each chain (never resampled), keeping
+    ``chain``/``draw`` indices, ``<treatment>_logOR``, ``<treatment>_prob``
+    and ``tau``.
+    """
+    posterior = idata.posterior
+    n_chains, n_total = posterior.sizes["chain"], posterior.sizes["draw"]
+    per_chain = n_total if n_draws is None else max(1, min(n_total, n_draws // n_chains))
+    keep = np.linspace(0, n_total - 1, per_chain).round().astype(int)
+
+    d_fixed = posterior["d_fixed"].values[:, keep].reshape(-1, len(treatments))
+    abs_effects = posterior["abs_effects"].values[:, keep].reshape(-1, len(treatments))
+    table = pd.DataFrame({
+        "chain": np.repeat(np.arange(n_chains), per_chain),
+        "draw": np.tile(keep, n_chains),
+    })
+    for i, treatment in enumerate(treatments):
+        table[f"{treatment}_logOR"] = d_fixed[:, i]
+    for i, treatment in enumerate(treatments):
+        table[f"{treatment}_prob"] = abs_effects[:, i]
+    table["tau"] = posterior["tau"].values[:, keep].ravel()
+    return table
+
+
+def fit_with_pymc(data: pd.DataFrame, spec: NMASpec) -> Tuple[pd.DataFrame, Any]:
+    """Fit the NMA with NUTS, ADVI or Pathfinder and return (draw table, InferenceData)."""
+    import pymc as pm
+
+    model = build_nma_model(data, spec)
+    n_samples = spec.draws * spec.chains
+    with model:
+        if spec.method == "nuts":
+            idata = pm.sample(draws=spec.draws, tune=spec.tune, chains=spec.chains,
+                              random_seed=spec.random_seed, progressbar=False)
+        elif spec.method == "advi":
+            approx = pm.fit(n=spec.vi_iterations, method="advi", random_seed=spec.random_seed,
+                            progressbar=False)
+            idata = approx.sample(n_samples, random_seed=spec.random_seed)
+        else:
+            try:
+                import pymc_extras as pmx
+            except ImportError:  # pragma: no cover - older releases
+                import pymc_experimental as pmx
+            idata = pmx.fit(method="pathfinder", num_draws=n_samples, random_seed=spec.random_seed)
+    return posterior_draws_table(idata, spec.treatments, spec.n_export), idata
+
+
+# ---------------------------------------------------------------------------
+# Fit store and service
+# ---------------------------------------------------------------------------
+
+@dataclass
+class NMAFit:
+    """A fitted (or cached) NMA."""
+
+    key: str
+    spec: NMASpec
+    draws: pd.DataFrame
+    directory: Path
+    cached: bool
+    fit_seconds: float
+
+    @property
+    def trace_path(self) -> Path:
+        return self.directory / "trace.nc"
+
+    @property
+    def draws_path(self) -> Path:
+        return self.directory / "posterior_draws.parquet"
+
+    def posterior(self) -> NMAPosterior:
+        """Draws with chain structure and tau, for linkage and diagnostics."""
+        return load_nma_posterior(self.draws_path)
+
+    def inference_data(self):
+        """Full ArviZ trace (requires ``arviz``)."""
+        import arviz as az
+
+        return az.from_netcdf(self.trace_path)
+
+
+class NMAFittingService:
+    """
+    Content-addressed NMA fits.
+
+    Each fit lives in ``<cache_dir>/<key>/`` as ``posterior_draws.parquet``,
+    ``trace.nc`` (when the fitter returns a trace) and ``fit.json``. A fit is
+    reused whenever data and spec hash to an existing key.
+    """
+
+    def __init__(self, cache_dir: Path = Path("cache/nma"), fitter: Optional[Fitter] = None):
+        self.cache_dir = Path(cache_dir)
+        self.fitter = fitter or fit_with_pymc
+
+    def _directory(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def lookup(self, data: pd.DataFrame, spec: NMASpec) -> Optional[NMAFit]:
+        """Cached fit for data and spec, if any."""
+        key = fit_key(data, spec)
+        directory = self._directory(key)
+        meta_path = directory / "fit.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        return NMAFit(key=key, spec=spec, draws=pd.read_parquet(directory / "posterior_draws.parquet"),
+                      directory=directory, cached=True, fit_seconds=meta["fit_seconds"])
+
+    def fit(self, data: pd.DataFrame, spec: NMASpec, refit: bool = False) -> NMAFit:
+        """
+        Fitted NMA for data and spec, fitting only on a cache miss.
+
+        Args:
+            data: Arm-level data (study, treatment, responders, total)
+            spec: Model and sampler specification
+            refit: Ignore any cached fit
+        """
+        if not refit:
+            cached = self.lookup(data, spec)
+            if cached is not None:
+                return cached
+
+        key = fit_key(data, spec)
+        directory = self._directory(key)
+        directory.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        draws, idata = self.fitter(data, spec)
+        seconds = time.perf_counter() - start
+
+        # Write the trace and draws before the metadata that marks the fit complete
+        if idata is not None:
+            idata.to_netcdf(str(directory / "trace.nc"))
+        draws.to_parquet(directory / "posterior_draws.parquet", index=False)
+        (directory / "fit.json").write_text(json.dumps({
+            "key": key,
+            "model_version": MODEL_VERSION,
+            "spec": asdict(spec),
+            "n_arms": len(data),
+            "fit_seconds": seconds,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, indent=2, default=str))
+        return NMAFit(key=key, spec=spec, draws=draws, directory=directory, cached=False, fit_seconds=seconds)
+
+    def fit_fast(self, data: pd.DataFrame, spec: NMASpec, method: str = "advi") -> NMAFit:
+        """Variational fit for exploratory runs."""
+        if method not in FAST_METHODS:
+            raise ValueError(f"Fast mode method must be one of {FAST_METHODS}")
+        return self.fit(data, spec.with_method(method))
+
+    def validate_fast_fit(
+        self,
+        data: pd.DataFrame,
+        spec: NMASpec,
+        method: str = "advi",
+        **thresholds: float,
+    ) -> pd.DataFrame:
+        """Compare a fast fit against the NUTS reference (both cached)."""
+        reference = self.fit(data, spec.with_method("nuts"))
+        fast = self.fit_fast(data, spec, method)
+        return compare_fits(fast.draws, reference.draws, **thresholds)
+
+
+def compare_fits(
+    fast: pd.DataFrame,
+    reference: pd.DataFrame,
+    columns: Optional[List[str]] = None,
+    max_mean_shift: float = 0.1,
+    sd_ratio_range: Tuple[float, float] = (0.8, 1.25),
+) -> pd.DataFrame:
+    """
+    Agreement of an approximate posterior with a reference posterior.
+
+    Args:
+        fast: Draw table of the approximate (e.g. ADVI) fit
+        reference: Draw table of the NUTS fit
+        columns: Quantities to compare (default: all shared non-index columns)
+        max_mean_shift: Largest acceptable mean difference in reference SDs
+        sd_ratio_range: Acceptable range of fast / reference SD (variational
+            fits typically understate posterior spread)
+
+    Returns:
+        DataFrame per quantity: means, SDs, standardised mean shift, SD ratio,
+        Kolmogorov-Smirnov distance and ``acceptable``
+    """
+    columns = columns or [c for c in reference.columns
+                          if c in fast.columns and c not in ("chain", "draw")]
+    a = fast[columns].to_numpy(dtype=float)
+    b = reference[columns].to_numpy(dtype=float)
+    mean_a, mean_b = a.mean(axis=0), b.mean(axis=0)
+    sd_a, sd_b = a.std(axis=0, ddof=1), b.std(axis=0, ddof=1)
+
+    # Two-sample KS distance for all columns at once on the pooled grid
+    grid = np.sort(np.concatenate([a, b]), axis=0)
+    cdf_a = np.stack([np.searchsorted(np.sort(a[:, j]), grid[:, j], side="right") for j in range(len(columns))], axis=1) / len(a)
+    cdf_b = np.stack([np.searchsorted(np.sort(b[:, j]), grid[:, j], side="right") for j in range(len(columns))], axis=1) / len(b)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(sd_b > 0, np.abs(mean_a - mean_b) / sd_b, 0.0)
+        ratio = np.where(sd_b > 0, sd_a / sd_b, 1.0)
+    return pd.DataFrame({
+        "parameter": columns,
+        "mean_fast": mean_a,
+        "mean_reference": mean_b,
+        "sd_fast": sd_a,
+        "sd_reference": sd_b,
+        "mean_shift_sd": shift,
+        "sd_ratio": ratio,
+        "ks_distance": np.abs(cdf_a - cdf_b).max(axis=0),
+        "acceptable": (shift <= max_mean_shift) & (ratio >= sd_ratio_range[0]) & (ratio <= sd_ratio_range[1]),
+    })
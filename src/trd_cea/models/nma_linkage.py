@@ -0,0 +1,352 @@
+"""
+V4 NMA-PSA Linkage
+
+Links PSA draws to whole NMA posterior draws.
+
+Responsibilities:
+- Loading stored NMA posterior draws (``nma_posterior_draws.parquet``, or an
+  ArviZ NetCDF trace) with their chain/draw structure and heterogeneity
+- Mapping every PSA draw to one posterior draw vector, by deterministic
+  thinning or a seeded permutation, so all treatments in a PSA draw come
+  from the same posterior draw and their joint correlation is kept
+- Convergence diagnostics: rank-normalised split R-hat and bulk/tail ESS
+  (Vehtari et al. 2021, as in ArviZ), and posterior summaries of tau
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+DEFAULT_POSTERIOR_PATH = Path("data/nma/nma_posterior_draws.parquet")
+
+# Columns of the stored draws that index the sample rather than hold values
+INDEX_COLUMNS = ("chain", "draw")
+
+# NMA treatment codes -> model strategy names
+NMA_STRATEGY_MAP = {
+    "ECT": "ECT",
+    "IV_KA": "IV-KA",
+    "IN_EKA": "IN-EKA",
+    "PO_PSI": "PO-PSI",
+    "rTMS": "rTMS",
+    "PHARM": "Usual Care",
+}
+
+
+@dataclass
+class NMAPosterior:
+    """Stored NMA posterior draws with their sampling structure."""
+
+    draws: pd.DataFrame                  # one row per posterior draw, one column per quantity
+    chain: np.ndarray                    # chain id per row
+    source: str = ""
+    tau: Optional[np.ndarray] = None     # between-study SD per row, if stored
+
+    @property
+    def n_draws(self) -> int:
+        return len(self.draws)
+
+    @property
+    def n_chains(self) -> int:
+        return len(np.unique(self.chain))
+
+    def treatments(self, suffix: str = "_prob") -> List[str]:
+        """Treatment codes that have a ``<treatment><suffix>`` column."""
+        return [c[: -len(suffix)] for c in self.draws.columns if c.endswith(suffix)]
+
+    def by_chain(self, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Values as (chains, draws, quantities), truncated to the shortest chain."""
+        columns = list(columns) if columns is not None else list(self.draws.columns)
+        values = self.draws[columns].to_numpy(dtype=float)
+        groups = [values[self.chain == c] for c in np.unique(self.chain)]
+        n = min(len(g) for g in groups)
+        return np.stack([g[:n] for g in groups])
+
+
+def load_nma_posterior(path: Path = DEFAULT_POSTERIOR_PATH) -> NMAPosterior:
+    """
+    Load stored NMA posterior draws.
+
+    Parquet files are as written by ``data/nma/run_nma.py``; optional
+    ``chain``/``draw`` columns give the sampling structure and a ``tau``
+    column the heterogeneity draws. Without a chain column all rows are
+    treated as one chain in stored order. ``.nc`` files are ArviZ
+    InferenceData traces (requires ``arviz``) with ``d_fixed``,
+    ``abs_effects`` and ``tau`` in the posterior group.
+    """
+    path = Path(path)
+    if path.suffix == ".nc":
+        return _load_netcdf(path)
+
+    draws = pd.read_parquet(path)
+    chain = draws["chain"].to_numpy() if "chain" in draws.columns else np.zeros(len(draws), dtype=int)
+    tau = draws["tau"].to_numpy(dtype=float) if "tau" in draws.columns else None
+    if "draw" in draws.columns:
+        order = np.lexsort((draws["draw"].to_numpy(), chain))
+        draws, chain = draws.iloc[order], chain[order]
+        tau = tau[order] if tau is not None else None
+    values = draws.drop(columns=[c for c in (*INDEX_COLUMNS, "tau") if c in draws.columns])
+    return NMAPosterior(draws=values.reset_index(drop=True), chain=chain, source=str(path), tau=tau)
+
+
+def _load_netcdf(path: Path) -> NMAPosterior:
+    import arviz as az
+
+    posterior = az.from_netcdf(path).posterior
+    n_chains, n_draws = posterior.sizes["chain"], posterior.sizes["draw"]
+    columns = {}
+    for treatment, idx in _treatment_index(posterior).items():
+        columns[f"{treatment}_logOR"] = posterior["d_fixed"].values[:, :, idx].ravel()
+        columns[f"{treatment}_prob"] = posterior["abs_effects"].values[:, :, idx].ravel()
+    tau = posterior["tau"].values.ravel() if "tau" in posterior else None
+    return NMAPosterior(
+        draws=pd.DataFrame(columns),
+        chain=np.repeat(np.arange(n_chains), n_draws),
+        source=str(path),
+        tau=tau,
+    )
+
+
+def _treatment_index(posterior) -> Dict[str, int]:
+    # Same ordering as data/nma/nma_model.TREATMENTS
+    codes = list(NMA_STRATEGY_MAP)
+    return {code: i for i, code in enumerate(codes[: posterior["d_fixed"].shape[-1]])}
+
+
+# ---------------------------------------------------------------------------
+# PSA draw linkage
+# ---------------------------------------------------------------------------
+
+def link_posterior_draws(
+    psa_draws: Sequence,
+    n_posterior: int,
+    method: str = "thin",
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Posterior row for every PSA draw.
+
+    Every distinct PSA draw id maps to exactly one posterior row, so all
+    strategies sharing a PSA draw use the same posterior draw vector.
+
+    Args:
+        psa_draws: PSA draw id per row (repeats across strategies are expected)
+        n_posterior: Number of stored posterior draws
+        method: ``"thin"`` takes evenly spaced posterior rows in draw order
+            (cycling when there are more PSA draws than posterior draws);
+            ``"seed"`` uses a seeded permutation of the posterior rows
+        seed: Seed for ``method="seed"``
+
+    Returns:
+        Integer array of posterior rows aligned with ``psa_draws``
+    """
+    ids, inverse = np.unique(np.asarray(psa_draws), return_inverse=True)
+    n_ids = len(ids)
+    if method == "thin":
+        rows = (np.arange(n_ids) * n_posterior // n_ids) if n_ids <= n_posterior else np.arange(n_ids) % n_posterior
+    elif method == "seed":
+        order = np.random.default_rng(seed).permutation(n_posterior)
+        rows = order[np.arange(n_ids) % n_posterior]
+    else:
+        raise ValueError(f"Unknown linkage method '{method}', expected 'thin' or 'seed'")
+    return rows[inverse.ravel()]
+
+
+def link_nma_effects(
+    psa: pd.DataFrame,
+    effects: pd.DataFrame,
+    strategy_columns: Dict[str, str],
+    effect_column: str = "effect",
+    method: str = "thin",
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Replace PSA effects with draw-linked posterior values.
+
+    Args:
+        psa: PSA table with ``draw`` and ``strategy`` columns
+        effects: Posterior draw table, one row per posterior draw
+        strategy_columns: Strategy -> column of ``effects`` to use for it
+        effect_column: PSA column to overwrite
+        method, seed: Linkage, as ``link_posterior_draws``
+
+    Returns:
+        Copy of ``psa`` with linked effects and a ``posterior_draw`` column
+    """
+    linked = psa.copy()
+    rows = link_posterior_draws(linked["draw"].to_numpy(), len(effects), method=method, seed=seed)
+    linked["posterior_draw"] = rows
+    for strategy, column in strategy_columns.items():
+        mask = (linked["strategy"] == strategy).to_numpy()
+        if mask.any():
+            linked.loc[mask, effect_column] = effects[column].to_numpy()[rows[mask]]
+    return linked
+
+
+# ---------------------------------------------------------------------------
+# Convergence diagnostics
+# ---------------------------------------------------------------------------
+
+def _split_chains(x: np.ndarray) -> np.ndarray:
+    # (chains, draws, ...) -> (2 * chains, draws // 2, ...)
+    half = x.shape[1] // 2
+    return np.concatenate([x[:, :half], x[:, x.shape[1] - half:]], axis=0)
+
+
+def _rank_normalize(x: np.ndarray) -> np.ndarray:
+    shape = x.shape
+    flat = x.reshape(-1, *shape[2:])
+    ranks = stats.rankdata(flat, axis=0)
+    return stats.norm.ppf((ranks - 0.375) / (flat.shape[0] + 0.25)).reshape(shape)
+
+
+def _rhat(x: np.ndarray) -> np.ndarray:
+    # x: (chains, draws, k)
+    n = x.shape[1]
+    within = x.var(axis=1, ddof=1).mean(axis=0)
+    between = n * x.mean(axis=1).var(axis=0, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sqrt(((n - 1) / n * within + between / n) / within)
+
+
+def _autocovariance(x: np.ndarray) -> np.ndarray:
+    # Biased autocovariance along axis 1 via FFT; x: (chains, draws, k)
+    n = x.shape[1]
+    size = 2 ** int(np.ceil(np.log2(2 * n)))
+    centered = x - x.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(centered, n=size, axis=1)
+    return np.fft.irfft(spectrum * np.conj(spectrum), n=size, axis=1)[:, :n] / n
+
+
+def _ess(x: np.ndarray) -> np.ndarray:
+    """Effective sample size with Geyer's initial monotone sequence; x: (chains, draws, k)."""
+    m, n, k = x.shape
+    acov = _autocovariance(x)
+    mean_var = acov[:, 0].mean(axis=0) * n / (n - 1)
+    var_plus = mean_var * (n - 1) / n
+    if m > 1:
+        var_plus = var_plus + x.mean(axis=1).var(axis=0, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho = 1 - (mean_var - acov.mean(axis=0)) / var_plus   # (n, k)
+    rho[0] = 1.0
+
+    out = np.empty(k)
+    for j in range(k):
+        if not np.isfinite(var_plus[j]) or var_plus[j] <= 0:
+            out[j] = np.nan
+            continue
+        r = rho[:, j]
+        # Sum autocorrelation pairs while positive, forcing them to be monotone
+        pairs = r[: n - n % 2].reshape(-1, 2).sum(axis=1)
+        positive = np.flatnonzero(pairs <= 0)
+        n_pairs = positive[0] if positive.size else len(pairs)
+        pairs = np.minimum.accumulate(pairs[:n_pairs])
+        tau = -1 + 2 * pairs.sum()
+        out[j] = m * n / max(tau, 1 / np.log10(m * n))
+    return out
+
+
+def convergence_diagnostics(samples: np.ndarray, names: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Rank-normalised split R-hat and bulk/tail ESS per quantity.
+
+    Args:
+        samples: Array (chains, draws, quantities)
+        names: Quantity names
+
+    Returns:
+        DataFrame: parameter, r_hat, ess_bulk, ess_tail (constant quantities give NaN)
+    """
+    samples = np.asarray(samples, dtype=float)
+    names = list(names) if names is not None else [f"x{j}" for j in range(samples.shape[-1])]
+    split = _split_chains(samples)
+
+    z = _rank_normalize(split)
+    folded = _rank_normalize(_split_chains(np.abs(samples - np.median(samples, axis=(0, 1)))))
+    r_hat = np.fmax(_rhat(z), _rhat(folded))
+
+    q05, q95 = np.quantile(samples, [0.05, 0.95], axis=(0, 1))
+    ess_tail = np.fmin(_ess((split <= q05).astype(float)), _ess((split <= q95).astype(float)))
+
+    constant = np.ptp(samples.reshape(-1, samples.shape[-1]), axis=0) == 0
+    return pd.DataFrame({
+        "parameter": names,
+        "r_hat": np.where(constant, np.nan, r_hat),
+        "ess_bulk": np.where(constant, np.nan, _ess(z)),
+        "ess_tail": np.where(constant, np.nan, ess_tail),
+    })
+
+
+@dataclass
+class NMASummary:
+    """Posterior summary of a stored NMA."""
+
+    diagnostics: pd.DataFrame
+    heterogeneity: Dict[str, Optional[float]]
+    correlation: pd.DataFrame
+    n_chains: int
+    n_draws: int
+    notes: List[str] = field(default_factory=list)
+
+    def convergence(self) -> Dict[str, Optional[float]]:
+        """Worst-case R-hat and ESS over all quantities."""
+        d = self.diagnostics.dropna(subset=["r_hat"])
+        if d.empty:
+            return {"r_hat": None, "ess_bulk": None, "ess_tail": None}
+        return {
+            "r_hat": float(d["r_hat"].max()),
+            "ess_bulk": float(d["ess_bulk"].min()),
+            "ess_tail": float(d["ess_tail"].min()),
+        }
+
+
+def summarize_posterior(posterior: NMAPosterior, suffix: str = "_logOR") -> NMASummary:
+    """
+    Convergence, heterogeneity and between-treatment correlation of stored draws.
+
+    Args:
+        posterior: Loaded posterior draws
+        suffix: Columns to correlate (``_logOR`` or ``_prob``)
+    """
+    notes = []
+    columns = list(posterior.draws.columns)
+    samples = posterior.by_chain(columns)
+    if posterior.tau is not None:
+        tau_chains = NMAPosterior(pd.DataFrame({"tau": posterior.tau}), posterior.chain).by_chain()
+        samples = np.concatenate([samples, tau_chains], axis=-1)
+        columns = columns + ["tau"]
+    if posterior.n_chains == 1:
+        notes.append("single chain in stored order: R-hat compares its two halves only")
+    diagnostics = convergence_diagnostics(samples, columns)
+
+    if posterior.tau is not None:
+        tau = posterior.tau
+        heterogeneity = {
+            "tau_mean": float(tau.mean()),
+            "tau_median": float(np.median(tau)),
+            "tau_q025": float(np.quantile(tau, 0.025)),
+            "tau_q975": float(np.quantile(tau, 0.975)),
+            "tau_squared": float(np.mean(tau ** 2)),
+        }
+    else:
+        heterogeneity = {"tau_mean": None, "tau_median": None, "tau_q025": None,
+                         "tau_q975": None, "tau_squared": None}
+        notes.append("tau not stored with the posterior draws")
+
+    effect_columns = [c for c in posterior.draws.columns if c.endswith(suffix)
+                      and posterior.draws[c].nunique() > 1]
+    correlation = posterior.draws[effect_columns].corr()
+    correlation.index = correlation.columns = [c[: -len(suffix)] for c in effect_columns]
+    return NMASummary(
+        diagnostics=diagnostics,
+        heterogeneity=heterogeneity,
+        correlation=correlation,
+        n_chains=posterior.n_chains,
+        n_draws=posterior.n_draws,
+        notes=notes,
+    )
@@ -1,15 +1,19 @@
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import yaml
 from scipy.stats import beta, gamma, lognorm, norm
-from .cea_engine import simulate_arm
-from ..plots.pricing import plot_pricing
+from ..plotting.figure_service import render_publication_figures
+from .cea_engine import CLINICAL_PARAMETERS, clinical_parameter_matrix, simulate_arm_grid
+from .psa_streaming import ConvergenceMonitor, StreamingPSA, iter_sampler_chunks, streaming_settings_from_config
+
+DEFAULT_ANALYSIS_CONFIG = Path("config/v4_analysis_defaults.yml")
 
-def sample_parameters(psa_df, n_iter=2000, correlated=False, correlations_path=None):
-    """Sample parameters for PSA."""
+def sample_parameters(psa_df, n_iter=2000, correlated=False, correlations_path=None, random_state=None):
+    """Sample parameters for PSA (``random_state`` seeds every draw)."""
     samples = {}
     if correlated and correlations_path:
-        import yaml
         with open(correlations_path, 'r') as f:
             corr_config = yaml.safe_load(f)
         # Collect all params in blocks
@@ -18,7 +22,7 @@ def sample_parameters(psa_df, n_iter=2000, correlated=False, correlations_path=N
             block_params.update(block['params'])
         # Generate independent normals for all params
         all_params = list(psa_df['parameter'].unique())
-        z_indep = norm.rvs(size=(n_iter, len(all_params)))
+        z_indep = norm.rvs(size=(n_iter, len(all_params)), random_state=random_state)
         param_to_idx = {p: i for i, p in enumerate(all_params)}
         # For each block, apply correlation
         for block in corr_config['blocks']:
@@ -62,7 +66,7 @@ def sample_parameters(psa_df, n_iter=2000, correlated=False, correlations_path=N
                     samples[param] = norm.ppf(norm.cdf(z_vals), mean, std)
                 else:
                     # Independent fallback
-                    samples[param] = norm.rvs(mean, std, size=n_iter)
+                    samples[param] = norm.rvs(mean, std, size=n_iter, random_state=random_state)
         # For params not in blocks, independent
         for _, row in psa_df.iterrows():
             param = row['parameter']
@@ -75,13 +79,13 @@ def sample_parameters(psa_df, n_iter=2000, correlated=False, correlations_path=N
                 var = std**2
                 alpha = mean * (mean*(1-mean)/var - 1)
                 beta_param = (1-mean) * (mean*(1-mean)/var - 1)
-                samples[param] = beta.rvs(alpha, beta_param, size=n_iter)
+                samples[param] = beta.rvs(alpha, beta_param, size=n_iter, random_state=random_state)
             elif dist == 'Gamma':
-                samples[param] = gamma.rvs(mean**2 / std**2, scale=std**2/mean, size=n_iter)
+                samples[param] = gamma.rvs(mean**2 / std**2, scale=std**2/mean, size=n_iter, random_state=random_state)
             elif dist == 'Lognormal':
-                samples[param] = lognorm.rvs(s=std, scale=np.exp(mean), size=n_iter)
+                samples[param] = lognorm.rvs(s=std, scale=np.exp(mean), size=n_iter, random_state=random_state)
             elif dist == 'Normal':
-                samples[param] = norm.rvs(mean, std, size=n_iter)
+                samples[param] = norm.rvs(mean, std, size=n_iter, random_state=random_state)
     else:
         # Independent sampling
         for _, row in psa_df.iterrows():
@@ -93,169 +97,175 @@ def sample_parameters(psa_df, n_iter=2000, correlated=False, correlations_path=N
                 var = std**2
                 alpha = mean * (mean*(1-mean)/var - 1)
                 beta_param = (1-mean) * (mean*(1-mean)/var - 1)
-                samples[param] = beta.rvs(alpha, beta_param, size=n_iter)
+                samples[param] = beta.rvs(alpha, beta_param, size=n_iter, random_state=random_state)
             elif dist == 'Gamma':
-                samples[param] = gamma.rvs(mean**2 / std**2, scale=std**2/mean, size=n_iter)
+                samples[param] = gamma.rvs(mean**2 / std**2, scale=std**2/mean, size=n_iter, random_state=random_state)
             elif dist == 'Lognormal':
-                samples[param] = lognorm.rvs(s=std, scale=np.exp(mean), size=n_iter)
+                samples[param] = lognorm.rvs(s=std, scale=np.exp(mean), size=n_iter, random_state=random_state)
             elif dist == 'Normal':
-                samples[param] = norm.rvs(mean, std, size=n_iter)
+                samples[param] = norm.rvs(mean, std, size=n_iter, random_state=random_state)
     return pd.DataFrame(samples)
 
-def run_psa(settings_path, inputs, n_iter=2000, out_dir='nextgen_v3/out/'):
-    """Run PSA and generate outputs."""
-    import yaml
-    with open(settings_path, 'r') as f:
-        settings = yaml.safe_load(f)
+def cohort_sampler(settings, inputs, parameters_psa):
+    """
+    Model sampler ``(n, rng) -> (cost, qaly)`` for ``iter_sampler_chunks``.
 
-    # Stub inputs if not provided
-    if inputs is None:
-        from types import SimpleNamespace
-        inputs = SimpleNamespace()
-        # Create stub parameters_psa
-        import pandas as pd
-        inputs.parameters_psa = pd.DataFrame({
-            'parameter': ['param1', 'param2'],
-            'distribution': ['Normal', 'Beta'],
-            'mean': [0.5, 0.6],
-            'std': [0.1, 0.05]
-        })
+    Each call samples ``n`` parameter draws from ``parameters_psa`` and
+    simulates every arm of ``settings`` over them; both arrays have shape
+    (n_draws, n_arms, n_jurisdictions, n_perspectives). Parameters without
+    a distribution keep their ``inputs`` value.
 
+    Raises:
+        KeyError: If a distribution names a parameter no arm uses
+    """
+    arms = list(settings['arms'])
+    jurisdictions = list(settings['jurisdictions'])
+    perspectives = list(settings['perspectives'])
+    names = {arm: [f"{key}.{sub or arm}" for key, sub, _ in CLINICAL_PARAMETERS] for arm in arms}
+    unknown = set(parameters_psa['parameter']) - {name for arm_names in names.values() for name in arm_names}
+    if unknown:
+        raise KeyError(f"Parameters not used by the cohort model: {sorted(unknown)}")
     correlated = settings.get('correlated_psa', False)
     correlations_path = 'nextgen_v3/config/correlations.yaml' if correlated else None
-    param_samples = sample_parameters(inputs.parameters_psa, n_iter, correlated=correlated, correlations_path=correlations_path)
 
-    results = []
-    for i in range(n_iter):
-        sample = param_samples.iloc[i]
-        # TODO: Pass sample to cea_engine.simulate_arm
-        for arm in settings['arms']:
-            for jur in settings['jurisdictions']:
-                for pers in settings['perspectives']:
-                    res = simulate_arm(arm, jur, pers, settings, inputs, out_dir)
-                    results.append({
-                        'iteration': i,
-                        'arm': arm,
-                        'jurisdiction': jur,
-                        'perspective': pers,
-                        'cost': res.cost,
-                        'qaly': res.qaly
-                    })
+    def sampler(n, rng):
+        samples = sample_parameters(parameters_psa, n, correlated=correlated,
+                                    correlations_path=correlations_path, random_state=rng)
+        grids = []
+        for arm in arms:
+            theta = np.tile(clinical_parameter_matrix(arm, inputs), (n, 1))
+            for k, name in enumerate(names[arm]):
+                if name in samples:
+                    theta[:, k] = samples[name].to_numpy()
+            grids.append(simulate_arm_grid(arm, jurisdictions, perspectives, settings, inputs, parameters=theta))
+        # (n_draws, n_arms, n_jurisdictions, n_perspectives)
+        return np.stack([g.cost for g in grids], axis=1), np.stack([g.qaly for g in grids], axis=1)
 
-    df = pd.DataFrame(results)
-    df.to_csv(f'{out_dir}/psa_results_v3.csv', index=False)
+    return sampler
 
-    # Compute mean stats for frontier
-    mean_stats = df.groupby('arm').agg({'cost': 'mean', 'qaly': 'mean'}).reset_index()
+def run_psa(settings_path, inputs, n_iter=None, out_dir='nextgen_v3/out/', parameters_psa=None,
+            analysis_config=DEFAULT_ANALYSIS_CONFIG):
+    """
+    Run a streaming PSA of the cohort model and write its summaries.
 
-    # Identify frontier arms (Pareto frontier in cost-QALY space)
-    frontier_arms = []
-    sorted_arms = mean_stats.sort_values('cost')
-    max_qaly = -np.inf
-    for _, row in sorted_arms.iterrows():
-        if row['qaly'] > max_qaly:
-            frontier_arms.append(row['arm'])
-            max_qaly = row['qaly']
+    Parameter draws are sampled ``psa.streaming.chunk_size`` at a time and
+    simulated for every arm at once; each (jurisdiction, perspective) slice
+    is folded into its own ``StreamingPSA``, whose ``ConvergenceMonitor``
+    uses the ``psa.streaming`` tolerances. Sampling stops once every slice
+    has converged (and ``psa.min_iterations`` draws are in) or after
+    ``n_iter`` draws; no per-draw table is kept. CEAC, CEAF and regret
+    figures per jurisdiction and perspective are rendered under
+    ``out_dir/figures`` through ``render_publication_figures``.
 
-    # CEAC
-    wtp_grid = settings['wtp_grid']
-    ceac_results = []
-    for wtp in wtp_grid:
-        for arm in settings['arms']:
-            arm_data = df[df['arm'] == arm]
-            nmb = arm_data['qaly'] * wtp - arm_data['cost']
-            max_nmb = df.groupby('iteration').apply(lambda x: x['qaly'] * wtp - x['cost']).max()
-            prob_ce = (nmb >= max_nmb).mean()
-            ceac_results.append({'wtp': wtp, 'arm': arm, 'prob_ce': prob_ce})
+    Args:
+        settings_path: Model settings YAML (arms, jurisdictions, perspectives,
+            time horizon, discounting; optional ``wtp_grid``, ``comparator``
+            and ``correlated_psa``)
+        inputs: Clinical inputs dict (``cea_engine`` layout)
+        n_iter: Maximum number of draws (default: ``psa.iterations``)
+        out_dir: Output directory
+        parameters_psa: Distribution table (parameter, distribution, mean,
+            std) over parameters named as in ``dsa_batch.CohortDSAModel``,
+            e.g. ``"remission_rates.IV_ketamine"`` or ``"death_rates.baseline"``
+        analysis_config: Analysis configuration dict or YAML path with the
+            ``psa`` and ``wtp`` blocks
 
-    ceac_df = pd.DataFrame(ceac_results)
-    ceac_df.to_csv(f'{out_dir}/ceac_v3.csv', index=False)
-    # Plot CEAC
-    for arm in settings['arms']:
-        arm_data = ceac_df[ceac_df['arm'] == arm]
-        plt.plot(arm_data['wtp'], arm_data['prob_ce'], label=arm)
-    plt.legend()
-    plt.savefig(f'{out_dir}/ceac_v3.png')
-    plt.close()
+    Returns:
+        Dict mapping (jurisdiction, perspective) to ``StreamingPSAResult``
 
-    # CEAF: prob of optimal arm
-    ceaf_results = []
-    for wtp in wtp_grid:
-        optimal_arms = df.groupby('iteration').apply(lambda x: x.loc[(x['qaly'] * wtp - x['cost']).idxmax(), 'arm'])
-        for arm in settings['arms']:
-            prob = (optimal_arms == arm).mean()
-            ceaf_results.append({'wtp': wtp, 'arm': arm, 'prob_optimal': prob})
+    Raises:
+        ValueError: If no parameter distributions are given
+        KeyError: If a distribution names a parameter no arm uses
+    """
+    with open(settings_path, 'r') as f:
+        settings = yaml.safe_load(f)
+    if not isinstance(analysis_config, dict):
+        with open(analysis_config, 'r') as f:
+            analysis_config = yaml.safe_load(f)
+    if parameters_psa is None or parameters_psa.empty:
+        raise ValueError("run_psa needs parameter distributions (parameters_psa)")
 
-    ceaf_df = pd.DataFrame(ceaf_results)
-    ceaf_df.to_csv(f'{out_dir}/ceaf_v3.csv', index=False)
-    # Plot CEAF with frontier annotation
-    for arm in settings['arms']:
-        label = arm
-        if arm in frontier_arms:
-            label += ' (frontier)'
-        arm_data = ceaf_df[ceaf_df['arm'] == arm]
-        plt.plot(arm_data['wtp'], arm_data['prob_optimal'], label=label)
-    plt.legend()
-    plt.savefig(f'{out_dir}/ceaf_v3.png')
-    plt.close()
+    stream = streaming_settings_from_config(analysis_config)
+    arms = list(settings['arms'])
+    jurisdictions = list(settings['jurisdictions'])
+    perspectives = list(settings['perspectives'])
+    comparator = settings.get('comparator', 'ECT_std')
+    wtp = analysis_config.get('wtp', {}) or {}
+    step = wtp.get('step', 1000)
+    lambda_grid = np.asarray(settings.get('wtp_grid') or np.arange(wtp.get('min', 0), wtp.get('max', 75000) + step, step),
+                             dtype=float)
 
-    # Regret analysis
-    regret_results = []
-    for wtp in wtp_grid:
-        for iteration in df['iteration'].unique():
-            iter_data = df[df['iteration'] == iteration]
-            nmbs = iter_data['qaly'] * wtp - iter_data['cost']
-            max_nmb = nmbs.max()
-            for _, row in iter_data.iterrows():
-                nmb = row['qaly'] * wtp - row['cost']
-                regret = max_nmb - nmb
-                regret_results.append({'iteration': iteration, 'wtp': wtp, 'arm': row['arm'], 'regret': regret})
-    
-    regret_df = pd.DataFrame(regret_results)
-    expected_regret = regret_df.groupby(['arm', 'wtp'])['regret'].mean().reset_index(name='expected_regret')
-    expected_regret.to_csv(f'{out_dir}/regret_table_v3.csv', index=False)
-    
-    # Minimax arm
-    max_regret_per_arm = expected_regret.groupby('arm')['expected_regret'].max()
-    minimax_arm = max_regret_per_arm.idxmin()
-    print(f"Minimax arm: {minimax_arm}")
-    
-    # Plot regret curves
-    from nextgen_v3.plots.frontier import plot_regret_curves
-    plot_regret_curves(expected_regret, output_path=f'{out_dir}/regret_curves_v3.png')
+    sampler = cohort_sampler(settings, inputs, parameters_psa)
+    positions = {(jur, pers): (j, k) for j, jur in enumerate(jurisdictions) for k, pers in enumerate(perspectives)}
+    slices = {
+        key: StreamingPSA(
+            arms, lambda_grid,
+            decision_lambda=stream['decision_lambda'],
+            comparator=comparator if comparator in arms else None,
+            monitor=ConvergenceMonitor(tolerances=stream['tolerances'], min_draws=stream['min_draws']),
+        )
+        for key in positions
+    }
+    chunks = iter_sampler_chunks(sampler, chunk_size=stream['chunk_size'],
+                                 max_draws=int(n_iter or stream['max_draws']),
+                                 seed=(analysis_config.get('psa', {}) or {}).get('seed', 42))
+    for cost, qaly in chunks:
+        converged = True
+        for key, summariser in slices.items():
+            j, k = positions[key]
+            converged &= summariser.update(cost[:, :, j, k], qaly[:, :, j, k])
+        if stream['early_stopping'] and converged:
+            break
+
+    results = {key: summariser.result() for key, summariser in slices.items()}
+
+    def combined(table):
+        return pd.concat([
+            table(key, result).assign(jurisdiction=key[0], perspective=key[1]) for key, result in results.items()
+        ], ignore_index=True)
 
-    # Distributionally-robust NMB (optional)
-    dr_results = []
-    for arm in settings['arms']:
-        arm_data = df[df['arm'] == arm]
-        nmbs = arm_data['qaly'] * wtp_grid[0] - arm_data['cost']  # Use first wtp for simplicity
-        # Bootstrap worst-case
-        bootstrap_nmbs = []
-        for _ in range(100):
-            sample = nmbs.sample(n=len(nmbs), replace=True)
-            bootstrap_nmbs.append(sample.min())  # Worst-case
-        dr_nmb = np.mean(bootstrap_nmbs)
-        dr_results.append({'arm': arm, 'dr_nmb': dr_nmb})
-    
-    dr_df = pd.DataFrame(dr_results)
-    dr_df.to_csv(f'{out_dir}/dr_nmb_v3.csv', index=False)
+    def ceaf(key, result):
+        counts = slices[key].ceac_counts
+        best = counts.nmb_sum.argmax(axis=1)
+        return pd.DataFrame({'arm': np.asarray(arms)[best], 'wtp': counts.lambda_grid,
+                             'prob_optimal': counts.optimal_counts[np.arange(len(best)), best] / max(counts.n, 1)})
 
-    # Pricing thresholds
-    plot_pricing(df, wtp_grid=wtp_grid, output_path=f'{out_dir}/pricing_thresholds_v3.png', csv_path=f'{out_dir}/pricing_thresholds_v3.csv')
+    def regret(key, result):
+        counts = slices[key].ceac_counts
+        expected = (counts.max_nmb_sum[:, None] - counts.nmb_sum) / max(counts.n, 1)
+        return pd.DataFrame({'arm': np.tile(arms, len(counts.lambda_grid)),
+                             'wtp': np.repeat(counts.lambda_grid, len(arms)),
+                             'expected_regret': expected.ravel()})
 
-    # ICER scatter vs ECT_std
-    ect_data = df[df['arm'] == 'ECT_std'].set_index(['iteration', 'jurisdiction', 'perspective'])
-    inc_results = []
-    for _, row in df.iterrows():
-        if row['arm'] != 'ECT_std':
-            base = ect_data.loc[(row['iteration'], row['jurisdiction'], row['perspective'])]
-            inc_cost = row['cost'] - base['cost']
-            inc_qaly = row['qaly'] - base['qaly']
-            inc_results.append({'arm': row['arm'], 'inc_cost': inc_cost, 'inc_qaly': inc_qaly})
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    combined(lambda key, r: r.summary).to_csv(out / 'psa_summary_v3.csv', index=False)
+    combined(lambda key, r: r.incremental).to_csv(out / 'psa_incremental_v3.csv', index=False)
+    ceac = combined(lambda key, r: r.ceac)
+    ceac.to_csv(out / 'ceac_v3.csv', index=False)
+    ceaf_df = combined(ceaf)
+    ceaf_df.to_csv(out / 'ceaf_v3.csv', index=False)
+    combined(lambda key, r: r.evpi).to_csv(out / 'evpi_v3.csv', index=False)
+    combined(lambda key, r: r.convergence).to_csv(out / 'psa_convergence_v3.csv', index=False)
+    expected_regret = combined(regret)
+    expected_regret.to_csv(out / 'regret_table_v3.csv', index=False)
 
-    inc_df = pd.DataFrame(inc_results)
-    plt.scatter(inc_df['inc_qaly'], inc_df['inc_cost'])
-    plt.xlabel('Incremental QALYs')
-    plt.ylabel('Incremental Cost')
-    plt.savefig(f'{out_dir}/icer_scatter_v3.png')
-    plt.close()
\ No newline at end of file
+    figures = {
+        'ceac': ceac.rename(columns={'strategy': 'arm', 'lambda': 'wtp', 'prob_optimal': 'prob_ce'}),
+        'ceaf': ceaf_df,
+        'regret_curves': expected_regret,
+    }
+    for jur in jurisdictions:
+        render_publication_figures(
+            {name: table[table['jurisdiction'] == jur] for name, table in figures.items()},
+            out / 'figures' / jur,
+            by='perspective',
+            options={name: {'max_wtp': float(ceac['lambda'].max()), 'country': jur} for name in figures},
+        )
+
+    max_regret_per_arm = expected_regret.groupby('arm')['expected_regret'].max()
+    print(f"Minimax arm: {max_regret_per_arm.idxmin()}")
+    for (jur, pers), result in results.items():
+        status = "converged" if result.converged else "did not converge"
+        print(f"PSA {jur}/{pers}: {status} after {result.n_draws} draws")
+    return results
@@ -0,0 +1,264 @@
+"""
+V4 PSA Table Schema
+
+Compact, typed representation of long-format PSA tables.
+
+Responsibilities:
+- Fixed categorical dictionaries for strategy, perspective and jurisdiction so
+  that category codes are stable across files, runs and processes
+- int32 draw identifiers
+- Opt-in float32 storage for cost/effect columns with error-bounded downcasting
+  (columns whose round-trip error exceeds the tolerance stay float64)
+- Validation that decision outputs computed on the compact table stay within
+  tolerance of the float64 results
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Fixed category dictionaries. New values are appended, never reordered, so
+# that stored category codes keep their meaning.
+STRATEGY_CATEGORIES: List[str] = [
+    "Usual Care",
+    "UC",
+    "UC+Li",
+    "UC+AA",
+    "ECT",
+    "KA-ECT",
+    "IV-KA",
+    "IN-EKA",
+    "PO-PSI",
+    "PO-KA",
+    "rTMS",
+]
+
+PERSPECTIVE_CATEGORIES: List[str] = ["health_system", "healthcare", "societal"]
+
+JURISDICTION_CATEGORIES: List[str] = ["AU", "NZ"]
+
+# Column name aliases used by older PSA outputs (e.g. ``run_psa``)
+CATEGORY_COLUMNS: Dict[str, List[str]] = {
+    "strategy": STRATEGY_CATEGORIES,
+    "arm": STRATEGY_CATEGORIES,
+    "perspective": PERSPECTIVE_CATEGORIES,
+    "jurisdiction": JURISDICTION_CATEGORIES,
+}
+DRAW_COLUMNS = ("draw", "iteration")
+VALUE_COLUMNS = ("cost", "effect", "qaly")
+
+DEFAULT_RTOL = 1e-6
+
+
+@dataclass
+class DowncastReport:
+    """Outcome of an error-bounded float32 downcast."""
+
+    downcast: List[str] = field(default_factory=list)
+    kept_float64: List[str] = field(default_factory=list)
+    max_relative_error: Dict[str, float] = field(default_factory=dict)
+    memory_before_mb: float = 0.0
+    memory_after_mb: float = 0.0
+
+
+@dataclass
+class ToleranceReport:
+    """Comparison of decision outputs between float64 and compact tables."""
+
+    max_relative_error: Dict[str, float]
+    rtol: float
+    passed: bool
+
+    def raise_if_failed(self) -> None:
+        """Raise ``ValueError`` if any output exceeded the tolerance."""
+        if not self.passed:
+            worst = {k: v for k, v in self.max_relative_error.items() if v > self.rtol}
+            raise ValueError(f"Compact PSA outputs exceed rtol={self.rtol}: {worst}")
+
+
+def categories_for(column: str, extra: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Return the fixed category dictionary for a column, extended with any extra values.
+
+    Args:
+        column: Column name (strategy, arm, perspective or jurisdiction)
+        extra: Additional values (e.g. step-care sequences from the strategy config)
+
+    Returns:
+        Ordered list of categories
+    """
+    categories = list(CATEGORY_COLUMNS[column])
+    for value in extra or ():
+        if value not in categories:
+            categories.append(value)
+    return categories
+
+
+def _relative_error(original: np.ndarray, approx: np.ndarray) -> float:
+    original = np.asarray(original, dtype=np.float64)
+    approx = np.asarray(approx, dtype=np.float64)
+    finite = np.isfinite(original)
+    if not finite.any():
+        return 0.0
+    scale = np.maximum(np.abs(original[finite]), np.finfo(np.float32).tiny)
+    return float(np.max(np.abs(original[finite] - approx[finite]) / scale))
+
+
+def compact_psa_table(
+    table: pd.DataFrame,
+    float32: bool = False,
+    rtol: float = DEFAULT_RTOL,
+    extra_strategies: Optional[Sequence[str]] = None,
+    report: Optional[DowncastReport] = None,
+) -> pd.DataFrame:
+    """
+    Convert a long-format PSA table to the compact schema.
+
+    Categorical columns are mapped onto the fixed dictionaries (values not in
+    the dictionary are appended after it), draw ids become int32 and, if
+    ``float32`` is set, value columns are downcast only where the round-trip
+    relative error stays within ``rtol``.
+
+    Args:
+        table: PSA table with draw, strategy, cost and effect columns
+        float32: Opt in to float32 storage for value columns
+        rtol: Maximum element-wise relative error allowed by the downcast
+        extra_strategies: Strategies to append to the fixed dictionary
+        report: Optional report populated with downcast decisions
+
+    Returns:
+        New DataFrame using the compact dtypes
+    """
+    report = report if report is not None else DowncastReport()
+    report.memory_before_mb = table.memory_usage(deep=True).sum() / 1024 / 1024
+    out = table.copy()
+
+    for column in CATEGORY_COLUMNS:
+        if column not in out.columns:
+            continue
+        observed = pd.unique(out[column].dropna().astype(str))
+        extra = list(extra_strategies or ()) if column in ("strategy", "arm") else []
+        categories = categories_for(column, list(extra) + [v for v in observed])
+        out[column] = pd.Categorical(out[column], categories=categories)
+
+    for column in DRAW_COLUMNS:
+        if column in out.columns and pd.api.types.is_numeric_dtype(out[column]):
+            values = out[column].to_numpy()
+            info = np.iinfo(np.int32)
+            if np.all(np.isfinite(values)) and values.min() >= info.min and values.max() <= info.max:
+                out[column] = values.astype(np.int32)
+
+    if float32:
+        for column in out.columns:
+            if column in DRAW_COLUMNS or not pd.api.types.is_float_dtype(out[column]):
+                continue
+            original = out[column].to_numpy(dtype=np.float64)
+            downcast = original.astype(np.float32)
+            err = _relative_error(original, downcast)
+            report.max_relative_error[column] = err
+            if err <= rtol:
+                out[column] = downcast
+                report.downcast.append(column)
+            else:
+                report.kept_float64.append(column)
+
+    report.memory_after_mb = out.memory_usage(deep=True).sum() / 1024 / 1024
+    return out
+
+
+def expand_psa_table(table: pd.DataFrame) -> pd.DataFrame:
+    """Convert a compact PSA table back to plain string labels and float64/int64."""
+    out = table.copy()
+    for column in out.columns:
+        if isinstance(out[column].dtype, pd.CategoricalDtype):
+            out[column] = out[column].astype(out[column].cat.categories.dtype)
+        elif pd.api.types.is_float_dtype(out[column]):
+            out[column] = out[column].astype(np.float64)
+        elif column in DRAW_COLUMNS and pd.api.types.is_integer_dtype(out[column]):
+            out[column] = out[column].astype(np.int64)
+    return out
+
+
+def strategy_mask(table: pd.DataFrame, strategies: Sequence[str], column: str = "strategy") -> np.ndarray:
+    """
+    Boolean row mask for a set of strategies.
+
+    Uses integer category codes when the column is categorical, avoiding
+    per-row string comparisons.
+
+    Args:
+        table: PSA table
+        strategies: Strategies to keep
+        column: Strategy column name
+
+    Returns:
+        Boolean NumPy array
+    """
+    series = table[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.categories.get_indexer(list(strategies))
+        codes = codes[codes >= 0]
+        return np.isin(series.cat.codes.to_numpy(), codes)
+    return series.isin(list(strategies)).to_numpy()
+
+
+def _decision_outputs(
+    table: pd.DataFrame, strategies: List[str], lambda_grid: np.ndarray
+) -> Dict[str, np.ndarray]:
+    # Combined files stack perspectives/jurisdictions; keep them on the row index
+    index = ["draw"] + [c for c in ("perspective", "jurisdiction") if c in table.columns]
+    frame = table.assign(**{c: table[c].astype(str) for c in index[1:] + ["strategy"]})
+    cost = frame.pivot(index=index, columns="strategy", values="cost").sort_index()[strategies]
+    effect = frame.pivot(index=index, columns="strategy", values="effect").sort_index()[strategies]
+    cost = cost.to_numpy(dtype=np.float64)
+    effect = effect.to_numpy(dtype=np.float64)
+    nmb = lambda_grid[:, None, None] * effect[None] - cost[None]
+    return {
+        "mean_cost": cost.mean(axis=0),
+        "mean_effect": effect.mean(axis=0),
+        "mean_nmb": nmb.mean(axis=1).ravel(),
+        "evpi": nmb.max(axis=2).mean(axis=1) - nmb.mean(axis=1).max(axis=1),
+    }
+
+
+def validate_compact_table(
+    original: pd.DataFrame,
+    compact: pd.DataFrame,
+    lambda_grid: Optional[np.ndarray] = None,
+    rtol: float = 1e-4,
+) -> ToleranceReport:
+    """
+    Check that decision outputs from a compact table match float64 results.
+
+    Compares mean cost, mean effect, mean NMB and EVPI over the WTP grid.
+    Errors are measured relative to the scale of each output (its largest
+    absolute value) so that near-zero entries do not dominate.
+
+    Args:
+        original: float64 PSA table
+        compact: Compact PSA table produced by ``compact_psa_table``
+        lambda_grid: WTP thresholds (defaults to 0-100k in 5k steps)
+        rtol: Relative tolerance
+
+    Returns:
+        ToleranceReport with per-output maximum relative error
+    """
+    if lambda_grid is None:
+        lambda_grid = np.arange(0, 100001, 5000, dtype=np.float64)
+    lambda_grid = np.asarray(lambda_grid, dtype=np.float64)
+    strategies = sorted(str(s) for s in pd.unique(original["strategy"]))
+    reference = _decision_outputs(original, strategies, lambda_grid)
+    candidate = _decision_outputs(compact, strategies, lambda_grid)
+
+    errors = {}
+    for key, ref in reference.items():
+        scale = max(float(np.max(np.abs(ref))), np.finfo(np.float64).tiny)
+        errors[key] = float(np.max(np.abs(ref - candidate[key])) / scale)
+    return ToleranceReport(
+        max_relative_error=errors,
+        rtol=rtol,
+        passed=all(err <= rtol for err in errors.values()),
+    )
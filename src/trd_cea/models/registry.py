@@ -6,7 +6,8 @@ analysis engines in the V4 health economic evaluation framework.
 
 The registry system enables:
 - Dynamic discovery of available engines
-- Engine capability detection and filtering
+- Engine capability detection and filtering, optionally restricted to
+  capabilities verified by the conformance harness (``models.capabilities``)
 - Centralized engine configuration management
 - Plugin-style engine loading
 - Version compatibility checking
@@ -20,7 +21,8 @@ from pathlib import Path
 import sys
 from dataclasses import dataclass
 
-from .base import BaseAnalysisEngine, EngineMetadata, AnalysisType, EngineCapabilities
+from .base import BaseAnalysisEngine, EngineInput, EngineMetadata, AnalysisType, EngineCapabilities
+from .capabilities import ConformanceReport, check_conformance
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -35,6 +37,7 @@ class EngineInfo:
     module_path: str
     is_loaded: bool = False
     load_error: Optional[str] = None
+    conformance: Optional[ConformanceReport] = None
 
 
 class EngineRegistry:
@@ -193,17 +196,54 @@ class EngineRegistry:
         """
         return list(self._type_index.get(analysis_type, set()))
 
-    def list_engines_by_capability(self, capability: EngineCapabilities) -> List[str]:
+    def list_engines_by_capability(self, capability: EngineCapabilities,
+                                   verified: bool = False) -> List[str]:
         """
         List engines that support a specific capability.
 
         Args:
             capability: Engine capability
+            verified: Only engines whose conformance check (``verify_engine``)
+                passed for the capability
 
         Returns:
             List of engine names supporting the capability
         """
-        return list(self._capability_index.get(capability, set()))
+        names = list(self._capability_index.get(capability, set()))
+        if verified:
+            names = [name for name in names if self._engines[name].conformance is not None
+                     and capability in self._engines[name].conformance.verified]
+        return names
+
+    def verify_engine(self, engine_name: str, sample: EngineInput,
+                      config: Optional[Dict[str, Any]] = None) -> ConformanceReport:
+        """
+        Check a registered engine against its declared capabilities.
+
+        Args:
+            engine_name: Registered engine name
+            sample: Valid input with enough draws for several chunks
+            config: Engine configuration (default: empty)
+
+        Returns:
+            ConformanceReport, also stored on the engine's registry entry
+
+        Raises:
+            ValueError: If the engine is not registered
+        """
+        engine_info = self._engines.get(engine_name)
+        if engine_info is None:
+            raise ValueError(f"Engine '{engine_name}' is not registered")
+        engine = engine_info.class_type(config or {})
+        try:
+            report = check_conformance(engine, sample)
+        finally:
+            engine.cleanup()
+        engine_info.conformance = report
+        for check in report.checks:
+            if not check.passed:
+                logger.warning(f"{engine_name} declares {check.capability.value} but fails it: {check.detail}")
+        return report
 
     def find_engines(self,
                     analysis_type: Optional[AnalysisType] = None,
@@ -24,7 +24,7 @@ from typing import List, Optional, Dict, Tuple
 from pathlib import Path
 from scipy import stats
 
-from trd_cea.core.io import load_psa
+from trd_cea.models.io import load_psa
 
 
 @dataclass
@@ -0,0 +1,374 @@
+"""
+V4 Structural Scenario Grid
+
+Evaluates structural-sensitivity grids for the Markov CEA model without
+re-simulating every combination.
+
+Each structural option is registered against the model component it changes
+(transition block, cost vector, utility vector, horizon or discount rate).
+Components are built once and shared across every combination that uses them:
+clinical traces are simulated once per arm and transition variant at the
+longest horizon (shorter horizons are prefixes), and per-cycle cost, utility and
+discount weights are cached by their own keys. Combinations are then evaluated
+in parallel batches as matrix products over the cycle axis.
+
+Opportunity-cost thresholds (k) are swept as a vectorised axis over stored
+incremental results rather than by re-running the model.
+"""
+from __future__ import annotations
+
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import cea_engine
+
+__all__ = [
+    "COMPONENTS",
+    "STRUCTURAL_OPTIONS",
+    "StructuralOption",
+    "ScenarioGrid",
+    "register_structural_option",
+    "sweep_opportunity_cost",
+]
+
+COMPONENTS = ("transition", "cost", "utility", "horizon", "discount")
+
+
+@dataclass(frozen=True)
+class StructuralOption:
+    """
+    A structural choice and the model component it changes.
+
+    ``apply(value, target)`` returns the modified component:
+
+    - ``transition``: the list of clinical-input draws
+    - ``cost``: the per-cycle cost schedule, shape (n_cycles,)
+    - ``utility``: the per-cycle state utilities, shape (n_cycles, n_states)
+    - ``horizon``/``discount``: the scalar spec dict (``years``,
+      ``cycle_len``, ``cost_rate``, ``qaly_rate``)
+
+    Options without ``apply`` are carried through to the output but do not
+    change any component, so all their values share the same cached results.
+    """
+
+    name: str
+    component: str
+    column: str
+    apply: Optional[Callable[[Any, Dict[str, Any]], Dict[str, Any]]] = None
+
+
+def _set_cycle_length(value, spec):
+    return {**spec, "cycle_len": float(value)}
+
+
+def _set_horizon(value, spec):
+    return {**spec, "years": float(value)}
+
+
+def _set_discount(value, spec):
+    return {**spec, "cost_rate": float(value), "qaly_rate": float(value)}
+
+
+STRUCTURAL_OPTIONS: Dict[str, StructuralOption] = {}
+
+
+def register_structural_option(option: StructuralOption) -> None:
+    """Register (or replace) a structural option."""
+    if option.component not in COMPONENTS:
+        raise ValueError(f"Unknown component '{option.component}', expected one of {COMPONENTS}")
+    STRUCTURAL_OPTIONS[option.name] = option
+
+
+for _option in (
+    StructuralOption("cycle_length_months", "horizon", "cycle_len_m", _set_cycle_length),
+    StructuralOption("time_horizon_years", "horizon", "time_horizon_years", _set_horizon),
+    StructuralOption("discount_rate", "discount", "discount_rate", _set_discount),
+    # Not yet modelled in the transition matrices; recorded only
+    StructuralOption("include_response_nonremit", "transition", "include_response_nonremit"),
+    StructuralOption("semi_markov_memory", "transition", "semi_markov"),
+    StructuralOption("switching_logic", "transition", "switching"),
+):
+    register_structural_option(_option)
+
+
+def _wtp(settings: Dict[str, Any], default: float = 50000.0) -> float:
+    wtp = settings.get("wtp", default)
+    if isinstance(wtp, dict):
+        wtp = wtp.get("default", default)
+    return float(wtp)
+
+
+class ScenarioGrid:
+    """
+    Memoised evaluator for structural scenario grids.
+
+    Args:
+        settings: Model settings (time_horizon_years, cycle_length_months,
+            discount_costs, discount_qalys)
+        inputs: Clinical inputs dict, or a sequence of dicts (one per draw)
+        jurisdiction: Jurisdiction whose discount rates are the default
+        perspective: Perspective whose cost vector is used
+        n_jobs: Worker threads for component construction and batch evaluation
+        batch_size: Combinations evaluated per matrix product
+    """
+
+    def __init__(
+        self,
+        settings: Dict[str, Any],
+        inputs,
+        jurisdiction: str = "AU",
+        perspective: str = "healthcare",
+        n_jobs: int = 4,
+        batch_size: int = 256,
+    ):
+        self.settings = settings
+        self.draws, self.has_draws = cea_engine._as_draws(inputs)
+        self.jurisdiction = jurisdiction
+        self.perspective = perspective
+        self.n_jobs = max(1, int(n_jobs))
+        self.batch_size = max(1, int(batch_size))
+        self._traces: Dict[Tuple, np.ndarray] = {}
+        self._qalys: Dict[Tuple, np.ndarray] = {}
+        self._costs: Dict[Tuple, np.ndarray] = {}
+        self._discounts: Dict[float, np.ndarray] = {}
+
+    # -- component specs ---------------------------------------------------
+
+    def base_spec(self) -> Dict[str, Any]:
+        """Component spec of the base-case settings."""
+        return {
+            "years": float(self.settings["time_horizon_years"]),
+            "cycle_len": float(self.settings["cycle_length_months"]),
+            "cost_rate": float(self.settings["discount_costs"][self.jurisdiction]),
+            "qaly_rate": float(self.settings["discount_qalys"][self.jurisdiction]),
+            "transition": (),
+            "cost": (),
+            "utility": (),
+        }
+
+    def spec_for(self, scenario: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a scenario's options to the base spec."""
+        spec = self.base_spec()
+        for name, value in scenario.items():
+            option = STRUCTURAL_OPTIONS.get(name)
+            if option is None:
+                raise KeyError(f"Unknown structural option '{name}'")
+            if option.apply is None:
+                continue
+            if option.component in ("transition", "cost", "utility"):
+                # Array components are rebuilt lazily and cached by these keys
+                spec[option.component] = spec[option.component] + ((name, value),)
+            else:
+                spec = option.apply(value, spec)
+        spec["n_cycles"] = int(spec["years"] * 12 / spec["cycle_len"])
+        return spec
+
+    # -- memoised components -----------------------------------------------
+
+    @staticmethod
+    def _apply(modifiers: Tuple, target):
+        for name, value in modifiers:
+            target = STRUCTURAL_OPTIONS[name].apply(value, target)
+        return target
+
+    def trace(self, arm: str, transition: Tuple, n_cycles: int) -> np.ndarray:
+        """
+        State occupancy, shape (n_draws, n_cycles, n_states).
+
+        Simulated once per arm and transition variant; shorter horizons reuse
+        the prefix of the longest trace built so far.
+        """
+        key = (arm, transition)
+        cached = self._traces.get(key)
+        if cached is None or cached.shape[1] < n_cycles:
+            cached = cea_engine.simulate_trace(arm, self._apply(transition, list(self.draws)), n_cycles)
+            self._traces[key] = cached
+        return cached[:, :n_cycles]
+
+    def qaly_per_cycle(self, arm: str, transition: Tuple, utility: Tuple, n_cycles: int) -> np.ndarray:
+        """Undiscounted QALYs per cycle, shape (n_draws, n_cycles)."""
+        key = (arm, transition, utility)
+        cached = self._qalys.get(key)
+        if cached is None or cached.shape[1] < n_cycles:
+            values = np.array([
+                [cea_engine.get_utility(state, self.draws[0], cycle, arm) for state in cea_engine.STATES]
+                for cycle in range(n_cycles)
+            ])
+            values = self._apply(utility, values)
+            cached = np.einsum("dts,ts->dt", self.trace(arm, transition, n_cycles), values)
+            self._qalys[key] = cached
+        return cached[:, :n_cycles]
+
+    def cost_schedule(self, arm: str, cost: Tuple, n_cycles: int) -> np.ndarray:
+        """Per-cycle cost for the arm under the grid's perspective."""
+        key = (arm, cost)
+        cached = self._costs.get(key)
+        if cached is None or cached.size < n_cycles:
+            cached = np.array([
+                cea_engine.get_costs(arm, self.jurisdiction, self.perspective, self.draws[0], cycle)
+                for cycle in range(n_cycles)
+            ])
+            cached = self._apply(cost, cached)
+            self._costs[key] = cached
+        return cached[:n_cycles]
+
+    def discount_weights(self, rate: float, n_cycles: int) -> np.ndarray:
+        """Discount weights ``(1 - rate) ** (cycle / 12)`` as used by the CEA engine."""
+        cached = self._discounts.get(rate)
+        if cached is None or cached.size < n_cycles:
+            cached = (1 - rate) ** (np.arange(n_cycles) / 12)
+            self._discounts[rate] = cached
+        return cached[:n_cycles]
+
+    def _evaluate_batch(self, arm: str, specs: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Totals for a batch of specs sharing one arm, shape (n_specs, n_draws)."""
+        horizon = max(spec["n_cycles"] for spec in specs)
+        cost = np.empty((len(specs), len(self.draws)))
+        qaly = np.empty_like(cost)
+        groups: Dict[Tuple, List[int]] = {}
+        for i, spec in enumerate(specs):
+            groups.setdefault((spec["transition"], spec["cost"], spec["utility"]), []).append(i)
+
+        for (transition, cost_key, utility_key), rows in groups.items():
+            mass = self.trace(arm, transition, horizon).sum(axis=2)
+            qaly_cycle = self.qaly_per_cycle(arm, transition, utility_key, horizon)
+            schedule = self.cost_schedule(arm, cost_key, horizon)
+            # Discounted, horizon-masked weights; totals are weight @ per-cycle values
+            w_cost = np.zeros((len(rows), horizon))
+            w_qaly = np.zeros((len(rows), horizon))
+            for r, i in enumerate(rows):
+                n = specs[i]["n_cycles"]
+                w_cost[r, :n] = schedule[:n] * self.discount_weights(specs[i]["cost_rate"], n)
+                w_qaly[r, :n] = self.discount_weights(specs[i]["qaly_rate"], n)
+            cost[rows] = w_cost @ mass.T
+            qaly[rows] = w_qaly @ qaly_cycle.T
+        return cost, qaly
+
+    def _prebuild(self, arms: Sequence[str], specs: Sequence[Dict[str, Any]]) -> None:
+        """Build each distinct component once, in parallel, at the longest horizon it needs."""
+        horizon = max(spec["n_cycles"] for spec in specs)
+        traces = {(arm, spec["transition"]) for arm in arms for spec in specs}
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            list(executor.map(lambda key: self.trace(key[0], key[1], horizon), traces))
+        for arm in arms:
+            for spec in specs:
+                self.qaly_per_cycle(arm, spec["transition"], spec["utility"], horizon)
+                self.cost_schedule(arm, spec["cost"], horizon)
+        for spec in specs:
+            self.discount_weights(spec["cost_rate"], horizon)
+            self.discount_weights(spec["qaly_rate"], horizon)
+
+    def evaluate(self, arms: Sequence[str], scenarios: Sequence[Dict[str, Any]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Discounted cost and QALY totals for every arm and scenario.
+
+        Returns:
+            Mapping arm -> (cost, qaly), each of shape (n_scenarios, n_draws)
+        """
+        specs = [self.spec_for(s) for s in scenarios]
+        self._prebuild(arms, specs)
+        tasks = [
+            (arm, start, specs[start:start + self.batch_size])
+            for arm in arms
+            for start in range(0, len(specs), self.batch_size)
+        ]
+        out = {arm: (np.empty((len(specs), len(self.draws))), np.empty((len(specs), len(self.draws))))
+               for arm in arms}
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            results = executor.map(lambda t: (t[0], t[1], self._evaluate_batch(t[0], t[2])), tasks)
+            for arm, start, (cost, qaly) in results:
+                out[arm][0][start:start + len(cost)] = cost
+                out[arm][1][start:start + len(qaly)] = qaly
+        return out
+
+    def run_structural_sensitivity(self, options: Dict[str, Sequence[Any]], arms: Sequence[str],
+                                   wtp: float = 50000.0) -> pd.DataFrame:
+        """
+        Evaluate the full product of structural options against the base case.
+
+        Args:
+            options: Option name -> values to sweep
+            arms: Arms to evaluate
+            wtp: Willingness-to-pay threshold for INMB
+
+        Returns:
+            One row per scenario and arm (and draw, when inputs are draws) with
+            delta_ICER and delta_INMB relative to the arm's base case
+        """
+        names = list(options)
+        combos = [dict(zip(names, values)) for values in itertools.product(*(options[n] for n in names))]
+        totals = self.evaluate(arms, [{}] + combos)
+
+        frames = []
+        for arm in arms:
+            cost, qaly = totals[arm]
+            inc_cost = cost[1:] - cost[0]
+            inc_qaly = qaly[1:] - qaly[0]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                delta_icer = np.where(inc_qaly != 0, inc_cost / inc_qaly, 0.0)
+            delta_nmb = inc_qaly * wtp - inc_cost
+            n_draws = cost.shape[1]
+            frame = pd.DataFrame({
+                "scenario_id": np.repeat([f"scenario_{i}" for i in range(len(combos))], n_draws),
+                **{STRUCTURAL_OPTIONS[n].column: np.repeat([c[n] for c in combos], n_draws) for n in names},
+                "arm": arm,
+                "draw": np.tile(np.arange(n_draws), len(combos)),
+                "delta_ICER": delta_icer.ravel(),
+                "delta_INMB": delta_nmb.ravel(),
+            })
+            frames.append(frame)
+
+        df = pd.concat(frames, ignore_index=True)
+        # Scenario-major order, arms within each scenario
+        df["_order"] = df["scenario_id"].str.slice(9).astype(int)
+        df = df.sort_values(["_order", "draw"], kind="stable").drop(columns="_order").reset_index(drop=True)
+        return df if self.has_draws else df.drop(columns="draw")
+
+
+def sweep_opportunity_cost(
+    incremental: pd.DataFrame,
+    k_values: Dict[str, Sequence[float]],
+    wtp: float = 50000.0,
+) -> pd.DataFrame:
+    """
+    Sweep opportunity-cost thresholds over stored incremental results.
+
+    The adjusted INMB subtracts the health forgone elsewhere,
+    ``incremental_cost / k``, valued at the WTP threshold.
+
+    Args:
+        incremental: Rows with jurisdiction, arm, incremental_cost and
+            incremental_qaly (other columns are carried through)
+        k_values: Jurisdiction -> opportunity-cost thresholds (cost per QALY)
+        wtp: Willingness-to-pay threshold
+
+    Returns:
+        One row per jurisdiction, k and incremental row with INMB_standard and
+        INMB_adjusted
+    """
+    frames = []
+    for jurisdiction, ks in k_values.items():
+        rows = incremental[incremental["jurisdiction"] == jurisdiction]
+        if rows.empty:
+            continue
+        k = np.asarray(ks, dtype=float)[:, None]                     # (K, 1)
+        inc_cost = rows["incremental_cost"].to_numpy(dtype=float)[None, :]
+        inc_qaly = rows["incremental_qaly"].to_numpy(dtype=float)[None, :]
+        standard = np.broadcast_to(inc_qaly * wtp - inc_cost, (k.shape[0], len(rows)))
+        adjusted = standard - inc_cost / k * wtp
+
+        carried = rows.drop(columns=["jurisdiction", "incremental_cost", "incremental_qaly"], errors="ignore")
+        frame = pd.concat([carried] * k.shape[0], ignore_index=True)
+        frame.insert(0, "k", np.repeat(k.ravel(), len(rows)))
+        frame.insert(0, "jurisdiction", jurisdiction)
+        frame["INMB_standard"] = standard.ravel()
+        frame["INMB_adjusted"] = adjusted.ravel()
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["jurisdiction", "k", "arm", "INMB_standard", "INMB_adjusted"])
+    return pd.concat(frames, ignore_index=True)
@@ -7,13 +7,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple, Callable
+from typing import List, Dict, Optional, Sequence, Tuple, Callable
 
 import numpy as np
 import pandas as pd
 
 from trd_cea.core.io import PSAData
 
+from .dsa_batch import BatchModel, CohortDSAModel, evaluate_design, grid_design, grid_frame, tornado_design
+from .global_sensitivity import parameter_columns as psa_parameter_columns
+from .global_sensitivity import partial_rank_correlation, prcc_table
+
 
 @dataclass
 class SensitivityResult:
@@ -102,7 +106,9 @@ def one_way_dsa(
 def tornado_analysis(
     parameters: Dict[str, Tuple[float, float, float]],  # name: (base, low, high)
     outcome_function: Callable[[Dict[str, float]], float],
-    outcome_metric: str = "NMB"
+    outcome_metric: str = "NMB",
+    vectorized: bool = False,
+    batch_size: Optional[int] = None
 ) -> TornadoResult:
     """
     Perform tornado analysis across multiple parameters.
@@ -111,29 +117,29 @@ def tornado_analysis(
         parameters: Dictionary of parameter names to (base, low, high) tuples
         outcome_function: Function that calculates outcome given parameter dict
         outcome_metric: Name of outcome metric
+        vectorized: ``outcome_function`` accepts a dict of parameter arrays and
+            returns one outcome per point (e.g. ``dsa_batch.CohortDSAModel``);
+            all scenarios are then evaluated in a single call
+        batch_size: Optional chunk size for vectorized evaluation
     
     Returns:
         TornadoResult with ranked parameters
     """
-    # Calculate base outcome
-    base_params = {name: values[0] for name, values in parameters.items()}
-    base_outcome = outcome_function(base_params)
-    
-    # Perform one-way DSA for each parameter
-    results = []
-    
-    for param_name, (base_val, low_val, high_val) in parameters.items():
-        # Low scenario
-        low_params = base_params.copy()
-        low_params[param_name] = low_val
-        low_outcome = outcome_function(low_params)
-        
-        # High scenario
-        high_params = base_params.copy()
-        high_params[param_name] = high_val
-        high_outcome = outcome_function(high_params)
-        
-        results.append({
+    # Base case plus low/high for each parameter as one parameter matrix
+    design = tornado_design(parameters)
+    if vectorized:
+        outcomes = evaluate_design(design, outcome_function, batch_size)
+    else:
+        outcomes = evaluate_design(design, lambda cols: [
+            outcome_function({name: values[i] for name, values in cols.items()})
+            for i in range(len(next(iter(cols.values()))))
+        ])
+    base_outcome = outcomes[0]
+    low_outcomes = outcomes[1::2]
+    high_outcomes = outcomes[2::2]
+    
+    results = [
+        {
             'parameter': param_name,
             'base_value': base_val,
             'low_value': low_val,
@@ -142,7 +148,10 @@ def tornado_analysis(
             'low_outcome': low_outcome,
             'high_outcome': high_outcome,
             'range': abs(high_outcome - low_outcome)
-        })
+        }
+        for (param_name, (base_val, low_val, high_val)), low_outcome, high_outcome
+        in zip(parameters.items(), low_outcomes, high_outcomes)
+    ]
     
     results_df = pd.DataFrame(results)
     
@@ -157,12 +166,32 @@ def tornado_analysis(
     )
 
 
+def _grid_dsa(
+    axes: Dict[str, np.ndarray],
+    outcome_function: Callable[..., float],
+    vectorized: bool,
+    batch_size: Optional[int]
+) -> pd.DataFrame:
+    """Evaluate a positional outcome function over the full product of ``axes``."""
+    design = grid_design({}, axes)
+    names = list(axes)
+    def model(cols):
+        columns = [cols[n] for n in names]
+        if vectorized:
+            return outcome_function(*columns)
+        return [outcome_function(*values) for values in zip(*columns)]
+
+    return grid_frame(design, evaluate_design(design, model, batch_size))
+
+
 def two_way_dsa(
     param1_name: str,
     param1_values: np.ndarray,
     param2_name: str,
     param2_values: np.ndarray,
-    outcome_function: Callable[[float, float], float]
+    outcome_function: Callable[[float, float], float],
+    vectorized: bool = False,
+    batch_size: Optional[int] = None
 ) -> TwoWayDSAResult:
     """
     Perform two-way deterministic sensitivity analysis.
@@ -173,22 +202,17 @@ def two_way_dsa(
         param2_name: Name of second parameter
         param2_values: Array of values for second parameter
         outcome_function: Function that calculates outcome given both parameters
+        vectorized: ``outcome_function`` accepts arrays and returns one outcome
+            per grid point, so the whole grid is a single call
+        batch_size: Optional chunk size for vectorized evaluation
     
     Returns:
         TwoWayDSAResult with results grid
     """
-    results = []
-    
-    for val1 in param1_values:
-        for val2 in param2_values:
-            outcome = outcome_function(val1, val2)
-            results.append({
-                param1_name: val1,
-                param2_name: val2,
-                'outcome': outcome
-            })
-    
-    results_df = pd.DataFrame(results)
+    results_df = _grid_dsa(
+        {param1_name: param1_values, param2_name: param2_values},
+        outcome_function, vectorized, batch_size
+    )
     
     return TwoWayDSAResult(
         results_grid=results_df,
@@ -206,7 +230,9 @@ def three_way_dsa(
     param2_values: np.ndarray,
     param3_name: str,
     param3_values: np.ndarray,
-    outcome_function: Callable[[float, float, float], float]
+    outcome_function: Callable[[float, float, float], float],
+    vectorized: bool = False,
+    batch_size: Optional[int] = None
 ) -> ThreeWayDSAResult:
     """
     Perform three-way deterministic sensitivity analysis (3D DSA).
@@ -219,24 +245,17 @@ def three_way_dsa(
         param3_name: Name of third parameter
         param3_values: Array of values for third parameter
         outcome_function: Function that calculates outcome given all three parameters
+        vectorized: ``outcome_function`` accepts arrays and returns one outcome
+            per grid point, so the whole grid is a single call
+        batch_size: Optional chunk size for vectorized evaluation
     
     Returns:
         ThreeWayDSAResult with results grid
     """
-    results = []
-    
-    for val1 in param1_values:
-        for val2 in param2_values:
-            for val3 in param3_values:
-                outcome = outcome_function(val1, val2, val3)
-                results.append({
-                    param1_name: val1,
-                    param2_name: val2,
-                    param3_name: val3,
-                    'outcome': outcome
-                })
-    
-    results_df = pd.DataFrame(results)
+    results_df = _grid_dsa(
+        {param1_name: param1_values, param2_name: param2_values, param3_name: param3_values},
+        outcome_function, vectorized, batch_size
+    )
     
     return ThreeWayDSAResult(
         results_grid=results_df,
@@ -257,6 +276,9 @@ def calculate_prcc(
     """
     Calculate Partial Rank Correlation Coefficients (PRCC).
     
+    Each coefficient is the correlation between the ranked parameter and the
+    ranked outcome after linear adjustment for all other ranked parameters.
+    
     Args:
         psa_data: PSA data with parameters and outcomes
         outcome_column: Name of outcome column
@@ -265,26 +287,17 @@ def calculate_prcc(
     Returns:
         DataFrame with PRCC values
     """
-    from scipy.stats import spearmanr
-    
-    # Rank transform all variables
-    ranked_data = psa_data[parameter_columns + [outcome_column]].rank()
-    
-    prcc_results = []
+    prcc, p_value = partial_rank_correlation(
+        psa_data[parameter_columns].to_numpy(dtype=float),
+        psa_data[outcome_column].to_numpy(dtype=float)
+    )
     
-    for param in parameter_columns:
-        # Calculate Spearman correlation between ranked parameter and ranked outcome
-        corr, pval = spearmanr(
-            ranked_data[param],
-            ranked_data[outcome_column]
-        )
-        
-        prcc_results.append({
-            'parameter': param,
-            'prcc': corr,
-            'p_value': pval,
-            'abs_prcc': abs(corr)
-        })
+    prcc_results = {
+        'parameter': parameter_columns,
+        'prcc': prcc,
+        'p_value': p_value,
+        'abs_prcc': np.abs(prcc)
+    }
     
     prcc_df = pd.DataFrame(prcc_results)
     prcc_df = prcc_df.sort_values('abs_prcc', ascending=False)
@@ -365,80 +378,137 @@ def save_sensitivity_results(
         )
 
 
-def run_one_way_dsa(psa: PSAData) -> pd.DataFrame:
+def _dsa_model(
+    model: Optional[BatchModel],
+    settings: Optional[Dict],
+    inputs: Optional[Dict],
+    arm: Optional[str],
+    comparator: str,
+    **kwargs
+) -> BatchModel:
+    """The injected model, or the Markov cohort model for ``arm`` vs ``comparator``."""
+    if model is not None:
+        return model
+    if settings is None or arm is None:
+        raise ValueError("DSA needs either a vectorised model or cohort model settings and an arm")
+    return CohortDSAModel(settings, inputs or {}, arm, comparator, **kwargs)
+
+
+def _dsa_base(model: BatchModel, base: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """Base-case parameter values (from the cohort model unless given)."""
+    if base is not None:
+        return dict(base)
+    if isinstance(model, CohortDSAModel):
+        return model.base_parameters()
+    raise ValueError("Base parameter values are required for a model other than CohortDSAModel")
+
+
+def _dsa_parameter(name: str, model: BatchModel, base: Dict[str, float]) -> str:
+    """Full parameter name; a bare inputs key (``"remission_rates"``) means the cohort arm's."""
+    if name in base:
+        return name
+    if isinstance(model, CohortDSAModel) and f"{name}.{model.arm}" in base:
+        return f"{name}.{model.arm}"
+    raise KeyError(f"Unknown DSA parameter '{name}'. Available: {sorted(base)}")
+
+
+def _dsa_bounds(name: str, model: BatchModel, base: Dict[str, float], variation: float) -> Tuple[float, float]:
+    """Base value -/+ ``variation``; cohort model parameters are probabilities, capped at 1."""
+    low, high = base[name] * (1 - variation), base[name] * (1 + variation)
+    if isinstance(model, CohortDSAModel):
+        high = min(high, 1.0)
+    return low, high
+
+
+def _dsa_axes(
+    names: Sequence[str],
+    model: BatchModel,
+    base: Dict[str, float],
+    ranges: Optional[Dict[str, Sequence[float]]],
+    n_points: int,
+    variation: float
+) -> Dict[str, np.ndarray]:
+    """Grid axis per parameter: the given values, or ``n_points`` across the base +/- variation."""
+    ranges = ranges or {}
+    axes = {}
+    for name in names:
+        full = _dsa_parameter(name, model, base)
+        values = ranges.get(name, ranges.get(full))
+        axes[full] = (np.asarray(values, dtype=float) if values is not None
+                      else np.linspace(*_dsa_bounds(full, model, base, variation), n_points))
+    return axes
+
+
+def run_one_way_dsa(
+    settings: Optional[Dict] = None,
+    inputs: Optional[Dict] = None,
+    arm: Optional[str] = None,
+    comparator: str = "ECT_std",
+    model: Optional[BatchModel] = None,
+    parameters: Optional[Dict[str, Tuple[float, float, float]]] = None,
+    base: Optional[Dict[str, float]] = None,
+    variation: float = 0.2,
+    jurisdiction: str = "AU",
+    perspective: str = "health_system",
+    outcome: str = "inmb",
+    wtp: float = 50000.0,
+    batch_size: Optional[int] = None
+) -> pd.DataFrame:
     """
-    Run one-way deterministic sensitivity analysis on PSA data.
+    Run one-way deterministic sensitivity analysis (tornado) through the cohort model.
+    
+    The base case and every low/high point are one tornado design evaluated
+    in a single batch by ``dsa_batch.CohortDSAModel`` (``simulate_arm_grid``),
+    or by ``model`` when one is injected.
     
     Args:
-        psa: PSA data with strategy information
+        settings: Cohort model settings (horizon, cycle length, discount rates)
+        inputs: Clinical inputs; parameters missing here take model defaults
+        arm: Treatment arm
+        comparator: Reference arm for incremental outcomes
+        model: Vectorised model used instead of the cohort model
+        parameters: Parameter -> (base, low, high); default every model
+            parameter at its base value -/+ ``variation``
+        base: Base-case values (required with an injected model and no ``parameters``)
+        variation: Relative low/high range for default parameters
+        jurisdiction: Jurisdiction (selects discount rates)
+        perspective: Perspective (selects costs)
+        outcome: Cohort model outcome (see ``CohortDSAModel.OUTCOMES``)
+        wtp: Willingness to pay for the INMB outcome
+        batch_size: Optional chunk size for evaluation
         
     Returns:
-        DataFrame with sensitivity analysis results
+        DataFrame with one row per parameter ranked by outcome range
     """
-    # This is a simplified implementation - in practice would need parameter ranges
-    # For now, create mock sensitivity results for demonstration
-    
-    strategies = psa.table['strategy'].unique()
-    results = []
-    
-    # Mock sensitivity analysis for key parameters
-    parameters = ['cost', 'effect', 'ICER']
-    
-    for strategy in strategies:
-        strategy_data = psa.table[psa.table['strategy'] == strategy]
-        
-        for param in parameters:
-            if param in ['cost', 'effect']:
-                base_value = strategy_data[param].mean()
-                low_value = strategy_data[param].quantile(0.05)
-                high_value = strategy_data[param].quantile(0.95)
-                base_outcome = base_value
-                low_outcome = low_value
-                high_outcome = high_value
-            else:
-                # For ICER, calculate as cost/effect ratio
-                base_cost = strategy_data['cost'].mean()
-                base_effect = strategy_data['effect'].mean()
-                base_value = base_cost / base_effect if base_effect != 0 else 0
-                
-                low_cost = strategy_data['cost'].quantile(0.05)
-                low_effect = strategy_data['effect'].quantile(0.95)  # Inverse for ICER
-                low_value = low_cost / low_effect if low_effect != 0 else 0
-                
-                high_cost = strategy_data['cost'].quantile(0.95)
-                high_effect = strategy_data['effect'].quantile(0.05)  # Inverse for ICER
-                high_value = high_cost / high_effect if high_effect != 0 else 0
-                
-                base_outcome = base_value
-                low_outcome = low_value
-                high_outcome = high_value
-            
-            results.append({
-                'strategy': strategy,
-                'parameter': param,
-                'base_value': base_value,
-                'low_value': low_value,
-                'high_value': high_value,
-                'base_outcome': base_outcome,
-                'low_outcome': low_outcome,
-                'high_outcome': high_outcome,
-                'range': abs(high_outcome - low_outcome)
-            })
-    
-    return pd.DataFrame(results)
+    model = _dsa_model(model, settings, inputs, arm, comparator, jurisdiction=jurisdiction,
+                       perspective=perspective, outcome=outcome, wtp=wtp)
+    if parameters is None:
+        base = _dsa_base(model, base)
+        parameters = {name: (value, *_dsa_bounds(name, model, base, variation)) for name, value in base.items()}
+    result = tornado_analysis(parameters, model, outcome_metric=outcome, vectorized=True, batch_size=batch_size)
+    return result.sensitivity_results.reset_index(drop=True)
 
 
 def run_prcc_analysis(psa: PSAData) -> pd.DataFrame:
     """
     Run PRCC (Partial Rank Correlation Coefficient) analysis.
     
+    Uses the sampled ``param_*`` columns of the PSA table; see
+    ``global_sensitivity.global_sensitivity`` for Sobol indices.
+    
     Args:
         psa: PSA data with strategy information
         
     Returns:
-        DataFrame with PRCC results
+        DataFrame with PRCC results per strategy, outcome and parameter, or
+        outcome correlations per strategy when the table has no parameter columns
     """
-    # Simplified PRCC implementation - in practice would use proper statistical methods
+    params = psa_parameter_columns(psa.table)
+    if params:
+        return prcc_table(psa.table, ['cost', 'effect'], params, by='strategy')
+    
+    # Without sampled parameter columns there is nothing to rank against;
+    # report descriptive correlations of the outcomes instead
     strategies = psa.table['strategy'].unique()
     results = []
     
@@ -461,87 +531,103 @@ def run_prcc_analysis(psa: PSAData) -> pd.DataFrame:
     return pd.DataFrame(results)
 
 
-def run_two_way_dsa(psa: PSAData, param_pairs: List[Tuple[str, str]]) -> pd.DataFrame:
+def _grid_table(
+    names: Sequence[str],
+    model: BatchModel,
+    base: Dict[str, float],
+    ranges: Optional[Dict[str, Sequence[float]]],
+    n_points: int,
+    variation: float,
+    batch_size: Optional[int]
+) -> pd.DataFrame:
+    """Outcome over the full grid of ``names``, other parameters at base."""
+    axes = _dsa_axes(names, model, base, ranges, n_points, variation)
+    design = grid_design(base, axes)
+    outcomes = evaluate_design(design, model, batch_size)
+    table = {f"param{i}": name for i, name in enumerate(axes, start=1)}
+    for i, name in enumerate(axes, start=1):
+        table[f"param{i}_value"] = design.matrix[:, design.parameters.index(name)]
+    table["outcome"] = outcomes
+    return pd.DataFrame(table)
+
+
+def run_two_way_dsa(
+    param_pairs: List[Tuple[str, str]],
+    settings: Optional[Dict] = None,
+    inputs: Optional[Dict] = None,
+    arm: Optional[str] = None,
+    comparator: str = "ECT_std",
+    model: Optional[BatchModel] = None,
+    ranges: Optional[Dict[str, Sequence[float]]] = None,
+    base: Optional[Dict[str, float]] = None,
+    n_points: int = 5,
+    variation: float = 0.2,
+    jurisdiction: str = "AU",
+    perspective: str = "health_system",
+    outcome: str = "inmb",
+    wtp: float = 50000.0,
+    batch_size: Optional[int] = None
+) -> pd.DataFrame:
     """
-    Run two-way deterministic sensitivity analysis.
+    Run two-way deterministic sensitivity analysis through the cohort model.
+    
+    Each pair is a full grid design evaluated in one batch; parameters may be
+    given as full names (``"remission_rates.ECT_std"``) or as inputs keys,
+    which refer to ``arm``.
     
     Args:
-        psa: PSA data with strategy information
-        param_pairs: List of parameter pairs to analyze
+        param_pairs: Parameter pairs to sweep
+        settings, inputs, arm, comparator, model, base, jurisdiction,
+            perspective, outcome, wtp, batch_size: As for ``run_one_way_dsa``
+        ranges: Parameter -> values to sweep; default ``n_points`` across the
+            base value -/+ ``variation``
+        n_points: Grid points per parameter without an explicit range
+        variation: Relative range for default axes
         
     Returns:
-        DataFrame with two-way DSA results
+        DataFrame with param1, param2, param1_value, param2_value and outcome
     """
-    results = []
-    
-    for param1, param2 in param_pairs:
-        # Create a grid of parameter combinations
-        if param1 == 'efficacy':
-            param1_values = np.linspace(0.1, 0.9, 5)
-        else:
-            param1_values = np.linspace(1000, 50000, 5)
-            
-        if param2 == 'cost':
-            param2_values = np.linspace(1000, 50000, 5)
-        elif param2 == 'utility':
-            param2_values = np.linspace(0.1, 0.9, 5)
-        else:  # relapse_rate
-            param2_values = np.linspace(0.1, 0.8, 5)
-        
-        for p1_val in param1_values:
-            for p2_val in param2_values:
-                # Mock outcome calculation
-                outcome = p1_val * 1000 + p2_val * 0.1
-                
-                results.append({
-                    'param1': param1,
-                    'param2': param2,
-                    'param1_value': p1_val,
-                    'param2_value': p2_val,
-                    'outcome': outcome
-                })
-    
-    return pd.DataFrame(results)
-
-
-def run_three_way_dsa(psa: PSAData, param_triple: Tuple[str, str, str]) -> pd.DataFrame:
+    model = _dsa_model(model, settings, inputs, arm, comparator, jurisdiction=jurisdiction,
+                       perspective=perspective, outcome=outcome, wtp=wtp)
+    base = _dsa_base(model, base)
+    columns = ['param1', 'param2', 'param1_value', 'param2_value', 'outcome']
+    results = [_grid_table(pair, model, base, ranges, n_points, variation, batch_size) for pair in param_pairs]
+    if not results:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(results, ignore_index=True)[columns]
+
+
+def run_three_way_dsa(
+    param_triple: Tuple[str, str, str],
+    settings: Optional[Dict] = None,
+    inputs: Optional[Dict] = None,
+    arm: Optional[str] = None,
+    comparator: str = "ECT_std",
+    model: Optional[BatchModel] = None,
+    ranges: Optional[Dict[str, Sequence[float]]] = None,
+    base: Optional[Dict[str, float]] = None,
+    n_points: int = 3,
+    variation: float = 0.2,
+    jurisdiction: str = "AU",
+    perspective: str = "health_system",
+    outcome: str = "inmb",
+    wtp: float = 50000.0,
+    batch_size: Optional[int] = None
+) -> pd.DataFrame:
     """
-    Run three-way deterministic sensitivity analysis.
+    Run three-way deterministic sensitivity analysis through the cohort model.
     
     Args:
-        psa: PSA data with strategy information
-        param_triple: Triple of parameters to analyze
+        param_triple: Three parameters to sweep
+        Others: As for ``run_two_way_dsa``
         
     Returns:
-        DataFrame with three-way DSA results
+        DataFrame with param1-3, param1_value-param3_value and outcome
     """
-    param1, param2, param3 = param_triple
-    results = []
-    
-    # Create parameter ranges
-    param_ranges = {
-        'efficacy': np.linspace(0.1, 0.9, 3),
-        'cost': np.linspace(5000, 30000, 3),
-        'utility': np.linspace(0.2, 0.8, 3)
-    }
-    
-    for p1_val in param_ranges.get(param1, np.linspace(0.1, 0.9, 3)):
-        for p2_val in param_ranges.get(param2, np.linspace(0.1, 0.9, 3)):
-            for p3_val in param_ranges.get(param3, np.linspace(0.1, 0.9, 3)):
-                # Mock outcome calculation
-                outcome = p1_val * 1000 + p2_val * 500 + p3_val * 200
-                
-                results.append({
-                    'param1': param1,
-                    'param2': param2,
-                    'param3': param3,
-                    'param1_value': p1_val,
-                    'param2_value': p2_val,
-                    'param3_value': p3_val,
-                    'outcome': outcome
-                })
-    
-    return pd.DataFrame(results)
+    model = _dsa_model(model, settings, inputs, arm, comparator, jurisdiction=jurisdiction,
+                       perspective=perspective, outcome=outcome, wtp=wtp)
+    results = _grid_table(param_triple, model, _dsa_base(model, base), ranges, n_points, variation, batch_size)
+    return results[['param1', 'param2', 'param3', 'param1_value', 'param2_value', 'param3_value', 'outcome']]
 
 
 def run_scenario_analysis(psa: PSAData) -> pd.DataFrame:
@@ -12,6 +12,7 @@ from typing import Optional, Dict, Tuple
 import numpy as np
 import pandas as pd
 
+from .utility_trajectory import first_crossing, simulate_paths, time_to_benefit_curves
 
 
 @dataclass
@@ -25,6 +26,7 @@ class TimeToBenefitResult:
     summary_stats: pd.DataFrame          # Summary statistics
     perspective: str
     jurisdiction: Optional[str]
+    time_to_benefit_curves: Optional[pd.DataFrame] = None  # Kaplan-Meier curves with bootstrap bands
 
 
 @dataclass
@@ -109,46 +111,7 @@ def generate_mock_utility_trajectory(
     Returns:
         Array of daily utility values
     """
-    time_points = np.arange(time_horizon)
-    
-    # Treatment-specific parameters (based on clinical knowledge)
-    treatment_params = {
-        "ECT": {"onset": 3, "peak": 14, "plateau": 0.85, "speed": 0.15},
-        "KA-ECT": {"onset": 2, "peak": 10, "plateau": 0.88, "speed": 0.18},
-        "IV-KA": {"onset": 1, "peak": 7, "plateau": 0.82, "speed": 0.20},
-        "IN-EKA": {"onset": 2, "peak": 14, "plateau": 0.78, "speed": 0.16},
-        "PO-PSI": {"onset": 14, "peak": 60, "plateau": 0.80, "speed": 0.08},
-        "PO-KA": {"onset": 7, "peak": 30, "plateau": 0.75, "speed": 0.12},
-        "rTMS": {"onset": 10, "peak": 28, "plateau": 0.70, "speed": 0.10},
-        "UC+Li": {"onset": 21, "peak": 90, "plateau": 0.68, "speed": 0.06},
-        "UC+AA": {"onset": 21, "peak": 90, "plateau": 0.65, "speed": 0.05},
-        "Usual Care": {"onset": 30, "peak": 180, "plateau": baseline_utility + 0.05, "speed": 0.03}
-    }
-    
-    params = treatment_params.get(strategy, treatment_params["Usual Care"])
-    
-    # Sigmoid benefit accrual curve
-    onset_day = params["onset"]
-    _peak_day = params["peak"]
-    plateau_utility = params["plateau"]
-    speed = params["speed"]
-    
-    # Calculate benefit accrual using logistic function
-    benefit_accrual = 1 / (1 + np.exp(-speed * (time_points - onset_day)))
-    
-    # Scale to reach plateau
-    max_benefit = plateau_utility - baseline_utility
-    scaled_benefit = max_benefit * benefit_accrual
-    
-    # Add baseline and some noise
-    utilities = baseline_utility + scaled_benefit
-    noise = np.random.normal(0, 0.02, time_horizon)  # Small random variation
-    utilities += noise
-    
-    # Ensure utilities stay within bounds
-    utilities = np.clip(utilities, 0.1, 0.95)
-    
-    return utilities
+    return simulate_paths(strategy, 1, time_horizon, baseline_utility)[0]
 
 
 def calculate_time_to_meaningful_change(
@@ -174,19 +137,11 @@ def calculate_time_to_meaningful_change(
     for strategy in strategies:
         # Generate multiple utility trajectories for uncertainty analysis
         n_simulations = 1000
-        time_to_improvement = []
+        baseline = 0.5
+        utilities = simulate_paths(strategy, n_simulations, time_horizon, baseline)
         
-        for _ in range(n_simulations):
-            baseline = 0.5
-            utilities = generate_mock_utility_trajectory(strategy, time_horizon, baseline)
-            
-            # Find first day where improvement exceeds threshold
-            improvement_days = np.where(utilities - baseline >= improvement_threshold)[0]
-            
-            if len(improvement_days) > 0:
-                time_to_improvement.append(improvement_days[0] + 1)  # 1-based days
-            else:
-                time_to_improvement.append(time_horizon)  # No improvement within horizon
+        # First day where improvement exceeds threshold (horizon if never)
+        time_to_improvement = first_crossing(utilities - baseline, improvement_threshold)
         
         # Calculate statistics
         time_to_change_data.append({
@@ -195,7 +150,7 @@ def calculate_time_to_meaningful_change(
             "mean_time_to_change": np.mean(time_to_improvement),
             "time_to_change_std": np.std(time_to_improvement),
             f"time_to_change_p{int(confidence_level*100)}": np.percentile(time_to_improvement, confidence_level*100),
-            "probability_improvement": np.mean(np.array(time_to_improvement) < time_horizon),
+            "probability_improvement": np.mean(time_to_improvement < time_horizon),
             "earliest_improvement": np.min(time_to_improvement),
             "latest_improvement": np.max(time_to_improvement)
         })
@@ -367,6 +322,9 @@ def analyze_time_to_benefit(
     time_to_change = calculate_time_to_meaningful_change(improvement_threshold, time_horizon)
     benefit_accrual = analyze_benefit_accrual_curves(time_horizon)
     speed_of_onset = calculate_speed_of_onset_metrics()
+    curves = time_to_benefit_curves(
+        days_well["strategy"].tolist(), improvement_threshold, time_horizon, baseline_utility
+    )
     
     # Create summary statistics
     summary_stats = pd.DataFrame({
@@ -390,7 +348,8 @@ def analyze_time_to_benefit(
         speed_of_onset=speed_of_onset,
         summary_stats=summary_stats,
         perspective="health_system",
-        jurisdiction=None
+        jurisdiction=None,
+        time_to_benefit_curves=curves
     )
 
 
@@ -422,47 +381,33 @@ def perform_time_to_benefit_sensitivity_analysis(
     sensitivity_results = []
     
     for strategy in strategies:
-        scenario_results = []
+        # Sample all scenarios at once; paths run to the longest horizon and
+        # days beyond each scenario's own horizon are masked out
+        threshold = np.random.uniform(*parameter_ranges["improvement_threshold"], n_scenarios)
+        baseline = np.random.uniform(*parameter_ranges["baseline_utility"], n_scenarios)
+        horizon = np.random.uniform(*parameter_ranges["time_horizon"], n_scenarios).astype(int)
+        effect_multiplier = np.random.uniform(*parameter_ranges["treatment_effect_variability"], n_scenarios)
         
-        for _ in range(n_scenarios):
-            # Sample parameters
-            threshold = np.random.uniform(*parameter_ranges["improvement_threshold"])
-            baseline = np.random.uniform(*parameter_ranges["baseline_utility"])
-            horizon = int(np.random.uniform(*parameter_ranges["time_horizon"]))
-            effect_multiplier = np.random.uniform(*parameter_ranges["treatment_effect_variability"])
-            
-            # Generate modified utility trajectory
-            utilities = generate_mock_utility_trajectory(strategy, horizon, baseline)
-            utilities = baseline + (utilities - baseline) * effect_multiplier
-            utilities = np.clip(utilities, 0.1, 0.95)
-            
-            # Calculate modified metrics
-            qald = np.sum(utilities)
-            incremental_qald = qald - (baseline * horizon)
-            
-            improvement_days = np.where(utilities - baseline >= threshold)[0]
-            time_to_improvement = improvement_days[0] + 1 if len(improvement_days) > 0 else horizon
-            
-            max_benefit = np.max(utilities - baseline)
-            half_benefit_threshold = baseline + max_benefit * 0.5
-            half_benefit_days = np.where(utilities >= half_benefit_threshold)[0]
-            time_to_half = half_benefit_days[0] + 1 if len(half_benefit_days) > 0 else horizon
-            
-            scenario_results.append({
-                "qald": qald,
-                "incremental_qald": incremental_qald,
-                "time_to_improvement": time_to_improvement,
-                "time_to_half_benefit": time_to_half,
-                "max_utility": np.max(utilities),
-                "threshold": threshold,
-                "baseline": baseline,
-                "horizon": horizon,
-                "effect_multiplier": effect_multiplier
-            })
+        utilities = simulate_paths(strategy, n_scenarios, int(horizon.max()), baseline, effect_multiplier)
+        in_horizon = np.arange(utilities.shape[1])[None, :] < horizon[:, None]
+        benefit = np.where(in_horizon, utilities - baseline[:, None], -np.inf)
         
-        # Calculate sensitivity statistics
-        scenario_df = pd.DataFrame(scenario_results)
+        qald = np.where(in_horizon, utilities, 0.0).sum(axis=1)
+        max_benefit = benefit.max(axis=1)
+        
+        scenario_df = pd.DataFrame({
+            "qald": qald,
+            "incremental_qald": qald - baseline * horizon,
+            "time_to_improvement": first_crossing(benefit, threshold, horizon),
+            "time_to_half_benefit": first_crossing(benefit, max_benefit * 0.5, horizon),
+            "max_utility": np.where(in_horizon, utilities, -np.inf).max(axis=1),
+            "threshold": threshold,
+            "baseline": baseline,
+            "horizon": horizon,
+            "effect_multiplier": effect_multiplier
+        })
         
+        # Calculate sensitivity statistics
         sensitivity_results.append({
             "strategy": strategy,
             "qald_mean": scenario_df["qald"].mean(),
@@ -475,4 +420,4 @@ def perform_time_to_benefit_sensitivity_analysis(
             # "most_influential_param": determine_most_influential_param(scenario_df),  # TODO: implement
             # "robustness_score": calculate_robustness_score(scenario_df)  # TODO: implement
         })
-   
\ No newline at end of file
+    return pd.DataFrame(sensitivity_results)
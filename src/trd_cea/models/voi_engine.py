@@ -2,6 +2,8 @@
 V4 Value of Information Analysis Engine
 
 Implements EVPI, EVPPI, and EVSI calculations for research prioritization.
+``EVPIEngine`` runs EVPI as a registry engine whose draw chunks and thread
+shards merge exactly.
 """
 from __future__ import annotations
 
@@ -14,6 +16,37 @@ import pandas as pd
 
 from trd_cea.core.io import PSAData
 
+from .base import AnalysisType, BaseAnalysisEngine, EngineCapabilities, EngineMetadata
+from .capabilities import CachedEngine, IncrementalEngine
+
+DEFAULT_LAMBDA_GRID = np.arange(0, 100001, 5000.0)
+
+
+# Parameter-name stems used by EVPPI for each strategy's cost and effect
+STRATEGY_PARAMETER_NAMES = {
+    'IV-KA': 'iv_ketamine',
+    'ECT': 'ect',
+    'KA-ECT': 'ka_ect',  # Ketamine-assisted ECT
+    'IN-EKA': 'esketamine',
+    'PO-PSI': 'psilocybin',
+    'PO-KA': 'oral_ketamine',
+    'rTMS': 'rtms',
+    'UC+Li': 'lithium',
+    'UC+AA': 'antipsychotic',
+    'UC': 'usual_care',
+    'Usual Care': 'usual_care',
+}
+
+
+def evppi_parameter_names(strategies: List[str]) -> List[str]:
+    """Cost and effect parameter names that EVPPI maps onto ``strategies``."""
+    names = []
+    for strategy in strategies:
+        param_name = STRATEGY_PARAMETER_NAMES.get(strategy)
+        if param_name is not None:
+            names.extend([f'cost_{param_name}', f'effect_{param_name}'])
+    return names
+
 
 @dataclass
 class EVPIResult:
@@ -154,28 +187,11 @@ def calculate_evppi(
     cost = psa.table.pivot(index="draw", columns="strategy", values="cost")[strategies]
     effect = psa.table.pivot(index="draw", columns="strategy", values="effect")[strategies]
 
-    # Define which strategies are primarily affected by each parameter
     # Map parameter names to affected strategies based on naming conventions
     parameter_strategy_mapping = {}
-    
-    # For each strategy, create cost and effect parameter mappings
-    strategy_abbreviations = {
-        'IV-KA': 'iv_ketamine',
-        'ECT': 'ect',
-        'KA-ECT': 'ka_ect',  # Ketamine-assisted ECT
-        'IN-EKA': 'esketamine',
-        'PO-PSI': 'psilocybin',
-        'PO-KA': 'oral_ketamine',
-        'rTMS': 'rtms',
-        'UC+Li': 'lithium',
-        'UC+AA': 'antipsychotic',
-        'UC': 'usual_care',
-        'Usual Care': 'usual_care',
-    }
-    
-    # Build parameter mapping for all strategies
-    for strategy, param_name in strategy_abbreviations.items():
-        if strategy in strategies:
+    for strategy in strategies:
+        param_name = STRATEGY_PARAMETER_NAMES.get(strategy)
+        if param_name is not None:
             parameter_strategy_mapping[f'cost_{param_name}'] = [strategy]
             parameter_strategy_mapping[f'effect_{param_name}'] = [strategy]
     
@@ -363,3 +379,76 @@ def save_voi_results(
     
     with open(output_dir / "voi_metadata.json", 'w') as f:
         json.dump(metadata, f, indent=2)
+
+
+class EVPIEngine(CachedEngine, IncrementalEngine, BaseAnalysisEngine):
+    """
+    Per-person EVPI across ``config['lambda_grid']`` as a chunkable engine.
+
+    Results keep the draw count, the summed NMB per lambda and strategy and
+    the summed per-draw maximum NMB, so ``merge_results`` is exact and
+    ``schedule_run`` can shard or chunk large PSA tables. ``results['evpi']``
+    has the ``lambda``, ``evpi_per_person``, ``expected_max_nmb`` and
+    ``max_expected_nmb`` columns of ``calculate_evpi``.
+    """
+
+    def _get_default_metadata(self) -> EngineMetadata:
+        return EngineMetadata(
+            name="EVPIEngine",
+            version="1.0.0",
+            description="Expected value of perfect information over a WTP grid",
+            author="V4 Development Team",
+            analysis_type=AnalysisType.VOI,
+            capabilities=[EngineCapabilities.VALIDATION],
+        )
+
+    def _validate_config(self) -> None:
+        grid = np.asarray(self.config.get("lambda_grid", DEFAULT_LAMBDA_GRID), dtype=float)
+        if grid.ndim != 1 or grid.size == 0:
+            raise ValueError("lambda_grid must be a non-empty 1-D sequence")
+
+    def _validate_input(self, input_data) -> None:
+        table = getattr(input_data.data, "table", None)
+        if table is None or table.empty:
+            raise ValueError("EVPI needs a non-empty PSA table")
+        missing = {"draw", "strategy", "cost", "effect"} - set(table.columns)
+        if missing:
+            raise ValueError(f"PSA table is missing columns {sorted(missing)}")
+
+    def _initialize_engine(self) -> None:
+        pass
+
+    def _cleanup_engine(self) -> None:
+        pass
+
+    def _run_analysis(self, input_data) -> dict:
+        table = input_data.data.table
+        lambdas = np.asarray(self.config.get("lambda_grid", DEFAULT_LAMBDA_GRID), dtype=float)
+        cost = table.pivot(index="draw", columns="strategy", values="cost")
+        effect = table.pivot(index="draw", columns="strategy", values="effect")[cost.columns]
+        nmb = lambdas[:, None, None] * effect.to_numpy()[None] - cost.to_numpy()[None]
+        return self._with_evpi({
+            "n_draws": len(cost),
+            "nmb_sum": pd.DataFrame(nmb.sum(axis=1), index=lambdas, columns=cost.columns),
+            "max_nmb_sum": pd.Series(nmb.max(axis=2).sum(axis=1), index=lambdas),
+        })
+
+    def merge_results(self, partials) -> dict:
+        return self._with_evpi({
+            "n_draws": sum(p["n_draws"] for p in partials),
+            "nmb_sum": sum(p["nmb_sum"] for p in partials),
+            "max_nmb_sum": sum(p["max_nmb_sum"] for p in partials),
+        })
+
+    @staticmethod
+    def _with_evpi(sums: dict) -> dict:
+        n = sums["n_draws"]
+        expected_max = sums["max_nmb_sum"].to_numpy() / n
+        max_expected = sums["nmb_sum"].to_numpy().max(axis=1) / n
+        sums["evpi"] = pd.DataFrame({
+            "lambda": sums["nmb_sum"].index.to_numpy(),
+            "evpi_per_person": expected_max - max_expected,
+            "expected_max_nmb": expected_max,
+            "max_expected_nmb": max_expected,
+        })
+        return sums
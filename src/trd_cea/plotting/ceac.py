@@ -29,6 +29,8 @@ def plot_ceac(ceac_df, output_path='nextgen_v3/out/ceac_v3.png',
     # Add professional legend
     add_publication_legend(ax)
     
+    if output_path is None:
+        return fig
     # Save with high quality
     save_publication_figure(fig, output_path)
     plt.close()
\ No newline at end of file
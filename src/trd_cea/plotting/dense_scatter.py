@@ -0,0 +1,336 @@
+"""
+V4 Dense Scatter Rendering
+
+Scatter layers for PSA-scale data (up to millions of draws per strategy).
+
+Responsibilities:
+- Draw grouped scatter data as points below a point-count threshold and as
+  one density artist above it: a categorical density raster (every group's
+  counts from a single ``bincount``, colour-blended and log-alpha shaded)
+  or per-group hexbins
+- Confidence ellipses for every group from grouped first and second moments
+  and one batched eigen-decomposition
+- Convex hulls per group after discarding points inside each group's
+  extreme-point quadrilateral
+- A CE-plane figure built on these layers with WTP threshold lines
+
+A raster layer is a single image artist, so file size is bounded by the
+raster resolution rather than the number of draws.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.axes import Axes
+from matplotlib.colors import LinearSegmentedColormap, to_rgba
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import Ellipse, Polygon
+from scipy import stats
+from scipy.spatial import ConvexHull
+
+from .publication import _get_cmap
+
+# Layers with more points than this are drawn as density instead of points
+DENSITY_THRESHOLD = 20_000
+DEFAULT_BINS = 400
+MODES = ("auto", "points", "raster", "hexbin")
+
+
+@dataclass
+class GroupedPoints:
+    """Points with integer group codes (0..n_groups-1)."""
+
+    x: np.ndarray
+    y: np.ndarray
+    codes: np.ndarray
+    labels: List[str]
+
+    @classmethod
+    def from_arrays(cls, x, y, groups=None) -> "GroupedPoints":
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if groups is None:
+            return cls(x, y, np.zeros(len(x), dtype=np.intp), [""])
+        # Hash-based factorize keeps first-appearance order, as the plotting modules do;
+        # categorical inputs (compact PSA tables) are factorized from their codes
+        if not isinstance(groups, (pd.Series, pd.Categorical, pd.Index)):
+            groups = np.asarray(groups)
+        codes, labels = pd.factorize(groups)
+        return cls(x, y, codes.astype(np.intp), [str(v) for v in labels])
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.labels)
+
+
+def group_colors(n_groups: int, colors: Optional[Sequence] = None) -> np.ndarray:
+    """(n_groups, 4) RGBA colours from ``colors`` or the tab10 cycle."""
+    if colors is None:
+        cmap = _get_cmap("tab10")
+        return np.array([cmap(i % 10) for i in range(n_groups)])
+    return np.array([to_rgba(colors[i % len(colors)]) for i in range(n_groups)])
+
+
+def group_ellipses(points: GroupedPoints, level: float = 0.95) -> Dict[str, np.ndarray]:
+    """
+    Confidence ellipse of every group from grouped moments.
+
+    Args:
+        points: Grouped points
+        level: Coverage probability under a bivariate normal
+
+    Returns:
+        Dict of arrays (n_groups,): center_x, center_y, width, height, angle (degrees)
+    """
+    g, n = points.codes, points.n_groups
+    # Raw moments about the overall mean (for numerical stability) in five bincounts
+    dx = points.x - points.x.mean()
+    dy = points.y - points.y.mean()
+    count = np.bincount(g, minlength=n).astype(float)
+    sx, sy = np.bincount(g, dx, n), np.bincount(g, dy, n)
+    mx, my = sx / count, sy / count
+    denom = np.maximum(count - 1, 1)
+    cov = np.empty((n, 2, 2))
+    cov[:, 0, 0] = (np.bincount(g, dx * dx, n) - sx * mx) / denom
+    cov[:, 1, 1] = (np.bincount(g, dy * dy, n) - sy * my) / denom
+    cov[:, 0, 1] = cov[:, 1, 0] = (np.bincount(g, dx * dy, n) - sx * my) / denom
+    mean_x = mx + points.x.mean()
+    mean_y = my + points.y.mean()
+
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)             # ascending
+    scale = stats.chi2.ppf(level, df=2)
+    major = eigenvectors[:, :, 1]
+    return {
+        "center_x": mean_x,
+        "center_y": mean_y,
+        "width": 2 * np.sqrt(scale * np.maximum(eigenvalues[:, 1], 0)),
+        "height": 2 * np.sqrt(scale * np.maximum(eigenvalues[:, 0], 0)),
+        "angle": np.degrees(np.arctan2(major[:, 1], major[:, 0])),
+    }
+
+
+def _hull_candidates(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Mask of points outside the quadrilateral of the four extreme points (Akl-Toussaint)."""
+    corners = np.array([[x[i], y[i]] for i in (x.argmin(), y.argmin(), x.argmax(), y.argmax())])
+    inside = np.ones(len(x), dtype=bool)
+    for (x0, y0), (x1, y1) in zip(corners, np.roll(corners, -1, axis=0)):
+        inside &= (x1 - x0) * (y - y0) - (y1 - y0) * (x - x0) > 0
+    return ~inside
+
+
+def group_hulls(points: GroupedPoints) -> List[np.ndarray]:
+    """Convex hull vertices (k, 2) of every group (empty for degenerate groups)."""
+    order = np.argsort(points.codes, kind="stable")
+    bounds = np.searchsorted(points.codes[order], np.arange(points.n_groups + 1))
+    hulls = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        x, y = points.x[order[start:stop]], points.y[order[start:stop]]
+        if len(x) < 3:
+            hulls.append(np.empty((0, 2)))
+            continue
+        keep = _hull_candidates(x, y)
+        xy = np.column_stack([x[keep], y[keep]])
+        try:
+            hull = ConvexHull(xy)
+            hulls.append(xy[hull.vertices])
+        except Exception:  # collinear or too few distinct points
+            hulls.append(np.empty((0, 2)))
+    return hulls
+
+
+def density_counts(
+    points: GroupedPoints,
+    extent: Tuple[float, float, float, float],
+    bins: int = DEFAULT_BINS,
+) -> np.ndarray:
+    """
+    Counts per group and cell, shape (n_groups, bins_y, bins_x), from one bincount.
+
+    Points outside ``extent`` (x0, x1, y0, y1) are dropped.
+    """
+    x0, x1, y0, y1 = extent
+    ix = np.floor((points.x - x0) / ((x1 - x0) or 1.0) * bins).astype(np.intp)
+    iy = np.floor((points.y - y0) / ((y1 - y0) or 1.0) * bins).astype(np.intp)
+    # Points exactly on the upper edge belong to the last cell
+    ix[points.x == x1] = bins - 1
+    iy[points.y == y1] = bins - 1
+    keep = (ix >= 0) & (ix < bins) & (iy >= 0) & (iy < bins)
+    flat = (points.codes[keep] * bins + iy[keep]) * bins + ix[keep]
+    return np.bincount(flat, minlength=points.n_groups * bins * bins).reshape(points.n_groups, bins, bins)
+
+
+def shade_density(counts: np.ndarray, colors: np.ndarray, min_alpha: float = 0.25) -> np.ndarray:
+    """
+    RGBA image from per-group counts.
+
+    Each cell's colour is the count-weighted blend of its groups' colours;
+    opacity grows with the log of the total count.
+    """
+    total = counts.sum(axis=0)
+    occupied = total > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rgb = np.einsum("gyx,gc->yxc", counts, colors[:, :3]) / total[..., None]
+    alpha = np.log1p(total) / np.log1p(total.max() if total.max() > 0 else 1)
+    image = np.zeros(total.shape + (4,))
+    image[occupied, :3] = rgb[occupied]
+    image[occupied, 3] = min_alpha + (1 - min_alpha) * alpha[occupied]
+    return image
+
+
+def _extent(points: GroupedPoints, pad: float = 0.05) -> Tuple[float, float, float, float]:
+    x0, x1 = float(points.x.min()), float(points.x.max())
+    y0, y1 = float(points.y.min()), float(points.y.max())
+    px, py = (x1 - x0) * pad or 0.5, (y1 - y0) * pad or 0.5
+    return x0 - px, x1 + px, y0 - py, y1 + py
+
+
+@dataclass
+class ScatterLayer:
+    """What ``scatter_layer`` drew."""
+
+    mode: str
+    labels: List[str]
+    colors: np.ndarray
+    artists: List = field(default_factory=list)
+    ellipses: Optional[Dict[str, np.ndarray]] = None
+    hulls: Optional[List[np.ndarray]] = None
+    markers: Sequence[str] = ("o",)
+
+    def legend_handles(self, labels: Optional[Dict[str, str]] = None) -> List[Line2D]:
+        """Proxy legend entries (density layers have no per-group artists)."""
+        labels = labels or {}
+        return [Line2D([0], [0], marker=self.markers[i % len(self.markers)], linestyle="", color=c,
+                       label=labels.get(label, label))
+                for i, (label, c) in enumerate(zip(self.labels, self.colors))]
+
+
+def scatter_layer(
+    ax: Axes,
+    x,
+    y,
+    groups=None,
+    colors: Optional[Sequence] = None,
+    mode: str = "auto",
+    threshold: int = DENSITY_THRESHOLD,
+    bins: int = DEFAULT_BINS,
+    extent: Optional[Tuple[float, float, float, float]] = None,
+    ellipse_level: Optional[float] = None,
+    hulls: bool = False,
+    point_size: float = 6.0,
+    alpha: float = 0.3,
+    markers: Optional[Sequence[str]] = None,
+) -> ScatterLayer:
+    """
+    Draw grouped points, switching to a density layer for large inputs.
+
+    Args:
+        ax: Axes to draw on
+        x, y: Coordinates
+        groups: Optional group label per point (e.g. strategy)
+        colors: Colours per group (default: tab10 cycle)
+        mode: "auto" (points up to ``threshold``, raster above), "points",
+            "raster" or "hexbin"
+        threshold: Point count above which "auto" switches to a raster
+        bins: Raster cells per axis (or hexbin grid size)
+        extent: Raster extent (x0, x1, y0, y1); defaults to the data range
+        ellipse_level: Draw confidence ellipses at this level
+        hulls: Draw convex hull outlines
+        point_size: Marker size in points mode
+        alpha: Marker opacity in points mode
+        markers: Marker per group in points mode (cycled)
+
+    Returns:
+        ScatterLayer describing the artists drawn
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+    points = GroupedPoints.from_arrays(x, y, groups)
+    rgba = group_colors(points.n_groups, colors)
+    if mode == "auto":
+        mode = "points" if len(points.x) <= threshold else "raster"
+    markers = tuple(markers or ("o",))
+    layer = ScatterLayer(mode=mode, labels=points.labels, colors=rgba, markers=markers)
+
+    if mode == "points":
+        for code, label in enumerate(points.labels):
+            mask = points.codes == code
+            layer.artists.append(ax.scatter(points.x[mask], points.y[mask], s=point_size, color=rgba[code],
+                                            marker=markers[code % len(markers)], alpha=alpha, linewidths=0,
+                                            label=label or None))
+    elif mode == "raster":
+        extent = extent or _extent(points)
+        image = shade_density(density_counts(points, extent, bins), rgba)
+        layer.artists.append(ax.imshow(image, extent=extent, origin="lower", aspect="auto",
+                                       interpolation="nearest", zorder=1))
+    else:
+        for code in range(points.n_groups):
+            mask = points.codes == code
+            cmap = LinearSegmentedColormap.from_list(f"group{code}", [(1, 1, 1, 0), rgba[code]])
+            layer.artists.append(ax.hexbin(points.x[mask], points.y[mask], gridsize=min(bins, 200),
+                                           mincnt=1, bins="log", cmap=cmap, linewidths=0))
+
+    if ellipse_level is not None:
+        layer.ellipses = group_ellipses(points, ellipse_level)
+        e = layer.ellipses
+        for code in range(points.n_groups):
+            patch = Ellipse((e["center_x"][code], e["center_y"][code]), e["width"][code], e["height"][code],
+                            angle=e["angle"][code], fill=False, edgecolor=rgba[code], linewidth=1.2, zorder=3)
+            layer.artists.append(ax.add_patch(patch))
+    if hulls:
+        layer.hulls = group_hulls(points)
+        for code, vertices in enumerate(layer.hulls):
+            if len(vertices):
+                layer.artists.append(ax.add_patch(Polygon(vertices, closed=True, fill=False, edgecolor=rgba[code],
+                                                          linewidth=0.8, linestyle="--", zorder=3)))
+    return layer
+
+
+def plot_ce_plane_draws(
+    incremental_effect,
+    incremental_cost,
+    strategies=None,
+    wtp_thresholds: Sequence[float] = (50000,),
+    mode: str = "auto",
+    ellipse_level: Optional[float] = 0.95,
+    hulls: bool = False,
+    colors: Optional[Sequence] = None,
+    title: str = "Cost-effectiveness plane",
+    xlabel: str = "Incremental QALYs",
+    ylabel: str = "Incremental cost",
+    figsize: Tuple[float, float] = (6.85, 5.0),
+    **layer_kwargs,
+) -> Figure:
+    """
+    CE plane of PSA draws for any number of draws and strategies.
+
+    Args:
+        incremental_effect, incremental_cost: Arrays over draws (all strategies stacked)
+        strategies: Strategy label per draw
+        wtp_thresholds: WTP lines to draw through the origin
+        mode, ellipse_level, hulls, colors, **layer_kwargs: See ``scatter_layer``
+
+    Returns:
+        Matplotlib figure
+    """
+    fig, ax = plt.subplots(figsize=figsize)
+    layer = scatter_layer(ax, incremental_effect, incremental_cost, strategies, colors=colors, mode=mode,
+                          ellipse_level=ellipse_level, hulls=hulls, **layer_kwargs)
+    x0, x1 = ax.get_xlim()
+    xs = np.array([x0, x1])
+    for wtp in wtp_thresholds:
+        ax.plot(xs, wtp * xs, linestyle="--", linewidth=1.0, color="#6c757d", alpha=0.7, zorder=2)
+    ax.set_xlim(x0, x1)
+    ax.axhline(0, color="#343a40", linewidth=0.8, zorder=2)
+    ax.axvline(0, color="#343a40", linewidth=0.8, zorder=2)
+    ax.set_title(title, fontweight="bold")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid(True, alpha=0.2)
+    if strategies is not None:
+        ax.legend(handles=layer.legend_handles(), frameon=False, loc="best")
+    return fig
@@ -0,0 +1,299 @@
+"""
+V4 Figure Rendering Service
+
+Renders publication figures as cached, parallel jobs.
+
+Responsibilities:
+- Describe each figure as a job: plot function, input data and style
+- Key jobs by a content hash of the function (name and source), the input
+  data and the style, and skip jobs whose key and outputs are unchanged
+- Render changed jobs on a process pool with the Agg backend, saving every
+  format through ``publication.save_multiformat`` with dense layers rasterized
+- Split figures by group (e.g. one per strategy) so a change to one group's
+  data only re-renders that group's figures
+- Keep a JSON index of rendered figures next to the outputs
+- Register the publication figure builders by name behind one entry point,
+  ``render_publication_figures``
+"""
+from __future__ import annotations
+
+import inspect
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ..core.hashing import hash_object
+from .ceac import plot_ceac
+from .ceaf import plot_ceaf
+from .frontier import plot_ce_plane, plot_frontier, plot_regret_curves
+from .publication import RASTERIZE_THRESHOLD, JournalStandards
+from .tornado import plot_tornado
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "figure_index.json"
+
+# Publication figure builders; each returns its figure when output_path is None
+PUBLICATION_FIGURES: Dict[str, Callable] = {
+    "ceac": plot_ceac,
+    "ceaf": plot_ceaf,
+    "regret_curves": plot_regret_curves,
+    "ce_plane": plot_ce_plane,
+    "frontier": plot_frontier,
+    "tornado": plot_tornado,
+}
+
+
+@dataclass(frozen=True)
+class FigureStyle:
+    """Everything about the output that is not data."""
+
+    formats: Tuple[str, ...] = ("svg", "pdf", "png")
+    dpi: Optional[int] = None
+    standards: JournalStandards = field(default_factory=JournalStandards)
+    rasterize_threshold: Optional[int] = RASTERIZE_THRESHOLD
+
+
+def _function_fingerprint(function: Callable) -> str:
+    """Qualified name plus source, so editing a plot function invalidates its figures."""
+    name = f"{function.__module__}.{function.__qualname__}"
+    try:
+        source = inspect.getsource(function)
+    except (OSError, TypeError):
+        source = ""
+    return hash_object([name, source])
+
+
+@dataclass
+class FigureJob:
+    """
+    One figure: ``function(*args, **kwargs)`` saved under ``name``.
+
+    The plot function must be importable (module-level) and return a
+    Figure, a ``(Figure, ...)`` tuple, or draw on the current figure.
+    """
+
+    name: str
+    function: Callable
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    style: FigureStyle = field(default_factory=FigureStyle)
+
+    def arguments(self) -> Any:
+        """Call arguments with defaults filled in, so spelling out a default is not a change."""
+        try:
+            bound = inspect.signature(self.function).bind(*self.args, **self.kwargs)
+        except (TypeError, ValueError):
+            return [list(self.args), self.kwargs]
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    @property
+    def key(self) -> str:
+        """Content hash of (plot function, input data, style)."""
+        return hash_object({
+            "function": _function_fingerprint(self.function),
+            "data": self.arguments(),
+            "style": self.style,
+        })
+
+
+def jobs_by_group(
+    name: str,
+    function: Callable,
+    data: pd.DataFrame,
+    by: str = "strategy",
+    style: Optional[FigureStyle] = None,
+    **kwargs,
+) -> List[FigureJob]:
+    """
+    One job per group of ``data``, named ``name.format(group=...)``.
+
+    Each job hashes only its own group's rows, so changing one strategy's
+    inputs re-renders only that strategy's figure.
+    """
+    return [
+        FigureJob(name=name.format(group=group), function=function, args=(frame.reset_index(drop=True),),
+                  kwargs=dict(kwargs), style=style or FigureStyle())
+        for group, frame in data.groupby(by, sort=False, observed=True)
+    ]
+
+
+def _init_worker() -> None:
+    """Pool initializer: render off-screen in worker processes only."""
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def _render(job: FigureJob, base_path: Path) -> float:
+    """Render and save one job; returns the seconds taken."""
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+
+    from .publication import journal_style, save_multiformat
+
+    start = time.perf_counter()
+    style = job.style
+    with journal_style(style.standards):
+        result = job.function(*job.args, **job.kwargs)
+        fig = result[0] if isinstance(result, tuple) else result
+        if not isinstance(fig, Figure):
+            fig = plt.gcf()
+        save_multiformat(fig, base_path, formats=style.formats, dpi=style.dpi,
+                         standards=style.standards, rasterize_threshold=style.rasterize_threshold)
+    return time.perf_counter() - start
+
+
+@dataclass
+class RenderReport:
+    """Outcome of one ``FigureService.render`` call."""
+
+    rendered: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+
+class FigureService:
+    """
+    Cached, parallel figure rendering into ``output_dir``.
+
+    Example::
+
+        service = FigureService("figures/v4", n_jobs=4)
+        service.add("ce_plane", plot_ce_plane, psa_table, wtp=50000)
+        service.extend(jobs_by_group("ceac_{group}", plot_ceac, ceac_table))
+        report = service.render()
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        n_jobs: int = 1,
+        style: Optional[FigureStyle] = None,
+    ):
+        self.output_dir = Path(output_dir)
+        self.n_jobs = max(1, int(n_jobs))
+        self.style = style or FigureStyle()
+        self.jobs: Dict[str, FigureJob] = {}
+
+    @property
+    def index_path(self) -> Path:
+        return self.output_dir / INDEX_NAME
+
+    def add(self, name: str, function: Callable, *args, style: Optional[FigureStyle] = None, **kwargs) -> FigureJob:
+        """Register a figure job (replacing any job with the same name)."""
+        job = FigureJob(name=name, function=function, args=args, kwargs=kwargs, style=style or self.style)
+        self.jobs[name] = job
+        return job
+
+    def extend(self, jobs: Sequence[FigureJob]) -> None:
+        for job in jobs:
+            self.jobs[job.name] = job
+
+    def load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not self.index_path.exists():
+            return {}
+        return json.loads(self.index_path.read_text())
+
+    def _is_current(self, job: FigureJob, key: str, entry: Optional[Dict[str, Any]]) -> bool:
+        if entry is None or entry.get("key") != key:
+            return False
+        base = self.output_dir / job.name
+        return all(base.with_suffix(f".{fmt}").exists() for fmt in job.style.formats)
+
+    def stale(self) -> List[str]:
+        """Names of jobs that would be rendered."""
+        index = self.load_index()
+        return [name for name, job in self.jobs.items() if not self._is_current(job, job.key, index.get(name))]
+
+    def render(self, force: bool = False) -> RenderReport:
+        """
+        Render every job whose key or outputs changed.
+
+        Args:
+            force: Render all jobs regardless of the index
+
+        Returns:
+            RenderReport listing rendered and skipped figures
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        index = self.load_index()
+        keys = {name: job.key for name, job in self.jobs.items()}
+        todo = [name for name, job in self.jobs.items()
+                if force or not self._is_current(job, keys[name], index.get(name))]
+        report = RenderReport(skipped=[name for name in self.jobs if name not in todo])
+
+        paths = [self.output_dir / name for name in todo]
+        for path in paths:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        jobs = [self.jobs[name] for name in todo]
+        if self.n_jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(jobs)), initializer=_init_worker) as pool:
+                seconds = list(pool.map(_render, jobs, paths))
+        else:
+            seconds = [_render(job, path) for job, path in zip(jobs, paths)]
+
+        rendered_at = datetime.now().isoformat(timespec="seconds")
+        for name, elapsed in zip(todo, seconds):
+            job = self.jobs[name]
+            index[name] = {
+                "key": keys[name],
+                "function": f"{job.function.__module__}.{job.function.__qualname__}",
+                "formats": list(job.style.formats),
+                "rendered_at": rendered_at,
+                "seconds": round(elapsed, 3),
+            }
+            report.rendered.append(name)
+            report.seconds[name] = elapsed
+        self.index_path.write_text(json.dumps(index, indent=2, sort_keys=True))
+        logger.info("Rendered %d figures, %d unchanged", len(report.rendered), len(report.skipped))
+        return report
+
+
+def render_publication_figures(
+    tables: Dict[str, pd.DataFrame],
+    output_dir: Path,
+    by: Optional[str] = None,
+    options: Optional[Dict[str, Dict[str, Any]]] = None,
+    n_jobs: int = 1,
+    style: Optional[FigureStyle] = None,
+    force: bool = False,
+) -> RenderReport:
+    """
+    Render the registered publication figure for each named table.
+
+    Args:
+        tables: ``PUBLICATION_FIGURES`` name -> builder input table
+        output_dir: Directory for the figures and their index
+        by: Optional column to split every table on, giving one figure per
+            group named ``<figure>_<group>`` (see ``jobs_by_group``)
+        options: Extra builder keyword arguments per figure name
+        n_jobs: Worker processes (1 renders in the calling process)
+        style: Output style for every figure
+        force: Render unchanged figures too
+
+    Returns:
+        RenderReport of the underlying ``FigureService``
+
+    Raises:
+        KeyError: If a table names no registered figure
+    """
+    unknown = sorted(set(tables) - set(PUBLICATION_FIGURES))
+    if unknown:
+        raise KeyError(f"No publication figure registered for {unknown}. Available: {sorted(PUBLICATION_FIGURES)}")
+    service = FigureService(output_dir, n_jobs=n_jobs, style=style)
+    for name, table in tables.items():
+        kwargs = {**(options or {}).get(name, {}), "output_path": None}
+        if by is None:
+            service.add(name, PUBLICATION_FIGURES[name], table, **kwargs)
+        else:
+            service.extend(jobs_by_group(f"{name}_{{group}}", PUBLICATION_FIGURES[name], table, by=by,
+                                         style=service.style, **kwargs))
+    return service.render(force=force)
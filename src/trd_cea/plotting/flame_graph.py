@@ -0,0 +1,114 @@
+"""
+V4 Flame Graph
+
+Flame graphs of traced run phases.
+
+Responsibilities:
+- Parse folded stacks (``"a;b;c <self time>"``, as written by
+  ``core.tracing.Tracer.folded_stacks``, flamegraph.pl and speedscope)
+- Lay frames out bottom-up with widths proportional to inclusive time and
+  siblings in name order
+- Draw one rectangle per frame and label those wide enough to read
+"""
+from __future__ import annotations
+
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+import matplotlib.pyplot as plt
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+Frame = Tuple[Tuple[str, ...], float, float]
+
+
+def parse_folded(lines: Iterable[str]) -> Dict[Tuple[str, ...], float]:
+    """Self time per stack path (repeated paths are summed)."""
+    stacks: Dict[Tuple[str, ...], float] = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        stack, _, value = line.rpartition(" ")
+        path = tuple(stack.split(";"))
+        stacks[path] = stacks.get(path, 0.0) + float(value)
+    return stacks
+
+
+def flame_layout(stacks: Dict[Tuple[str, ...], float]) -> List[Frame]:
+    """
+    (path, x offset, width) of every frame.
+
+    A frame's width is its inclusive time (its own plus all descendants');
+    children start at their parent's offset in name order.
+    """
+    inclusive: Dict[Tuple[str, ...], float] = {}
+    for path, value in stacks.items():
+        for depth in range(1, len(path) + 1):
+            inclusive[path[:depth]] = inclusive.get(path[:depth], 0.0) + value
+
+    children: Dict[Tuple[str, ...], List[Tuple[str, ...]]] = {}
+    for path in inclusive:
+        children.setdefault(path[:-1], []).append(path)
+
+    frames: List[Frame] = []
+    pending = [((), 0.0)]
+    while pending:
+        parent, offset = pending.pop()
+        for path in sorted(children.get(parent, [])):
+            frames.append((path, offset, inclusive[path]))
+            pending.append((path, offset))
+            offset += inclusive[path]
+    return frames
+
+
+def _frame_color(name: str) -> Tuple[float, float, float]:
+    """Warm colour that is stable per frame name."""
+    h = zlib.crc32(name.encode()) / 0xFFFFFFFF
+    return (0.85 + 0.15 * h, 0.35 + 0.45 * h, 0.1 + 0.2 * (1 - h))
+
+
+def plot_flame_graph(
+    folded: Iterable[str],
+    title: str = "Run phases",
+    unit: str = "us",
+    figsize: Tuple[float, float] = (10, 4),
+    min_label_fraction: float = 0.04,
+) -> Figure:
+    """
+    Flame graph of folded stacks.
+
+    Args:
+        folded: Folded stack lines, e.g. ``tracer.folded_stacks()``
+        title: Figure title
+        unit: Unit of the stack values, shown on the x axis
+        figsize: Figure size in inches
+        min_label_fraction: Label frames at least this share of the total width
+
+    Returns:
+        Figure with one row per stack depth
+    """
+    frames = flame_layout(parse_folded(folded))
+    total = sum(width for path, _, width in frames if len(path) == 1)
+    depth = max((len(path) for path, _, _ in frames), default=1)
+
+    fig, ax = plt.subplots(figsize=figsize)
+    patches = [Rectangle((offset, len(path) - 1), width, 0.95) for path, offset, width in frames]
+    ax.add_collection(PatchCollection(patches, facecolors=[_frame_color(path[-1]) for path, _, _ in frames],
+                                      edgecolors="white", linewidths=0.5))
+    for path, offset, width in frames:
+        if total > 0 and width / total >= min_label_fraction:
+            share = 100 * width / total
+            ax.text(offset + width / 2, len(path) - 0.525, f"{path[-1]} ({share:.0f}%)",
+                    ha="center", va="center", fontsize=8, clip_on=True)
+
+    ax.set_xlim(0, total or 1)
+    ax.set_ylim(0, depth)
+    ax.set_yticks([])
+    ax.set_xlabel(f"Inclusive time ({unit})")
+    ax.set_title(title)
+    for side in ("top", "right", "left"):
+        ax.spines[side].set_visible(False)
+    fig.tight_layout()
+    return fig
@@ -1,4 +1,7 @@
 import matplotlib.pyplot as plt
+import pandas as pd
+
+from .dense_scatter import scatter_layer
 from .publication_style import (
     apply_publication_style, get_therapy_color, get_therapy_label,
     save_publication_figure, add_wtp_threshold_line, add_publication_legend,
@@ -17,6 +20,8 @@ def plot_frontier(cea_df, output_path='nextgen_v3/out/frontier_v3.png'):
     ax.set_ylabel('Cost', fontweight='bold')
     ax.grid(True, alpha=0.3)
     
+    if output_path is None:
+        return fig
     save_publication_figure(fig, output_path)
     plt.close()
 
@@ -36,22 +41,12 @@ def plot_ce_plane(psa_df, output_path='nextgen_v3/out/ce_plane_v3.png',
     base_cost = base_data['cost'].mean()
     base_qaly = base_data['qaly'].mean()
     
-    # Plot each therapy
-    for arm in df['arm'].unique():
-        if arm == 'ECT_std':
-            continue  # Skip base case
-            
-        arm_data = df[df['arm'] == arm]
-        
-        # Calculate incremental values
-        inc_cost = arm_data['cost'] - base_cost
-        inc_qaly = arm_data['qaly'] - base_qaly
-        
-        # Plot PSA scatter
-        ax.scatter(inc_qaly, inc_cost, 
-                  color=get_therapy_color(arm), 
-                  alpha=0.6, s=30,
-                  label=get_therapy_label(arm))
+    # Plot every therapy's PSA draws as one layer (density-shaded when large)
+    draws = df[df['arm'] != 'ECT_std']
+    arms = list(pd.unique(draws['arm']))
+    layer = scatter_layer(ax, draws['qaly'].to_numpy() - base_qaly, draws['cost'].to_numpy() - base_cost,
+                          draws['arm'], colors=[get_therapy_color(arm) for arm in arms],
+                          point_size=30, alpha=0.6)
     
     # Add WTP threshold line
     add_wtp_threshold_line(ax, wtp_threshold, country)
@@ -68,8 +63,10 @@ def plot_ce_plane(psa_df, output_path='nextgen_v3/out/ce_plane_v3.png',
     ax.grid(True, alpha=0.3)
     
     # Add legend
-    add_publication_legend(ax)
+    add_publication_legend(ax, handles=layer.legend_handles({arm: get_therapy_label(arm) for arm in arms}))
     
+    if output_path is None:
+        return fig
     # Save with high quality
     save_publication_figure(fig, output_path)
     plt.close()
@@ -97,5 +94,7 @@ def plot_regret_curves(regret_df, output_path='nextgen_v3/out/regret_curves_v3.p
     
     add_publication_legend(ax)
     
+    if output_path is None:
+        return fig
     save_publication_figure(fig, output_path)
     plt.close()
\ No newline at end of file
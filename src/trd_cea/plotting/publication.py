@@ -32,6 +32,7 @@ __all__ = [
     "journal_style",
     "figure_context",
     "save_multiformat",
+    "rasterize_dense_artists",
     "add_reference_line",
     "format_axis_currency",
     "format_axis_percentage",
@@ -55,6 +56,8 @@ def _get_cmap(name: str):
 DEFAULT_DPI = 300
 DEFAULT_FORMATS = ("png", "pdf", "tiff")
 DEFAULT_FIGSIZE = (6.85, 4.5)  # Double column width
+# Scatter/line layers with more points than this are rasterized in vector outputs
+RASTERIZE_THRESHOLD = 5000
 
 
 @dataclass
@@ -185,6 +188,7 @@ def save_multiformat(
     formats: Optional[Sequence[str]] = None,
     dpi: Optional[int] = None,
     standards: Optional[JournalStandards] = None,
+    rasterize_threshold: Optional[int] = RASTERIZE_THRESHOLD,
 ) -> FigureArtifacts:
     """
     Save figure in multiple formats with journal standards.
@@ -195,6 +199,8 @@ def save_multiformat(
         formats: File formats to save
         dpi: Resolution for raster formats
         standards: Journal standards to apply
+        rasterize_threshold: Rasterize scatter/line layers with more points
+            than this in vector formats (None keeps everything vector)
     
     Returns:
         FigureArtifacts with saved file paths
@@ -226,6 +232,9 @@ def save_multiformat(
     
     # Remove extension if present
     base_path = output_path.with_suffix('')
+
+    if rasterize_threshold is not None:
+        rasterize_dense_artists(fig, rasterize_threshold)
     
     for fmt in formats:
         save_path = base_path.with_suffix(f'.{fmt}')
@@ -267,6 +276,35 @@ def save_multiformat(
     return FigureArtifacts(base_path=base_path, formats=formats)
 
 
+def rasterize_dense_artists(fig: Figure, threshold: int = RASTERIZE_THRESHOLD) -> int:
+    """
+    Rasterize dense data layers so SVG/PDF outputs stay small.
+
+    Scatter collections and lines with more than ``threshold`` points are
+    drawn as an embedded image at the save resolution; axes, labels and
+    sparse layers stay vector.
+
+    Args:
+        fig: Figure to modify in place
+        threshold: Minimum number of points for a layer to be rasterized
+
+    Returns:
+        Number of artists rasterized
+    """
+    count = 0
+    for ax in fig.get_axes():
+        for artist in list(ax.collections) + list(ax.lines):
+            if hasattr(artist, 'get_offsets'):
+                # Scatter points are offsets; line collections are one path per line
+                n_points = max(len(artist.get_offsets()), len(artist.get_paths()))
+            else:
+                n_points = len(artist.get_xydata())
+            if n_points > threshold:
+                artist.set_rasterized(True)
+                count += 1
+    return count
+
+
 def add_reference_line(
     ax: Axes,
     value: float,
@@ -0,0 +1,297 @@
+"""
+V4 Surface Animation
+
+Rotating animations of 3-D sensitivity surfaces.
+
+Responsibilities:
+- Build the surface figure (mesh, contour projection, colour bar, labels)
+  once per worker and only change the view angle between frames
+- Render frames straight from the Agg canvas buffer on a process pool,
+  each worker taking a contiguous block of azimuths
+- Cache frames as PNG files keyed by a content hash of the surface, view
+  angle and resolution, so re-running an unchanged animation renders nothing
+- Fit the frame count and resolution to an optional time budget from the
+  measured cost of one frame
+- Encode GIF, WebP and APNG with Pillow and MP4 through ``ffmpeg`` when it
+  is on the PATH
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+
+from ..core.hashing import hash_object
+from .figure_service import _init_worker
+from .publication import JournalStandards, journal_style
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("gif", "webp", "apng", "mp4")
+SUFFIXES = {"gif": ".gif", "webp": ".webp", "apng": ".apng", "mp4": ".mp4"}
+INDEX_NAME = "frames.json"
+
+
+@dataclass
+class SurfaceSpec:
+    """Data and labels of one surface; ``z`` has shape ``(len(y), len(x))``."""
+
+    x: np.ndarray
+    y: np.ndarray
+    z: np.ndarray
+    x_label: str
+    y_label: str
+    z_label: str
+    title: str = ""
+    cmap: str = "viridis"
+    contour_levels: int = 15
+    figsize: Tuple[float, float] = (12, 9)
+    standards: JournalStandards = field(default_factory=JournalStandards)
+
+
+@dataclass
+class AnimationSettings:
+    """
+    Frame plan and outputs of a rotating animation.
+
+    With ``time_budget`` (seconds) set, ``frames`` and ``dpi`` are upper
+    bounds: the frame count drops first (not below ``min_frames``), then
+    the resolution (not below ``min_dpi``).
+    """
+
+    frames: int = 36
+    dpi: int = 150
+    elevation: float = 30.0
+    fps: float = 10.0
+    formats: Tuple[str, ...] = ("gif",)
+    n_jobs: int = 1
+    time_budget: Optional[float] = None
+    min_frames: int = 12
+    min_dpi: int = 60
+    cache_dir: Optional[Path] = None
+
+
+@dataclass
+class AnimationResult:
+    """Outputs and frame statistics of one ``animate_surface`` call."""
+
+    paths: Dict[str, Path]
+    frames: int
+    dpi: int
+    rendered: int
+    cached: int
+    seconds: float
+
+
+def build_surface_figure(spec: SurfaceSpec, dpi: Optional[int] = None) -> Tuple[Figure, Axes]:
+    """Surface with a filled contour projection below it, labels and colour bar."""
+    X, Y = np.meshgrid(spec.x, spec.y)
+    fig = plt.figure(figsize=spec.figsize, dpi=dpi or spec.standards.min_dpi)
+    ax = fig.add_subplot(111, projection='3d')
+
+    surf = ax.plot_surface(
+        X, Y, spec.z,
+        cmap=spec.cmap,
+        alpha=0.8,
+        edgecolor='none',
+        antialiased=True,
+        rstride=1, cstride=1
+    )
+
+    # Offset the contour projection slightly below the surface to avoid clipping
+    z_min = float(spec.z.min())
+    z_max = float(spec.z.max())
+    contour_offset = z_min - 0.02 * max(1e-6, z_max - z_min)
+    ax.contourf(X, Y, spec.z, zdir='z', offset=contour_offset, cmap=spec.cmap, alpha=0.6,
+                levels=spec.contour_levels)
+    ax.set_zlim(contour_offset, z_max)
+
+    ax.set_xlabel(spec.x_label, fontsize=11, fontweight='bold', labelpad=10)
+    ax.set_ylabel(spec.y_label, fontsize=11, fontweight='bold', labelpad=10)
+    ax.set_zlabel(spec.z_label, fontsize=11, fontweight='bold', labelpad=10)
+    ax.set_title(spec.title, fontsize=14, fontweight='bold', pad=20)
+
+    cbar = fig.colorbar(surf, ax=ax, shrink=0.6, aspect=10, pad=0.1)
+    cbar.set_label(spec.z_label, rotation=270, labelpad=20, fontsize=10)
+    return fig, ax
+
+
+def azimuths(n_frames: int) -> np.ndarray:
+    """Evenly spaced view azimuths for one full turn (the last frame loops to the first)."""
+    return np.linspace(0.0, 360.0, n_frames, endpoint=False)
+
+
+def plan_frames(seconds_per_frame: float, settings: AnimationSettings) -> Tuple[int, int]:
+    """
+    Frame count and dpi that fit ``settings.time_budget``.
+
+    Render time is taken as proportional to the frame count and to the
+    pixel count (dpi squared), shared across ``settings.n_jobs`` workers.
+
+    Returns:
+        (frames, dpi)
+    """
+    if settings.time_budget is None or seconds_per_frame <= 0:
+        return settings.frames, settings.dpi
+    affordable = settings.time_budget * max(1, settings.n_jobs) / seconds_per_frame
+    if affordable >= settings.frames:
+        return settings.frames, settings.dpi
+    if affordable >= settings.min_frames:
+        return int(affordable), settings.dpi
+    dpi = int(settings.dpi * math.sqrt(affordable / settings.min_frames))
+    return settings.min_frames, max(settings.min_dpi, dpi)
+
+
+def _render_frames(spec: SurfaceSpec, frames: Sequence[Tuple[float, str]], elevation: float,
+                   dpi: int) -> List[float]:
+    """Build the figure once and save each (azimuth, path) frame; returns seconds per frame."""
+    from PIL import Image
+
+    seconds = []
+    with journal_style(spec.standards):
+        fig, ax = build_surface_figure(spec, dpi)
+        fig.tight_layout()
+        try:
+            for azimuth, path in frames:
+                start = time.perf_counter()
+                ax.view_init(elev=elevation, azim=azimuth)
+                fig.canvas.draw()
+                # Fast lossless cache: RGB with run-length PNG compression
+                Image.fromarray(np.asarray(fig.canvas.buffer_rgba())[..., :3]).save(path, compress_type=3)
+                seconds.append(time.perf_counter() - start)
+        finally:
+            plt.close(fig)
+    return seconds
+
+
+def _load_frames(paths: Sequence[Path]) -> List:
+    """Cached frames as RGB images cropped to the union of their content boxes."""
+    from PIL import Image, ImageChops
+
+    images = [Image.open(path).convert("RGB") for path in paths]
+    background = Image.new("RGB", images[0].size, images[0].getpixel((0, 0)))
+    boxes = np.array([ImageChops.difference(image, background).getbbox() or (0, 0) + images[0].size
+                      for image in images])
+    box = (int(boxes[:, 0].min()), int(boxes[:, 1].min()), int(boxes[:, 2].max()), int(boxes[:, 3].max()))
+    return [image.crop(box) for image in images]
+
+
+def _encode(images: Sequence, output: Path, fmt: str, fps: float) -> Optional[Path]:
+    """Write one animation file from frame images (``None`` if the encoder is unavailable)."""
+    from PIL import Image
+
+    target = output.with_suffix(SUFFIXES[fmt])
+    duration = int(round(1000 / fps))
+    if fmt == "mp4":
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            logger.warning("ffmpeg not found; skipping %s", target)
+            return None
+        width, height = images[0].size
+        command = [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                   "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                   "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", "libx264", "-pix_fmt", "yuv420p", str(target)]
+        with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+            for image in images:
+                process.stdin.write(image.tobytes())
+            process.stdin.close()
+        if process.returncode:
+            raise RuntimeError(f"ffmpeg exited with status {process.returncode} writing {target}")
+        return target
+
+    options = {}
+    if fmt == "gif":
+        # One palette for the whole animation instead of quantizing every frame from
+        # scratch; Pillow's inter-frame optimisation costs more than it saves here
+        palette = images[0].quantize(colors=255, method=Image.Quantize.FASTOCTREE)
+        images = [image.quantize(palette=palette, dither=Image.Dither.NONE) for image in images]
+        options = {"optimize": False}
+    elif fmt == "apng":
+        options = {"format": "PNG", "compress_level": 1}
+    elif fmt == "webp":
+        options = {"quality": 80, "method": 0}
+    images[0].save(target, save_all=True, append_images=list(images[1:]), duration=duration, loop=0, **options)
+    return target
+
+
+def animate_surface(
+    spec: SurfaceSpec,
+    output_path: Path,
+    settings: Optional[AnimationSettings] = None,
+) -> AnimationResult:
+    """
+    Render a rotating animation of ``spec`` next to ``output_path``.
+
+    Args:
+        spec: Surface data and labels
+        output_path: Base path; each format replaces the suffix
+        settings: Frame plan, workers, formats and cache location
+
+    Returns:
+        AnimationResult with the written files and how many frames were
+        rendered or reused from the cache
+    """
+    settings = settings or AnimationSettings()
+    unknown = set(settings.formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown animation formats {sorted(unknown)}, expected some of {FORMATS}")
+    start = time.perf_counter()
+    output_path = Path(output_path)
+    cache_dir = Path(settings.cache_dir or output_path.parent / f".{output_path.stem}_frames")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index_path = cache_dir / INDEX_NAME
+    index: Dict[str, float] = json.loads(index_path.read_text()) if index_path.exists() else {}
+    surface_key = hash_object(spec)
+
+    def frame_path(azimuth: float, dpi: int) -> Path:
+        key = hash_object([surface_key, settings.elevation, float(azimuth), dpi], length=24)
+        return cache_dir / f"{key}.png"
+
+    frames, dpi, probed = settings.frames, settings.dpi, 0
+    if settings.time_budget is not None:
+        # Time one frame at full resolution (reused from the index when cached)
+        probe = frame_path(0.0, dpi)
+        if probe.name not in index or not probe.exists():
+            index[probe.name] = _render_frames(spec, [(0.0, str(probe))], settings.elevation, dpi)[0]
+            probed = 1
+        frames, dpi = plan_frames(index[probe.name], settings)
+
+    paths = [frame_path(azimuth, dpi) for azimuth in azimuths(frames)]
+    todo = [(float(azimuth), str(path)) for azimuth, path in zip(azimuths(frames), paths) if not path.exists()]
+    n_workers = max(1, min(settings.n_jobs, len(todo)))
+    blocks = [list(block) for block in np.array_split(np.arange(len(todo)), n_workers) if len(block)]
+    chunks = [[todo[i] for i in block] for block in blocks]
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as pool:
+            timings = list(pool.map(_render_frames, [spec] * len(chunks), chunks,
+                                    [settings.elevation] * len(chunks), [dpi] * len(chunks)))
+    else:
+        timings = [_render_frames(spec, chunk, settings.elevation, dpi) for chunk in chunks]
+    for chunk, seconds in zip(chunks, timings):
+        index.update({Path(path).name: elapsed for (_, path), elapsed in zip(chunk, seconds)})
+    index_path.write_text(json.dumps(index, indent=2, sort_keys=True))
+
+    written = {}
+    images = _load_frames(paths) if settings.formats else []
+    for fmt in settings.formats:
+        target = _encode(images, output_path, fmt, settings.fps)
+        if target is not None:
+            written[fmt] = target
+    elapsed = time.perf_counter() - start
+    rendered = len(todo) + probed
+    logger.info("Animation %s: %d frames at %d dpi (%d rendered, %d cached) in %.1fs",
+                output_path.stem, frames, dpi, rendered, frames - len(todo), elapsed)
+    return AnimationResult(paths=written, frames=frames, dpi=dpi, rendered=rendered,
+                           cached=frames - len(todo), seconds=elapsed)
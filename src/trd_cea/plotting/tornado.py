@@ -63,6 +63,8 @@ def plot_tornado(dsa_df, output_path='nextgen_v3/out/tornado_v3.png',
     ax.legend(loc='upper right', frameon=True, fancybox=True, shadow=True)
     ax.grid(True, alpha=0.3, axis='x')
     
+    if output_path is None:
+        return fig
     # Save with high quality
     save_publication_figure(fig, output_path)
     plt.close()
\ No newline at end of file
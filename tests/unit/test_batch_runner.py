@@ -0,0 +1,99 @@
+"""
+Unit tests for the manifest-driven batch runner.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.trd_cea.models.batch_runner import AnalysisManifest, run_batch
+from src.trd_cea.cli import main
+
+
+def _write_psa(path: Path, jurisdiction: str, perspective: str, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for draw in range(200):
+        for strategy, cost, effect in (('UC', 5000, 2.0), ('ECT', 15000, 2.3), ('IV-KA', 9000, 2.2)):
+            rows.append({'draw': draw, 'strategy': strategy,
+                         'cost': cost + rng.normal(0, 500), 'effect': effect + rng.normal(0, 0.05),
+                         'perspective': perspective, 'jurisdiction': jurisdiction})
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+class TestBatchRunner(unittest.TestCase):
+    """Manifest expansion, dispatch and consolidated output."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        inputs = []
+        for i, (jur, persp) in enumerate([('AU', 'healthcare'), ('NZ', 'societal')]):
+            path = self.root / f"psa_{jur}_{persp}.csv"
+            _write_psa(path, jur, persp, i)
+            inputs.append(str(path))
+        self.manifest_data = {
+            'inputs': inputs,
+            'jurisdictions': ['AU', 'NZ'],
+            'perspectives': ['healthcare', 'societal'],
+            'analyses': ['cea', 'voi', 'dcea', 'bia'],
+            'wtp': {'min': 0, 'max': 100000, 'step': 25000, 'default': 50000},
+            'output': str(self.root / "out" / "results.parquet"),
+            'n_jobs': 2,
+        }
+
+    def test_runs_all_analyses_once_per_slice(self):
+        result = run_batch(AnalysisManifest.from_dict(self.manifest_data))
+        completed = result.index[result.index['status'] == 'completed']
+        self.assertEqual(len(completed), 8)
+        self.assertTrue(result.output_path.exists())
+        self.assertTrue((self.root / "out" / "results_index.json").exists())
+
+        stored = pd.read_parquet(result.output_path)
+        self.assertEqual(len(stored), len(result.results))
+        evpi = result.select(input='psa_AU_healthcare', analysis='voi', metric='evpi_per_person')
+        self.assertEqual(len(evpi), 5)
+        self.assertTrue((evpi['value'] >= 0).all())
+
+    def test_cea_matches_direct_calculation(self):
+        manifest = AnalysisManifest.from_dict({**self.manifest_data, 'analyses': ['cea']})
+        result = run_batch(manifest, write=False)
+        psa = pd.read_csv(self.manifest_data['inputs'][0])
+        expected = psa.groupby('strategy')['cost'].mean()
+        got = result.select(input='psa_AU_healthcare', metric='cost_mean').set_index('strategy')['value']
+        for strategy, value in expected.items():
+            self.assertAlmostEqual(got[strategy], value, places=6)
+
+    def test_unknown_analysis_rejected(self):
+        with self.assertRaises(ValueError):
+            AnalysisManifest.from_dict({**self.manifest_data, 'analyses': ['cea', 'markov']})
+
+    def test_cli_batch_command(self):
+        manifest_path = self.root / "manifest.yml"
+        manifest_path.write_text(yaml.safe_dump(self.manifest_data))
+        output = self.root / "cli" / "results.csv"
+        self.assertEqual(main(['batch', str(manifest_path), '--output', str(output)]), 0)
+        self.assertTrue(output.exists())
+
+    def test_cli_voi_types_and_dcea_equity(self):
+        self.manifest_data['output'] = str(self.root / "cli" / "results.csv")
+        manifest_path = self.root / "manifest.yml"
+        manifest_path.write_text(yaml.safe_dump(self.manifest_data))
+
+        self.assertEqual(main(['voi', '--config', str(manifest_path), '--type', 'evppi']), 0)
+        metrics = set(pd.read_csv(self.root / "cli" / "results.csv")['metric'])
+        self.assertTrue({'evppi_cost_ect', 'evppi_effect_iv_ketamine', 'evppi_cost_usual_care'} <= metrics)
+
+        self.assertEqual(main(['dcea', '--config', str(manifest_path), '--include-equity']), 0)
+        dcea = pd.read_csv(self.root / "cli" / "results.csv")
+        ratio = dcea[dcea['metric'] == 'equity_efficiency_ratio']
+        self.assertEqual(len(ratio), 2 * 3)
+
+        self.assertEqual(main(['voi', '--config', str(manifest_path), '--type', 'evsi']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
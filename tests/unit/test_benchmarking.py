@@ -0,0 +1,96 @@
+"""Tests for the offline benchmark runner."""
+import shutil
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.core.benchmarking import (
+    SYNTHETIC_STRATEGIES,
+    BenchmarkRecord,
+    BenchmarkRun,
+    compare_runs,
+    discover,
+    format_report,
+    result_path,
+    run_suite,
+    synthetic_psa,
+)
+
+SUITE = '''
+class Sums:
+    params = [10, 1000]
+    param_names = ["n_draws"]
+
+    def setup(self, n_draws):
+        self.values = list(range(n_draws))
+
+    def time_sum(self, n_draws):
+        sum(self.values)
+
+    def peakmem_copy(self, n_draws):
+        [v + 1 for v in self.values]
+
+    def time_unsupported(self, n_draws):
+        raise NotImplementedError
+'''
+
+
+def _run(values, commit="abc"):
+    records = [BenchmarkRecord(name, "time", {"n_draws": 10}, value, "s") for name, value in values.items()]
+    return BenchmarkRun(commit=commit, dirty=False, timestamp="", machine={"node": "test"}, records=records)
+
+
+class TestBenchmarking(unittest.TestCase):
+    """Discovery, measurement, storage and regression checks."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.suite = self.root / "suite_under_test"
+        self.suite.mkdir()
+        (self.suite / "__init__.py").write_text("")
+        (self.suite / "bench_sums.py").write_text(textwrap.dedent(SUITE))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_discover_and_run_suite(self):
+        cases = discover(self.suite)
+        self.assertEqual(len(cases), 6)
+        self.assertEqual([c.label for c in discover(self.suite, pattern="time_sum", sizes=[1000])],
+                         ["bench_sums.Sums.time_sum(n_draws=1000)"])
+
+        run = run_suite(self.suite, sizes=[1000], repeat=2, max_time=1.0, repo=self.root)
+        records = {r.name: r for r in run.records}
+        self.assertGreater(records["bench_sums.Sums.time_sum"].value, 0)
+        self.assertEqual(records["bench_sums.Sums.peakmem_copy"].unit, "bytes")
+        self.assertGreater(records["bench_sums.Sums.peakmem_copy"].value, 0)
+        self.assertEqual(records["bench_sums.Sums.time_unsupported"].error, "skipped")
+
+        path = run.save(result_path(run, self.root / "results"))
+        pd.testing.assert_frame_equal(BenchmarkRun.load(path).to_frame(), run.to_frame())
+
+    def test_regressions_against_baseline(self):
+        baseline = _run({"a": 1.0, "b": 1.0, "gone": 1.0})
+        current = _run({"a": 1.1, "b": 2.0, "new": 1.0}, commit="def")
+        comparison = compare_runs(current, baseline, factor=1.25)
+        self.assertEqual(sorted(comparison["name"]), ["a", "b"])
+        self.assertEqual(comparison.set_index("name")["regressed"].to_dict(), {"a": False, "b": True})
+        report = format_report(current, comparison)
+        self.assertIn("REGRESSION", report)
+        self.assertIn("1 regression(s) of 2", report)
+
+    def test_synthetic_psa_shape(self):
+        psa = synthetic_psa(200)
+        self.assertEqual(len(psa.table), 200 * len(SYNTHETIC_STRATEGIES))
+        self.assertEqual(psa.strategies, list(SYNTHETIC_STRATEGIES))
+        cost = psa.table["cost"].to_numpy().reshape(200, -1)
+        self.assertTrue((cost > 0).all())
+        np.testing.assert_array_equal(synthetic_psa(200).table["effect"], psa.table["effect"])
+
+
+if __name__ == "__main__":
+    unittest.main()
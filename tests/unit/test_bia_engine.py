@@ -0,0 +1,59 @@
+"""Tests for the cohort-flow budget impact engine."""
+import unittest
+
+import numpy as np
+
+from src.trd_cea.models.bia_engine import (
+    PopulationInputs,
+    budget_impact,
+    cohort_budgets,
+    cohort_cost_streams,
+    compute_bia,
+    market_shares,
+)
+
+
+class TestBIAEngine(unittest.TestCase):
+    """Cohort flow, displacement and PSA summaries."""
+
+    def test_cohort_flow_matches_loop(self):
+        rng = np.random.default_rng(1)
+        streams = rng.gamma(2.0, 1000.0, size=(7, 3, 4))
+        entrants = PopulationInputs('AU', prevalent=500, incident=[100, 120]).entrants(4)
+        np.testing.assert_allclose(entrants, [600, 120, 120, 120])
+
+        budgets = cohort_budgets(streams, entrants)
+        expected = np.zeros((7, 3, 4))
+        for start in range(4):
+            for year in range(start, 4):
+                expected[:, :, year] += entrants[start] * streams[:, :, year - start]
+        np.testing.assert_allclose(budgets, expected)
+
+    def test_displacement_and_exceedance(self):
+        shares = market_shares(['ECT', 'rTMS', 'KET'], {'ECT': 0.6, 'rTMS': 0.4},
+                               {'KET': [0.1, 0.2]}, 2, displacement={'KET': {'ECT': 1.0}})
+        np.testing.assert_allclose(shares['scenario'], [[0.5, 0.4, 0.1], [0.4, 0.4, 0.2]])
+        with self.assertRaises(ValueError):
+            market_shares(['ECT', 'KET'], {'ECT': 1.0}, {'KET': [1.5]}, 1)
+
+        streams = np.zeros((4, 2, 2))
+        streams[:, 1, 0] = [0.0, 10.0, 20.0, 30.0]           # new strategy costs more in some draws
+        result = budget_impact(streams, ['ECT', 'KET'], PopulationInputs('NZ', incident=100),
+                               {'ECT': 1.0}, {'KET': 0.5})
+        np.testing.assert_allclose(result.net[:, 0], [0.0, 500.0, 1000.0, 1500.0])
+        exceed = result.exceedance([600.0])
+        self.assertAlmostEqual(exceed.loc[exceed['year'] == 1, 'probability_exceeds'].item(), 0.5)
+        summary = result.summary()
+        self.assertEqual(set(summary['horizon']), {'annual', 'cumulative'})
+
+    def test_cohort_streams_from_markov_model(self):
+        settings = {'time_horizon_years': 2, 'cycle_length_months': 1}
+        inputs = [{'remission_rates': {'ECT_std': r, 'IV_ketamine': 0.35}} for r in (0.3, 0.5)]
+        streams = cohort_cost_streams(['ECT_std', 'IV_ketamine'], 'AU', 'health_system', settings, inputs, 3)
+        self.assertEqual(streams.shape, (2, 2, 3))
+        self.assertTrue((np.diff(streams, axis=2) <= 1e-9).all())  # maintenance phase and mortality
+
+        settings['bia'] = {'years': 3, 'population': {'AU': {'prevalent': 1000, 'incident': 200}}}
+        df = compute_bia('IV_ketamine', 'AU', settings, inputs)
+        self.assertEqual(list(df['year']), [1, 2, 3])
+        self.assertTrue((np.diff(df['adoption']) > 0).all())
@@ -0,0 +1,59 @@
+"""
+Unit tests for the capacity discrete-event simulator.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.models.capacity_des import (
+    ServiceSpec,
+    apply_capacity_qaly_loss,
+    delay_qaly_loss,
+    simulate_capacity,
+)
+
+
+class TestCapacityDES(unittest.TestCase):
+    """Session-capacity queue simulation."""
+
+    def setUp(self):
+        self.service = ServiceSpec(
+            "ECT", sessions={8: 0.4, 12: 0.6}, sessions_per_week=3,
+            priority_shares=(0.3, 0.7), patience_days=(None, 30), patience_shape=1.5,
+        )
+
+    def test_patient_flow_is_conserved(self):
+        sim = simulate_capacity(self.service, 6, 0.6, horizon_days=200, n_replications=64, seed=3)
+        reps = sim.replications
+        np.testing.assert_array_equal(
+            reps["arrived"], reps["started"] + reps["reneged"] + reps["still_waiting"])
+        self.assertTrue((reps["utilization"] <= 1.0).all())
+        self.assertEqual(sim.summary.loc[0, "reneged_mean"], 0.0)
+
+    def test_priority_and_reproducibility(self):
+        a = simulate_capacity(self.service, 6, 0.6, horizon_days=200, n_replications=64,
+                              seed=3, n_jobs=1, batch_size=16)
+        b = simulate_capacity(self.service, 6, 0.6, horizon_days=200, n_replications=64,
+                              seed=3, n_jobs=4, batch_size=16)
+        pd.testing.assert_frame_equal(a.summary, b.summary)
+        waits = a.summary["mean_wait_days"]
+        self.assertLess(waits[0], waits[1])
+
+    def test_qaly_loss_feeds_incremental_results(self):
+        sim = simulate_capacity(self.service, 6, 0.6, horizon_days=200, n_replications=32, seed=3)
+        loss = delay_qaly_loss(sim, utility_gain=0.2)
+        overall = loss.loc[loss["priority_class"] == "all", "qaly_loss_per_referral"].iloc[0]
+        self.assertGreater(overall, 0.0)
+
+        incremental = pd.DataFrame({
+            "arm": ["ECT"], "incremental_cost": [1000.0], "incremental_qaly": [0.1], "icer": [10000.0],
+        })
+        adjusted = apply_capacity_qaly_loss(incremental, {"ECT": overall}, comparator="UC")
+        self.assertAlmostEqual(adjusted.loc[0, "incremental_qaly"], 0.1 - overall)
+        self.assertAlmostEqual(adjusted.loc[0, "icer"], 1000.0 / (0.1 - overall))
+
+
+if __name__ == '__main__':
+    unittest.main()
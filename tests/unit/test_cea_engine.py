@@ -0,0 +1,87 @@
+"""
+Unit tests for the broadcast Markov CEA runner.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from src.trd_cea.models.cea_engine import (
+    run_cea_all_arms, run_opportunity_cost_scenarios, simulate_arm, simulate_arm_grid)
+
+
+class TestCEABroadcast(unittest.TestCase):
+    """Jurisdiction x perspective broadcasting matches per-cell simulation."""
+
+    def setUp(self):
+        self.out = Path(tempfile.mkdtemp())
+        self.settings = {
+            'time_horizon_years': 2,
+            'cycle_length_months': 1,
+            'discount_costs': {'AU': 0.05, 'NZ': 0.035},
+            'discount_qalys': {'AU': 0.05, 'NZ': 0.035},
+            'arms': ['ECT_std', 'IV_ketamine', 'rTMS'],
+            'jurisdictions': ['AU', 'NZ'],
+            'perspectives': ['health_system', 'societal'],
+            'out_dir': f"{self.out}/",
+        }
+        self.settings_path = self.out / "settings.yml"
+        self.settings_path.write_text(yaml.safe_dump(self.settings))
+        self.inputs = {'remission_rates': {'ECT_std': 0.4, 'IV_ketamine': 0.35}}
+
+    def test_grid_matches_single_cells(self):
+        grid = simulate_arm_grid('IV_ketamine', ['AU', 'NZ'], ['health_system', 'societal'],
+                                 self.settings, self.inputs)
+        for j, jur in enumerate(['AU', 'NZ']):
+            for p, pers in enumerate(['health_system', 'societal']):
+                single = simulate_arm('IV_ketamine', jur, pers, self.settings, self.inputs)
+                self.assertAlmostEqual(grid.cost[0, j, p], single.cost)
+                self.assertAlmostEqual(grid.qaly[0, j, p], single.qaly)
+
+    def test_incrementals_are_differences_against_comparator(self):
+        res = run_cea_all_arms(self.settings_path, self.inputs, out_dir=str(self.out))
+        self.assertEqual(len(res.results), 3 * 2 * 2)
+        base = res.results[res.results['arm'] == 'ECT_std'].set_index(['jurisdiction', 'perspective'])
+        row = res.incremental.iloc[0]
+        ref = base.loc[(row['jurisdiction'], row['perspective'])]
+        arm = res.results.set_index(['arm', 'jurisdiction', 'perspective']).loc[
+            (row['arm'], row['jurisdiction'], row['perspective'])]
+        self.assertAlmostEqual(row['incremental_cost'], arm['total_cost'] - ref['total_cost'])
+        self.assertTrue((self.out / "incremental_vs_ECT_std_v3.csv").exists())
+
+    def test_parameter_draws_axis(self):
+        draws = [{'remission_rates': {'ECT_std': r}} for r in np.linspace(0.2, 0.5, 5)]
+        res = run_cea_all_arms(self.settings_path, draws, out_dir=str(self.out))
+        self.assertEqual(len(res.results), 3 * 2 * 2 * 5)
+        ect = res.results[(res.results['arm'] == 'ECT_std') & (res.results['jurisdiction'] == 'AU')
+                          & (res.results['perspective'] == 'health_system')]
+        # Higher remission rates give more QALYs
+        self.assertTrue(np.all(np.diff(ect.sort_values('draw')['total_qaly'].to_numpy()) > 0))
+
+    def test_opportunity_cost_uses_mean_over_draws(self):
+        draws = [{'remission_rates': {'ECT_std': r, 'IV_ketamine': 0.35}} for r in (0.2, 0.35, 0.5)]
+        settings = {**self.settings, 'arms': ['ECT_std', 'IV_ketamine'], 'perspectives': ['health_system'],
+                    'opportunity_cost': {'use_k': True, 'k_values': {'AU': [25000], 'NZ': [40000]},
+                                         'apply_in': ['CEA']}}
+        cwd = os.getcwd()
+        os.chdir(self.out)
+        self.addCleanup(os.chdir, cwd)
+        df = run_opportunity_cost_scenarios(settings, draws)
+
+        ect = simulate_arm_grid('ECT_std', ['AU', 'NZ'], ['health_system'], settings, draws)
+        ivk = simulate_arm_grid('IV_ketamine', ['AU', 'NZ'], ['health_system'], settings, draws)
+        inc_cost = (ivk.cost - ect.cost).mean(axis=0)
+        inc_qaly = (ivk.qaly - ect.qaly).mean(axis=0)
+        # The first draw alone differs from the mean
+        self.assertNotAlmostEqual(inc_qaly[0, 0], (ivk.qaly - ect.qaly)[0, 0, 0])
+        got = df.set_index('jurisdiction')['INMB_standard']
+        self.assertAlmostEqual(got['AU'], inc_qaly[0, 0] * 50000 - inc_cost[0, 0])
+        self.assertAlmostEqual(got['NZ'], inc_qaly[1, 0] * 50000 - inc_cost[1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
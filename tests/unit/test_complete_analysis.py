@@ -0,0 +1,146 @@
+"""
+Unit tests for the complete V4 analysis runner.
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.cli import main
+from src.trd_cea.models import dcea_engine, vbp_engine, voi_engine
+from src.trd_cea.models.complete_analysis import (
+    ANALYSES,
+    CompleteAnalysisConfig,
+    SharedPSA,
+    StrategySubset,
+    efficiency_frontier,
+    run_complete_analysis,
+)
+from src.trd_cea.models.io import PSAData, StrategyConfig
+
+STRATEGIES = (('UC', 5000, 2.0), ('ECT', 15000, 2.3), ('IV-KA', 9000, 2.2), ('rTMS', 12000, 2.05))
+
+
+def _psa_table(seed: int, jurisdiction: str = 'AU', perspective: str = 'healthcare') -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for draw in range(200):
+        for strategy, cost, effect in STRATEGIES:
+            rows.append({'draw': draw, 'strategy': strategy,
+                         'cost': cost + rng.normal(0, 500), 'effect': effect + rng.normal(0, 0.05),
+                         'perspective': perspective, 'jurisdiction': jurisdiction})
+    return pd.DataFrame(rows)
+
+
+def _psa(table: pd.DataFrame) -> PSAData:
+    strategies = [s for s, _, _ in STRATEGIES]
+    config = StrategyConfig(base='UC', perspectives=['healthcare'], strategies=strategies,
+                            prices={s: 0 for s in strategies}, effects_unit='QALY', currency='AUD')
+    return PSAData(table=table, config=config, perspective='healthcare', jurisdiction='AU')
+
+
+class TestCompleteAnalysis(unittest.TestCase):
+    """Strategy subsets, shared derived quantities and the end-to-end run."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.lambda_grid = np.arange(0, 100001, 25000.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_shared_quantities_match_engines(self):
+        psa = _psa(_psa_table(0))
+        shared = SharedPSA.derive(psa, self.lambda_grid, 50000)
+        self.assertEqual(shared.nmb.shape, (5, 200, 4))
+        np.testing.assert_allclose(shared.prob_optimal.sum(axis=1), 1.0)
+
+        config = CompleteAnalysisConfig.from_dict({'inputs': [], 'jurisdictions': ['AU'],
+                                                   'perspectives': ['healthcare']})
+        voi = ANALYSES['voi'](shared, config, {'population': 1000})
+        expected = voi_engine.calculate_evpi(psa, self.lambda_grid, population_size=1000)
+        pd.testing.assert_frame_equal(voi['evpi'], expected.evpi)
+        pd.testing.assert_frame_equal(voi['population_evpi'], expected.population_evpi, check_dtype=False)
+
+        vbp = ANALYSES['vbp'](shared, config, {})
+        curves = vbp_engine.calculate_vbp_curves(psa, self.lambda_grid)
+        pd.testing.assert_frame_equal(vbp['vbp_curves'], curves, check_dtype=False)
+
+        dcea = ANALYSES['dcea'](shared, config, {'epsilon': 3.0})['distributional_ceac']
+        np.testing.assert_allclose(dcea.groupby('lambda')['probability_optimal'].sum(), 1.0)
+        ede = dcea_engine.calculate_ede_qalys(shared.effect[:, 1], epsilon=3.0)
+        row = dcea[(dcea['lambda'] == 50000) & (dcea['strategy'] == 'ECT')].iloc[0]
+        self.assertAlmostEqual(row['equity_weighted_nmb'], 50000 * ede - shared.cost[:, 1].mean(), places=4)
+
+        options = {'arms': {'UC': 'Control', 'ECT': 'ECT', 'IV-KA': 'IV_Ketamine'}, 'time_horizon': 2,
+                   'inputs': {'remission_rates': {'Control': 0.2, 'ECT': 0.45, 'IV_Ketamine': 0.35}}}
+        with self.assertLogs('src.trd_cea.models.complete_analysis', level='WARNING') as logs:
+            dsa = ANALYSES['dsa'](shared, config, options)
+        self.assertIn('rTMS', logs.output[0])
+        self.assertEqual(set(dsa['tornado_owsa']['strategy']), {'ECT', 'IV-KA'})
+        self.assertIn('remission_rates.ECT', set(dsa['dsa_twoway']['param1']))
+        inmb = dsa['tornado_owsa'].groupby('strategy')['base_outcome'].first()
+        self.assertNotAlmostEqual(inmb['ECT'], inmb['IV-KA'])
+
+        # Without clinical inputs no strategy has a meaningful DSA
+        with self.assertLogs('src.trd_cea.models.complete_analysis', level='WARNING'):
+            dsa = ANALYSES['dsa'](shared, config, {'arms': options['arms'], 'time_horizon': 2})
+        self.assertEqual(set(dsa), {'tornado_prcc', 'scenarios'})
+
+    def test_subset_and_frontier(self):
+        psa = _psa(_psa_table(1))
+        no_uc = StrategySubset.from_config('no_uc').apply(psa)
+        self.assertEqual(no_uc.strategies, ['ECT', 'IV-KA', 'rTMS'])
+        self.assertEqual(no_uc.config.base, 'ECT')
+        self.assertNotIn('UC', no_uc.config.prices)
+        custom = StrategySubset.from_config({'include': ['rTMS', 'IV-KA', 'UC'], 'base': 'IV-KA'}).apply(psa)
+        self.assertEqual(custom.config.strategies, ['rTMS', 'IV-KA', 'UC'])
+        self.assertEqual(custom.config.base, 'IV-KA')
+        with self.assertRaises(ValueError):
+            StrategySubset(include=['ECT']).apply(psa)
+
+        frontier = efficiency_frontier(['A', 'B', 'C', 'D'], np.array([0.0, 100.0, 150.0, 180.0]),
+                                       np.array([1.0, 1.5, 0.9, 2.0])).set_index('strategy')
+        self.assertEqual(frontier['status'].to_dict(),
+                         {'A': 'frontier', 'B': 'extendedly dominated', 'C': 'dominated', 'D': 'frontier'})
+        self.assertAlmostEqual(frontier.at['D', 'icer'], 180.0)
+
+    def test_runs_analyses_per_slice_and_writes_outputs(self):
+        inputs = []
+        for i, (jur, persp) in enumerate([('AU', 'healthcare'), ('NZ', 'societal')]):
+            path = self.root / f"psa_{jur}_{persp}.csv"
+            _psa_table(i, jur, persp).to_csv(path, index=False)
+            inputs.append(str(path))
+        config = CompleteAnalysisConfig.from_dict({
+            'inputs': inputs, 'jurisdictions': ['AU', 'NZ'], 'perspectives': ['healthcare', 'societal'],
+            'analyses': ['cea', 'voi', 'headroom', 'roi'], 'strategy_subset': 'no_uc',
+            'wtp': {'min': 0, 'max': 100000, 'step': 25000}, 'output_dir': str(self.root / 'out'), 'n_jobs': 2,
+        })
+        result = run_complete_analysis(config)
+        completed = result.index[result.index['status'] == 'completed']
+        self.assertEqual(len(completed), 8, result.index.to_string())
+        self.assertEqual(set(completed['strategies']), {'ECT,IV-KA,rTMS'})
+        self.assertEqual(len(result.shared), 2)
+
+        out = self.root / 'out' / 'psa_AU_healthcare' / 'AU' / 'healthcare'
+        self.assertEqual(len(pd.read_csv(out / 'ceac.csv')), 5 * 3)
+        headroom = pd.read_csv(out / 'headroom.csv')
+        self.assertEqual(set(headroom['strategy']), {'IV-KA', 'rTMS'})
+        index = json.loads((self.root / 'out' / 'complete_index.json').read_text())
+        self.assertEqual(index['strategy_subset']['name'], 'no_uc')
+
+        code = main(['complete', '--input', inputs[0], '--jurisdictions', 'AU', '--perspectives', 'healthcare',
+                     '--analyses', 'cea', '--subset', 'ect_focused', '--output-dir', str(self.root / 'cli'),
+                     '--trace', str(self.root / 'trace.json')])
+        self.assertEqual(code, 0)
+        self.assertTrue((self.root / 'trace.folded').exists())
+        self.assertTrue((self.root / 'cli' / 'psa_AU_healthcare' / 'AU' / 'healthcare' / 'cea_frontier.csv').exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Unit tests for the sqlite-backed data pipeline manager.
+"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from src.trd_cea.core.data_pipeline import DataPipelineManager
+
+
+class TestDataPipelineManager(unittest.TestCase):
+    """Incremental state, content-addressed cache and garbage collection."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.source = self.root / "psa.csv"
+        pd.DataFrame({
+            'strategy': ['ECT', 'IV-KA', 'PO-PSI'],
+            'cost': [10000.0, 8000.0, 6000.0],
+            'effect': [0.60, 0.75, 0.68],
+        }).to_csv(self.source, index=False)
+        self.schema = {'required_columns': ['strategy', 'cost', 'effect'], 'no_nulls': True}
+        self.pm = DataPipelineManager(
+            data_dir=str(self.root / "data"), cache_dir=str(self.root / "cache")
+        )
+
+    def _snapshot(self):
+        return {
+            str(p): (p.stat().st_mtime_ns, p.stat().st_size)
+            for p in self.root.rglob('*') if p.is_file()
+        }
+
+    def _run_pipeline(self):
+        df = self.pm.load_data_with_validation(str(self.source), self.schema)
+        df = self.pm.apply_transformation(df, lambda d: d.assign(nmb=d['effect'] * 50000 - d['cost']), 'nmb')
+        out = self.pm.save_processed_data(df, str(self.root / "out" / "processed.csv"))
+        self.pm.log_pipeline_step('nmb', [str(self.source)], [out])
+        return out
+
+    def test_unchanged_rerun_writes_nothing(self):
+        first = self._run_pipeline()
+        time.sleep(0.01)
+        before = self._snapshot()
+        second = self._run_pipeline()
+        self.assertEqual(first, second)
+        self.assertEqual(before, self._snapshot())
+        self.assertEqual(len(self.pm.metadata['pipeline_history']), 1)
+
+    def test_identical_sources_share_cache_object(self):
+        copy = self.root / "psa_copy.csv"
+        copy.write_bytes(self.source.read_bytes())
+        self.pm.load_data_with_validation(str(self.source), self.schema)
+        self.pm.load_data_with_validation(str(copy), self.schema)
+        self.assertEqual(len(list((self.root / "cache" / "objects").glob("*/*.parquet"))), 1)
+
+    def test_garbage_collector_enforces_budget(self):
+        self._run_pipeline()
+        summary = self.pm.collect_garbage(max_size_mb=0)
+        self.assertEqual(summary['bytes_remaining'], 0)
+        self.assertEqual(list((self.root / "cache" / "objects").glob("*/*.parquet")), [])
+        # The pipeline still works after eviction
+        df = self.pm.load_data_with_validation(str(self.source), self.schema)
+        self.assertEqual(len(df), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
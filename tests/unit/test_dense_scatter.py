@@ -0,0 +1,75 @@
+"""Tests for dense PSA scatter layers."""
+import unittest
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from scipy.spatial import ConvexHull  # noqa: E402
+
+from src.trd_cea.core.nmb import create_ce_plane_data  # noqa: E402
+from src.trd_cea.plotting.dense_scatter import (  # noqa: E402
+    GroupedPoints,
+    group_ellipses,
+    group_hulls,
+    scatter_layer,
+)
+
+
+class TestDenseScatter(unittest.TestCase):
+    """Mode switching, grouped moments and hulls."""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.groups = np.repeat(["ECT", "IV-KA", "PO-PSI"], 3000)
+        self.x = rng.normal(size=9000) + np.repeat([0.0, 0.2, 0.5], 3000)
+        self.y = rng.normal(size=9000) * 1000 + 0.5 * self.x * 1000
+
+    def tearDown(self):
+        plt.close("all")
+
+    def test_auto_mode_switches_to_single_raster(self):
+        fig, ax = plt.subplots()
+        small = scatter_layer(ax, self.x, self.y, self.groups, threshold=10000)
+        self.assertEqual(small.mode, "points")
+        self.assertEqual(len(small.artists), 3)
+
+        fig, ax = plt.subplots()
+        dense = scatter_layer(ax, self.x, self.y, self.groups, threshold=1000, bins=64)
+        self.assertEqual(dense.mode, "raster")
+        self.assertEqual(len(ax.images), 1)
+        self.assertEqual(len(ax.collections), 0)
+        self.assertEqual(ax.images[0].get_array().shape[:2], (64, 64))
+        self.assertEqual([h.get_label() for h in dense.legend_handles({"ECT": "ECT (std)"})],
+                         ["ECT (std)", "IV-KA", "PO-PSI"])
+
+    def test_ellipses_match_group_covariance(self):
+        points = GroupedPoints.from_arrays(self.x, self.y, pd.Categorical(self.groups))
+        ellipses = group_ellipses(points, level=0.95)
+        for code, label in enumerate(points.labels):
+            mask = self.groups == label
+            cov = np.cov(self.x[mask], self.y[mask])
+            eigenvalues = np.linalg.eigvalsh(cov)
+            scale = 5.991464547107979  # chi2(2) 95%
+            self.assertAlmostEqual(ellipses["center_x"][code], self.x[mask].mean())
+            np.testing.assert_allclose(ellipses["width"][code], 2 * np.sqrt(scale * eigenvalues[1]), rtol=1e-8)
+            np.testing.assert_allclose(ellipses["height"][code], 2 * np.sqrt(scale * eigenvalues[0]), rtol=1e-8)
+
+    def test_hulls_and_ce_plane_icers(self):
+        points = GroupedPoints.from_arrays(self.x, self.y, self.groups)
+        for code, vertices in enumerate(group_hulls(points)):
+            mask = points.codes == code
+            xy = np.column_stack([self.x[mask], self.y[mask]])
+            expected = xy[ConvexHull(xy).vertices]
+            self.assertEqual({tuple(v) for v in vertices}, {tuple(v) for v in expected})
+
+        data = create_ce_plane_data(["A", "B", "C"], [100.0, 300.0, 100.0], [1.0, 2.0, 1.0],
+                                    reference_strategy="A")
+        self.assertTrue(np.isnan(data["icer"].iloc[0]))
+        self.assertAlmostEqual(data["icer"].iloc[1], 200.0)
+        self.assertTrue(np.isnan(data["icer"].iloc[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Unit tests for batched deterministic sensitivity analysis.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.trd_cea.models.cea_engine import (
+    get_transition_matrix,
+    simulate_arm_grid,
+    transition_basis,
+)
+from src.trd_cea.models.dsa_batch import CohortDSAModel, evaluate_design, grid_design, tornado_design
+from src.trd_cea.models.sensitivity_engine import run_one_way_dsa, run_three_way_dsa, run_two_way_dsa
+
+
+class TestDSABatch(unittest.TestCase):
+    """Design construction and cohort-model evaluation."""
+
+    def setUp(self):
+        self.settings = {
+            'time_horizon_years': 2,
+            'cycle_length_months': 1,
+            'discount_costs': {'AU': 0.05},
+            'discount_qalys': {'AU': 0.05},
+        }
+        self.inputs = {'remission_rates': {'ECT_std': 0.4, 'IV_ketamine': 0.35}}
+
+    def test_design_order_matches_nested_loops(self):
+        design = grid_design({'c': 9.0}, {'a': [1.0, 2.0], 'b': [10.0, 20.0, 30.0]})
+        expected = [(a, b) for a in (1.0, 2.0) for b in (10.0, 20.0, 30.0)]
+        cols = design.columns()
+        self.assertEqual(list(zip(cols['a'], cols['b'])), expected)
+        np.testing.assert_array_equal(cols['c'], 9.0)
+        self.assertEqual(design.grid_shape(), (2, 3))
+
+        tornado = tornado_design({'x': (1.0, 0.5, 2.0), 'y': (3.0, 1.0, 4.0)})
+        outcomes = evaluate_design(tornado, lambda p: p['x'] * p['y'])
+        np.testing.assert_allclose(outcomes, [3.0, 1.5, 6.0, 1.0, 4.0])
+
+    def test_transition_basis_is_exact(self):
+        P0, G = transition_basis('IV_ketamine', 0)
+        values = {
+            'remission_rates': {'IV_ketamine': 0.27},
+            'partial_response_rates': {'IV_ketamine': 0.15},
+            'relapse_rates': {'IV_ketamine': 0.04},
+            'ae_rates': {'IV_ketamine': 0.02},
+            'death_rates': {'baseline': 0.002},
+        }
+        theta = np.array([0.27, 0.15, 0.04, 0.02, 0.002])
+        np.testing.assert_allclose(P0 + np.einsum('k,kst->st', theta, G),
+                                   get_transition_matrix('IV_ketamine', values, 0), atol=1e-12)
+
+    def test_cohort_grid_matches_direct_simulation(self):
+        model = CohortDSAModel(self.settings, self.inputs, 'IV_ketamine', 'ECT_std',
+                               perspective='healthcare', wtp=50000)
+        design = grid_design(model.base_parameters(), {
+            'remission_rates.IV_ketamine': [0.3, 0.5],
+            'relapse_rates.IV_ketamine': [0.01, 0.03],
+            'remission_rates.ECT_std': [0.4, 0.45],
+        })
+        outcomes = evaluate_design(design, model, batch_size=3)
+        self.assertEqual(outcomes.shape, (8,))
+
+        # Last point checked against a direct run with the modified inputs
+        inputs = dict(self.inputs)
+        inputs['remission_rates'] = {'ECT_std': 0.45, 'IV_ketamine': 0.5}
+        inputs['relapse_rates'] = {'IV_ketamine': 0.03}
+        arm = simulate_arm_grid('IV_ketamine', ['AU'], ['healthcare'], self.settings, inputs)
+        ref = simulate_arm_grid('ECT_std', ['AU'], ['healthcare'], self.settings, inputs)
+        inmb = 50000 * (arm.qaly - ref.qaly) - (arm.cost - ref.cost)
+        self.assertAlmostEqual(outcomes[-1], float(inmb[0, 0, 0]), places=6)
+
+        with self.assertRaises(KeyError):
+            model({'not_a_parameter': np.array([1.0])})
+
+    def test_dsa_tables_come_from_cohort_model(self):
+        model = CohortDSAModel(self.settings, self.inputs, 'IV_ketamine', 'ECT_std', perspective='healthcare')
+        args = (self.settings, self.inputs, 'IV_ketamine', 'ECT_std')
+        kwargs = {'perspective': 'healthcare'}
+
+        tornado = run_one_way_dsa(*args, **kwargs).set_index('parameter')
+        self.assertEqual(set(tornado.index), set(model.parameter_names()))
+        row = tornado.loc['remission_rates.IV_ketamine']
+        self.assertAlmostEqual(row['low_value'], 0.35 * 0.8)
+        self.assertAlmostEqual(row['high_outcome'],
+                               model({'remission_rates.IV_ketamine': np.array([0.35 * 1.2])})[0])
+        self.assertTrue((tornado['range'].diff().dropna() <= 0).all())
+
+        two_way = run_two_way_dsa([('remission_rates', 'relapse_rates')], *args,
+                                  ranges={'remission_rates': [0.3, 0.5]}, n_points=3, **kwargs)
+        self.assertEqual(len(two_way), 6)
+        self.assertEqual(set(two_way['param1']), {'remission_rates.IV_ketamine'})
+        last = two_way.iloc[-1]
+        expected = model({'remission_rates.IV_ketamine': np.array([last['param1_value']]),
+                          'relapse_rates.IV_ketamine': np.array([last['param2_value']])})[0]
+        self.assertAlmostEqual(last['outcome'], expected)
+
+        three_way = run_three_way_dsa(('remission_rates', 'ae_rates', 'remission_rates.ECT_std'), *args, **kwargs)
+        self.assertEqual(len(three_way), 27)
+
+        # An injected vectorised model replaces the cohort model
+        linear = run_one_way_dsa(model=lambda p: 2 * p['x'] + p['y'], parameters={'x': (1.0, 0.0, 2.0),
+                                                                                   'y': (1.0, 0.5, 1.5)})
+        self.assertEqual(linear['parameter'].tolist(), ['x', 'y'])
+        self.assertEqual(linear['range'].tolist(), [4.0, 1.0])
+        with self.assertRaises(ValueError):
+            run_two_way_dsa([('x', 'y')], model=lambda p: p['x'])
+
+
+if __name__ == '__main__':
+    unittest.main()
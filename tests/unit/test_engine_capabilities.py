@@ -0,0 +1,150 @@
+"""Tests for engine capability protocols and the conformance harness."""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.models.base import (
+    AnalysisType,
+    BaseAnalysisEngine,
+    EngineCapabilities,
+    EngineInput,
+    EngineMetadata,
+)
+from src.trd_cea.models.capabilities import (
+    CachedEngine,
+    IncrementalEngine,
+    PersistentEngine,
+    check_conformance,
+    schedule_run,
+)
+from src.trd_cea.models.io import PSAData, StrategyConfig
+from src.trd_cea.models.registry import EngineRegistry
+from src.trd_cea.models.voi_engine import EVPIEngine, calculate_evpi
+
+
+class _MeanCostEngine(CachedEngine, PersistentEngine, IncrementalEngine, BaseAnalysisEngine):
+    """Mean cost per strategy, with draw counts so chunk results can be merged."""
+
+    def _get_default_metadata(self):
+        return EngineMetadata("MeanCost", "1.0", "Toy engine", "tests", AnalysisType.CUA,
+                              capabilities=[EngineCapabilities.VALIDATION])
+
+    def _validate_config(self):
+        pass
+
+    def _validate_input(self, input_data):
+        if input_data.data.table.empty:
+            raise ValueError("no draws")
+
+    def _initialize_engine(self):
+        pass
+
+    def _cleanup_engine(self):
+        pass
+
+    def _run_analysis(self, input_data):
+        grouped = input_data.data.table.groupby("strategy")["cost"]
+        return {"n": grouped.size(), "mean_cost": grouped.mean()}
+
+    def merge_results(self, partials):
+        n = sum(p["n"] for p in partials)
+        total = sum(p["mean_cost"] * p["n"] for p in partials)
+        return {"n": n, "mean_cost": total / n}
+
+
+class _UnweightedMerge(_MeanCostEngine):
+    """Declares incremental results but averages chunk means without weights."""
+
+    def merge_results(self, partials):
+        return {"n": sum(p["n"] for p in partials),
+                "mean_cost": sum(p["mean_cost"] for p in partials) / len(partials)}
+
+
+class TestEngineCapabilities(unittest.TestCase):
+    """Protocols, conformance reports and capability-aware scheduling."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        rng = np.random.default_rng(3)
+        table = pd.DataFrame({"draw": np.repeat(np.arange(50), 2), "strategy": ["UC", "ECT"] * 50,
+                              "cost": rng.gamma(2.0, 500.0, 100)})
+        self.sample = EngineInput(table.iloc[:-2], {})       # 49 draws, uneven chunks
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_engine_conforms_to_declared_capabilities(self):
+        engine = _MeanCostEngine({"persist_dir": str(self.root / "store")})
+        report = check_conformance(engine, self.sample, chunk_size=10)
+        self.assertTrue(report.passed, report.to_frame().to_string())
+        self.assertEqual({check.capability for check in report.checks}, set(engine.get_capabilities()))
+        self.assertNotIn(EngineCapabilities.ASYNC_EXECUTION, report.verified)
+        self.assertFalse((self.root / "store").exists())   # checks use their own store
+
+        chunks = list(engine.iter_chunks(self.sample, 10))
+        self.assertEqual([c.metadata["chunk"] for c in chunks], [0, 1, 2, 3, 4])
+        self.assertEqual(sum(len(c.data) for c in chunks), len(self.sample.data))
+
+    def test_failing_capability_is_reported_and_not_verified(self):
+        report = check_conformance(_UnweightedMerge({}), self.sample, chunk_size=10)
+        failed = {check.capability for check in report.checks if not check.passed}
+        self.assertEqual(failed, {EngineCapabilities.INCREMENTAL_RESULTS, EngineCapabilities.PARALLEL_PROCESSING})
+        self.assertIn(EngineCapabilities.CACHING, report.verified)
+
+        registry = EngineRegistry()
+        registry.register_engine(_MeanCostEngine)
+        registry.register_engine(_UnweightedMerge)
+        parallel = EngineCapabilities.PARALLEL_PROCESSING
+        self.assertEqual(sorted(registry.list_engines_by_capability(parallel)), ["_MeanCostEngine", "_UnweightedMerge"])
+        self.assertEqual(registry.list_engines_by_capability(parallel, verified=True), [])
+        for name in ("_MeanCostEngine", "_UnweightedMerge"):
+            registry.verify_engine(name, self.sample, {"persist_dir": str(self.root / "store")})
+        self.assertEqual(registry.list_engines_by_capability(parallel, verified=True), ["_MeanCostEngine"])
+
+    def test_cache_persistence_and_scheduling(self):
+        config = {"persist_dir": str(self.root / "store"), "tracing": True}
+        engine = _MeanCostEngine(config)
+        whole = engine.run(self.sample)
+        self.assertFalse(whole.metadata["cache_hit"])
+        self.assertTrue(engine.run(self.sample).metadata["cache_hit"])
+        self.assertEqual(engine.cache_key(self.sample), _MeanCostEngine({**config, "tracing": False}).cache_key(self.sample))
+
+        reloaded = _MeanCostEngine(config).run(self.sample)
+        self.assertTrue(reloaded.metadata["persisted"])
+        pd.testing.assert_series_equal(reloaded.results["mean_cost"], whole.results["mean_cost"])
+
+        sharded = schedule_run(engine, self.sample, n_shards=4)
+        self.assertEqual(sharded.metadata["chunks"], 4)
+        pd.testing.assert_series_equal(sharded.results["mean_cost"], whole.results["mean_cost"])
+        progress = []
+        engine.run_incremental(self.sample, 20, callback=lambda merged, i: progress.append(int(merged["n"].sum())))
+        self.assertEqual(progress, [40, 80, 98])
+
+    def test_evpi_engine_merges_chunks_exactly(self):
+        with self.assertRaises(TypeError):
+            type("NoMerge", (IncrementalEngine, BaseAnalysisEngine), {})({})
+
+        rng = np.random.default_rng(5)
+        table = pd.DataFrame({"draw": np.repeat(np.arange(60), 3), "strategy": ["UC", "ECT", "IV-KA"] * 60,
+                              "cost": rng.normal(10000, 3000, 180), "effect": rng.normal(2.0, 0.3, 180)})
+        config = StrategyConfig(base="UC", perspectives=["healthcare"], strategies=["UC", "ECT", "IV-KA"],
+                                prices={}, effects_unit="QALY", currency="AUD")
+        psa = PSAData(table=table, config=config, perspective="healthcare", jurisdiction="AU")
+        grid = np.arange(0, 100001, 25000.0)
+        engine = EVPIEngine({"lambda_grid": grid})
+
+        report = check_conformance(engine, EngineInput(psa, {}), chunk_size=15)
+        self.assertTrue(report.passed, report.to_frame().to_string())
+        sharded = schedule_run(engine, EngineInput(psa, {}), n_shards=4)
+        self.assertEqual(sharded.metadata["chunks"], 4)
+        expected = calculate_evpi(psa, grid).evpi
+        columns = ["lambda", "evpi_per_person", "expected_max_nmb", "max_expected_nmb"]
+        pd.testing.assert_frame_equal(sharded.results["evpi"], expected[columns])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Unit tests for vectorised predictive checks, cross-validation and
+draw-level calibration in the external validation engine.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import KFold
+
+from src.trd_cea.models.external_validation_engine import (
+    ExternalValidationEngine,
+    calibration_target_checks,
+    replicated_statistics,
+)
+
+
+class TestExternalValidation(unittest.TestCase):
+    """Predictive checks, CV folds and calibration targets."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 300
+        self.predictions = pd.DataFrame({
+            'strategy': np.repeat(['A', 'B'], n), 'draw': np.tile(np.arange(n), 2),
+            'effect': np.r_[rng.normal(1.0, 0.2, n), rng.normal(2.0, 0.3, n)],
+        })
+        self.observed = pd.DataFrame({
+            'strategy': np.repeat(['A', 'B'], n), 'draw': np.tile(np.arange(n), 2),
+            'effect': np.r_[rng.normal(1.0, 0.2, n), rng.normal(3.0, 0.3, n)],
+        })
+
+    def test_replicated_statistics_match_per_replicate_loop(self):
+        values = self.predictions['effect'].to_numpy()
+        result = replicated_statistics(values, 50, 40, ['mean', 'std', 'skewness', 'kurtosis'],
+                                       np.random.default_rng(1))
+        index = np.random.default_rng(1).integers(0, len(values), size=(40, 50))
+        for i, row in enumerate(index):
+            sample = values[row]
+            self.assertAlmostEqual(result['mean'][i], sample.mean())
+            self.assertAlmostEqual(result['std'][i], pd.Series(sample).std())
+            self.assertAlmostEqual(result['skewness'][i], stats.skew(sample))
+            self.assertAlmostEqual(result['kurtosis'][i], stats.kurtosis(sample))
+
+    def test_cross_validation_scores(self):
+        engine = ExternalValidationEngine()
+        cv = engine._cross_validate_model(self.predictions, self.observed)
+        merged = pd.merge(self.predictions, self.observed, on=['strategy', 'draw'], suffixes=('_pred', '_obs'))
+        kf = KFold(n_splits=5, shuffle=True, random_state=42)
+        expected = [
+            1.0 / (1.0 + mean_squared_error([merged['effect_pred'].iloc[train].mean()] * len(test),
+                                            merged['effect_obs'].iloc[test]))
+            for train, test in kf.split(merged)
+        ]
+        np.testing.assert_allclose(cv['scores'], expected)
+        self.assertEqual(list(cv['cv_df']['fold']), [1, 2, 3, 4, 5])
+
+        # Too little data: placeholder score and an empty fold table
+        small = engine._cross_validate_model(self.predictions.head(3), self.observed.head(3))
+        self.assertEqual(small['scores'], [0.0])
+        self.assertTrue(small['cv_df'].empty)
+
+    def test_calibration_targets_checked_against_every_draw(self):
+        checks = calibration_target_checks(self.predictions, self.observed).set_index('strategy')
+        self.assertEqual(checks.loc['A', 'n_draws'], 300)
+        self.assertTrue(checks.loc['A', 'target_in_interval'])
+        # Strategy B's target lies above every predicted draw
+        self.assertFalse(checks.loc['B', 'target_in_interval'])
+        self.assertEqual(checks.loc['B', 'draw_p_value'], 0.0)
+
+        results = ExternalValidationEngine().validate_model(self.predictions, self.observed)
+        self.assertEqual(results.validation_summary['calibration']['targets_within_draw_interval'], 0.5)
+        self.assertEqual(len(results.predictive_checks), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Tests for the cached figure rendering service."""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from src.trd_cea.plotting.figure_service import (  # noqa: E402
+    FigureService,
+    FigureStyle,
+    jobs_by_group,
+    render_publication_figures,
+)
+from src.trd_cea.plotting.publication import rasterize_dense_artists  # noqa: E402
+
+
+def plot_plane(frame, title="CE plane"):
+    fig, ax = plt.subplots()
+    ax.scatter(frame["effect"], frame["cost"], s=2)
+    ax.set_title(title)
+    return fig
+
+
+class TestFigureService(unittest.TestCase):
+    """Cache keys, group invalidation and rasterization."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        rng = np.random.default_rng(0)
+        self.psa = pd.DataFrame({
+            "strategy": np.repeat(["ECT", "IV-KA", "PO-PSI"], 200),
+            "effect": rng.normal(size=600),
+            "cost": rng.normal(size=600),
+        })
+        self.style = FigureStyle(formats=("svg", "png"), dpi=72)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_unchanged_figures_are_skipped(self):
+        service = FigureService(self.root, n_jobs=2, style=self.style)
+        service.extend(jobs_by_group("plane_{group}", plot_plane, self.psa, style=self.style))
+        service.add("all", plot_plane, self.psa)
+        self.assertEqual(len(service.render().rendered), 4)
+        self.assertTrue((self.root / "plane_ECT.svg").exists())
+
+        again = FigureService(self.root, style=self.style)
+        again.extend(jobs_by_group("plane_{group}", plot_plane, self.psa, style=self.style))
+        again.add("all", plot_plane, self.psa, title="CE plane")
+        self.assertEqual(sorted(again.render().skipped), ["all", "plane_ECT", "plane_IV-KA", "plane_PO-PSI"])
+
+    def test_one_strategy_change_rerenders_its_figures(self):
+        service = FigureService(self.root, style=self.style)
+        service.extend(jobs_by_group("plane_{group}", plot_plane, self.psa, style=self.style))
+        service.render()
+
+        changed = self.psa.copy()
+        changed.loc[changed["strategy"] == "IV-KA", "cost"] += 1.0
+        service.extend(jobs_by_group("plane_{group}", plot_plane, changed, style=self.style))
+        self.assertEqual(service.stale(), ["plane_IV-KA"])
+        self.assertEqual(service.render().rendered, ["plane_IV-KA"])
+
+        # Style changes invalidate every figure
+        service.extend(jobs_by_group("plane_{group}", plot_plane, changed, style=FigureStyle(formats=("svg",))))
+        self.assertEqual(len(service.stale()), 3)
+
+    def test_publication_figures_render_by_group_in_process(self):
+        ceac = pd.DataFrame({"arm": np.tile(["ECT_std", "Ketamine_IV"], 4),
+                             "wtp": np.repeat([0.0, 25000.0], 4),
+                             "prob_ce": [0.6, 0.4] * 4,
+                             "perspective": np.tile(np.repeat(["healthcare", "societal"], 2), 2)})
+        with mock.patch("matplotlib.use") as use:
+            report = render_publication_figures({"ceac": ceac}, self.root, by="perspective",
+                                                options={"ceac": {"max_wtp": 25000}}, style=self.style)
+        use.assert_not_called()
+        self.assertEqual(sorted(report.rendered), ["ceac_healthcare", "ceac_societal"])
+        self.assertTrue((self.root / "ceac_societal.png").exists())
+        again = render_publication_figures({"ceac": ceac}, self.root, by="perspective",
+                                           options={"ceac": {"max_wtp": 25000}}, style=self.style)
+        self.assertEqual(again.rendered, [])
+        with self.assertRaises(KeyError):
+            render_publication_figures({"ceac_v2": ceac}, self.root)
+
+    def test_dense_layers_are_rasterized(self):
+        fig, ax = plt.subplots()
+        ax.scatter(np.arange(10), np.arange(10))
+        dense = ax.scatter(np.arange(20000), np.arange(20000))
+        self.assertEqual(rasterize_dense_artists(fig, threshold=5000), 1)
+        self.assertTrue(dense.get_rasterized())
+        plt.close(fig)
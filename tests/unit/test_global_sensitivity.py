@@ -0,0 +1,75 @@
+"""
+Unit tests for PRCC and Sobol global sensitivity indices.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+from src.trd_cea.models.global_sensitivity import (
+    PolynomialChaosEmulator,
+    partial_rank_correlation,
+    prcc_table,
+    sobol_analysis,
+)
+
+
+def ishigami(params):
+    x1, x2, x3 = params['x1'], params['x2'], params['x3']
+    return np.sin(x1) + 7 * np.sin(x2) ** 2 + 0.1 * x3 ** 4 * np.sin(x1)
+
+
+# Analytic indices of the Ishigami function (a=7, b=0.1)
+ISHIGAMI_S1 = [0.3139, 0.4424, 0.0]
+ISHIGAMI_ST = [0.5576, 0.4424, 0.2437]
+
+
+class TestGlobalSensitivity(unittest.TestCase):
+    """PRCC, Saltelli/Jansen estimators and the polynomial chaos emulator."""
+
+    def test_prcc_matches_rank_residual_correlation(self):
+        rng = np.random.default_rng(0)
+        X = rng.uniform(size=(500, 4))
+        y = 3 * X[:, 0] + X[:, 1] ** 2 - X[:, 0] * X[:, 2] + 0.1 * rng.normal(size=500)
+        prcc, p_value = partial_rank_correlation(X, y)
+
+        ranks = rankdata(np.column_stack([X, y]), axis=0)
+        for i in range(4):
+            Z = np.column_stack([np.ones(500), np.delete(ranks[:, :4], i, axis=1)])
+            rx = ranks[:, i] - Z @ np.linalg.lstsq(Z, ranks[:, i], rcond=None)[0]
+            ry = ranks[:, 4] - Z @ np.linalg.lstsq(Z, ranks[:, 4], rcond=None)[0]
+            self.assertAlmostEqual(prcc[i], np.corrcoef(rx, ry)[0, 1], places=10)
+        self.assertLess(p_value[0], 1e-6)
+
+        frame = pd.DataFrame(X, columns=['param_a', 'param_b', 'param_c', 'param_d']).assign(
+            cost=y, strategy=np.repeat(['A', 'B'], 250))
+        table = prcc_table(frame, 'cost', by='strategy')
+        self.assertEqual(len(table), 8)
+        self.assertEqual(table.groupby('strategy')['parameter'].first().tolist(), ['param_a', 'param_a'])
+
+    def test_sobol_recovers_ishigami_indices(self):
+        bounds = {name: (-np.pi, np.pi) for name in ('x1', 'x2', 'x3')}
+        result = sobol_analysis(ishigami, bounds, n_samples=4096, n_bootstrap=100, seed=1)
+        np.testing.assert_allclose(result['S1'], ISHIGAMI_S1, atol=0.05)
+        np.testing.assert_allclose(result['ST'], ISHIGAMI_ST, atol=0.05)
+        self.assertTrue((result['ST_lower'] <= result['ST']).all())
+        self.assertTrue((result['ST'] <= result['ST_upper']).all())
+
+    def test_emulator_indices_from_psa_draws(self):
+        rng = np.random.default_rng(2)
+        X = rng.uniform(-np.pi, np.pi, size=(2000, 3))
+        y = ishigami({'x1': X[:, 0], 'x2': X[:, 1], 'x3': X[:, 2]})
+        emulator = PolynomialChaosEmulator(degree=8).fit(X, y, ['x1', 'x2', 'x3'])
+        result = emulator.sobol_indices(n_bootstrap=20, seed=0)
+        np.testing.assert_allclose(result['S1'], ISHIGAMI_S1, atol=0.03)
+        np.testing.assert_allclose(result['ST'], ISHIGAMI_ST, atol=0.03)
+        self.assertGreater(emulator.q2_, 0.99)
+
+        with self.assertRaises(ValueError):
+            PolynomialChaosEmulator(degree=3).fit(X[:10], y[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()
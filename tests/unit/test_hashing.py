@@ -0,0 +1,73 @@
+"""
+Unit tests for the content hashing service.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.core import hashing
+
+
+class TestContentHashing(unittest.TestCase):
+    """Full-content hashes for frames, nested objects and files."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'draw': np.repeat(np.arange(500), 2),
+            'strategy': ['ECT', 'IV-KA'] * 500,
+            'cost': rng.normal(10000, 500, 1000),
+        })
+
+    def test_mid_frame_edit_changes_hash(self):
+        edited = self.df.copy()
+        edited.loc[500, 'cost'] += 1e-6
+        self.assertNotEqual(hashing.hash_dataframe(self.df), hashing.hash_dataframe(edited))
+        self.assertEqual(hashing.hash_dataframe(self.df), hashing.hash_dataframe(self.df.copy()))
+
+    def test_object_hash_handles_arrays_and_key_order(self):
+        a = {'grid': np.arange(5.0), 'config': {'b': 1, 'a': [1, 2]}}
+        b = {'config': {'a': [1, 2], 'b': 1}, 'grid': np.arange(5.0)}
+        self.assertEqual(hashing.hash_object(a), hashing.hash_object(b))
+        b['grid'][2] = 9.0
+        self.assertNotEqual(hashing.hash_object(a), hashing.hash_object(b))
+
+    def test_objects_hash_by_state_not_repr(self):
+        class Slotted:
+            __slots__ = ('a', 'b')
+
+            def __init__(self, a, b):
+                self.a, self.b = a, b
+
+        self.assertEqual(hashing.hash_object(Slotted(1, [2])), hashing.hash_object(Slotted(1, [2])))
+        self.assertNotEqual(hashing.hash_object(Slotted(1, [2])), hashing.hash_object(Slotted(1, [3])))
+        self.assertEqual(hashing.hash_object({'f': np.mean}), hashing.hash_object({'f': np.mean}))
+        self.assertNotEqual(hashing.hash_object(np.mean), hashing.hash_object(np.median))
+
+        with self.assertRaises(TypeError):
+            hashing.hash_object({'opaque': object()})
+
+    def test_file_hash_algorithms_and_cache(self):
+        path = Path(tempfile.mkdtemp()) / "psa.csv"
+        self.df.to_csv(path, index=False)
+        import hashlib
+        self.assertEqual(hashing.hash_file(path, hashing.SHA256),
+                         hashlib.sha256(path.read_bytes()).hexdigest())
+
+        first = hashing.hash_file(path)
+        path.write_text(path.read_text().replace('ECT', 'ECX', 1))
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))
+        self.assertNotEqual(first, hashing.hash_file(path))
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            hashing.new_hasher('md5')
+
+
+if __name__ == '__main__':
+    unittest.main()
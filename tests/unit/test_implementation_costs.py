@@ -0,0 +1,56 @@
+"""Tests for the array-based implementation cost engine."""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.models.implementation_costs_engine import (
+    analyze_implementation_costs,
+    breakeven_year,
+    build_cost_schedule,
+    scale_up_scenarios,
+)
+
+
+class TestImplementationCosts(unittest.TestCase):
+    """Schedules, breakeven search and batched sensitivity."""
+
+    def setUp(self):
+        self.volumes = pd.DataFrame({'strategy': ['ECT', 'IV-KA', 'PO-PSI'], 'annual_volume': [300, 150, 40]})
+        self.params = {'startup_equipment': {'ECT': 50000, 'IV-KA': 25000},
+                       'revenue_per_patient': {'ECT': 2500, 'IV-KA': 200, 'PO-PSI': 3000}}
+
+    def test_schedule_matches_component_tables(self):
+        result = analyze_implementation_costs(self.volumes, self.params, time_horizon=4)
+        volumes = np.repeat(self.volumes['annual_volume'].to_numpy(float)[:, None], 4, axis=1)
+        schedule = build_cost_schedule(list(self.volumes['strategy']), volumes, self.params)
+        amortization = result.cost_amortization
+        np.testing.assert_allclose(schedule.annual_totals().ravel(), amortization['total_annual_cost'])
+        np.testing.assert_allclose(
+            amortization.groupby('strategy', sort=False)['cumulative_cost'].last().to_numpy(),
+            result.total_costs['total_5year_cost'].to_numpy())
+        # One-way sensitivity covers every parameter for every strategy
+        self.assertEqual(len(result.sensitivity_analysis), 3 * 4)
+
+    def test_breakeven_search(self):
+        cumulative = np.cumsum([[-100.0, 40.0, 40.0, 40.0], [-10.0, -1.0, -1.0, -1.0]], axis=1)
+        years = breakeven_year(cumulative)
+        self.assertEqual(years[0], 4.0)
+        self.assertTrue(np.isnan(years[1]))
+
+        result = analyze_implementation_costs(self.volumes, self.params, time_horizon=5, n_draws=500, seed=3)
+        table = result.breakeven_analysis.set_index('strategy')
+        self.assertEqual(table.loc['PO-PSI', 'breakeven_year'], 1)
+        self.assertEqual(table.loc['IV-KA', 'breakeven_year'], '>5')
+        prcc = result.probabilistic_sensitivity
+        ect = prcc[prcc['strategy'] == 'ECT'].set_index('parameter')['prcc']
+        self.assertGreater(ect['operational_cost'], 0.9)
+
+    def test_scale_up_grid(self):
+        df = scale_up_scenarios(['ECT', 'PO-PSI'], [300, 40], self.params,
+                                sites=[1, 4], ramp_speeds=[0.5, np.inf], time_horizon=5)
+        self.assertEqual(len(df), 2 * 2 * 2)
+        full = df[(df['ramp_speed'] == np.inf) & (df['strategy'] == 'ECT')].set_index('sites')
+        self.assertAlmostEqual(full.loc[4, 'patients'], 4 * 300 * 5)
+        slow = df[(df['ramp_speed'] == 0.5) & (df['sites'] == 4) & (df['strategy'] == 'ECT')]
+        self.assertGreaterEqual(slow['breakeven_year'].item(), full.loc[4, 'breakeven_year'])
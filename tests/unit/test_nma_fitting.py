@@ -0,0 +1,79 @@
+"""
+Unit tests for the cached NMA fitting service.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.models.nma_fitting import NMAFittingService, NMASpec, compare_fits, fit_key
+
+
+def draw_table(shift=0.0, scale=1.0, n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'chain': np.repeat([0, 1], n // 2),
+        'draw': np.tile(np.arange(n // 2), 2),
+        'IV_KA_logOR': shift + scale * rng.normal(-0.2, 0.3, n),
+        'IV_KA_prob': shift + scale * rng.normal(0.65, 0.05, n),
+        'tau': np.abs(rng.normal(0.3, 0.1, n)),
+    })
+
+
+class TestNMAFitting(unittest.TestCase):
+    """Fit reuse keyed by data and spec, and fast-fit comparison."""
+
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'study': ['A', 'A', 'B', 'B'],
+            'treatment': ['ECT', 'IV_KA', 'ECT', 'IV_KA'],
+            'responders': [18, 15, 22, 19],
+            'total': [25, 25, 30, 30],
+        })
+        self.calls = []
+
+    def fitter(self, data, spec):
+        self.calls.append(spec.method)
+        return draw_table(seed=len(self.calls)), None
+
+    def test_unchanged_fit_is_reused(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            service = NMAFittingService(Path(tmp), fitter=self.fitter)
+            spec = NMASpec(draws=500)
+            first = service.fit(self.data, spec)
+            second = service.fit(self.data, spec)
+            self.assertFalse(first.cached)
+            self.assertTrue(second.cached)
+            self.assertEqual(self.calls, ['nuts'])
+            pd.testing.assert_frame_equal(first.draws, second.draws)
+            self.assertEqual(second.posterior().n_chains, 2)
+
+            # New data, a different spec or an explicit refit trigger a new fit
+            changed = self.data.assign(responders=[18, 16, 22, 19])
+            service.fit(changed, spec)
+            service.fit(self.data, NMASpec(draws=1000))
+            service.fit(self.data, spec, refit=True)
+            self.assertEqual(len(self.calls), 4)
+            self.assertEqual(fit_key(self.data, spec), fit_key(self.data.copy(), NMASpec(draws=500)))
+
+    def test_fast_fit_validation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            service = NMAFittingService(Path(tmp), fitter=self.fitter)
+            comparison = service.validate_fast_fit(self.data, NMASpec())
+            self.assertEqual(self.calls, ['nuts', 'advi'])
+            self.assertEqual(list(comparison['parameter']), ['IV_KA_logOR', 'IV_KA_prob', 'tau'])
+            self.assertTrue(comparison['acceptable'].all())
+
+        # A variational fit that understates spread is flagged
+        narrow = compare_fits(draw_table(scale=0.5, seed=1), draw_table(seed=2), columns=['IV_KA_logOR'])
+        self.assertFalse(narrow['acceptable'][0])
+        self.assertAlmostEqual(narrow['sd_ratio'][0], 0.5, delta=0.1)
+        with self.assertRaises(ValueError):
+            NMASpec(method='gibbs')
+
+
+if __name__ == '__main__':
+    unittest.main()
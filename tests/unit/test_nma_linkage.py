@@ -0,0 +1,77 @@
+"""
+Unit tests for draw-preserving NMA-PSA linkage and convergence diagnostics.
+"""
+
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.models.nma_engine import integrate_nma_with_psa, run_nma_analysis
+from src.trd_cea.models.nma_linkage import (
+    convergence_diagnostics,
+    link_posterior_draws,
+    load_nma_posterior,
+)
+
+POSTERIOR_PATH = Path(__file__).resolve().parents[2] / 'data' / 'nma' / 'nma_posterior_draws.parquet'
+
+
+class TestNMALinkage(unittest.TestCase):
+    """Linkage keeps joint posterior draws; diagnostics behave as expected."""
+
+    def test_psa_draws_keep_joint_posterior_draws(self):
+        rng = np.random.default_rng(0)
+        shared = rng.normal(size=400)
+        effects = pd.DataFrame({'A': shared + 0.1 * rng.normal(size=400),
+                                'B': shared + 0.1 * rng.normal(size=400)})
+        effects['draw'] = range(400)
+        psa = pd.DataFrame({'draw': np.repeat(np.arange(200), 2), 'strategy': ['A', 'B'] * 200,
+                            'effect': 0.0, 'cost': 1.0})
+
+        for method in ('thin', 'seed'):
+            linked = integrate_nma_with_psa(effects, psa, method=method, seed=3)
+            wide = linked.pivot(index='draw', columns='strategy', values='effect')
+            rows = linked.groupby('draw')['posterior_draw'].nunique()
+            self.assertTrue((rows == 1).all())
+            self.assertGreater(np.corrcoef(wide['A'], wide['B'])[0, 1], 0.95)
+
+        # Thinning is deterministic and evenly spaced
+        np.testing.assert_array_equal(link_posterior_draws([5, 6, 7, 8], 8), [0, 2, 4, 6])
+        np.testing.assert_array_equal(link_posterior_draws([1, 1, 2], 10, method='seed', seed=1),
+                                      link_posterior_draws([1, 1, 2], 10, method='seed', seed=1))
+
+    def test_convergence_diagnostics(self):
+        rng = np.random.default_rng(1)
+        iid = rng.normal(size=(4, 1000, 1))
+        shifted = iid.copy()
+        shifted[0] += 2.0
+        good = convergence_diagnostics(iid)
+        bad = convergence_diagnostics(shifted)
+        self.assertLess(good['r_hat'][0], 1.01)
+        self.assertGreater(good['ess_bulk'][0], 2500)
+        self.assertGreater(bad['r_hat'][0], 1.1)
+
+        # AR(1) with phi = 0.9: ESS close to n (1 - phi) / (1 + phi)
+        noise = rng.normal(size=(4, 4000))
+        chain = np.zeros_like(noise)
+        for t in range(1, 4000):
+            chain[:, t] = 0.9 * chain[:, t - 1] + noise[:, t]
+        ess = convergence_diagnostics(chain[..., None])['ess_bulk'][0]
+        self.assertAlmostEqual(ess / (16000 * 0.1 / 1.9), 1.0, delta=0.3)
+
+    def test_stored_posterior_analysis(self):
+        posterior = load_nma_posterior(POSTERIOR_PATH)
+        result = run_nma_analysis(['ECT', 'IV-KA', 'rTMS'], 'ECT', {}, posterior=posterior)
+        self.assertEqual(list(result.treatment_effects.columns), ['ECT', 'IV-KA', 'rTMS', 'draw'])
+        self.assertEqual(len(result.treatment_effects), posterior.n_draws)
+        self.assertLess(result.convergence_diagnostics['r_hat'], 1.05)
+        # The parquet does not store tau, so heterogeneity is not reported
+        self.assertIsNone(result.heterogeneity['tau_squared'])
+        expected = np.corrcoef(posterior.draws['ECT_prob'], posterior.draws['rTMS_prob'])[0, 1]
+        self.assertAlmostEqual(result.correlation_matrix.loc['ECT', 'rTMS'], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Unit tests for the compact PSA table schema.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.models.psa_schema import (
+    STRATEGY_CATEGORIES, DowncastReport, compact_psa_table, expand_psa_table,
+    strategy_mask, validate_compact_table
+)
+
+
+class TestCompactSchema(unittest.TestCase):
+    """Compact dtypes, masks and tolerance validation."""
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        strategies = ['UC', 'ECT', 'IV-KA', 'PO-PSI']
+        n_draws = 500
+        self.table = pd.DataFrame({
+            'draw': np.repeat(np.arange(n_draws), len(strategies)),
+            'strategy': np.tile(strategies, n_draws),
+            'cost': rng.gamma(4.0, 3000.0, n_draws * len(strategies)),
+            'effect': rng.normal(3.0, 0.4, n_draws * len(strategies)),
+            'perspective': 'healthcare',
+            'jurisdiction': 'AU',
+        })
+
+    def test_compact_dtypes_and_fixed_codes(self):
+        report = DowncastReport()
+        compact = compact_psa_table(self.table, float32=True, report=report)
+        self.assertEqual(compact['draw'].dtype, np.int32)
+        self.assertEqual(compact['cost'].dtype, np.float32)
+        self.assertIsInstance(compact['strategy'].dtype, pd.CategoricalDtype)
+        # Codes follow the fixed dictionary, not the order values appear in
+        self.assertEqual(
+            list(compact['strategy'].cat.categories[:len(STRATEGY_CATEGORIES)]),
+            STRATEGY_CATEGORIES
+        )
+        self.assertLess(report.memory_after_mb, report.memory_before_mb)
+
+    def test_downcast_is_error_bounded(self):
+        table = self.table.copy()
+        table['cost'] = table['cost'] + 1e-3  # still representable within rtol
+        report = DowncastReport()
+        compact_psa_table(table, float32=True, rtol=1e-12, report=report)
+        self.assertIn('cost', report.kept_float64)
+
+    def test_mask_and_round_trip(self):
+        compact = compact_psa_table(self.table)
+        mask = strategy_mask(compact, ['ECT', 'PO-PSI', 'not-a-strategy'])
+        expected = self.table['strategy'].isin(['ECT', 'PO-PSI']).to_numpy()
+        np.testing.assert_array_equal(mask, expected)
+        pd.testing.assert_frame_equal(expand_psa_table(compact), self.table)
+
+    def test_float32_outputs_within_tolerance(self):
+        compact = compact_psa_table(self.table, float32=True)
+        report = validate_compact_table(self.table, compact, rtol=1e-5)
+        self.assertTrue(report.passed, report.max_relative_error)
+        report.raise_if_failed()
+
+
+if __name__ == '__main__':
+    unittest.main()
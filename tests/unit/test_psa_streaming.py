@@ -0,0 +1,147 @@
+"""
+Unit tests for the streaming PSA accumulators.
+
+Streaming summaries are compared against the equivalent batch NumPy results.
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.trd_cea.models.psa import run_psa
+from src.trd_cea.models.psa_streaming import (
+    OnlineMoments, P2Quantile, StreamingPSA, ConvergenceMonitor,
+    iter_sampler_chunks, run_streaming_psa
+)
+
+
+def _sampler(n, rng):
+    """Three-strategy toy model with correlated costs and effects."""
+    base = rng.normal(size=(n, 1))
+    cost = np.array([5000.0, 12000.0, 15000.0]) + 1500 * base + rng.normal(0, 1000, (n, 3))
+    effect = np.array([2.0, 2.3, 2.35]) + 0.1 * base + rng.normal(0, 0.1, (n, 3))
+    return cost, effect
+
+
+class TestOnlineAccumulators(unittest.TestCase):
+    """Accumulators reproduce batch statistics."""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.cost, self.effect = _sampler(3000, rng)
+
+    def test_online_moments_match_batch(self):
+        acc = OnlineMoments(3)
+        for start in range(0, 3000, 700):
+            acc.update(self.cost[start:start + 700])
+        np.testing.assert_allclose(acc.mean, self.cost.mean(axis=0))
+        np.testing.assert_allclose(acc.covariance, np.cov(self.cost, rowvar=False))
+
+    def test_merge_equals_single_pass(self):
+        left, right, full = OnlineMoments(3), OnlineMoments(3), OnlineMoments(3)
+        left.update(self.cost[:1200])
+        right.update(self.cost[1200:])
+        full.update(self.cost)
+        left.merge(right)
+        np.testing.assert_allclose(left.covariance, full.covariance)
+
+    def test_p2_quantile_close_to_exact(self):
+        sketch = P2Quantile([0.1, 0.5, 0.9], 3)
+        sketch.update(np.tile(self.cost[:, :1], 3))
+        exact = np.quantile(self.cost[:, 0], [0.1, 0.5, 0.9])
+        np.testing.assert_allclose(sketch.value, exact, rtol=0.03)
+
+
+class TestStreamingPSA(unittest.TestCase):
+    """End-to-end streaming summaries and stopping rule."""
+
+    def setUp(self):
+        self.strategies = ['UC', 'ECT', 'IV-KA']
+        self.lambda_grid = np.array([0, 25000, 50000, 75000])
+
+    def test_ceac_and_evpi_match_batch(self):
+        rng = np.random.default_rng(7)
+        cost, effect = _sampler(2000, rng)
+        psa = StreamingPSA(self.strategies, self.lambda_grid)
+        for start in range(0, 2000, 300):
+            psa.update(cost[start:start + 300], effect[start:start + 300])
+        result = psa.result()
+
+        nmb = 50000 * effect - cost
+        expected_prob = np.bincount(nmb.argmax(axis=1), minlength=3) / 2000
+        ceac = result.ceac[result.ceac['lambda'] == 50000]
+        np.testing.assert_allclose(ceac['prob_optimal'].to_numpy(), expected_prob)
+
+        evpi = result.evpi.set_index('lambda').loc[50000, 'evpi_per_person']
+        self.assertAlmostEqual(evpi, nmb.max(axis=1).mean() - nmb.mean(axis=0).max(), places=6)
+
+    def test_early_stopping_before_max_draws(self):
+        result = run_streaming_psa(
+            iter_sampler_chunks(_sampler, chunk_size=250, max_draws=20000, seed=3),
+            self.strategies,
+            self.lambda_grid,
+            tolerances={'inmb': 200.0, 'ceac': 0.02, 'evpi': 100.0},
+            min_draws=500,
+        )
+        self.assertTrue(result.converged)
+        self.assertLess(result.n_draws, 20000)
+        last = result.convergence.iloc[-1]
+        self.assertLessEqual(last['inmb'], 200.0)
+        self.assertLessEqual(last['ceac'], 0.02)
+
+    def test_monitor_respects_min_draws(self):
+        monitor = ConvergenceMonitor(tolerances={'inmb': 1e9}, min_draws=1000)
+        self.assertFalse(monitor.check(500, {'inmb': 0.0}))
+        self.assertTrue(monitor.check(1000, {'inmb': 0.0}))
+
+
+class TestStreamingRunPSA(unittest.TestCase):
+    """The cohort-model PSA driver stops on the configured MCSE tolerances."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.settings = self.root / 'settings.yml'
+        self.settings.write_text(yaml.safe_dump({
+            'arms': ['ECT_std', 'IV_ketamine'], 'jurisdictions': ['AU'], 'perspectives': ['healthcare'],
+            'time_horizon_years': 1, 'cycle_length_months': 1,
+            'discount_costs': {'AU': 0.05}, 'discount_qalys': {'AU': 0.05},
+        }))
+        self.parameters = pd.DataFrame({
+            'parameter': ['remission_rates.ECT_std', 'remission_rates.IV_ketamine'],
+            'distribution': ['Beta', 'Beta'], 'mean': [0.4, 0.35], 'std': [0.05, 0.05],
+        })
+        self.config = {
+            'wtp': {'min': 0, 'max': 100000, 'step': 50000, 'default': 50000},
+            'psa': {'iterations': 5000, 'min_iterations': 200, 'seed': 1,
+                    'streaming': {'chunk_size': 100, 'tolerances': {'inmb': 500, 'ceac': 0.05, 'evpi': 500}}},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_stops_once_converged(self):
+        results = run_psa(self.settings, {}, out_dir=self.root / 'out', parameters_psa=self.parameters,
+                          analysis_config=self.config)
+        result = results[('AU', 'healthcare')]
+        self.assertTrue(result.converged)
+        self.assertLess(result.n_draws, 5000)
+        self.assertEqual(result.n_draws % 100, 0)
+        self.assertEqual(result.convergence['n_draws'].iloc[-1], result.n_draws)
+        ceac = pd.read_csv(self.root / 'out' / 'ceac_v3.csv')
+        np.testing.assert_allclose(ceac.groupby('lambda')['prob_optimal'].sum(), 1.0)
+        self.assertTrue((self.root / 'out' / 'figures' / 'AU' / 'ceac_healthcare.svg').exists())
+
+        self.config['psa']['streaming']['tolerances'] = {'inmb': 1e-6}
+        strict = run_psa(self.settings, {}, n_iter=300, out_dir=self.root / 'out', parameters_psa=self.parameters,
+                         analysis_config=self.config)[('AU', 'healthcare')]
+        self.assertFalse(strict.converged)
+        self.assertEqual(strict.n_draws, 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Unit tests for the vectorised queueing kernel.
+"""
+
+import math
+import unittest
+
+import numpy as np
+
+from src.trd_cea.models import queueing
+from src.trd_cea.models.queueing import log_erlang_c, queue_metrics, required_servers
+
+
+def _erlang_c_factorial(c, a):
+    terms = sum(a ** k / math.factorial(k) for k in range(c))
+    last = a ** c / (math.factorial(c) * (1 - a / c))
+    return last / (terms + last)
+
+
+class TestQueueingKernel(unittest.TestCase):
+    """Log-space Erlang C and M/M/c metrics."""
+
+    def test_matches_factorial_formula(self):
+        cases = [(1, 0.5), (2, 1.6), (10, 9.0), (50, 47.5), (120, 110.0)]
+        c, a = np.array(cases).T
+        expected = [_erlang_c_factorial(int(ci), ai) for ci, ai in cases]
+        np.testing.assert_allclose(np.exp(log_erlang_c(a, c)), expected, rtol=1e-10)
+
+        mm1 = queue_metrics(0.5, 1.0, 1)
+        self.assertAlmostEqual(float(mm1["mean_waiting_time"]), 1.0)
+        self.assertAlmostEqual(float(mm1["wait_q50"]), 0.0)
+
+    def test_large_servers_and_grid_paths(self):
+        lam = np.linspace(1, 990, 40)[:, None]
+        servers = np.array([1, 10, 171, 500, 1000])[None, :]
+        table = queue_metrics(lam, 1.0, servers)
+        p_wait = table["probability_waiting"]
+        self.assertTrue(np.all(np.isfinite(p_wait)))
+        self.assertTrue(np.all((p_wait >= 0) & (p_wait <= 1)))
+        self.assertTrue(np.all(np.isinf(table["mean_waiting_time"][~table["stable"]])))
+
+        limit = queueing.TABLE_LIMIT
+        queueing.TABLE_LIMIT = 0
+        try:
+            sorted_path = queue_metrics(lam, 1.0, servers)["probability_waiting"]
+        finally:
+            queueing.TABLE_LIMIT = limit
+        np.testing.assert_allclose(sorted_path, p_wait, rtol=1e-12)
+
+    def test_required_servers(self):
+        needed = required_servers([5.0, 200.0], 1.0, max_mean_wait=0.1, max_servers=300)
+        for lam, c in zip([5.0, 200.0], needed):
+            self.assertLessEqual(float(queue_metrics(lam, 1.0, c)["mean_waiting_time"]), 0.1)
+            self.assertGreater(float(queue_metrics(lam, 1.0, c - 1)["mean_waiting_time"]), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""Tests for the persistent run ledger."""
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.cli import main
+from src.trd_cea.core.reproducibility import ProvenanceTracker, ReproducibilityChecker
+from src.trd_cea.core.run_ledger import LedgerEntry, RunLedger
+from src.trd_cea.models.base import (
+    AnalysisType,
+    BaseAnalysisEngine,
+    EngineInput,
+    EngineMetadata,
+)
+
+
+class _NoisyEngine(BaseAnalysisEngine):
+    """Mean cost plus noise that is reproducible only when a seed is given."""
+
+    def _get_default_metadata(self):
+        return EngineMetadata("Noisy", "1.0", "Toy engine", "tests", AnalysisType.CUA)
+
+    def _validate_config(self):
+        pass
+
+    def _validate_input(self, input_data):
+        if "cost" not in input_data.data.table:
+            raise ValueError("missing cost")
+
+    def _initialize_engine(self):
+        pass
+
+    def _cleanup_engine(self):
+        pass
+
+    def _run_analysis(self, input_data):
+        seed = (input_data.parameters or {}).get("seed")
+        noise = np.random.default_rng(seed).normal(size=3)
+        return {"mean_cost": float(input_data.data.table["cost"].mean()), "noise": noise}
+
+
+class TestRunLedger(unittest.TestCase):
+    """Storage, queries, engine and batch recording."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.ledger = RunLedger(self.root / "ledger.sqlite")
+        self.table = pd.DataFrame({"draw": np.repeat(np.arange(20), 2), "strategy": ["UC", "ECT"] * 20,
+                                   "cost": np.arange(40.0), "effect": 1.0,
+                                   "perspective": "healthcare", "jurisdiction": "AU"})
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_queries_comparison_and_export(self):
+        def entry(commit, seconds, digest, seed=1):
+            return LedgerEntry("cea", "in1", "cfg1", seconds, seed=seed, output_digest=digest, commit=commit)
+
+        self.ledger.append([entry("a", 1.0, "x"), entry("a", 3.0, "x"), entry("b", 1.0, "x"),
+                            entry("b", 1.2, "y"), entry("b", 5.0, "z", seed=2)])
+        self.ledger.record(LedgerEntry("cea", "in1", "cfg1", 0.1, success=False, error="boom", commit="b"))
+
+        self.assertEqual(len(self.ledger.query()), 6)
+        self.assertEqual(len(self.ledger.query(success=False)), 1)
+        performance = self.ledger.performance().set_index("commit")
+        self.assertEqual(performance.loc["a", "median_s"], 2.0)
+        self.assertEqual(performance.loc["b", "runs"], 3)
+
+        comparison = self.ledger.compare("a", "b")
+        self.assertEqual(len(comparison), 1)                       # seed 2 only ran under b
+        self.assertAlmostEqual(comparison["ratio"].iloc[0], 1.1 / 2.0)
+        self.assertFalse(comparison["same_output"].iloc[0])
+
+        conflicts = self.ledger.nondeterministic()
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual((conflicts["commit"].iloc[0], conflicts["digests"].iloc[0]), ("b", ["x", "y"]))
+        self.assertEqual(len(self.ledger.nondeterministic(across_versions=True)), 1)
+
+        exported = pd.read_parquet(self.ledger.export(self.root / "ledger.parquet"))
+        self.assertEqual(len(exported), 6)
+        self.assertEqual(json.loads(exported["phases"].iloc[0]), {})
+
+    def test_engine_runs_are_recorded(self):
+        engine = _NoisyEngine({"ledger": str(self.ledger.path), "tracing": True})
+        seeded = EngineInput(data=self.table, config={}, parameters={"seed": 3})
+        first = engine.run(seeded)
+        engine.run(seeded)
+        engine.run(EngineInput(data=self.table, config={}))
+        engine.run(EngineInput(data=self.table, config={}))
+        engine.run(EngineInput(data=self.table.drop(columns="cost"), config={}))
+
+        runs = self.ledger.query(engine="Noisy")
+        self.assertEqual(len(runs), 5)
+        self.assertEqual(runs["run_id"].iloc[0], first.metadata["run_id"])
+        self.assertEqual(runs["seed"].iloc[0], 3)
+        self.assertEqual(runs["output_digest"].iloc[0], runs["output_digest"].iloc[1])
+        self.assertGreater(runs["peak_memory_bytes"].iloc[0], 0)
+        self.assertEqual(list(runs["phases"].iloc[0]), ["load", "validate", "compute", "record"])
+        self.assertEqual(runs["error"].iloc[-1], "missing cost")
+
+        # The unseeded pair is flagged; instrumentation settings do not change the config hash
+        conflicts = self.ledger.nondeterministic()
+        self.assertEqual(len(conflicts), 1)
+        self.assertTrue(pd.isna(conflicts["seed"].iloc[0]))
+        plain = _NoisyEngine({"ledger": str(self.ledger.path)})
+        plain.run(seeded)
+        hashes = self.ledger.query()["config_hash"]
+        self.assertEqual(hashes.iloc[-1], hashes.iloc[0])
+
+        checker = ReproducibilityChecker(ProvenanceTracker(str(self.root / "provenance")))
+        self.assertFalse(checker.check_run_ledger(self.ledger))
+        self.assertEqual(checker.checks[-1]["name"], "run_ledger_determinism")
+
+    def test_batch_jobs_are_recorded(self):
+        self.table.to_csv(self.root / "psa.csv", index=False)
+        manifest = self.root / "manifest.yml"
+        manifest.write_text(json.dumps({
+            "inputs": [str(self.root / "psa.csv")], "jurisdictions": ["AU"], "perspectives": ["healthcare"],
+            "analyses": ["cea", "dcea"], "output": str(self.root / "out" / "results.parquet"), "n_jobs": 2,
+            "wtp": {"min": 0, "max": 50000, "step": 25000, "default": 50000},
+            "ledger": str(self.ledger.path),
+        }))
+        self.assertEqual(main(["batch", str(manifest)]), 0)
+        self.assertEqual(main(["batch", str(manifest)]), 0)
+
+        runs = self.ledger.query()
+        self.assertEqual(sorted(set(runs["engine"])), ["batch.cea", "batch.dcea"])
+        self.assertEqual(len(runs), 4)
+        self.assertEqual(runs.groupby("engine")["output_digest"].nunique().tolist(), [1, 1])
+        self.assertEqual(runs["context"].iloc[0]["jurisdiction"], "AU")
+        self.assertEqual(main(["ledger", str(self.ledger.path), "--check"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Unit tests for the memoised structural scenario grid.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.models.cea_engine import simulate_arm_grid
+from src.trd_cea.models.scenario_grid import ScenarioGrid, sweep_opportunity_cost
+
+
+class TestScenarioGrid(unittest.TestCase):
+    """Scenario grid evaluation and opportunity-cost sweep."""
+
+    def setUp(self):
+        self.settings = {
+            'time_horizon_years': 2,
+            'cycle_length_months': 1,
+            'discount_costs': {'AU': 0.05, 'NZ': 0.035},
+            'discount_qalys': {'AU': 0.05, 'NZ': 0.035},
+        }
+        self.inputs = {'remission_rates': {'ECT_std': 0.4, 'IV_ketamine': 0.35}}
+
+    def test_base_scenario_matches_markov_model(self):
+        grid = ScenarioGrid(self.settings, self.inputs, jurisdiction='AU', perspective='healthcare')
+        values = grid.evaluate(['IV_ketamine'], [{}])
+        cost, qaly = values['IV_ketamine']
+        ref = simulate_arm_grid('IV_ketamine', ['AU'], ['healthcare'], self.settings, self.inputs)
+        self.assertAlmostEqual(cost[0, 0], ref.cost[0, 0, 0])
+        self.assertAlmostEqual(qaly[0, 0], ref.qaly[0, 0, 0])
+
+    def test_structural_product_and_trace_reuse(self):
+        grid = ScenarioGrid(self.settings, self.inputs)
+        df = grid.run_structural_sensitivity(
+            {'cycle_length_months': [1, 3], 'switching_logic': ['standard', 'aggressive']},
+            ['ECT_std', 'IV_ketamine'], wtp=50000)
+        # 2 x 2 product, one row per arm
+        self.assertEqual(len(df), 8)
+        self.assertEqual(df.loc[0, 'scenario_id'], 'scenario_0')
+        # Unmodelled options share the same trace, so they cannot change results
+        by_switch = df.groupby(['cycle_len_m', 'arm'])['delta_INMB'].nunique()
+        self.assertTrue((by_switch == 1).all())
+        base = df[df['cycle_len_m'] == 1]
+        np.testing.assert_allclose(base['delta_INMB'], 0.0, atol=1e-9)
+
+    def test_opportunity_cost_sweep(self):
+        incremental = pd.DataFrame({
+            'jurisdiction': ['AU', 'NZ'], 'arm': ['IV_ketamine'] * 2, 'perspective': ['healthcare'] * 2,
+            'incremental_cost': [1000.0, 2000.0], 'incremental_qaly': [0.1, 0.2],
+        })
+        df = sweep_opportunity_cost(incremental, {'AU': [25000, 50000], 'NZ': [40000]}, wtp=50000)
+        self.assertEqual(len(df), 3)
+        row = df[(df['jurisdiction'] == 'AU') & (df['k'] == 25000)].iloc[0]
+        self.assertAlmostEqual(row['INMB_standard'], 0.1 * 50000 - 1000)
+        self.assertAlmostEqual(row['INMB_adjusted'], 0.1 * 50000 - 1000 - 1000 / 25000 * 50000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Tests for cached surface animations."""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from src.trd_cea.plotting.surface_animation import (  # noqa: E402
+    AnimationSettings,
+    SurfaceSpec,
+    animate_surface,
+    plan_frames,
+)
+
+
+class TestSurfaceAnimation(unittest.TestCase):
+    """Frame caching, encoders and the time-budget plan."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        x = np.linspace(0, 1, 8)
+        y = np.linspace(0, 2, 6)
+        self.spec = SurfaceSpec(x, y, np.sin(3 * x)[None, :] + np.cos(y)[:, None],
+                                "Response", "Cost", "NMB", figsize=(3, 2.5))
+        self.settings = AnimationSettings(frames=6, dpi=40, formats=("gif", "apng"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_frames_are_cached_by_content(self):
+        first = animate_surface(self.spec, self.root / "surface.png", self.settings)
+        self.assertEqual((first.rendered, first.cached), (6, 0))
+        self.assertEqual(Image.open(first.paths["gif"]).n_frames, 6)
+        self.assertEqual(first.paths["apng"].suffix, ".apng")
+
+        again = animate_surface(self.spec, self.root / "surface.png", self.settings)
+        self.assertEqual((again.rendered, again.cached), (0, 6))
+
+        # Doubling the frame count reuses the shared azimuths
+        finer = AnimationSettings(frames=12, dpi=40, formats=("gif",))
+        self.assertEqual(animate_surface(self.spec, self.root / "surface.png", finer).rendered, 6)
+
+        self.spec.z = self.spec.z * 2
+        self.assertEqual(animate_surface(self.spec, self.root / "surface.png", self.settings).rendered, 6)
+
+    def test_time_budget_plan(self):
+        settings = AnimationSettings(frames=36, dpi=150, time_budget=10.0, min_frames=12, min_dpi=60)
+        self.assertEqual(plan_frames(0.1, settings), (36, 150))
+        self.assertEqual(plan_frames(0.5, settings), (20, 150))
+        frames, dpi = plan_frames(2.0, settings)
+        self.assertEqual(frames, 12)
+        self.assertTrue(60 <= dpi < 150)
+        self.assertEqual(plan_frames(100.0, settings), (12, 60))
+
+        budget = AnimationSettings(frames=36, dpi=40, formats=(), time_budget=1e-6, min_frames=4, min_dpi=20)
+        result = animate_surface(self.spec, self.root / "budget.png", budget)
+        self.assertEqual((result.frames, result.dpi), (4, 20))
+        self.assertEqual(result.paths, {})
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            animate_surface(self.spec, self.root / "surface.png", AnimationSettings(formats=("avi",)))
+
+
+if __name__ == "__main__":
+    unittest.main()
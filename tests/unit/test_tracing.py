@@ -0,0 +1,129 @@
+"""Tests for phase tracing in engines and the batch runner."""
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from src.trd_cea.cli import main  # noqa: E402
+from src.trd_cea.core.tracing import Tracer, span, traced  # noqa: E402
+from src.trd_cea.models.base import (  # noqa: E402
+    AnalysisType,
+    BaseAnalysisEngine,
+    EngineInput,
+    EngineMetadata,
+)
+from src.trd_cea.plotting.flame_graph import flame_layout, parse_folded, plot_flame_graph  # noqa: E402
+
+
+class _ToyEngine(BaseAnalysisEngine):
+    def _get_default_metadata(self):
+        return EngineMetadata("Toy", "1.0", "Toy engine", "tests", AnalysisType.CUA)
+
+    def _validate_config(self):
+        pass
+
+    def _validate_input(self, input_data):
+        if "cost" not in input_data.data.table:
+            raise ValueError("missing cost")
+
+    def _initialize_engine(self):
+        pass
+
+    def _cleanup_engine(self):
+        pass
+
+    def _run_analysis(self, input_data):
+        with span("pivot"):
+            wide = input_data.data.table.pivot(index="draw", columns="strategy", values="cost")
+        with span("nmb"):
+            buffer = np.ones(2_000_000)
+            time.sleep(0.02)
+        return float(wide.to_numpy().sum() + buffer[0])
+
+
+class TestTracing(unittest.TestCase):
+    """Span nesting, engine phases and exports."""
+
+    def setUp(self):
+        self.table = pd.DataFrame({"draw": np.repeat(np.arange(50), 2), "strategy": ["A", "B"] * 50,
+                                   "cost": 1.0, "effect": 1.0})
+
+    def tearDown(self):
+        plt.close("all")
+
+    def test_nested_spans_and_disabled_path(self):
+        with span("ignored") as record:
+            self.assertIsNone(record)
+
+        @traced()
+        def allocate():
+            return np.ones(500_000)
+
+        tracer = Tracer()
+        with tracer.activate(), tracer.span("outer", size=3):
+            with span("inner"):
+                allocate()
+            time.sleep(0.01)
+        outer = tracer.roots[0]
+        self.assertEqual([c.name for c in outer.children], ["inner"])
+        self.assertEqual(outer.children[0].children[0].name, "allocate")
+        self.assertGreaterEqual(outer.children[0].peak_memory, 4_000_000)
+        self.assertGreaterEqual(outer.peak_memory, outer.children[0].peak_memory)
+        self.assertAlmostEqual(outer.self_time + outer.children[0].duration, outer.duration)
+        self.assertEqual(tracer.dominant(), "outer")
+
+    def test_engine_run_records_phases(self):
+        engine = _ToyEngine({"tracing": True})
+        output = engine.run(EngineInput(data=self.table, config={}))
+        self.assertEqual(output.errors, [])
+        self.assertEqual(list(output.trace.phase_times()), ["load", "validate", "compute", "record"])
+        summary = engine.tracer.summary().set_index("path")
+        self.assertIn("Toy;compute;nmb", summary.index)
+        self.assertGreater(summary.loc["Toy;compute;nmb", "peak_memory"], 15_000_000)
+
+        failed = engine.run(EngineInput(data=self.table.drop(columns="cost"), config={}))
+        self.assertEqual(failed.errors, ["missing cost"])
+        self.assertEqual(list(failed.trace.phase_times()), ["load", "validate"])
+
+        # No tracer: no spans
+        self.assertIsNone(_ToyEngine({}).run(EngineInput(data=self.table, config={})).trace)
+
+        stacks = parse_folded(engine.tracer.folded_stacks())
+        widths = {path: width for path, _, width in flame_layout(stacks)}
+        self.assertEqual(widths[("Toy",)], stacks[("Toy",)] + sum(w for p, w in widths.items() if len(p) == 2))
+        self.assertEqual(len(plot_flame_graph(engine.tracer.folded_stacks()).axes), 1)
+
+    def test_batch_trace_spans_worker_threads(self):
+        root = Path(tempfile.mkdtemp())
+        psa = self.table.assign(strategy=np.where(self.table["strategy"] == "A", "UC", "ECT"),
+                                perspective="healthcare", jurisdiction="AU")
+        psa.to_csv(root / "psa.csv", index=False)
+        manifest = root / "manifest.yml"
+        manifest.write_text(json.dumps({
+            "inputs": [str(root / "psa.csv")], "jurisdictions": ["AU"], "perspectives": ["healthcare"],
+            "analyses": ["cea", "dcea"], "output": str(root / "out" / "results.parquet"), "n_jobs": 2,
+            "wtp": {"min": 0, "max": 50000, "step": 25000, "default": 50000},
+        }))
+        trace_path = root / "trace.json"
+        self.assertEqual(main(["batch", str(manifest), "--trace", str(trace_path)]), 0)
+
+        events = json.loads(trace_path.read_text())["traceEvents"]
+        names = [event["name"] for event in events]
+        self.assertEqual(names[0], "batch")
+        for phase in ("load", "validate", "pivot", "compute", "save"):
+            self.assertIn(phase, names)
+        self.assertEqual(names.count("compute"), 2)
+        self.assertTrue(all(event["ph"] == "X" and event["dur"] >= 0 for event in events))
+        folded = trace_path.with_suffix(".folded").read_text().splitlines()
+        self.assertIn("batch;compute;pivot", [line.rsplit(" ", 1)[0] for line in folded])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Unit tests for the vectorised utility trajectory engine.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.trd_cea.models.utility_trajectory import (
+    TREATMENT_CURVES,
+    first_crossing,
+    fit_response_curves,
+    kaplan_meier,
+    simulate_paths,
+)
+
+
+class TestUtilityTrajectory(unittest.TestCase):
+    """Path generation, first crossings and Kaplan-Meier curves."""
+
+    def test_first_crossing_respects_horizon(self):
+        paths = np.array([
+            [0.0, 0.2, 0.5, 0.9],
+            [0.0, 0.0, 0.0, 0.9],
+            [0.0, 0.0, 0.0, 0.0],
+        ])
+        np.testing.assert_array_equal(first_crossing(paths, 0.5), [3, 4, 4])
+        np.testing.assert_array_equal(first_crossing(paths, 0.5, horizon=[4, 3, 2]), [3, 3, 2])
+
+    def test_kaplan_meier_with_censoring(self):
+        times = np.array([1, 2, 2, 3, 4])
+        events = np.array([True, True, False, True, False])
+        km = kaplan_meier(times, events, horizon=4)
+        # S(1)=4/5, S(2)=S(1)*3/4, S(3)=S(2)*1/2
+        expected = 1 - np.cumprod([4 / 5, 3 / 4, 1 / 2, 1.0])
+        np.testing.assert_allclose(km["probability_benefit"], expected)
+        np.testing.assert_array_equal(km["at_risk"], [5, 4, 2, 1])
+
+        rng = np.random.default_rng(0)
+        paths = simulate_paths("ECT", 400, 60, rng=rng)
+        days = first_crossing(paths - 0.5, 0.2)
+        banded = kaplan_meier(days, days < 60, horizon=60, n_bootstrap=100, rng=rng)
+        self.assertTrue((banded["lower"] <= banded["probability_benefit"] + 1e-12).all())
+        self.assertTrue((banded["upper"] >= banded["probability_benefit"] - 1e-12).all())
+
+    def test_fitted_curves_drive_paths(self):
+        days = np.array([0, 7, 14, 28, 56, 84])
+        true = TREATMENT_CURVES["PO-PSI"]
+        utility = 0.5 + (true.plateau - 0.5) / (1 + np.exp(-true.speed * (days - true.onset)))
+        trial = pd.DataFrame({"strategy": "PO-PSI", "day": days, "utility": utility, "baseline": 0.5})
+        curves = fit_response_curves(trial)
+        self.assertAlmostEqual(curves["PO-PSI"].plateau, true.plateau, places=3)
+        self.assertAlmostEqual(curves["PO-PSI"].onset, true.onset, places=1)
+
+        paths = simulate_paths("PO-PSI", 50, 90, baseline=np.full(50, 0.5), noise_sd=0.0,
+                               curves=curves, rng=np.random.default_rng(1))
+        self.assertEqual(paths.shape, (50, 90))
+        np.testing.assert_allclose(paths[:, -1], true.plateau, atol=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()